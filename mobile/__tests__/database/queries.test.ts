@@ -5,6 +5,7 @@
  */
 
 import { getSeverityInfo } from '../../src/utils/severity';
+import { decodeRightBits, hasRightBit } from '../../src/utils/rightsMatrix';
 import { Colors } from '../../src/constants/colors';
 import { APP_VERSION, DB_VERSION, DB_FILENAME } from '../../src/constants/config';
 
@@ -81,3 +82,25 @@ describe('Colors', () => {
     expect(Colors.actionNoHacer).toBeTruthy();
   });
 });
+
+describe('decodeRightBits', () => {
+  const ids = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j'];
+
+  it('decodifica bitsets little-endian en el orden de right_bits', () => {
+    // bits 0, 2 y 9
+    expect(decodeRightBits(new Uint8Array([0b101, 0b10]), ids)).toEqual(['a', 'c', 'j']);
+  });
+
+  it('retorna lista vacia sin bits', () => {
+    expect(decodeRightBits(new Uint8Array([0]), ids)).toEqual([]);
+    expect(decodeRightBits(null, ids)).toEqual([]);
+  });
+
+  it('hasRightBit consulta un bit', () => {
+    const bits = new Uint8Array([0b101, 0b10]);
+    expect(hasRightBit(bits, 2)).toBe(true);
+    expect(hasRightBit(bits, 1)).toBe(false);
+    expect(hasRightBit(bits, 9)).toBe(true);
+    expect(hasRightBit(bits, 40)).toBe(false);
+  });
+});
@@ -3,7 +3,9 @@
  * Usa funciones puras sin DB (testing de la logica de scoring).
  */
 
-import { normalize, tokenize, tokensSinStopwords, STOPWORDS } from '../../src/utils/normalize';
+import {
+  normalize, suggestionKey, tokenize, tokensSinStopwords, STOPWORDS,
+} from '../../src/utils/normalize';
 
 describe('normalize', () => {
   it('convierte a minusculas', () => {
@@ -32,6 +34,18 @@ describe('normalize', () => {
   });
 });
 
+describe('suggestionKey', () => {
+  it('conserva el espacio final como en autocomplete.py', () => {
+    expect(suggestionKey('Me  ')).toBe('me ');
+    expect(suggestionKey('ME ?')).toBe('me ');
+    expect(suggestionKey('me')).toBe('me');
+  });
+
+  it('texto vacio no tiene clave', () => {
+    expect(suggestionKey('   ')).toBe('');
+  });
+});
+
 describe('tokenize', () => {
   it('divide texto en tokens unicos', () => {
     const tokens = tokenize('me piden DNI me piden documentos');
@@ -1,6 +1,9 @@
 #!/usr/bin/env node
 /**
- * Copia la base de datos generada por build_db.py a los assets de la app movil.
+ * Copia la base de datos mobile generada por build_db.py a los assets de la app.
+ *
+ * Copia la DB principal y la de textos legales (que la app adjunta con
+ * ATTACH solo cuando se pide un texto completo).
  *
  * Uso:
  *   node scripts/copy-db.js
@@ -10,13 +13,14 @@
 const fs = require('fs');
 const path = require('path');
 
-const SOURCE = path.resolve(__dirname, '..', '..', 'build', 'truths_and_rights_pe.db');
+const SOURCE_DIR = path.resolve(__dirname, '..', '..', 'build', 'mobile');
 const DEST_DIR = path.resolve(__dirname, '..', 'assets', 'db');
-const DEST = path.join(DEST_DIR, 'truths_and_rights_pe.db');
+const FILES = ['truths_and_rights_pe.db', 'truths_and_rights_pe_texts.db'];
 
-if (!fs.existsSync(SOURCE)) {
-  console.error(`ERROR: No se encontro la base de datos: ${SOURCE}`);
-  console.error('Ejecuta primero: make build-pe (o python scripts/build_db.py --country PE)');
+const missing = FILES.filter((f) => !fs.existsSync(path.join(SOURCE_DIR, f)));
+if (missing.length > 0) {
+  console.error(`ERROR: No se encontro la base de datos mobile: ${missing.join(', ')} en ${SOURCE_DIR}`);
+  console.error('Ejecuta primero: make build-mobile (o python scripts/build_db.py --country PE --profile mobile)');
   process.exit(1);
 }
 
@@ -24,8 +28,12 @@ if (!fs.existsSync(DEST_DIR)) {
   fs.mkdirSync(DEST_DIR, { recursive: true });
 }
 
-fs.copyFileSync(SOURCE, DEST);
-
-const stats = fs.statSync(DEST);
-const sizeKB = Math.round(stats.size / 1024);
-console.log(`DB copiada: ${DEST} (${sizeKB} KB)`);
+let totalKB = 0;
+for (const file of FILES) {
+  const dest = path.join(DEST_DIR, file);
+  fs.copyFileSync(path.join(SOURCE_DIR, file), dest);
+  const sizeKB = Math.round(fs.statSync(dest).size / 1024);
+  totalKB += sizeKB;
+  console.log(`DB copiada: ${dest} (${sizeKB} KB)`);
+}
+console.log(`Total assets DB: ${totalKB} KB`);
@@ -8,6 +8,8 @@ interface Props {
   onSubmit?: () => void;
   placeholder?: string;
   autoFocus?: boolean;
+  suggestions?: string[];
+  onSelectSuggestion?: (text: string) => void;
 }
 
 export function SearchBar({
@@ -16,31 +18,51 @@ export function SearchBar({
   onSubmit,
   placeholder = 'Describe tu situacion...',
   autoFocus = false,
+  suggestions = [],
+  onSelectSuggestion,
 }: Props) {
+  const showSuggestions = value.length > 0 && suggestions.length > 0 && !!onSelectSuggestion;
+
   return (
-    <View style={styles.container}>
-      <TextInput
-        style={styles.input}
-        value={value}
-        onChangeText={onChangeText}
-        onSubmitEditing={onSubmit}
-        placeholder={placeholder}
-        placeholderTextColor={Colors.textMuted}
-        returnKeyType="search"
-        autoFocus={autoFocus}
-        autoCorrect={false}
-        accessibilityLabel="Campo de busqueda"
-        accessibilityHint="Escribe tu situacion para buscar tus derechos"
-      />
-      {value.length > 0 && (
-        <Pressable
-          onPress={() => onChangeText('')}
-          style={styles.clearButton}
-          accessibilityLabel="Borrar busqueda"
-          hitSlop={8}
-        >
-          <Text style={styles.clearText}>X</Text>
-        </Pressable>
+    <View>
+      <View style={styles.container}>
+        <TextInput
+          style={styles.input}
+          value={value}
+          onChangeText={onChangeText}
+          onSubmitEditing={onSubmit}
+          placeholder={placeholder}
+          placeholderTextColor={Colors.textMuted}
+          returnKeyType="search"
+          autoFocus={autoFocus}
+          autoCorrect={false}
+          accessibilityLabel="Campo de busqueda"
+          accessibilityHint="Escribe tu situacion para buscar tus derechos"
+        />
+        {value.length > 0 && (
+          <Pressable
+            onPress={() => onChangeText('')}
+            style={styles.clearButton}
+            accessibilityLabel="Borrar busqueda"
+            hitSlop={8}
+          >
+            <Text style={styles.clearText}>X</Text>
+          </Pressable>
+        )}
+      </View>
+      {showSuggestions && (
+        <View style={styles.suggestions} accessibilityLabel="Sugerencias de busqueda">
+          {suggestions.map(text => (
+            <Pressable
+              key={text}
+              onPress={() => onSelectSuggestion?.(text)}
+              style={styles.suggestion}
+              accessibilityRole="button"
+            >
+              <Text style={styles.suggestionText}>{text}</Text>
+            </Pressable>
+          ))}
+        </View>
       )}
     </View>
   );
@@ -77,4 +99,21 @@ const styles = StyleSheet.create({
     fontSize: 16,
     fontWeight: '600',
   },
+  suggestions: {
+    backgroundColor: Colors.surface,
+    borderRadius: 12,
+    borderWidth: 1,
+    borderColor: Colors.border,
+    marginHorizontal: 16,
+    overflow: 'hidden',
+  },
+  suggestion: {
+    paddingHorizontal: 16,
+    minHeight: 44,
+    justifyContent: 'center',
+  },
+  suggestionText: {
+    color: Colors.textPrimary,
+    fontSize: 15,
+  },
 });
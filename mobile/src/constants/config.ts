@@ -12,6 +12,9 @@ export const STATUS_JSON_URL =
 /** Nombre del archivo de la DB. */
 export const DB_FILENAME = 'truths_and_rights_pe.db';
 
+/** DB secundaria con los textos legales completos (se adjunta bajo demanda). */
+export const TEXTS_DB_FILENAME = 'truths_and_rights_pe_texts.db';
+
 /** Codigo de pais activo. */
 export const COUNTRY_CODE = 'PE';
 
@@ -20,3 +23,9 @@ export const APP_VERSION = '0.4.0';
 
 /** Intervalo minimo entre checks de actualizacion (ms). 24 horas. */
 export const UPDATE_CHECK_INTERVAL = 24 * 60 * 60 * 1000;
+
+/** Largo maximo de prefijo indexado en search_suggestions (ver scripts/autocomplete.py). */
+export const SUGGESTION_MAX_PREFIX = 32;
+
+/** Sugerencias de autocompletado por prefijo. */
+export const SUGGESTION_LIMIT = 8;
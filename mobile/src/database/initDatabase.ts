@@ -1,7 +1,7 @@
 import * as FileSystem from 'expo-file-system';
 import { Asset } from 'expo-asset';
 import * as SQLite from 'expo-sqlite';
-import { DB_FILENAME } from '../constants/config';
+import { DB_FILENAME, TEXTS_DB_FILENAME } from '../constants/config';
 
 /**
  * Inicializa la base de datos:
@@ -11,6 +11,10 @@ import { DB_FILENAME } from '../constants/config';
  */
 
 const DB_DEST = `${FileSystem.documentDirectory}SQLite/${DB_FILENAME}`;
+const TEXTS_DEST = `${FileSystem.documentDirectory}SQLite/${TEXTS_DB_FILENAME}`;
+
+/** ATTACH de la DB de textos en curso o hecho (ver attachLegalTexts). */
+let textsAttached: Promise<void> | null = null;
 
 /** Verifica si la DB ya existe en el filesystem. */
 async function dbExists(): Promise<boolean> {
@@ -18,6 +22,18 @@ async function dbExists(): Promise<boolean> {
   return info.exists;
 }
 
+/** Copia un asset (modulo require) al filesystem. */
+async function copyAsset(moduleId: number, dest: string): Promise<void> {
+  const asset = Asset.fromModule(moduleId);
+  await asset.downloadAsync();
+
+  if (!asset.localUri) {
+    throw new Error('No se pudo descargar el asset de la base de datos');
+  }
+
+  await FileSystem.copyAsync({ from: asset.localUri, to: dest });
+}
+
 /** Copia la DB desde los assets al filesystem. */
 async function copyDbFromAssets(): Promise<void> {
   // Asegurar que el directorio SQLite existe
@@ -31,20 +47,10 @@ async function copyDbFromAssets(): Promise<void> {
     );
   }
 
-  // Cargar el asset
   // eslint-disable-next-line @typescript-eslint/no-var-requires
-  const asset = Asset.fromModule(require('../../assets/db/truths_and_rights_pe.db'));
-  await asset.downloadAsync();
-
-  if (!asset.localUri) {
-    throw new Error('No se pudo descargar el asset de la base de datos');
-  }
-
-  // Copiar al destino
-  await FileSystem.copyAsync({
-    from: asset.localUri,
-    to: DB_DEST,
-  });
+  await copyAsset(require('../../assets/db/truths_and_rights_pe.db'), DB_DEST);
+  // Los textos se copian de nuevo junto con cada version de la DB
+  await FileSystem.deleteAsync(TEXTS_DEST, { idempotent: true });
 }
 
 /** Inicializa y retorna la conexion a la DB. */
@@ -74,6 +80,7 @@ export async function reinstallDatabase(): Promise<SQLite.SQLiteDatabase> {
     await FileSystem.deleteAsync(DB_DEST, { idempotent: true });
   }
   await copyDbFromAssets();
+  textsAttached = null;
 
   const db = await SQLite.openDatabaseAsync(DB_FILENAME);
   await db.execAsync('PRAGMA journal_mode=WAL');
@@ -81,3 +88,25 @@ export async function reinstallDatabase(): Promise<SQLite.SQLiteDatabase> {
 
   return db;
 }
+
+/**
+ * Adjunta la DB de textos legales como `texts` (una vez por conexion).
+ * La app arranca sin ella; se copia y adjunta al pedir el primer texto.
+ */
+export function attachLegalTexts(db: SQLite.SQLiteDatabase): Promise<void> {
+  if (!textsAttached) {
+    textsAttached = (async () => {
+      const info = await FileSystem.getInfoAsync(TEXTS_DEST);
+      if (!info.exists) {
+        // eslint-disable-next-line @typescript-eslint/no-var-requires
+        await copyAsset(require('../../assets/db/truths_and_rights_pe_texts.db'), TEXTS_DEST);
+      }
+      const path = TEXTS_DEST.replace(/^file:\/\//, '');
+      await db.execAsync(`ATTACH DATABASE '${path.replace(/'/g, "''")}' AS texts`);
+    })().catch((err) => {
+      textsAttached = null;
+      throw err;
+    });
+  }
+  return textsAttached;
+}
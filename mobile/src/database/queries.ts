@@ -11,7 +11,14 @@ import type {
   LegalPossession,
   ForceLevel,
   SituationDetails,
+  Suggestion,
+  AnswerCard,
+  EffectiveRightsRow,
 } from '../types/database';
+import { normalize, suggestionKey } from '../utils/normalize';
+import { attachLegalTexts } from './initDatabase';
+import { decodeRightBits } from '../utils/rightsMatrix';
+import { SUGGESTION_LIMIT, SUGGESTION_MAX_PREFIX } from '../constants/config';
 
 /**
  * Queries SQL tipadas — todas las consultas que la app necesita.
@@ -46,14 +53,62 @@ export async function getAllContexts(db: SQLite.SQLiteDatabase): Promise<Context
   return db.getAllAsync<Context>('SELECT * FROM contexts');
 }
 
-/** Obtiene el contexto de emergencia activo, si existe. */
-export async function getActiveEmergencyContext(db: SQLite.SQLiteDatabase): Promise<Context | null> {
-  return db.getFirstAsync<Context>(
-    `SELECT * FROM contexts
-     WHERE is_currently_active = 1
-       AND context_type = 'estado_emergencia'
-     LIMIT 1`
-  );
+/**
+ * Obtiene el contexto de emergencia vigente hoy, si existe.
+ * La vigencia sale de start_date/end_date (end_date inclusivo, usa
+ * idx_contexts_interval); sin fechas, del flag is_currently_active.
+ * Con `region` solo cuenta los que rigen ahi (context_regions) o en todo el pais.
+ */
+export async function getActiveEmergencyContext(
+  db: SQLite.SQLiteDatabase,
+  region?: string
+): Promise<Context | null> {
+  const now = new Date();
+  const today = [
+    now.getFullYear(),
+    String(now.getMonth() + 1).padStart(2, '0'),
+    String(now.getDate()).padStart(2, '0'),
+  ].join('-');
+  const params: string[] = [today, today];
+  let regionFilter = '';
+  if (region) {
+    regionFilter = `AND (c.id IN (SELECT context_id FROM context_regions WHERE region = ?)
+                         OR NOT EXISTS (SELECT 1 FROM context_regions r WHERE r.context_id = c.id))`;
+    params.push(regionKey(region));
+  }
+  try {
+    return await db.getFirstAsync<Context>(
+      `SELECT c.* FROM contexts c
+       WHERE c.context_type = 'estado_emergencia'
+         AND CASE WHEN c.start_date IS NULL AND c.end_date IS NULL
+                  THEN c.is_currently_active = 1
+                  ELSE COALESCE(c.start_date, '0000-01-01') <= ?
+                       AND ? <= COALESCE(c.end_date, '9999-12-31') END
+         ${regionFilter}
+       ORDER BY c.start_date, c.end_date, c.id
+       LIMIT 1`,
+      params
+    );
+  } catch {
+    // DB anterior a context_regions
+    return db.getFirstAsync<Context>(
+      `SELECT * FROM contexts
+       WHERE is_currently_active = 1
+         AND context_type = 'estado_emergencia'
+       LIMIT 1`
+    );
+  }
+}
+
+/** Clave de region como la guarda build_db.py: 'Lima Metropolitana' -> 'lima_metropolitana'. */
+export function regionKey(name: string): string {
+  return name
+    .normalize('NFD')
+    .replace(/[\u0300-\u036f]/g, '')
+    .toLowerCase()
+    .split(/[^a-z0-9]+/)
+    .filter(Boolean)
+    .join('_');
 }
 
 // --- Derechos por situacion ---
@@ -71,7 +126,7 @@ export async function getRightsForSituation(
      FROM situation_rights sr
      JOIN rights r ON sr.right_id = r.id
      WHERE sr.situation_id = ?
-     ORDER BY r.display_order`,
+     ORDER BY sr.right_order, sr.right_id`,
     [situationId]
   );
 }
@@ -147,6 +202,58 @@ export async function getSituationDetails(
   return { rights, actions, contacts, time_limits };
 }
 
+/**
+ * Tarjeta de respuesta pre-renderizada para una situacion y contexto.
+ * Una sola lectura por clave primaria de answer_cards, sin joins.
+ * Devuelve null si la DB es anterior a la tabla o no hay tarjeta.
+ */
+export async function getAnswerCard(
+  db: SQLite.SQLiteDatabase,
+  situationId: string,
+  contextId: string = 'normal'
+): Promise<AnswerCard | null> {
+  try {
+    const row = await db.getFirstAsync<{ body: string }>(
+      `SELECT body FROM answer_cards
+       WHERE situation_id = ? AND context_id = ? AND format = 'json'`,
+      [situationId, contextId]
+    );
+    return row ? (JSON.parse(row.body) as AnswerCard) : null;
+  } catch {
+    return null;
+  }
+}
+
+/**
+ * Derechos que aplican / quedan suspendidos para (situacion, contexto),
+ * leidos de la matriz precalculada en build (effective_rights).
+ * Devuelve null si la DB es anterior a la matriz.
+ */
+export async function getEffectiveRights(
+  db: SQLite.SQLiteDatabase,
+  situationId: string,
+  contextId: string = 'normal'
+): Promise<{ applies: string[]; suspended: string[] } | null> {
+  try {
+    const bits = await db.getAllAsync<{ right_id: string }>(
+      'SELECT right_id FROM right_bits ORDER BY bit'
+    );
+    const row = await db.getFirstAsync<EffectiveRightsRow>(
+      `SELECT applies_bits, suspended_bits FROM effective_rights
+       WHERE situation_id = ? AND context_id = ?`,
+      [situationId, contextId]
+    );
+    if (!row) return null;
+    const rightIds = bits.map((b) => b.right_id);
+    return {
+      applies: decodeRightBits(row.applies_bits, rightIds),
+      suspended: decodeRightBits(row.suspended_bits, rightIds),
+    };
+  } catch {
+    return null;
+  }
+}
+
 // --- Derechos ---
 
 /** Obtiene todos los derechos, ordenados por categoria y display_order. */
@@ -188,9 +295,76 @@ export async function getAllLegalPossession(db: SQLite.SQLiteDatabase): Promise<
 
 // --- Niveles de fuerza ---
 
-/** Obtiene todos los niveles de fuerza, ordenados por nivel. */
+/**
+ * Obtiene todos los niveles de fuerza, ordenados por nivel.
+ * La DB mobile no trae force_levels (tabla de servidor): lista vacia.
+ */
 export async function getAllForceLevels(db: SQLite.SQLiteDatabase): Promise<ForceLevel[]> {
-  return db.getAllAsync<ForceLevel>(
-    'SELECT * FROM force_levels ORDER BY level_number'
+  try {
+    return await db.getAllAsync<ForceLevel>(
+      'SELECT * FROM force_levels ORDER BY level_number'
+    );
+  } catch {
+    return [];
+  }
+}
+
+// --- Textos legales ---
+
+/**
+ * Texto oficial completo de una fuente.
+ * En la DB mobile full_text vive en la DB de textos, que se adjunta recien
+ * aqui (ver scripts/db_profiles.py); en una DB completa sale de legal_sources.
+ */
+export async function getSourceFullText(
+  db: SQLite.SQLiteDatabase,
+  sourceId: string
+): Promise<string | null> {
+  const row = await db.getFirstAsync<{ full_text: string }>(
+    'SELECT full_text FROM legal_sources WHERE id = ?',
+    [sourceId]
+  );
+  if (row?.full_text) return row.full_text;
+  try {
+    await attachLegalTexts(db);
+    const text = await db.getFirstAsync<{ full_text: string }>(
+      'SELECT full_text FROM texts.legal_texts WHERE source_id = ?',
+      [sourceId]
+    );
+    return text?.full_text ?? null;
+  } catch {
+    return null;
+  }
+}
+
+// --- Autocompletado ---
+
+/**
+ * Sugerencias precalculadas para lo que el usuario lleva escrito.
+ * Una sola lectura por la clave primaria (prefix, rank) de search_suggestions;
+ * mas alla de SUGGESTION_MAX_PREFIX se filtra contra el texto completo,
+ * igual que Autocompleter.suggest() en scripts/autocomplete.py.
+ */
+export async function getSuggestions(
+  db: SQLite.SQLiteDatabase,
+  text: string,
+  limit: number = SUGGESTION_LIMIT
+): Promise<Suggestion[]> {
+  const key = suggestionKey(text);
+  if (!key) {
+    return [];
+  }
+  const truncated = key.length > SUGGESTION_MAX_PREFIX;
+  const rows = await db.getAllAsync<Suggestion>(
+    `SELECT suggestion, situation_id, kind
+     FROM search_suggestions
+     WHERE prefix = ?
+     ORDER BY rank
+     LIMIT ?`,
+    [key.slice(0, SUGGESTION_MAX_PREFIX), truncated ? -1 : limit]
   );
+  if (!truncated) {
+    return rows;
+  }
+  return rows.filter((row) => normalize(row.suggestion).startsWith(key)).slice(0, limit);
 }
@@ -0,0 +1,29 @@
+import { useEffect, useState } from 'react';
+import { useDatabase } from './useDatabase';
+import { getSuggestions } from '../database/queries';
+import type { Suggestion } from '../types/database';
+
+/** Hook que carga las sugerencias de autocompletado para el texto actual. */
+export function useSuggestions(text: string) {
+  const db = useDatabase();
+  const [suggestions, setSuggestions] = useState<Suggestion[]>([]);
+
+  useEffect(() => {
+    let mounted = true;
+    getSuggestions(db, text)
+      .then(data => {
+        if (mounted) {
+          setSuggestions(data);
+        }
+      })
+      .catch(() => {
+        // DB anterior a search_suggestions: sin sugerencias
+        if (mounted) {
+          setSuggestions([]);
+        }
+      });
+    return () => { mounted = false; };
+  }, [db, text]);
+
+  return { suggestions };
+}
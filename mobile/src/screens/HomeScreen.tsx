@@ -11,6 +11,7 @@ import { EmergencyBanner } from '../components/EmergencyBanner';
 import { useSituations } from '../hooks/useSituations';
 import { useEmergencyContext } from '../hooks/useEmergencyContext';
 import { useDataUpdate } from '../hooks/useDataUpdate';
+import { useSuggestions } from '../hooks/useSuggestions';
 import type { RootStackParamList } from '../navigation/types';
 import type { Situation } from '../types/database';
 
@@ -22,6 +23,7 @@ export function HomeScreen() {
   const { context, isActive } = useEmergencyContext();
   const { updateAvailable } = useDataUpdate();
   const [query, setQuery] = useState('');
+  const { suggestions } = useSuggestions(query);
 
   const handleSearch = useCallback(() => {
     if (query.trim()) {
@@ -29,6 +31,11 @@ export function HomeScreen() {
     }
   }, [navigation, query]);
 
+  const handleSuggestion = useCallback((text: string) => {
+    setQuery(text);
+    navigation.navigate('SearchResults', { query: text });
+  }, [navigation]);
+
   const handleSituationPress = useCallback((situation: Situation) => {
     navigation.navigate('Situation', {
       situationId: situation.id,
@@ -52,6 +59,8 @@ export function HomeScreen() {
         onChangeText={setQuery}
         onSubmit={handleSearch}
         placeholder="Describe tu situacion..."
+        suggestions={suggestions.map(s => s.suggestion)}
+        onSelectSuggestion={handleSuggestion}
       />
 
       {updateAvailable && (
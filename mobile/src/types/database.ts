@@ -155,6 +155,13 @@ export interface SearchResult {
   };
 }
 
+/** Sugerencia de autocompletado (tabla search_suggestions) */
+export interface Suggestion {
+  suggestion: string;
+  situation_id: string;
+  kind: 'natural_query' | 'title' | 'keyword';
+}
+
 /** Detalles completos de una situacion */
 export interface SituationDetails {
   rights: SituationRight[];
@@ -162,3 +169,54 @@ export interface SituationDetails {
   contacts: EmergencyContact[];
   time_limits: TimeLimit[];
 }
+
+/** Tarjeta de respuesta pre-renderizada (answer_cards, formato 'json') */
+export interface AnswerCard {
+  version: number;
+  situation: Pick<Situation, 'id' | 'title' | 'description' | 'severity' | 'category' | 'icon'>;
+  context: { id: string; name: string; context_type: string | null };
+  rights: {
+    id: string;
+    title: string;
+    description: string;
+    legal_basis: string;
+    never_suspended: boolean;
+    notes: string | null;
+  }[];
+  suspended_rights: { id: string; title: string }[];
+  emergency_notes: string[];
+  actions: {
+    step: number;
+    action_type: string;
+    label: string;
+    title: string;
+    description: string;
+    script: string | null;
+    warning: string | null;
+  }[];
+  time_limits: {
+    description: string;
+    max_hours: number;
+    max_hours_emergency: number | null;
+    applies_to: string;
+    after_expiry_action: string;
+    max_label: string;
+    emergency_label: string | null;
+  }[];
+  contacts: {
+    id: string;
+    institution: string;
+    description: string;
+    phone: string | null;
+    whatsapp: string | null;
+    website: string | null;
+    available_hours: string;
+    is_free: boolean;
+  }[];
+}
+
+/** Fila de effective_rights: bitsets little-endian indexados por right_bits.bit. */
+export interface EffectiveRightsRow {
+  applies_bits: Uint8Array;
+  suspended_bits: Uint8Array;
+}
@@ -17,6 +17,15 @@ export function normalize(text: string): string {
   return result;
 }
 
+/**
+ * Clave de search_suggestions — port de scripts/autocomplete.py suggestion_key().
+ * Conserva un espacio final: "me " ya cerro la palabra y no completa "mecanismo".
+ */
+export function suggestionKey(text: string): string {
+  const key = normalize(text);
+  return key && /\s$/.test(text) && !key.endsWith(' ') ? key + ' ' : key;
+}
+
 /** Divide texto normalizado en tokens unicos. */
 export function tokenize(text: string): Set<string> {
   return new Set(normalize(text).split(' ').filter(Boolean));
@@ -0,0 +1,26 @@
+/**
+ * Decodifica los bitsets de effective_rights (ver scripts/rights_matrix.py).
+ * Byte i, bit j (little-endian) -> right_bits.bit = 8 * i + j.
+ */
+
+export function decodeRightBits(bits: Uint8Array | null | undefined, rightIds: string[]): string[] {
+  const ids: string[] = [];
+  if (!bits) return ids;
+  for (let i = 0; i < bits.length; i++) {
+    const byte = bits[i];
+    if (byte === 0) continue;
+    for (let j = 0; j < 8; j++) {
+      if (byte & (1 << j)) {
+        const id = rightIds[i * 8 + j];
+        if (id !== undefined) ids.push(id);
+      }
+    }
+  }
+  return ids;
+}
+
+export function hasRightBit(bits: Uint8Array | null | undefined, bit: number): boolean {
+  if (!bits || bit < 0) return false;
+  const byte = bits[bit >> 3];
+  return byte !== undefined && (byte & (1 << (bit & 7))) !== 0;
+}
@@ -14,7 +14,7 @@ CREATE TABLE legal_sources (
     source_type TEXT NOT NULL,              -- 'constitucion', 'codigo_procesal', 'decreto_legislativo', 'ley', 'jurisprudencia', 'tratado_internacional'
     name TEXT NOT NULL,                     -- 'Constitución Política del Perú'
     article TEXT,                           -- 'Artículo 2, inciso 24, literal f'
-    full_text TEXT NOT NULL,                -- Texto literal oficial
+    full_text TEXT NOT NULL,                -- Texto literal oficial (BLOB si se construye con --compress-texts)
     summary TEXT NOT NULL,                  -- Resumen en lenguaje simple
     publication_date TEXT,                  -- Fecha de publicación en El Peruano
     last_modified TEXT,                     -- Última modificación conocida
@@ -65,6 +65,18 @@ CREATE TABLE contexts (
     FOREIGN KEY (source_id) REFERENCES legal_sources(id)
 );
 
+-- Regiones de cada contexto, normalizadas (sin filas = rige en todo el país).
+-- Con idx_contexts_interval resuelven "¿qué rige en esta región hoy?"
+-- sin parsear active_regions (ver scripts/context_resolver.py).
+CREATE TABLE context_regions (
+    region TEXT NOT NULL,                   -- Clave normalizada: 'lima_metropolitana'
+    context_id TEXT NOT NULL,
+    region_name TEXT NOT NULL,              -- Como figura en el decreto: 'Lima Metropolitana'
+    position INTEGER NOT NULL,              -- Orden en el decreto
+    PRIMARY KEY (region, context_id),
+    FOREIGN KEY (context_id) REFERENCES contexts(id)
+) WITHOUT ROWID;
+
 -- ============================================================
 -- 4. DERECHOS
 -- Qué derechos tiene el ciudadano en cada situación
@@ -88,6 +100,7 @@ CREATE TABLE situation_rights (
     context_id TEXT DEFAULT 'normal',       -- En qué contexto aplica esta relación
     applies BOOLEAN DEFAULT TRUE,           -- TRUE = el derecho aplica, FALSE = está suspendido en este contexto
     notes TEXT,                             -- Notas específicas de esta combinación
+    right_order INTEGER DEFAULT 0,          -- rights.display_order copiado en build: ordena sin JOIN
     PRIMARY KEY (situation_id, right_id, context_id),
     FOREIGN KEY (situation_id) REFERENCES situations(id),
     FOREIGN KEY (right_id) REFERENCES rights(id),
@@ -274,20 +287,116 @@ CREATE TABLE myths (
     display_order INTEGER DEFAULT 0
 );
 
+-- Relación: qué fuentes legales respaldan cada mito desmontado
+-- (myths.related_sources normalizado, indexable por source_id)
+CREATE TABLE myth_sources (
+    myth_id TEXT NOT NULL,
+    source_id TEXT NOT NULL,
+    PRIMARY KEY (myth_id, source_id),
+    FOREIGN KEY (myth_id) REFERENCES myths(id),
+    FOREIGN KEY (source_id) REFERENCES legal_sources(id)
+) WITHOUT ROWID;
+
+-- ============================================================
+-- 13. METADATA DEL BUILD
+-- Identifica cada DB generada (invalida índices y caches derivados)
+-- ============================================================
+
+CREATE TABLE build_info (
+    key TEXT PRIMARY KEY,                   -- 'build_id', 'country', 'built_at'
+    value TEXT NOT NULL
+);
+
+-- Autocompletado: top-k sugerencias precalculadas por prefijo normalizado
+CREATE TABLE search_suggestions (
+    prefix TEXT NOT NULL,                   -- 'me pi' (normalizado, como search.normalize)
+    rank INTEGER NOT NULL,                  -- 1 = mejor sugerencia para el prefijo
+    suggestion TEXT NOT NULL,               -- 'me piden DNI'
+    situation_id TEXT NOT NULL,
+    kind TEXT NOT NULL,                     -- 'natural_query', 'title', 'keyword'
+    PRIMARY KEY (prefix, rank),
+    FOREIGN KEY (situation_id) REFERENCES situations(id)
+) WITHOUT ROWID;
+
+-- Matriz de derechos efectivos (rights_matrix.py): bit fijo por derecho y
+-- bitsets little-endian por (situación, contexto)
+CREATE TABLE right_bits (
+    right_id TEXT PRIMARY KEY,
+    bit INTEGER NOT NULL UNIQUE,            -- Posición del derecho en los bitsets
+    FOREIGN KEY (right_id) REFERENCES rights(id)
+) WITHOUT ROWID;
+
+CREATE TABLE effective_rights (
+    situation_id TEXT NOT NULL,
+    context_id TEXT NOT NULL,
+    applies_bits BLOB NOT NULL,             -- Derechos que aplican en este contexto
+    suspended_bits BLOB NOT NULL,           -- Derechos de la situación suspendidos en este contexto
+    PRIMARY KEY (situation_id, context_id),
+    FOREIGN KEY (situation_id) REFERENCES situations(id),
+    FOREIGN KEY (context_id) REFERENCES contexts(id)
+) WITHOUT ROWID;
+
+-- Grafo de citas (citations.py): todo el contenido que depende de cada
+-- fuente, directa o indirectamente (fuente → derecho → situación,
+-- fuente → plazo → situación, fuente → mito, fuente → contexto)
+CREATE TABLE source_citations (
+    source_id TEXT NOT NULL,
+    target_type TEXT NOT NULL,              -- 'right', 'situation', 'time_limit', 'myth', 'context'
+    target_id TEXT NOT NULL,
+    via TEXT NOT NULL DEFAULT '',           -- '' = cita directa; 'right:<id>' o 'time_limit:<id>'
+    PRIMARY KEY (source_id, target_type, target_id, via)
+) WITHOUT ROWID;
+
+-- Diccionarios de compresión de columnas (text_codec.py, --compress-texts):
+-- sin filas, los textos están en claro
+CREATE TABLE text_dictionaries (
+    name TEXT PRIMARY KEY,                  -- 'legal_sources.full_text'
+    codec TEXT NOT NULL,                    -- 'zlib' (zdict) o 'zstd'
+    dictionary BLOB NOT NULL
+) WITHOUT ROWID;
+
+-- Tarjetas de respuesta pre-renderizadas por situación y contexto (cards.py)
+CREATE TABLE answer_cards (
+    situation_id TEXT NOT NULL,
+    context_id TEXT NOT NULL,               -- 'normal', 'estado_emergencia_seguridad'
+    format TEXT NOT NULL,                   -- 'json' (text/markdown/ansi se pintan desde json)
+    body TEXT NOT NULL,                     -- Respuesta lista para mostrar
+    PRIMARY KEY (situation_id, context_id, format),
+    FOREIGN KEY (situation_id) REFERENCES situations(id),
+    FOREIGN KEY (context_id) REFERENCES contexts(id)
+) WITHOUT ROWID;
+
 -- ============================================================
 -- ÍNDICES para búsqueda rápida (offline performance)
 -- ============================================================
 
 CREATE INDEX idx_situations_category ON situations(category);
-CREATE INDEX idx_situations_keywords ON situations(keywords);
-CREATE INDEX idx_rights_category ON rights(category);
 CREATE INDEX idx_contexts_active ON contexts(is_currently_active);
+CREATE INDEX idx_context_regions_context ON context_regions(context_id, position);
 CREATE INDEX idx_time_limits_situation ON time_limits(situation_id);
+CREATE INDEX idx_time_limits_source ON time_limits(source_id);
+CREATE INDEX idx_right_sources_source ON right_sources(source_id);
+CREATE INDEX idx_myth_sources_source ON myth_sources(source_id);
+CREATE INDEX idx_situation_rights_right ON situation_rights(right_id);
+CREATE INDEX idx_source_citations_target ON source_citations(target_type, target_id);
 CREATE INDEX idx_incident_reports_district ON incident_reports(district);
 CREATE INDEX idx_incident_reports_date ON incident_reports(incident_date);
 CREATE INDEX idx_legal_sources_type ON legal_sources(source_type);
 CREATE INDEX idx_legal_sources_status ON legal_sources(status);
 
+-- Índices cubrientes: uno por forma de consulta de scripts/search.py y
+-- mobile/src/database/queries.ts. tests/test_query_plans.py corre EXPLAIN
+-- QUERY PLAN sobre cada consulta y falla ante un SCAN o un TEMP B-TREE.
+CREATE INDEX idx_situations_active_order ON situations(is_active, display_order, title);
+CREATE INDEX idx_situation_rights_order ON situation_rights(situation_id, right_order, right_id, context_id, applies, notes);
+CREATE INDEX idx_situation_actions_available ON situation_actions(situation_id, is_available, step_order, action_id);
+CREATE INDEX idx_situation_contacts_priority ON situation_contacts(situation_id, priority, contact_id);
+CREATE INDEX idx_contexts_interval ON contexts(context_type, start_date, end_date, id);
+CREATE INDEX idx_rights_category_order ON rights(category, display_order);
+CREATE INDEX idx_emergency_contacts_priority ON emergency_contacts(priority);
+CREATE INDEX idx_myths_order ON myths(display_order);
+CREATE INDEX idx_force_levels_number ON force_levels(level_number);
+
 -- ============================================================
 -- VISTAS útiles para la app
 -- ============================================================
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Truths and Rights — Prueba de carga local de la API
+Mide pedidos por segundo y latencias (p50/p99) contra api_server.py.
+
+Abre N conexiones keep-alive concurrentes (asyncio, solo stdlib) y cada
+una manda pedidos en serie durante el tiempo indicado, rotando entre
+consultas de busqueda, detalles de situaciones y /status.
+
+Uso:
+    python api_load_test.py --spawn                 # levanta su propio servidor
+    python api_load_test.py --port 8080 -c 32 -d 10
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib.parse import quote
+
+SCRIPTS_DIR = Path(__file__).parent
+
+HOST = "127.0.0.1"
+PORT = 8080
+CONCURRENCY = 16
+DURATION = 5.0
+
+# Mezcla de pedidos: sobre todo busquedas, algunas con detalles
+QUERIES = [
+    "me piden dni",
+    "me quieren revisar el celular",
+    "puedo grabar a la policia",
+    "me detienen sin motivo",
+    "cuantos gramos puedo llevar",
+    "quieren entrar a mi casa",
+    "me revisan la mochila",
+    "estado de emergencia",
+]
+SITUATIONS = ["police_id_check", "police_phone_search", "recording_police"]
+
+
+def request_paths():
+    paths = [f"/search?q={quote(q)}" for q in QUERIES]
+    paths += [f"/search?q={quote(q)}&details=1" for q in QUERIES[:3]]
+    paths += [f"/situations/{s}" for s in SITUATIONS]
+    paths.append("/status")
+    return paths
+
+
+async def _read_response(reader):
+    """Lee una respuesta HTTP/1.1 con Content-Length; devuelve el status."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    if length:
+        await reader.readexactly(length)
+    return status
+
+
+async def _worker(host, port, paths, offset, deadline, latencies, errors, gzip):
+    reader, writer = await asyncio.open_connection(host, port)
+    encoding = "Accept-Encoding: gzip\r\n" if gzip else ""
+    i = offset
+    try:
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            raw = f"GET {path} HTTP/1.1\r\nHost: {host}\r\n{encoding}\r\n".encode("latin-1")
+            start = time.perf_counter()
+            writer.write(raw)
+            status = await _read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors.append(status)
+    except (ConnectionError, asyncio.IncompleteReadError) as e:
+        errors.append(type(e).__name__)
+    finally:
+        writer.close()
+
+
+async def run_load(host=HOST, port=PORT, concurrency=CONCURRENCY, duration=DURATION, gzip=True):
+    """
+    Corre la prueba de carga.
+
+    Returns:
+        Dict con requests, errors, seconds, rps, p50_ms, p99_ms y max_ms
+    """
+    paths = request_paths()
+    latencies, errors = [], []
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(
+        _worker(host, port, paths, n, deadline, latencies, errors, gzip)
+        for n in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def pct(p):
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "seconds": round(elapsed, 2),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(pct(0.50), 2),
+        "p99_ms": round(pct(0.99), 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+def spawn_server(port, db_path=None, workers=None):
+    """Levanta api_server.py en otro proceso y espera a que acepte conexiones."""
+    cmd = [sys.executable, str(SCRIPTS_DIR / "api_server.py"), "--port", str(port)]
+    if db_path:
+        cmd += ["--db", str(db_path)]
+    if workers:
+        cmd += ["--workers", str(workers)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"El servidor termino: {proc.stderr.read().decode(errors='replace')}")
+        try:
+            socket.create_connection((HOST, port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("El servidor no arranco a tiempo")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga local de api_server.py")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("-c", "--concurrency", type=int, default=CONCURRENCY,
+                        help="Conexiones keep-alive simultaneas")
+    parser.add_argument("-d", "--duration", type=float, default=DURATION, help="Segundos")
+    parser.add_argument("--no-gzip", action="store_true", help="No pedir respuestas comprimidas")
+    parser.add_argument("--spawn", action="store_true",
+                        help="Levantar un servidor propio en un puerto libre")
+    parser.add_argument("--db", default=None, help="DB para el servidor levantado con --spawn")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Hilos del servidor levantado con --spawn")
+    args = parser.parse_args()
+
+    proc = None
+    host, port = args.host, args.port
+    if args.spawn:
+        host, port = HOST, _free_port()
+        proc = spawn_server(port, args.db, args.workers)
+
+    try:
+        print(f"Carga: {args.concurrency} conexiones x {args.duration:g}s contra http://{host}:{port}")
+        stats = asyncio.run(run_load(host, port, args.concurrency, args.duration, not args.no_gzip))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    print(f"  Pedidos:  {stats['requests']} ({stats['errors']} errores) en {stats['seconds']}s")
+    print(f"  Req/s:    {stats['rps']}")
+    print(f"  Latencia: p50 {stats['p50_ms']} ms | p99 {stats['p99_ms']} ms | max {stats['max_ms']} ms")
+    print(f"  CPUs:     {os.cpu_count()}")
+    return 1 if stats["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+Truths and Rights — API HTTP de busqueda
+Servidor JSON liviano (solo stdlib, asyncio) sobre la DB construida.
+
+Endpoints (GET/HEAD):
+    /search?q=me+piden+dni&limit=3&details=1
+    /situations/<id>
+    /status
+
+El event loop solo hace I/O de red: cada pedido se resuelve en un pool
+acotado de hilos, y las lecturas SQLite usan conexiones de solo lectura
+reutilizadas entre pedidos (nunca se reabre la DB por pedido). Soporta
+keep-alive (HTTP/1.1), gzip segun Accept-Encoding y ETags derivados del
+build_id de la DB, asi un cliente que revalida recibe 304 hasta el
+proximo build.
+
+Uso:
+    python api_server.py                      # 127.0.0.1:8080
+    python api_server.py --port 9000 --workers 8
+    python api_load_test.py --spawn           # prueba de carga local
+"""
+
+import argparse
+import asyncio
+import functools
+import gzip
+import itertools
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http import HTTPStatus
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from search import (
+    DB_PATH,
+    cache_stats,
+    get_situation_details,
+    load_search_index,
+    read_build_info,
+    search_situation,
+)
+
+HOST = "127.0.0.1"
+PORT = 8080
+# Hilos para resolver pedidos = conexiones SQLite abiertas como maximo
+WORKERS = 4
+# Segundos que una conexion keep-alive puede quedar ociosa
+KEEPALIVE_TIMEOUT = 15.0
+MAX_HEADER_BYTES = 16 * 1024
+# Respuestas mas chicas no se comprimen (el encabezado gzip no compensa)
+GZIP_MIN_BYTES = 512
+GZIP_LEVEL = 5
+DEFAULT_LIMIT = 3
+MAX_LIMIT = 20
+
+SITUATION_QUERY = """
+    SELECT id, category, title, description, severity, icon,
+           parent_situation_id
+    FROM situations
+    WHERE id = ? AND is_active = 1
+"""
+
+
+class ConnectionPool:
+    """
+    Conexiones SQLite de solo lectura reutilizables entre hilos.
+
+    Se abren a demanda hasta `size`; si la DB se reemplaza (nuevo build),
+    reset() hace que las conexiones viejas se cierren al devolverse.
+    """
+
+    def __init__(self, db_path, size=WORKERS):
+        self.db_path = Path(db_path)
+        self.size = size
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = []
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def _connect(self):
+        uri = self.db_path.resolve().as_uri() + "?mode=ro"
+        return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        try:
+            with self._lock:
+                generation = self._generation
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = self._connect()
+            try:
+                yield conn
+            finally:
+                with self._lock:
+                    if generation == self._generation:
+                        self._idle.append(conn)
+                        conn = None
+                if conn is not None:
+                    conn.close()
+        finally:
+            self._slots.release()
+
+    def reset(self):
+        """Cierra las conexiones ociosas; las que estan en uso se cierran al volver."""
+        with self._lock:
+            self._generation += 1
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def close(self):
+        self.reset()
+
+
+class SearchApi:
+    """
+    Logica de los endpoints, independiente de HTTP (corre en los hilos del pool).
+
+    Cada metodo devuelve (status, payload) con payload serializable a JSON.
+    """
+
+    def __init__(self, db_path=None, pool_size=WORKERS):
+        self.db_path = Path(db_path or DB_PATH)
+        self.pool = ConnectionPool(self.db_path, pool_size)
+        self.started = time.time()
+        self.requests = 0
+        self._counter = itertools.count(1)
+        self._stamp = None
+        self._info = {}
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self):
+        """Detecta un build nuevo (cambio del archivo) y renueva pool e info."""
+        st = os.stat(self.db_path)
+        stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if stamp == self._stamp:
+            return
+        with self._lock:
+            if stamp == self._stamp:
+                return
+            self.pool.reset()
+            with self.pool.connection() as conn:
+                self._info = read_build_info(conn)
+            self._stamp = stamp
+
+    def begin_request(self):
+        """Cuenta el pedido y revisa si hay un build nuevo."""
+        self.requests = next(self._counter)
+        self.refresh()
+
+    @property
+    def version(self):
+        """Version de los datos para ETags: el build_id, o la firma del archivo."""
+        return self._info.get('build_id') or '{:x}-{:x}'.format(*self._stamp[:2])
+
+    def etag(self, target):
+        """
+        ETag de un recurso: version de la DB + hash de la URL.
+
+        Es debil (W/) porque se comparte entre la version gzip y la plana.
+        """
+        return f'W/"{self.version[:16]}-{zlib.crc32(target.encode("utf-8")):08x}"'
+
+    def search(self, params):
+        query = params.get('q', '').strip()
+        if not query:
+            return HTTPStatus.BAD_REQUEST, {'error': "Falta el parametro 'q'"}
+        try:
+            limit = int(params.get('limit', DEFAULT_LIMIT))
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST, {'error': "'limit' debe ser un entero"}
+        limit = max(1, min(limit, MAX_LIMIT))
+
+        results = search_situation(query, db_path=self.db_path, limit=limit)
+        payload = {'query': query, 'results': results}
+        if results and params.get('details', '') in ('1', 'true', 'yes'):
+            with self.pool.connection() as conn:
+                payload['details'] = get_situation_details(results[0]['situation_id'], conn=conn)
+        return HTTPStatus.OK, payload
+
+    def situation(self, situation_id):
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            cur.row_factory = sqlite3.Row
+            row = cur.execute(SITUATION_QUERY, (situation_id,)).fetchone()
+            if row is None:
+                return HTTPStatus.NOT_FOUND, {'error': f"Situacion no encontrada: {situation_id}"}
+            situation = dict(row)
+            situation.update(get_situation_details(situation_id, conn=conn))
+        return HTTPStatus.OK, situation
+
+    def status(self):
+        index = load_search_index(self.db_path)
+        return HTTPStatus.OK, {
+            'build_id': self._info.get('build_id'),
+            'country': self._info.get('country'),
+            'built_at': self._info.get('built_at'),
+            'situations': len(index),
+            'db_path': str(self.db_path),
+            'workers': self.pool.size,
+            'requests': self.requests,
+            'uptime_seconds': round(time.time() - self.started, 1),
+            'results_cache': cache_stats(),
+        }
+
+
+# ============================================================
+# HTTP
+# ============================================================
+
+class Request:
+    def __init__(self, method, target, version, headers):
+        self.method = method
+        self.target = target
+        self.version = version
+        self.headers = headers
+        parts = urlsplit(target)
+        self.path = unquote(parts.path)
+        self.params = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+
+    @property
+    def keep_alive(self):
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+    def accepts_gzip(self):
+        for item in self.headers.get('accept-encoding', '').split(','):
+            name, _, params = item.strip().partition(';')
+            if name.strip().lower() in ('gzip', '*'):
+                return params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+        return False
+
+
+class HttpError(Exception):
+    def __init__(self, status):
+        super().__init__(status.phrase)
+        self.status = status
+
+
+async def read_request(reader):
+    """Lee linea de pedido + encabezados; None si el cliente cerro la conexion."""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError as e:
+        if e.partial.strip():
+            raise HttpError(HTTPStatus.BAD_REQUEST)
+        return None
+    except asyncio.LimitOverrunError:
+        raise HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, version = lines[0].split(' ')
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST)
+    if version not in ('HTTP/1.0', 'HTTP/1.1'):
+        raise HttpError(HTTPStatus.HTTP_VERSION_NOT_SUPPORTED)
+
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+    # La API no usa cuerpos, pero hay que consumirlos para seguir en keep-alive
+    length = headers.get('content-length', '0')
+    if not length.isdigit():
+        raise HttpError(HTTPStatus.BAD_REQUEST)
+    if int(length):
+        await reader.readexactly(int(length))
+    return Request(method, target, version, headers)
+
+
+def render_response(status, headers=(), body=b'', keep_alive=True, head=False):
+    """Bytes de la respuesta; con head=True se omite el cuerpo (pedido HEAD)."""
+    lines = [f'HTTP/1.1 {status.value} {status.phrase}']
+    lines.extend(f'{name}: {value}' for name, value in headers)
+    lines.append(f'Content-Length: {len(body)}')
+    if keep_alive:
+        lines.append('Connection: keep-alive')
+        lines.append(f'Keep-Alive: timeout={int(KEEPALIVE_TIMEOUT)}')
+    else:
+        lines.append('Connection: close')
+    head_bytes = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+    return head_bytes if head else head_bytes + body
+
+
+class ApiServer:
+    """Servidor asyncio: parsea HTTP y delega cada pedido al pool de hilos."""
+
+    def __init__(self, api, host=HOST, port=PORT, workers=WORKERS):
+        self.api = api
+        self.host = host
+        self.port = port
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='api')
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(
+            self.handle_client, self.host, self.port, limit=MAX_HEADER_BYTES
+        )
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.executor.shutdown(wait=False)
+        self.api.pool.close()
+
+    async def handle_client(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(read_request(reader), KEEPALIVE_TIMEOUT)
+                except HttpError as e:
+                    writer.write(self._error(e.status, keep_alive=False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                keep_alive = request.keep_alive
+                try:
+                    response = await loop.run_in_executor(self.executor, self.respond, request, keep_alive)
+                except Exception:
+                    # sqlite3.Error, DB borrada (os.stat en refresh)...: 500 y se cierra
+                    writer.write(self._error(HTTPStatus.INTERNAL_SERVER_ERROR, keep_alive=False))
+                    await writer.drain()
+                    break
+                writer.write(response)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def _error(self, status, keep_alive=True, headers=()):
+        body = json.dumps({'error': status.phrase}).encode('utf-8')
+        headers = [('Content-Type', 'application/json; charset=utf-8'), *headers]
+        return render_response(status, headers, body, keep_alive)
+
+    def respond(self, request, keep_alive=True):
+        """Resuelve un pedido completo (corre en el pool de hilos) y devuelve los bytes."""
+        if request.method not in ('GET', 'HEAD'):
+            return self._error(HTTPStatus.METHOD_NOT_ALLOWED, keep_alive, [('Allow', 'GET, HEAD')])
+
+        api = self.api
+        api.begin_request()
+
+        path = request.path.rstrip('/') or '/'
+        cacheable = True
+        if path == '/search':
+            handler = functools.partial(api.search, request.params)
+        elif path.startswith('/situations/') and path.count('/') == 2:
+            situation_id = path.rsplit('/', 1)[1]
+            handler = functools.partial(api.situation, situation_id)
+        elif path == '/status':
+            handler = api.status
+            cacheable = False
+        else:
+            return self._error(HTTPStatus.NOT_FOUND, keep_alive)
+
+        status, payload = handler()
+
+        # Solo un 200 lleva ETag (y se revalida): un 400/404 no es un recurso
+        headers = [('Content-Type', 'application/json; charset=utf-8'), ('Vary', 'Accept-Encoding')]
+        if cacheable and status == HTTPStatus.OK:
+            etag = api.etag(request.target)
+            headers += [('ETag', etag), ('Cache-Control', 'no-cache')]
+            if _etag_matches(etag, request.headers.get('if-none-match', '')):
+                return render_response(HTTPStatus.NOT_MODIFIED, headers, b'', keep_alive)
+        else:
+            headers.append(('Cache-Control', 'no-store'))
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        if len(body) >= GZIP_MIN_BYTES and request.accepts_gzip():
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+            headers.append(('Content-Encoding', 'gzip'))
+        return render_response(status, headers, body, keep_alive, head=request.method == 'HEAD')
+
+
+def _etag_matches(etag, if_none_match):
+    """Comparacion debil de If-None-Match (ignora el prefijo W/)."""
+    if if_none_match.strip() == '*':
+        return True
+    bare = etag[2:] if etag.startswith('W/') else etag
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith('W/') else tag) == bare:
+            return True
+    return False
+
+
+async def serve(host=HOST, port=PORT, db_path=None, workers=WORKERS):
+    api = SearchApi(db_path, pool_size=workers)
+    load_search_index(api.db_path)  # calienta el indice antes del primer pedido
+    server = ApiServer(api, host, port, workers)
+    await server.start()
+    print(f"API de busqueda escuchando en http://{host}:{server.port}")
+    print(f"  DB: {api.db_path}")
+    print(f"  Build: {api.version}")
+    sys.stdout.flush()
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API HTTP de busqueda de Truths and Rights")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--db", default=None, help="Ruta a la DB (por defecto la de Peru)")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Hilos/conexiones SQLite")
+    args = parser.parse_args()
+
+    db_path = Path(args.db or DB_PATH)
+    if not db_path.exists():
+        print(f"ERROR: No se encontro la base de datos: {db_path}")
+        print("Ejecuta primero: python scripts/build_db.py --country PE")
+        return 1
+
+    try:
+        asyncio.run(serve(args.host, args.port, db_path, args.workers))
+    except KeyboardInterrupt:
+        print("\nAPI detenida.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Truths and Rights — Autocompletado de consultas
+Sugerencias por prefijo precalculadas en build time.
+
+build_db.py arma un trie sobre natural_queries, titulos y keywords
+(normalizados con search.normalize) y guarda en cada nodo las mejores
+TOP_K completaciones. El trie se exporta aplanado a la tabla
+search_suggestions (prefix, rank) -> sugerencia, de modo que tanto la app
+mobile como Python resuelven cada tecla con una sola lectura indexada.
+
+Uso como modulo:
+    from autocomplete import load_autocompleter
+    ac = load_autocompleter()
+    ac.suggest("me pi")
+
+Uso directo:
+    python autocomplete.py "me pi"
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+from search import DB_PATH, cached_by_build_id, normalize
+
+# Sugerencias guardadas por prefijo y largo maximo de prefijo indexado
+TOP_K = 8
+MAX_PREFIX_LEN = 32
+
+# Peso por origen: una consulta natural completa es mejor sugerencia que una keyword
+SOURCE_WEIGHTS = {
+    'natural_query': 3,
+    'title': 2,
+    'keyword': 1,
+}
+
+
+def collect_suggestions(conn):
+    """
+    Reune las frases sugeribles de la tabla situations.
+
+    Returns:
+        Lista de dicts con text, normalized, kind, weight y situation_id,
+        sin duplicados por texto normalizado (gana el de mayor peso).
+    """
+    rows = conn.execute("""
+        SELECT id, title, keywords, natural_queries
+        FROM situations
+        WHERE is_active = 1
+        ORDER BY display_order, id
+    """).fetchall()
+
+    best = {}
+    for s_id, title, keywords, natural_q in rows:
+        candidates = [(nq, 'natural_query') for nq in (natural_q or '').split('|')]
+        candidates.append((title or '', 'title'))
+        candidates.extend((kw, 'keyword') for kw in (keywords or '').split(','))
+
+        for text, kind in candidates:
+            text = text.strip()
+            norm = normalize(text)
+            if not norm:
+                continue
+            weight = SOURCE_WEIGHTS[kind]
+            current = best.get(norm)
+            if current is None or weight > current['weight']:
+                best[norm] = {
+                    'text': text,
+                    'normalized': norm,
+                    'kind': kind,
+                    'weight': weight,
+                    'situation_id': s_id,
+                }
+
+    return list(best.values())
+
+
+def _rank_key(suggestion):
+    """Orden dentro de un nodo: mas peso, luego mas corta, luego alfabetico."""
+    return (-suggestion['weight'], len(suggestion['normalized']), suggestion['normalized'])
+
+
+class SuggestionTrie:
+    """Trie de prefijos con las top-k completaciones guardadas en cada nodo."""
+
+    def __init__(self, top_k=TOP_K, max_prefix_len=MAX_PREFIX_LEN):
+        self.top_k = top_k
+        self.max_prefix_len = max_prefix_len
+        self.root = {'children': {}, 'top': []}
+
+    def insert(self, suggestion):
+        node = self.root
+        key = _rank_key(suggestion)
+        for ch in suggestion['normalized'][:self.max_prefix_len]:
+            node = node['children'].setdefault(ch, {'children': {}, 'top': []})
+            top = node['top']
+            if len(top) < self.top_k or key < _rank_key(top[-1]):
+                top.append(suggestion)
+                top.sort(key=_rank_key)
+                del top[self.top_k:]
+
+    def items(self):
+        """Recorre el trie en orden: (prefijo, [sugerencias])."""
+        stack = [('', self.root)]
+        while stack:
+            prefix, node = stack.pop()
+            if prefix:
+                yield prefix, node['top']
+            for ch in sorted(node['children'], reverse=True):
+                stack.append((prefix + ch, node['children'][ch]))
+
+
+def write_suggestions(conn, top_k=TOP_K):
+    """
+    Construye el trie y lo guarda aplanado en search_suggestions.
+
+    Returns:
+        Numero de prefijos exportados
+    """
+    trie = SuggestionTrie(top_k=top_k)
+    for suggestion in collect_suggestions(conn):
+        trie.insert(suggestion)
+
+    conn.execute("DELETE FROM search_suggestions")
+    count = 0
+    for prefix, top in trie.items():
+        conn.executemany("""
+            INSERT INTO search_suggestions
+            (prefix, rank, suggestion, situation_id, kind)
+            VALUES (?, ?, ?, ?, ?)
+        """, [
+            (prefix, rank, s['text'], s['situation_id'], s['kind'])
+            for rank, s in enumerate(top, 1)
+        ])
+        count += 1
+    return count
+
+
+def suggestion_key(text):
+    """
+    Clave de search_suggestions para lo que el usuario lleva escrito.
+
+    normalize() recorta los espacios, pero un espacio final es significativo:
+    "me " ya cerro la palabra y no debe completar "mecanismo".
+    """
+    query = normalize(text)
+    if query and text[-1:].isspace() and not query.endswith(' '):
+        query += ' '
+    return query
+
+
+class Autocompleter:
+    """
+    Sugerencias en memoria: prefijo normalizado -> completaciones ordenadas.
+
+    Es el mismo trie de search_suggestions, aplanado en un dict, asi que
+    cada tecla cuesta un normalize() y una busqueda en el dict.
+    """
+
+    def __init__(self, table, max_prefix_len=MAX_PREFIX_LEN):
+        self._table = table
+        self.max_prefix_len = max_prefix_len
+
+    @classmethod
+    def from_db(cls, conn):
+        table = {}
+        rows = conn.execute("""
+            SELECT prefix, suggestion, situation_id, kind
+            FROM search_suggestions
+            ORDER BY prefix, rank
+        """)
+        for prefix, text, s_id, kind in rows:
+            table.setdefault(prefix, []).append(
+                {'text': text, 'normalized': normalize(text), 'situation_id': s_id, 'kind': kind}
+            )
+        return cls(table)
+
+    def __len__(self):
+        return len(self._table)
+
+    def suggest(self, text, limit=TOP_K):
+        """Completaciones para lo que el usuario lleva escrito."""
+        query = suggestion_key(text)
+        if not query:
+            return []
+        candidates = self._table.get(query[:self.max_prefix_len], ())
+        if len(query) > self.max_prefix_len:
+            # Mas alla del largo indexado se filtra contra el texto completo
+            candidates = [s for s in candidates if s['normalized'].startswith(query)]
+        return [dict(s) for s in candidates[:limit]]
+
+
+def _autocompleter_from_db(conn):
+    try:
+        return Autocompleter.from_db(conn)
+    except sqlite3.OperationalError:
+        # DB anterior a la tabla de sugerencias
+        return Autocompleter({})
+
+
+def load_autocompleter(db_path=None):
+    """Carga search_suggestions de la DB (cacheado por build_id)."""
+    return cached_by_build_id(db_path, _autocompleter_from_db)
+
+
+# --- Ejecucion directa ---
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python autocomplete.py \"inicio de consulta\"")
+        sys.exit(1)
+
+    if not Path(DB_PATH).exists():
+        print(f"ERROR: No se encontro la base de datos: {DB_PATH}")
+        sys.exit(1)
+
+    for s in load_autocompleter().suggest(' '.join(sys.argv[1:])):
+        print(f"  {s['text']}  [{s['kind']} -> {s['situation_id']}]")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Truths and Rights — Benchmark de arranque
+Mide cuanto cuesta importar los modulos del CLI con `python -X importtime`.
+
+Cada modulo se importa en un interprete nuevo (varias veces, se toma el
+minimo) y se compara contra STARTUP_BUDGET_MS. Tambien lista los imports
+mas caros, para ver que se cuela al arranque.
+
+Uso:
+    python bench_startup.py              # reporte + control de presupuesto
+    python bench_startup.py --runs 10 --top 15
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Presupuesto (ms, import acumulado con bytecode ya compilado). Es holgado
+# a proposito: lo que debe fallar es volver a importar sqlite3 o argparse
+# al arranque, no el ruido de la maquina.
+STARTUP_BUDGET_MS = {
+    'search': 40.0,
+    'cli': 20.0,
+}
+
+# Modulos que importar el modulo NO debe cargar (se importan al usarse)
+FORBIDDEN_AT_IMPORT = {
+    'search': ('sqlite3', 'mmap', 'heapq', 'array', 'threading', 'json', 'socket'),
+    'cli': ('search', 'search_daemon', 'sqlite3', 'argparse', 'json', 'socket', 'pathlib'),
+}
+
+
+def _child_env():
+    env = dict(os.environ)
+    # Sin .pyc cada import incluye compilar el modulo: no es lo que se mide
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    return env
+
+
+def import_profile(module):
+    """
+    Importa `module` en un interprete nuevo con -X importtime.
+
+    Returns:
+        Lista de (modulo, self_us, cumulative_us) en el orden del reporte
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=SCRIPTS_DIR, env=_child_env(), capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure_import(module, runs=5):
+    """Minimo de `runs` importaciones (ms) y el perfil de esa corrida."""
+    import_profile(module)  # calentar: escribe el .pyc
+    best, best_rows = None, []
+    for _ in range(runs):
+        rows = import_profile(module)
+        total = next(cum for name, _, cum in reversed(rows) if name == module) / 1000
+        if best is None or total < best:
+            best, best_rows = total, rows
+    return best, best_rows
+
+
+def loaded_after_import(module):
+    """Modulos de FORBIDDEN_AT_IMPORT[module] presentes tras importarlo."""
+    forbidden = FORBIDDEN_AT_IMPORT.get(module, ())
+    code = (f'import sys, {module}; '
+            f'print(",".join(m for m in {forbidden!r} if m in sys.modules))')
+    proc = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=SCRIPTS_DIR, env=_child_env(), capture_output=True, text=True, check=True,
+    )
+    return [m for m in proc.stdout.strip().split(',') if m]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de arranque de los modulos del CLI')
+    parser.add_argument('--runs', type=int, default=5, help='Corridas por modulo (se toma el minimo)')
+    parser.add_argument('--top', type=int, default=8, help='Imports mas caros a listar')
+    args = parser.parse_args()
+
+    failed = False
+    for module, budget in STARTUP_BUDGET_MS.items():
+        total, rows = measure_import(module, args.runs)
+        leaked = loaded_after_import(module)
+        ok = total <= budget and not leaked
+        failed |= not ok
+        status = 'OK' if ok else 'EXCEDIDO'
+        print(f"\nimport {module}: {total:.1f} ms (presupuesto {budget:.0f} ms) [{status}]")
+        if leaked:
+            print(f"  Importados al arranque (no deberian): {', '.join(leaked)}")
+        for name, self_us, _ in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+            print(f"  {self_us / 1000:6.2f} ms  {name}")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,6 +7,31 @@ Uso:
     python build_db.py                    # Build todos los países
     python build_db.py --country PE       # Build solo Perú
     python build_db.py --validate         # Solo validar, no construir
+    python build_db.py --country PE --profile mobile [--check-budget]
+                                          # + DB liviana para la app (build/mobile/)
+    python build_db.py --country PE --compress-texts
+                                          # full_text comprimido (text_codec.py)
+    python build_db.py --country PE --trace build/trace.json
+                                          # tiempos por etapa (tracing.py)
+
+Uso como modulo (sin subprocess ni archivos, no imprime nada):
+    from build_db import build_database
+    conn, stats = build_database('PE')                  # :memory:
+    conn, stats = build_database('PE', 'build/pe.db')   # + indice .idx
+    conn, stats = build_database('PE', data={'sources': [...], ...})
+    stats.rows['sources'], stats.warnings, stats.build_id
+
+El build es reproducible: los mismos datos producen los mismos bytes.
+    - Los archivos de entrada se leen en orden (no en el orden de glob()).
+    - created_at/updated_at/built_at salen de los datos (metadata.json
+      last_verified, o SOURCE_DATE_EPOCH si esta definido), no del reloj.
+    - La DB se escribe con VACUUM INTO: paginas compactas y en orden.
+    - build_id = hash de las entradas (datos, schema y scripts del build).
+
+Las fuentes (sources/*.json, que pueden traer codigos completos con miles
+de articulos) se leen en streaming: un elemento del array por vez (ijson
+si esta instalado, si no un buffer acotado sobre json.raw_decode) y se
+insertan en lotes de INSERT_BATCH_SIZE, con memoria constante.
 """
 
 import json
@@ -15,9 +40,24 @@ import os
 import sys
 import io
 import argparse
-from datetime import datetime
+import hashlib
+import tempfile
+import time
+from itertools import chain, islice
+from datetime import datetime, timezone
 from pathlib import Path
 
+from autocomplete import write_suggestions
+from cards import write_cards
+from citations import write_citations
+from context_resolver import normalize_region
+from data_schemas import SCHEMA_PATH, checker, load_schemas
+from db_profiles import PROFILES, build_mobile_db, size_report
+from rights_matrix import write_matrix
+from search import IndexInUseError, index_path_for, write_search_index
+from text_codec import compress_full_texts
+from tracing import finish_tracing, span, start_tracing
+
 # Fix encoding on Windows consoles (cp1252 can't handle emojis)
 if sys.stdout.encoding and sys.stdout.encoding.lower() != 'utf-8':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
@@ -28,20 +68,34 @@ PROJECT_ROOT = Path(__file__).parent.parent
 SCHEMA_DIR = PROJECT_ROOT / "schema"
 DATA_DIR = PROJECT_ROOT / "data"
 OUTPUT_DIR = PROJECT_ROOT / "build"
+SCRIPTS_DIR = PROJECT_ROOT / "scripts"
+
+# Modulos cuyo codigo decide el contenido de la DB (tablas derivadas, .idx,
+# perfil mobile): entran en el build_id. cli.py, api_server.py, etc. no: editarlos
+# no cambia la DB ni debe invalidar caches, .idx ni bases de deltas.
+BUILD_MODULES = (
+    'build_db', 'search', 'autocomplete', 'cards', 'rights_matrix', 'citations',
+    'context_resolver', 'text_codec', 'data_schemas', 'db_profiles',
+)
+
+# Fecha fija si los datos no traen ninguna (y no hay SOURCE_DATE_EPOCH)
+FALLBACK_TIMESTAMP = '1970-01-01T00:00:00'
+
+# Ingesta en streaming: filas por executemany y bytes por lectura del archivo
+INSERT_BATCH_SIZE = 500
+STREAM_CHUNK_SIZE = 64 * 1024
 
 
 def load_schema(conn):
     """Carga el schema SQL en la base de datos."""
     schema_path = SCHEMA_DIR / "database_schema.sql"
     if not schema_path.exists():
-        print(f"ERROR: No se encontró {schema_path}")
-        sys.exit(1)
+        raise FileNotFoundError(f"No se encontró {schema_path}")
     
     with open(schema_path, 'r', encoding='utf-8') as f:
         schema_sql = f.read()
     
     conn.executescript(schema_sql)
-    print("✓ Schema cargado")
 
 
 def load_json(filepath):
@@ -55,50 +109,222 @@ def load_json(filepath):
     return data if isinstance(data, list) else [data]
 
 
-def validate_source(source):
-    """Valida que una fuente legal tenga los campos requeridos."""
-    required = ['id', 'source_type', 'name', 'full_text', 'summary', 'status']
-    missing = [f for f in required if f not in source or not source[f]]
-    
-    if missing:
-        print(f"  ⚠ Fuente '{source.get('id', '?')}' le faltan campos: {missing}")
-        return False
-    
-    valid_types = ['constitucion', 'codigo_penal', 'codigo_procesal', 
-                   'decreto_legislativo', 'ley', 'jurisprudencia', 'tratado_internacional']
-    if source['source_type'] not in valid_types:
-        print(f"  ⚠ Fuente '{source['id']}' tiene source_type inválido: {source['source_type']}")
-        return False
-    
-    return True
+def _iter_json_buffered(f, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Elementos de un array JSON con un buffer acotado (sin ijson).
+
+    El buffer guarda a lo sumo un elemento incompleto mas un bloque leido:
+    cada elemento se decodifica con raw_decode apenas esta completo y se
+    descarta del buffer. Las comas se exigen entre elementos (ni faltantes
+    ni de mas) y un error de sintaxis se reporta donde ocurre, sin leer el
+    resto del archivo.
+    """
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    offset = 0      # caracteres del archivo ya descartados del buffer
+    eof = False
+    expect = 'open'  # open -> first (valor o ']') -> next (',' o ']') -> value -> next ...
+
+    def fill():
+        nonlocal buf, pos, offset, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        offset += pos
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    def invalid(msg, at):
+        return ValueError(f"JSON inválido en el caracter {offset + at}: {msg}")
+
+    while True:
+        # Saltar espacios hasta el proximo token
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            fill()
+        if pos >= len(buf):
+            raise ValueError("JSON incompleto: falta ']'")
+        char = buf[pos]
+
+        if expect == 'open':
+            if char != '[':
+                raise ValueError("se esperaba un array JSON")
+            pos += 1
+            expect = 'first'
+            continue
+        if char == ']' and expect in ('first', 'next'):
+            return
+        if expect == 'next':
+            if char != ',':
+                raise invalid("se esperaba ',' o ']'", pos)
+            pos += 1
+            expect = 'value'
+            continue
+
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError as e:
+            if eof or not _may_be_truncated(buf, e):
+                raise invalid(e.msg, e.pos) from None
+            fill()
+            continue
+        if not eof and all(c in '0123456789+-.eE' for c in buf[end:]):
+            # Un numero al borde del buffer ('6.5' de '6.5e10') puede seguir
+            # en el proximo bloque
+            fill()
+            continue
+        pos = end
+        expect = 'next'
+        yield item
 
 
-def validate_situation(situation):
-    """Valida que una situación tenga los campos requeridos."""
-    required = ['id', 'category', 'title', 'description', 'keywords', 'natural_queries']
-    missing = [f for f in required if f not in situation or not situation[f]]
-    
-    if missing:
-        print(f"  ⚠ Situación '{situation.get('id', '?')}' le faltan campos: {missing}")
+def _may_be_truncated(buf, error):
+    """
+    Si el error de raw_decode puede deberse solo a que falta leer: un string
+    sin cerrar, o un error en el ultimo token del buffer ('tr' de 'true',
+    '{"a": 1' sin su '}'). Otro error ya no se arregla leyendo mas.
+    """
+    if error.msg.startswith('Unterminated string'):
+        return True
+    return not any(c in ' \t\r\n,:[]{}"' for c in buf[error.pos:])
+
+
+def iter_json(filepath):
+    """
+    Elementos de un archivo JSON, uno por vez.
+
+    Un array se recorre en streaming (ijson o _iter_json_buffered); un
+    objeto suelto se devuelve como unico elemento, como load_json.
+    """
+    if not filepath.exists():
+        return
+    with open(filepath, 'r', encoding='utf-8') as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        if first != '[':
+            data = json.loads(first + f.read()) if first else []
+            yield from (data if isinstance(data, list) else [data])
+            return
+        f.seek(0)
+        try:
+            import ijson
+        except ImportError:
+            yield from _iter_json_buffered(f)
+            return
+    with open(filepath, 'rb') as f:
+        yield from ijson.items(f, 'item', use_float=True)
+
+
+def iter_batches(items, size=INSERT_BATCH_SIZE):
+    """Agrupa un iterable en listas de hasta `size` elementos."""
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+def file_bytes(*paths):
+    """Tamano total de los archivos que existen (para las trazas)."""
+    return sum(p.stat().st_size for p in paths if p.exists())
+
+
+def input_files(country_dir):
+    """Archivos JSON que lee el build, en orden estable."""
+    files = [country_dir / "metadata.json", country_dir / "contexts" / "contexts.json"]
+    files += sorted((country_dir / "sources").glob("*.json"))
+    files += [country_dir / "rights" / "rights.json",
+              country_dir / "actions" / "actions.json",
+              country_dir / "contacts" / "emergency_contacts.json"]
+    files += sorted((country_dir / "situations").glob("*.json"))
+    files += [country_dir / "myths" / "myths.json"]
+    return [f for f in files if f.exists()]
+
+
+def compute_build_id(country_dir, options=(), data=None):
+    """
+    Hash de las entradas del build: datos del pais, schema, BUILD_MODULES y
+    opciones que cambian el contenido (ej: 'compress_texts').
+
+    Esos modulos entran porque las tablas derivadas (matriz, tarjetas,
+    sugerencias) dependen del codigo: mismo build_id = misma DB. Con
+    `data` (datos ya cargados) se hashea su JSON en vez de los archivos.
+    """
+    digest = hashlib.sha256()
+    for option in sorted(options):
+        digest.update(f"option:{option}\0".encode('utf-8'))
+    if data is not None:
+        digest.update(json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        paths = []
+    else:
+        # Nombrados desde el directorio de datos ('PE/metadata.json'), este donde este
+        paths = [(p, p.relative_to(country_dir.parent)) for p in input_files(country_dir)]
+    paths += [(p, p.relative_to(PROJECT_ROOT)) for p in (SCHEMA_DIR / "database_schema.sql", SCHEMA_PATH)]
+    paths += [(SCRIPTS_DIR / f"{name}.py", Path("scripts") / f"{name}.py") for name in BUILD_MODULES]
+    for path, name in paths:
+        digest.update(name.as_posix().encode('utf-8') + b'\0')
+        # Por bloques: las fuentes pueden ser grandes y se leen en streaming
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(STREAM_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+
+def build_timestamp(metadata):
+    """Fecha fija del build: SOURCE_DATE_EPOCH o last_verified de metadata.json."""
+    epoch = os.environ.get('SOURCE_DATE_EPOCH')
+    if epoch:
+        return datetime.fromtimestamp(int(epoch), tz=timezone.utc).replace(tzinfo=None).isoformat()
+    last_verified = (metadata or {}).get('last_verified')
+    if last_verified:
+        return datetime.fromisoformat(last_verified).isoformat()
+    return FALLBACK_TIMESTAMP
+
+
+def _warn(warnings, msg):
+    """Agrega la advertencia a `warnings` o, si es None, la imprime."""
+    if warnings is None:
+        print(f"  ⚠ {msg}")
+    else:
+        warnings.append(msg)
+
+
+def _validate(kind, entity, warnings):
+    """Chequea la entidad contra su esquema (data_schemas.py); los errores la descartan."""
+    errors = [detail for severity, detail in checker(kind)(entity) if severity == 'error']
+    if errors:
+        label = load_schemas()[kind]['title']
+        _warn(warnings, f"{label} '{entity.get('id', '?')}' descartada: {', '.join(errors)}")
         return False
-    
     return True
 
 
-def insert_sources(conn, sources, country):
-    """Inserta fuentes legales en la base de datos."""
+def validate_source(source, warnings=None):
+    """Valida una fuente legal contra schema/data_format.json."""
+    return _validate('sources', source, warnings)
+
+
+def validate_situation(situation, warnings=None):
+    """Valida una situación contra schema/data_format.json."""
+    return _validate('situations', situation, warnings)
+
+
+def insert_sources(conn, sources, country, timestamp=FALLBACK_TIMESTAMP, warnings=None):
+    """
+    Inserta fuentes legales en la base de datos.
+
+    `sources` puede ser un generador (iter_json): se valida e inserta de a
+    lotes, sin materializar la lista.
+    """
     count = 0
-    for source in sources:
-        if not validate_source(source):
-            continue
-        
-        conn.execute("""
-            INSERT OR REPLACE INTO legal_sources 
-            (id, source_type, name, article, full_text, summary, 
-             publication_date, last_modified, official_url, status, country,
-             created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+    for batch in iter_batches(sources):
+        rows = [(
             source['id'],
             source['source_type'],
             source['name'],
@@ -110,12 +336,19 @@ def insert_sources(conn, sources, country):
             source.get('official_url'),
             source['status'],
             country,
-            datetime.now().isoformat(),
-            datetime.now().isoformat()
-        ))
-        count += 1
-    
-    print(f"  ✓ {count} fuentes legales insertadas")
+            timestamp,
+            timestamp
+        ) for source in batch if validate_source(source, warnings)]
+        conn.executemany("""
+            INSERT OR REPLACE INTO legal_sources 
+            (id, source_type, name, article, full_text, summary, 
+             publication_date, last_modified, official_url, status, country,
+             created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        count += len(rows)
+
+    return count
 
 
 def insert_rights(conn, rights):
@@ -145,8 +378,8 @@ def insert_rights(conn, rights):
             """, (right['id'], source_id))
         
         count += 1
-    
-    print(f"  ✓ {count} derechos insertados")
+
+    return count
 
 
 def insert_actions(conn, actions):
@@ -170,15 +403,15 @@ def insert_actions(conn, actions):
             action.get('legal_basis_summary')
         ))
         count += 1
-    
-    print(f"  ✓ {count} acciones insertadas")
+
+    return count
 
 
-def insert_situations(conn, situations):
+def insert_situations(conn, situations, warnings=None):
     """Inserta situaciones con sus relaciones."""
     count = 0
     for sit in situations:
-        if not validate_situation(sit):
+        if not validate_situation(sit, warnings):
             continue
         
         keywords = ','.join(sit['keywords']) if isinstance(sit['keywords'], list) else sit['keywords']
@@ -207,14 +440,15 @@ def insert_situations(conn, situations):
         for right_rel in sit.get('rights', []):
             conn.execute("""
                 INSERT OR REPLACE INTO situation_rights
-                (situation_id, right_id, context_id, applies, notes)
-                VALUES (?, ?, ?, ?, ?)
+                (situation_id, right_id, context_id, applies, notes, right_order)
+                VALUES (?, ?, ?, ?, ?, COALESCE((SELECT display_order FROM rights WHERE id = ?), 0))
             """, (
                 sit['id'],
                 right_rel['right_id'],
                 right_rel.get('context', 'normal'),
                 right_rel.get('applies', True),
-                right_rel.get('notes')
+                right_rel.get('notes'),
+                right_rel['right_id']
             ))
         
         # Insertar relaciones con acciones
@@ -240,8 +474,8 @@ def insert_situations(conn, situations):
             """, (sit['id'], contact_id, i + 1))
         
         count += 1
-    
-    print(f"  ✓ {count} situaciones insertadas (con relaciones)")
+
+    return count
 
 
 def insert_contacts(conn, contacts):
@@ -269,8 +503,8 @@ def insert_contacts(conn, contacts):
             contact.get('priority', 0)
         ))
         count += 1
-    
-    print(f"  ✓ {count} contactos de emergencia insertados")
+
+    return count
 
 
 def insert_contexts(conn, contexts):
@@ -296,9 +530,13 @@ def insert_contexts(conn, contexts):
             ctx.get('end_date'),
             ctx.get('source_id'),
         ))
+        conn.executemany(
+            "INSERT OR REPLACE INTO context_regions (region, context_id, region_name, position) VALUES (?, ?, ?, ?)",
+            [(normalize_region(name), ctx['id'], name, i) for i, name in enumerate(ctx.get('active_regions', []))]
+        )
         count += 1
 
-    print(f"  ✓ {count} contextos insertados")
+    return count
 
 
 def insert_time_limits(conn, situations):
@@ -323,8 +561,7 @@ def insert_time_limits(conn, situations):
             ))
             count += 1
 
-    if count > 0:
-        print(f"  ✓ {count} límites de tiempo insertados")
+    return count
 
 
 def insert_myths(conn, myths):
@@ -344,13 +581,254 @@ def insert_myths(conn, myths):
             myth['category'],
             myth.get('display_order', 0)
         ))
+        conn.executemany(
+            "INSERT OR REPLACE INTO myth_sources (myth_id, source_id) VALUES (?, ?)",
+            [(myth['id'], source_id) for source_id in myth.get('related_source_ids', [])]
+        )
         count += 1
-    
-    print(f"  ✓ {count} mitos insertados")
 
+    return count
+
+
+def insert_build_info(conn, country, build_id, timestamp=FALLBACK_TIMESTAMP):
+    """Registra el build_id que identifica esta DB (y sus índices derivados)."""
+    info = {
+        'build_id': build_id,
+        'country': country,
+        'built_at': timestamp,
+    }
+    conn.executemany(
+        "INSERT OR REPLACE INTO build_info (key, value) VALUES (?, ?)",
+        sorted(info.items())
+    )
+
+
+# Claves de los datos de un pais (load_country_data / build_database(data=...))
+DATA_KEYS = ('metadata', 'contexts', 'sources', 'rights', 'actions', 'contacts', 'situations', 'myths')
+
+# Archivos de cada clave dentro de data/<cc>/
+DATA_FILES = {
+    'contexts': 'contexts/contexts.json',
+    'sources': 'sources/*.json',
+    'rights': 'rights/rights.json',
+    'actions': 'actions/actions.json',
+    'contacts': 'contacts/emergency_contacts.json',
+    'situations': 'situations/*.json',
+    'myths': 'myths/myths.json',
+}
+
+# Mensajes del CLI por etapa (BuildStats.rows), en el orden del build
+ROW_MESSAGES = (
+    ('contexts', "{} contextos insertados"),
+    ('sources', "{} fuentes legales insertadas"),
+    ('rights', "{} derechos insertados"),
+    ('actions', "{} acciones insertadas"),
+    ('contacts', "{} contactos de emergencia insertados"),
+    ('situations', "{} situaciones insertadas (con relaciones)"),
+    ('time_limits', "{} límites de tiempo insertados"),
+    ('myths', "{} mitos insertados"),
+    ('suggestions', "{} prefijos de autocompletado generados"),
+    ('rights_matrix', "Matriz de derechos efectivos: {} pares situación/contexto"),
+    ('citations', "Grafo de citas: {} aristas fuente → contenido"),
+    ('cards', "{} tarjetas de respuesta pre-renderizadas"),
+)
+
+
+class BuildStats:
+    """Resultado de build_database(): filas por etapa, advertencias y build_id."""
+
+    def __init__(self, country):
+        self.country = country
+        self.build_id = None
+        self.built_at = None
+        self.rows = {}              # etapa -> filas ('sources', 'cards', ...)
+        self.warnings = []          # datos descartados, .idx que no se pudo reemplazar
+        self.compression = None     # compress_full_texts() con --compress-texts
+        self.db_path = None
+        self.index_path = None
+        self.elapsed_ms = 0.0
+
+    def __repr__(self):
+        return (f"BuildStats({self.country}, build_id={self.build_id}, "
+                f"rows={sum(self.rows.values())}, warnings={len(self.warnings)})")
+
+
+def load_country_data(country_dir):
+    """
+    Datos de un pais desde data/<cc>/ (dict con DATA_KEYS).
+
+    'sources' es un iterador en streaming (iter_json): se consume una vez.
+    """
+    files = {key: sorted(country_dir.glob(pattern)) for key, pattern in DATA_FILES.items()}
+    metadata = load_json(country_dir / "metadata.json")
+    data = {'metadata': metadata[0] if metadata else {}}
+    for key, paths in files.items():
+        if key == 'sources':
+            data[key] = chain.from_iterable(iter_json(f) for f in paths)
+        else:
+            data[key] = [item for f in paths for item in load_json(f)]
+    return data
+
+
+def build_database(country_code, target=':memory:', data=None, compress_texts=False):
+    """
+    Construye la DB de un pais en el proceso, sin imprimir nada.
+
+    Args:
+        country_code: 'PE'
+        target: ':memory:', ruta del .db (se arma en <db>.tmp, se compacta
+                con VACUUM INTO y reemplaza al .db con os.replace, junto con
+                su indice .idx) o una conexion sqlite3 abierta y vacia
+        data: datos ya cargados (dict con DATA_KEYS; las claves ausentes
+              quedan vacias). None = leer data/<cc>/, las fuentes en streaming
+        compress_texts: comprimir full_text (text_codec.py)
+
+    Returns:
+        (conexion, BuildStats); cerrar la conexion es cosa del llamador
+    """
+    started = time.perf_counter()
+    country_dir = DATA_DIR / country_code
+    stats = BuildStats(country_code)
+
+    if data is None:
+        if not country_dir.exists():
+            raise FileNotFoundError(f"No existe directorio para {country_code}")
+        with span('load_json'):
+            data = load_country_data(country_dir)
+        inputs = None
+        sizes = {key: file_bytes(*country_dir.glob(pattern)) for key, pattern in DATA_FILES.items()}
+    else:
+        data = {key: data.get(key) or ({} if key == 'metadata' else []) for key in DATA_KEYS}
+        data['sources'] = list(data['sources'])
+        inputs = data
+        sizes = {}
+    timestamp = build_timestamp(data['metadata'])
+
+    db_path = None
+    if isinstance(target, sqlite3.Connection):
+        conn = target
+    elif str(target) == ':memory:':
+        conn = sqlite3.connect(":memory:")
+    else:
+        # En disco, no en memoria: las filas (y cada full_text) no quedan en RAM
+        db_path = Path(target)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        build_path = db_path.with_name(db_path.name + '.tmp')
+        if build_path.exists():
+            build_path.unlink()
+        conn = sqlite3.connect(str(build_path))
+
+    with span('schema'):
+        load_schema(conn)
+
+    warnings = stats.warnings
+    with span('load_insert'):
+        steps = (
+            ('contexts', lambda: insert_contexts(conn, data['contexts'])),
+            ('sources', lambda: insert_sources(conn, data['sources'], country_code, timestamp, warnings)),
+            ('rights', lambda: insert_rights(conn, data['rights'])),
+            ('actions', lambda: insert_actions(conn, data['actions'])),
+            ('contacts', lambda: insert_contacts(conn, data['contacts'])),
+            ('situations', lambda: insert_situations(conn, data['situations'], warnings)),
+            # Time limits (extraidos de las situaciones)
+            ('time_limits', lambda: insert_time_limits(conn, data['situations'])),
+            ('myths', lambda: insert_myths(conn, data['myths'])),
+        )
+        for name, step in steps:
+            with span(name) as s:
+                stats.rows[name] = step()
+                s.add(rows=stats.rows[name])
+                if name in sizes:
+                    s.add(bytes=sizes[name])
+
+    with span('derived'):
+        steps = (
+            # Autocompletado (derivado de las situaciones)
+            ('suggestions', write_suggestions),
+            # Matriz de derechos efectivos (situación x contexto, bitsets)
+            ('rights_matrix', write_matrix),
+            # Grafo de citas (fuente -> contenido que la cita)
+            ('citations', write_citations),
+            # Tarjetas de respuesta (situación x contexto, pre-renderizadas)
+            ('cards', write_cards),
+        )
+        for name, step in steps:
+            with span(name) as s:
+                stats.rows[name] = step(conn)
+                s.add(rows=stats.rows[name])
+
+    options = []
+    if compress_texts:
+        # Al final: todo lo anterior lee full_text en claro
+        with span('compress_texts') as s:
+            stats.compression = compress_full_texts(conn)
+            s.add(rows=stats.compression['rows'],
+                  bytes=stats.compression['stored_bytes'] + stats.compression['dictionary_bytes'])
+        options.append('compress_texts')
+
+    with span('build_id'):
+        stats.build_id = compute_build_id(country_dir, options, inputs)
+        stats.built_at = timestamp
+        insert_build_info(conn, country_code, stats.build_id, timestamp)
+
+    # Estadisticas para el planificador (sqlite_stat1): viajan con la DB
+    with span('analyze'):
+        conn.execute("ANALYZE")
+
+    with span('commit'):
+        conn.commit()
+
+    if db_path is not None:
+        # Copia compacta con paginas en orden: mismos datos, mismos bytes
+        with span('vacuum_into') as s:
+            vacuum_path = db_path.with_name(db_path.name + '.new')
+            if vacuum_path.exists():
+                vacuum_path.unlink()
+            conn.execute("VACUUM INTO ?", (str(vacuum_path),))
+            conn.close()
+            build_path.unlink()
+            os.replace(vacuum_path, db_path)
+            s.add(bytes=file_bytes(db_path))
+        conn = sqlite3.connect(str(db_path))
+        with span('search_index') as s:
+            try:
+                stats.index_path = write_search_index(conn, index_path_for(db_path), stats.build_id)
+                s.add(bytes=file_bytes(stats.index_path))
+            except IndexInUseError as e:
+                # La DB nueva ya esta; la busqueda arma el indice en memoria
+                stats.warnings.append(str(e))
+        stats.db_path = db_path
 
-def build_country(country_code, validate_only=False):
-    """Construye la base de datos para un país."""
+    stats.elapsed_ms = (time.perf_counter() - started) * 1000
+    return conn, stats
+
+
+def print_build_stats(stats):
+    """Avance del build como lo muestra el CLI."""
+    print("✓ Schema cargado")
+    print("\nCargando datos...")
+    for warning in stats.warnings:
+        print(f"  ⚠ {warning}")
+    for name, message in ROW_MESSAGES:
+        if stats.rows.get(name):
+            print(f"  ✓ {message.format(stats.rows[name])}")
+    if stats.compression:
+        c = stats.compression
+        saved = 1 - (c['stored_bytes'] + c['dictionary_bytes']) / max(c['raw_bytes'], 1)
+        print(f"  ✓ full_text comprimido ({c['codec']} + diccionario de "
+              f"{c['dictionary_bytes'] / 1024:.1f} KB): {saved:.0%} menos")
+
+
+def build_country(country_code, validate_only=False, profile='desktop', check_budget=False,
+                  compress_texts=False):
+    """
+    Construye la base de datos para un país (CLI: imprime el avance).
+
+    Con profile='mobile' deriva ademas la DB de la app en build/mobile/
+    (db_profiles.py); con check_budget, devuelve False si se pasa del
+    presupuesto de tamano. Con compress_texts, full_text se guarda
+    comprimido con un diccionario compartido (text_codec.py).
+    """
     country_dir = DATA_DIR / country_code
     
     if not country_dir.exists():
@@ -359,8 +837,8 @@ def build_country(country_code, validate_only=False):
     
     # Cargar metadata
     metadata = load_json(country_dir / "metadata.json")
+    metadata = metadata[0] if metadata else {}
     if metadata:
-        metadata = metadata[0]
         print(f"\n{'='*50}")
         print(f"País: {metadata.get('country_name', country_code)}")
         print(f"Última verificación: {metadata.get('last_verified', 'N/A')}")
@@ -373,61 +851,15 @@ def build_country(country_code, validate_only=False):
     # Crear directorio de build
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     db_path = OUTPUT_DIR / f"truths_and_rights_{country_code.lower()}.db"
-    
-    if not validate_only:
-        # Eliminar DB anterior
-        if db_path.exists():
-            db_path.unlink()
-        
-        conn = sqlite3.connect(str(db_path))
-        load_schema(conn)
-    else:
-        conn = sqlite3.connect(":memory:")
-        load_schema(conn)
-    
-    # Cargar e insertar datos
-    print("\nCargando datos...")
-    
-    # Contexts
-    contexts = load_json(country_dir / "contexts" / "contexts.json")
-    insert_contexts(conn, contexts)
-
-    # Sources (buscar todos los JSON en sources/)
-    sources_dir = country_dir / "sources"
-    all_sources = []
-    if sources_dir.exists():
-        for f in sources_dir.glob("*.json"):
-            all_sources.extend(load_json(f))
-    insert_sources(conn, all_sources, country_code)
-
-    # Rights
-    rights = load_json(country_dir / "rights" / "rights.json")
-    insert_rights(conn, rights)
-
-    # Actions
-    actions = load_json(country_dir / "actions" / "actions.json")
-    insert_actions(conn, actions)
-
-    # Contacts
-    contacts = load_json(country_dir / "contacts" / "emergency_contacts.json")
-    insert_contacts(conn, contacts)
-
-    # Situations (buscar todos los JSON en situations/)
-    situations_dir = country_dir / "situations"
-    all_situations = []
-    if situations_dir.exists():
-        for f in situations_dir.glob("*.json"):
-            all_situations.extend(load_json(f))
-    insert_situations(conn, all_situations)
-
-    # Time limits (extraidos de las situaciones)
-    insert_time_limits(conn, all_situations)
-
-    # Myths
-    myths = load_json(country_dir / "myths" / "myths.json")
-    insert_myths(conn, myths)
-    
-    conn.commit()
+
+    target = db_path
+    if validate_only:
+        # Se construye igual, en un archivo temporal que se borra al final
+        scratch = tempfile.TemporaryDirectory(prefix='validate_', dir=OUTPUT_DIR)
+        target = sqlite3.connect(str(Path(scratch.name) / db_path.name))
+    with span('build_country', country=country_code, profile=profile):
+        conn, stats = build_database(country_code, target, compress_texts=compress_texts)
+    print_build_stats(stats)
     
     # Stats
     cursor = conn.cursor()
@@ -442,36 +874,69 @@ def build_country(country_code, validate_only=False):
             print(f"  {table}: {count} registros")
         except:
             print(f"  {table}: tabla vacía")
-    
+
     conn.close()
+    if validate_only:
+        scratch.cleanup()
     
     if not validate_only:
         print(f"\n✓ Base de datos generada: {db_path}")
         print(f"  Tamaño: {db_path.stat().st_size / 1024:.1f} KB")
-    
-    return True
+        if stats.index_path:
+            print(f"✓ Índice de búsqueda: {stats.index_path} ({stats.index_path.stat().st_size / 1024:.1f} KB)")
+        print(f"  Build ID: {stats.build_id}")
+
+    if profile == 'mobile' and not validate_only:
+        with span('mobile_profile') as s:
+            mobile_path, texts_path = build_mobile_db(db_path, OUTPUT_DIR / "mobile")
+            s.add(bytes=file_bytes(mobile_path, texts_path))
+        print(f"\n✓ DB mobile: {mobile_path}")
+        print(f"✓ Textos legales (ATTACH bajo demanda): {texts_path}")
+        within_budget = size_report(mobile_path)
+        if check_budget and not within_budget:
+            return False
 
+    return True
 
 def main():
     parser = argparse.ArgumentParser(description='Build Truths and Rights database')
     parser.add_argument('--country', type=str, help='Country code (e.g., PE)')
     parser.add_argument('--validate', action='store_true', help='Validate only, do not build')
+    parser.add_argument('--profile', choices=PROFILES, default='desktop',
+                        help='mobile: ademas genera la DB liviana de la app en build/mobile/')
+    parser.add_argument('--check-budget', action='store_true',
+                        help='Con --profile mobile, salir con error si el asset supera el presupuesto')
+    parser.add_argument('--compress-texts', action='store_true',
+                        help='Comprimir legal_sources.full_text con un diccionario compartido')
+    parser.add_argument('--trace', metavar='OUT.json',
+                        help='Guardar trazas por etapa (formato Chrome) e imprimir un resumen')
     args = parser.parse_args()
+    if args.trace:
+        start_tracing('build_db')
     
     print("🛡️  Truths and Rights — Database Builder")
     print(f"   Timestamp: {datetime.now().isoformat()}")
     
+    ok = True
     if args.country:
-        build_country(args.country.upper(), args.validate)
+        ok = build_country(args.country.upper(), args.validate, args.profile, args.check_budget,
+                           args.compress_texts)
     else:
         # Build all countries
         if DATA_DIR.exists():
             countries = [d.name for d in DATA_DIR.iterdir() if d.is_dir()]
             for country in sorted(countries):
-                build_country(country, args.validate)
+                ok &= build_country(country, args.validate, args.profile, args.check_budget,
+                                    args.compress_texts)
         else:
             print(f"ERROR: No existe directorio de datos: {DATA_DIR}")
 
+    if args.trace:
+        finish_tracing(args.trace)
+
+    if not ok:
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+Truths and Rights — Tarjetas de respuesta
+Respuestas pre-renderizadas por (situacion, contexto) que build_db.py
+guarda en la tabla answer_cards.
+
+Cada tarjeta existe en varios formatos:
+    json      estructura lista para pintar (app mobile, API)
+    text      texto plano
+    markdown  para el sitio, issues o documentacion
+    ansi      texto con colores para la terminal (lo que muestra cli.py)
+
+Solo se guarda json (STORED_CARD_FORMATS): los otros se pintan desde el
+json en decenas de microsegundos y guardarlos cuadruplicaba la tabla.
+Mostrar una respuesta es entonces una lectura por clave primaria, sin
+joins:
+
+    from cards import get_card
+    print(get_card("police_id_check", fmt="ansi"))
+
+Uso directo:
+    python cards.py police_id_check [contexto] [formato]
+"""
+
+import sys
+
+CARD_FORMATS = ('json', 'text', 'markdown', 'ansi')
+STORED_CARD_FORMATS = ('json',)
+CARD_VERSION = 1
+DEFAULT_CONTEXT = 'normal'
+
+
+# --- Colores para terminal ---
+
+class Color:
+    BOLD = '\033[1m'
+    DIM = '\033[2m'
+    RED = '\033[91m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    BLUE = '\033[94m'
+    CYAN = '\033[96m'
+    WHITE = '\033[97m'
+    RESET = '\033[0m'
+
+
+ACTION_LABELS = {
+    'decir': 'DECIR',
+    'hacer': 'HACER',
+    'no_hacer': 'NO HACER',
+    'grabar': 'GRABAR',
+    'llamar': 'LLAMAR',
+    'documentar': 'DOCUMENTAR',
+}
+
+
+# ============================================================
+# DATOS DE LA TARJETA
+# ============================================================
+
+def _rows(conn, sql, params):
+    cur = conn.execute(sql, params)
+    names = [d[0] for d in cur.description]
+    return [dict(zip(names, row)) for row in cur.fetchall()]
+
+
+def _hours_label(hours):
+    return f"{int(hours)} horas" if hours == int(hours) else f"{hours} horas"
+
+
+def _load_matrix(conn):
+    from rights_matrix import RightsMatrix, compute_matrix
+    import sqlite3
+    try:
+        return RightsMatrix.from_db(conn)
+    except sqlite3.OperationalError:
+        return RightsMatrix(*compute_matrix(conn))
+
+
+def collect_card(conn, situation_id, context_id=DEFAULT_CONTEXT, matrix=None):
+    """
+    Arma la tarjeta estructurada de una situacion en un contexto.
+
+    Los derechos que aplican y los suspendidos salen de la matriz de
+    derechos efectivos (rights_matrix.py). Las notas de emergencia son las
+    de las filas fuera de 'normal' (en la tarjeta normal, las de todos los
+    contextos; en la de un contexto, las suyas).
+
+    Returns:
+        dict serializable a JSON, o None si la situacion no existe
+    """
+    situation = _rows(conn, """
+        SELECT id, title, description, severity, category, icon
+        FROM situations WHERE id = ?
+    """, (situation_id,))
+    if not situation:
+        return None
+    context = _rows(conn, "SELECT id, name, context_type FROM contexts WHERE id = ?", (context_id,))
+    if matrix is None:
+        matrix = _load_matrix(conn)
+
+    rights_rows = _rows(conn, """
+        SELECT r.id, r.title, r.description, r.legal_basis, r.never_suspended,
+               sr.context_id, sr.applies, sr.notes
+        FROM situation_rights sr
+        JOIN rights r ON sr.right_id = r.id
+        WHERE sr.situation_id = ?
+        ORDER BY sr.right_order, sr.right_id
+    """, (situation_id,))
+
+    # Filas de 'normal' primero (su nota es la que se muestra), luego las
+    # que solo existen en el contexto
+    rights, suspended = {}, {}
+    for ctx in dict.fromkeys((DEFAULT_CONTEXT, context_id)):
+        for r in rights_rows:
+            if r['context_id'] != ctx or r['id'] in rights or r['id'] in suspended:
+                continue
+            if matrix.is_suspended(situation_id, context_id, r['id']):
+                suspended[r['id']] = {'id': r['id'], 'title': r['title']}
+            elif matrix.applies(situation_id, context_id, r['id']):
+                rights[r['id']] = {
+                    'id': r['id'],
+                    'title': r['title'],
+                    'description': r['description'],
+                    'legal_basis': r['legal_basis'],
+                    'never_suspended': bool(r['never_suspended']),
+                    'notes': r['notes'],
+                }
+
+    emergency_notes = []
+    for r in rights_rows:
+        if r['context_id'] == DEFAULT_CONTEXT:
+            continue
+        if context_id != DEFAULT_CONTEXT and r['context_id'] != context_id:
+            continue
+        if r['notes'] and r['notes'] not in emergency_notes:
+            emergency_notes.append(r['notes'])
+
+    actions = {}
+    for a in _rows(conn, """
+        SELECT a.id, a.action_type, a.title, a.description, a.script, a.warning,
+               sa.step_order, sa.context_id, sa.is_available
+        FROM situation_actions sa
+        JOIN actions a ON sa.action_id = a.id
+        WHERE sa.situation_id = ? AND sa.context_id IN (?, ?)
+        ORDER BY sa.step_order
+    """, (situation_id, DEFAULT_CONTEXT, context_id)):
+        if a['id'] in actions and a['context_id'] == DEFAULT_CONTEXT:
+            continue
+        actions[a['id']] = a
+    steps = [
+        {
+            'step': a['step_order'],
+            'action_type': a['action_type'],
+            'label': ACTION_LABELS.get(a['action_type'], a['action_type'].upper()),
+            'title': a['title'],
+            'description': a['description'],
+            'script': a['script'],
+            'warning': a['warning'],
+        }
+        for a in sorted(actions.values(), key=lambda a: a['step_order'])
+        if a['is_available']
+    ]
+
+    time_limits = []
+    for tl in _rows(conn, """
+        SELECT description, max_hours, max_hours_emergency, applies_to, after_expiry_action
+        FROM time_limits WHERE situation_id = ?
+    """, (situation_id,)):
+        tl['max_label'] = _hours_label(tl['max_hours'])
+        tl['emergency_label'] = None
+        if tl['max_hours_emergency'] and tl['max_hours_emergency'] != tl['max_hours']:
+            tl['emergency_label'] = _hours_label(tl['max_hours_emergency'])
+        time_limits.append(tl)
+
+    contacts = _rows(conn, """
+        SELECT ec.id, ec.institution, ec.description, ec.phone, ec.whatsapp,
+               ec.website, ec.available_hours, ec.is_free
+        FROM situation_contacts sc
+        JOIN emergency_contacts ec ON sc.contact_id = ec.id
+        WHERE sc.situation_id = ?
+        ORDER BY sc.priority
+    """, (situation_id,))
+    for ct in contacts:
+        ct['is_free'] = bool(ct['is_free'])
+
+    return {
+        'version': CARD_VERSION,
+        'situation': situation[0],
+        'context': context[0] if context else {'id': context_id, 'name': context_id, 'context_type': None},
+        'rights': list(rights.values()),
+        'suspended_rights': list(suspended.values()),
+        'emergency_notes': emergency_notes,
+        'actions': steps,
+        'time_limits': time_limits,
+        'contacts': contacts,
+    }
+
+
+# ============================================================
+# RENDERIZADO
+# ============================================================
+
+def _terminal_lines(card, paint):
+    """Cuerpo de la respuesta en la terminal (text y ansi difieren solo en paint)."""
+    sep = '-' * 60
+    lines = []
+
+    def section(title):
+        lines.append('')
+        lines.append(paint(f" {title} ", Color.BOLD))
+        lines.append(paint(sep, Color.DIM))
+
+    if card['rights'] or card['emergency_notes'] or card['suspended_rights']:
+        section('TUS DERECHOS')
+        for r in card['rights']:
+            absolute = paint(" [NUNCA SE SUSPENDE]", Color.GREEN) if r['never_suspended'] else ''
+            lines.append(f"\n  {paint(r['title'], Color.CYAN)}{absolute}")
+            lines.append(f"  {r['description']}")
+            lines.append(f"  {paint('Base legal:', Color.DIM)} {r['legal_basis']}")
+            if r['notes']:
+                lines.append(f"  {paint('Nota:', Color.YELLOW)} {r['notes']}")
+        if card['emergency_notes']:
+            lines.append(f"\n  {paint('En estado de emergencia:', Color.YELLOW)}")
+            lines.extend(f"    - {note}" for note in card['emergency_notes'])
+        if card['suspended_rights']:
+            lines.append(f"\n  {paint('Suspendidos en este contexto:', Color.RED)}")
+            lines.extend(f"    - {r['title']}" for r in card['suspended_rights'])
+
+    if card['actions']:
+        section('QUE HACER (PASO A PASO)')
+        for a in card['actions']:
+            label_color = Color.RED if a['action_type'] == 'no_hacer' else Color.GREEN
+            step = paint(f"Paso {a['step']}", Color.BOLD)
+            lines.append(f"\n  {step} [{paint(a['label'], label_color)}]")
+            lines.append(f"  {paint(a['title'], Color.CYAN)}")
+            lines.append(f"  {a['description']}")
+            if a['script']:
+                lines.append(f"\n  {paint('Texto sugerido:', Color.YELLOW)}")
+                lines.append(f"  \"{a['script']}\"")
+            if a['warning']:
+                lines.append(f"\n  {paint('Advertencia:', Color.RED)} {a['warning']}")
+
+    if card['time_limits']:
+        section('LIMITES DE TIEMPO')
+        for tl in card['time_limits']:
+            lines.append(f"\n  {paint(tl['description'], Color.CYAN)}")
+            lines.append(f"  Maximo: {paint(tl['max_label'], Color.RED)}")
+            if tl['emergency_label']:
+                lines.append(f"  En emergencia: {paint(tl['emergency_label'], Color.YELLOW)}")
+            if tl['applies_to'] != 'todos':
+                lines.append(f"  Aplica a: {tl['applies_to']}")
+            lines.append(f"  {paint('Si se excede:', Color.RED)} {tl['after_expiry_action']}")
+
+    if card['contacts']:
+        section('A QUIEN LLAMAR')
+        for ct in card['contacts']:
+            lines.append(f"\n  {paint(ct['institution'], Color.CYAN)}")
+            lines.append(f"  {ct['description']}")
+            if ct['phone']:
+                lines.append(f"  Tel: {paint(ct['phone'], Color.GREEN)}")
+            if ct['whatsapp']:
+                lines.append(f"  WhatsApp: {paint(ct['whatsapp'], Color.GREEN)}")
+            if ct['website']:
+                lines.append(f"  Web: {ct['website']}")
+            free_label = "Gratuito" if ct['is_free'] else "De pago"
+            lines.append(f"  {free_label} | {ct['available_hours']}")
+
+    return lines
+
+
+def render_ansi(card):
+    return '\n'.join(_terminal_lines(card, lambda text, color: f"{color}{text}{Color.RESET}"))
+
+
+def render_text(card):
+    return '\n'.join(_terminal_lines(card, lambda text, color: text))
+
+
+def render_markdown(card):
+    situation = card['situation']
+    lines = [f"## {situation['title']}", '', situation['description']]
+    if card['context']['id'] != DEFAULT_CONTEXT:
+        lines += ['', f"> Contexto: **{card['context']['name']}**"]
+
+    if card['rights'] or card['emergency_notes'] or card['suspended_rights']:
+        lines += ['', '### Tus derechos', '']
+        for r in card['rights']:
+            badge = ' — *nunca se suspende*' if r['never_suspended'] else ''
+            lines.append(f"- **{r['title']}**{badge}  ")
+            lines.append(f"  {r['description']}  ")
+            lines.append(f"  Base legal: {r['legal_basis']}")
+            if r['notes']:
+                lines[-1] += '  '
+                lines.append(f"  Nota: {r['notes']}")
+        if card['emergency_notes']:
+            lines += ['', '**En estado de emergencia:**', '']
+            lines.extend(f"- {note}" for note in card['emergency_notes'])
+        if card['suspended_rights']:
+            lines += ['', '**Suspendidos en este contexto:**', '']
+            lines.extend(f"- ~~{r['title']}~~" for r in card['suspended_rights'])
+
+    if card['actions']:
+        lines += ['', '### Qué hacer (paso a paso)', '']
+        for a in card['actions']:
+            lines.append(f"{a['step']}. **[{a['label']}] {a['title']}**  ")
+            lines.append(f"   {a['description']}")
+            if a['script']:
+                lines.append(f"   > \"{a['script']}\"")
+            if a['warning']:
+                lines.append(f"   ⚠️ {a['warning']}")
+
+    if card['time_limits']:
+        lines += ['', '### Límites de tiempo', '']
+        for tl in card['time_limits']:
+            extra = f" (en emergencia: {tl['emergency_label']})" if tl['emergency_label'] else ''
+            lines.append(f"- **{tl['max_label']}**{extra} — {tl['description']}. "
+                         f"Si se excede: {tl['after_expiry_action']}")
+
+    if card['contacts']:
+        lines += ['', '### A quién llamar', '']
+        for ct in card['contacts']:
+            phone = f" — {ct['phone']}" if ct['phone'] else ''
+            lines.append(f"- **{ct['institution']}**{phone}: {ct['description']}")
+
+    return '\n'.join(lines) + '\n'
+
+
+def render_card(card, fmt):
+    """Renderiza una tarjeta estructurada en uno de CARD_FORMATS."""
+    if fmt == 'json':
+        import json
+        return json.dumps(card, ensure_ascii=False, separators=(',', ':'))
+    renderers = {'text': render_text, 'markdown': render_markdown, 'ansi': render_ansi}
+    if fmt not in renderers:
+        raise ValueError(f"Formato de tarjeta desconocido: {fmt}")
+    return renderers[fmt](card)
+
+
+# ============================================================
+# BUILD Y LECTURA
+# ============================================================
+
+def write_cards(conn, formats=STORED_CARD_FORMATS):
+    """
+    Pre-renderiza todas las (situacion, contexto) en answer_cards.
+
+    Returns:
+        Numero de tarjetas (pares situacion/contexto) generadas
+    """
+    situations = [row[0] for row in conn.execute("SELECT id FROM situations ORDER BY id")]
+    contexts = [row[0] for row in conn.execute("SELECT id FROM contexts ORDER BY id")]
+    if DEFAULT_CONTEXT not in contexts:
+        contexts.insert(0, DEFAULT_CONTEXT)
+
+    matrix = _load_matrix(conn)
+    conn.execute("DELETE FROM answer_cards")
+    count = 0
+    for situation_id in situations:
+        for context_id in contexts:
+            card = collect_card(conn, situation_id, context_id, matrix)
+            conn.executemany(
+                "INSERT INTO answer_cards (situation_id, context_id, format, body) VALUES (?, ?, ?, ?)",
+                [(situation_id, context_id, fmt, render_card(card, fmt)) for fmt in formats]
+            )
+            count += 1
+    return count
+
+
+def read_card(conn, situation_id, context_id=DEFAULT_CONTEXT, fmt='json'):
+    """
+    Lee una tarjeta pre-renderizada (una lectura por clave primaria).
+
+    Un formato que no esta guardado se pinta desde la tarjeta json. Si la
+    DB no tiene la tabla (build anterior) o falta la fila, la arma y
+    renderiza en el momento. Devuelve None si la situacion no existe.
+    """
+    import json
+    import sqlite3
+    if fmt not in CARD_FORMATS:
+        raise ValueError(f"Formato de tarjeta desconocido: {fmt}")
+    try:
+        rows = dict(conn.execute(
+            "SELECT format, body FROM answer_cards "
+            "WHERE situation_id = ? AND context_id = ? AND format IN (?, 'json')",
+            (situation_id, context_id, fmt)
+        ).fetchall())
+    except sqlite3.OperationalError:
+        rows = {}
+    if fmt in rows:
+        return rows[fmt]
+    if 'json' in rows:
+        return render_card(json.loads(rows['json']), fmt)
+    card = collect_card(conn, situation_id, context_id)
+    return render_card(card, fmt) if card else None
+
+
+def get_card(situation_id, context_id=DEFAULT_CONTEXT, fmt='json', db_path=None):
+    """Tarjeta de una situacion abriendo la DB (por defecto la de search.DB_PATH)."""
+    import sqlite3
+    if db_path is None:
+        from search import DB_PATH
+        db_path = DB_PATH
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return read_card(conn, situation_id, context_id, fmt)
+    finally:
+        conn.close()
+
+
+# --- Ejecucion directa ---
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python cards.py <situation_id> [contexto] [json|text|markdown|ansi]")
+        sys.exit(1)
+
+    situation_id = sys.argv[1]
+    context_id = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_CONTEXT
+    fmt = sys.argv[3] if len(sys.argv) > 3 else 'text'
+    body = get_card(situation_id, context_id, fmt)
+    if body is None:
+        print(f"No existe la situacion: {situation_id}")
+        sys.exit(1)
+    print(body)
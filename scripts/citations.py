@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Truths and Rights — Grafo de citas
+Que contenido depende de cada fuente legal.
+
+Cuando el scraper marca una fuente como modificada hay que revisar todo lo
+que la cita: derechos, las situaciones que muestran esos derechos, plazos,
+mitos y contextos. build_db.py precalcula ese cierre en source_citations
+(clave primaria por source_id), asi que la pregunta es un rango del indice:
+
+    fuente ── right_sources ──> derecho ── situation_rights ──> situacion
+    fuente ── time_limits.source_id ──> plazo ──> situacion
+    fuente ── myth_sources ──> mito
+    fuente ── contexts.source_id ──> contexto
+
+Uso como modulo:
+    from citations import load_citation_graph
+    graph = load_citation_graph()
+    graph.impact(['const_art2'])   # {'right': [...], 'situation': [...], ...}
+
+Uso directo:
+    python citations.py const_art2 [otra_fuente ...]
+"""
+
+import sys
+
+# Orden en que se listan los tipos de contenido
+TARGET_TYPES = ('right', 'situation', 'time_limit', 'myth', 'context')
+
+# Tabla y columna de titulo de cada tipo (para los reportes)
+_TITLES = {
+    'right': "SELECT id, title FROM rights",
+    'situation': "SELECT id, title FROM situations",
+    'time_limit': "SELECT id, description FROM time_limits",
+    'myth': "SELECT id, myth FROM myths",
+    'context': "SELECT id, name FROM contexts",
+}
+
+
+def compute_citations(conn):
+    """
+    Aristas del grafo desde las tablas base.
+
+    Returns:
+        Lista ordenada de (source_id, target_type, target_id, via)
+    """
+    edges = set()
+
+    right_sources = conn.execute("SELECT source_id, right_id FROM right_sources").fetchall()
+    situations_by_right = {}
+    for situation_id, right_id in conn.execute(
+        "SELECT DISTINCT situation_id, right_id FROM situation_rights"
+    ):
+        situations_by_right.setdefault(right_id, []).append(situation_id)
+
+    for source_id, right_id in right_sources:
+        edges.add((source_id, 'right', right_id, ''))
+        for situation_id in situations_by_right.get(right_id, ()):
+            edges.add((source_id, 'situation', situation_id, f'right:{right_id}'))
+
+    for source_id, limit_id, situation_id in conn.execute(
+        "SELECT source_id, id, situation_id FROM time_limits WHERE source_id IS NOT NULL"
+    ):
+        edges.add((source_id, 'time_limit', limit_id, ''))
+        edges.add((source_id, 'situation', situation_id, f'time_limit:{limit_id}'))
+
+    for source_id, myth_id in conn.execute("SELECT source_id, myth_id FROM myth_sources"):
+        edges.add((source_id, 'myth', myth_id, ''))
+
+    for source_id, context_id in conn.execute(
+        "SELECT source_id, id FROM contexts WHERE source_id IS NOT NULL"
+    ):
+        edges.add((source_id, 'context', context_id, ''))
+
+    return sorted(edges)
+
+
+def write_citations(conn):
+    """
+    Guarda el grafo en source_citations.
+
+    Returns:
+        Numero de aristas guardadas
+    """
+    edges = compute_citations(conn)
+    conn.execute("DELETE FROM source_citations")
+    conn.executemany(
+        "INSERT INTO source_citations (source_id, target_type, target_id, via) VALUES (?, ?, ?, ?)",
+        edges
+    )
+    return len(edges)
+
+
+def impact_query(conn, source_ids):
+    """
+    Contenido que cita alguna de las fuentes, directo desde la DB (un rango
+    de la clave primaria de source_citations por fuente).
+
+    Returns:
+        dict target_type -> lista ordenada de ids
+    """
+    impact = {kind: set() for kind in TARGET_TYPES}
+    for source_id in source_ids:
+        for kind, target_id in conn.execute(
+            "SELECT DISTINCT target_type, target_id FROM source_citations WHERE source_id = ?",
+            (source_id,)
+        ):
+            impact.setdefault(kind, set()).add(target_id)
+    return {kind: sorted(ids) for kind, ids in impact.items()}
+
+
+class CitationGraph:
+    """Grafo de citas en memoria: fuente -> tipo -> ids, y titulos para reportes."""
+
+    def __init__(self, edges, titles=None):
+        self._by_source = {}
+        self._via = {}
+        for source_id, kind, target_id, via in edges:
+            self._by_source.setdefault(source_id, {}).setdefault(kind, set()).add(target_id)
+            if via:
+                self._via.setdefault((source_id, kind, target_id), []).append(via)
+        self.titles = titles or {}
+
+    @classmethod
+    def from_db(cls, conn):
+        import sqlite3
+
+        try:
+            edges = conn.execute(
+                "SELECT source_id, target_type, target_id, via FROM source_citations"
+            ).fetchall()
+        except sqlite3.OperationalError:
+            # DB anterior al grafo: se calcula en el momento
+            edges = compute_citations(conn)
+        titles = {}
+        for kind, sql in _TITLES.items():
+            titles[kind] = dict(conn.execute(sql).fetchall())
+        return cls(edges, titles)
+
+    @property
+    def sources(self):
+        """Fuentes que alguien cita."""
+        return sorted(self._by_source)
+
+    def cited_by(self, source_id):
+        """dict target_type -> ids ordenados del contenido que cita la fuente."""
+        by_kind = self._by_source.get(source_id, {})
+        return {kind: sorted(by_kind.get(kind, ())) for kind in TARGET_TYPES}
+
+    def via(self, source_id, kind, target_id):
+        """Por donde llega la fuente al contenido ('right:<id>', ...); [] si es directa."""
+        return sorted(self._via.get((source_id, kind, target_id), []))
+
+    def impact(self, source_ids):
+        """Union de cited_by() para varias fuentes."""
+        impact = {kind: set() for kind in TARGET_TYPES}
+        for source_id in source_ids:
+            for kind, ids in self._by_source.get(source_id, {}).items():
+                impact[kind].update(ids)
+        return {kind: sorted(ids) for kind, ids in impact.items()}
+
+    def describe(self, impact):
+        """Agrega titulos: dict target_type -> [{'id', 'title'}]."""
+        return {
+            kind: [{'id': i, 'title': self.titles.get(kind, {}).get(i, i)} for i in ids]
+            for kind, ids in impact.items()
+        }
+
+
+def load_citation_graph(db_path=None):
+    """Carga el grafo de la DB (cacheado por build_id)."""
+    from search import cached_by_build_id
+    return cached_by_build_id(db_path, CitationGraph.from_db)
+
+
+# --- Ejecucion directa ---
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python citations.py <source_id> [source_id ...]")
+        sys.exit(1)
+
+    graph = load_citation_graph()
+    described = graph.describe(graph.impact(sys.argv[1:]))
+    for kind in TARGET_TYPES:
+        if described[kind]:
+            print(f"{kind} ({len(described[kind])}):")
+            for item in described[kind]:
+                print(f"  {item['id']}: {item['title']}")
@@ -7,34 +7,36 @@ Uso:
     python cli.py "me quieren revisar el celular"
     python cli.py "me encuentran con marihuana"
     python cli.py                                   # modo interactivo
+    python cli.py --serve                           # daemon de busqueda (socket Unix)
+    python cli.py --batch < consultas.txt > out.ndjson   # una consulta por linea
+
+Palabras que empiezan con '-' y no son opciones (ej: -no me dejan ir) van a
+la consulta; despues de '--' todo es consulta.
+
+Si hay un daemon corriendo (python cli.py --serve), las consultas lo usan
+automaticamente; si no, se busca en el mismo proceso.
+
+En --batch cada linea de stdin produce una linea JSON en stdout (mismo
+orden, tambien para lineas vacias):
+    {"query": "...", "best": {...} | null, "alternatives": [...], "details": {...}}
+"details" solo aparece con --details.
 """
 
 import io
+import os
 import sys
-from pathlib import Path
-
-# Fix encoding on Windows consoles
-if sys.stdout.encoding and sys.stdout.encoding.lower() != 'utf-8':
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
-# Agregar scripts/ al path para importar search
-sys.path.insert(0, str(Path(__file__).parent))
-from search import search_situation, get_situation_details
+# Agregar scripts/ al path para importar search. El resto de los imports
+# (argparse, search, search_daemon...) se hace donde se usa: importar el CLI
+# no hace trabajo y cada modo paga solo lo que necesita.
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from cards import Color
 
-# --- Colores para terminal ---
-
-class Color:
-    BOLD = '\033[1m'
-    DIM = '\033[2m'
-    RED = '\033[91m'
-    GREEN = '\033[92m'
-    YELLOW = '\033[93m'
-    BLUE = '\033[94m'
-    CYAN = '\033[96m'
-    WHITE = '\033[97m'
-    RESET = '\033[0m'
+# --batch: lineas de salida acumuladas antes de cada escritura/flush y
+# respuestas ya serializadas que se recuerdan (los logs repiten mucho)
+BATCH_CHUNK = 1000
+BATCH_CACHE_SIZE = 65536
 
 
 def c(text, color):
@@ -73,133 +75,6 @@ def print_situation(result):
     print(f"  Relevancia: {result['score']:.0%}")
 
 
-def print_rights(rights):
-    """Imprime derechos aplicables."""
-    if not rights:
-        return
-
-    print()
-    print(c(" TUS DERECHOS ", Color.BOLD))
-    print(c(separator(), Color.DIM))
-
-    # Agrupar por contexto, mostrar primero 'normal'
-    normal_rights = [r for r in rights if r['context_id'] == 'normal' and r['applies']]
-    emergency_rights = [r for r in rights if r['context_id'] != 'normal']
-
-    seen = set()
-    for r in normal_rights:
-        if r['id'] in seen:
-            continue
-        seen.add(r['id'])
-
-        absolute = ""
-        if r['never_suspended']:
-            absolute = c(" [NUNCA SE SUSPENDE]", Color.GREEN)
-
-        print(f"\n  {c(r['title'], Color.CYAN)}{absolute}")
-        print(f"  {r['description']}")
-        print(f"  {c('Base legal:', Color.DIM)} {r['legal_basis']}")
-
-        if r['notes']:
-            print(f"  {c('Nota:', Color.YELLOW)} {r['notes']}")
-
-    # Notas de estado de emergencia
-    emergency_notes = []
-    for r in emergency_rights:
-        if r['notes'] and r['notes'] not in emergency_notes:
-            emergency_notes.append(r['notes'])
-
-    if emergency_notes:
-        print(f"\n  {c('En estado de emergencia:', Color.YELLOW)}")
-        for note in emergency_notes:
-            print(f"    - {note}")
-
-
-def print_actions(actions):
-    """Imprime acciones paso a paso."""
-    if not actions:
-        return
-
-    print()
-    print(c(" QUE HACER (PASO A PASO) ", Color.BOLD))
-    print(c(separator(), Color.DIM))
-
-    for a in actions:
-        type_labels = {
-            'decir': 'DECIR',
-            'hacer': 'HACER',
-            'no_hacer': 'NO HACER',
-            'grabar': 'GRABAR',
-            'llamar': 'LLAMAR',
-            'documentar': 'DOCUMENTAR',
-        }
-        type_label = type_labels.get(a['action_type'], a['action_type'].upper())
-        type_color = Color.RED if a['action_type'] == 'no_hacer' else Color.GREEN
-
-        step = a['step_order']
-        print(f"\n  {c(f'Paso {step}', Color.BOLD)} [{c(type_label, type_color)}]")
-        print(f"  {c(a['title'], Color.CYAN)}")
-        print(f"  {a['description']}")
-
-        if a['script']:
-            print(f"\n  {c('Texto sugerido:', Color.YELLOW)}")
-            print(f"  \"{a['script']}\"")
-
-        if a['warning']:
-            print(f"\n  {c('Advertencia:', Color.RED)} {a['warning']}")
-
-
-def print_time_limits(time_limits):
-    """Imprime limites de tiempo."""
-    if not time_limits:
-        return
-
-    print()
-    print(c(" LIMITES DE TIEMPO ", Color.BOLD))
-    print(c(separator(), Color.DIM))
-
-    for tl in time_limits:
-        hours = tl['max_hours']
-        label = f"{int(hours)} horas" if hours == int(hours) else f"{hours} horas"
-
-        print(f"\n  {c(tl['description'], Color.CYAN)}")
-        print(f"  Maximo: {c(label, Color.RED)}")
-
-        if tl['max_hours_emergency'] and tl['max_hours_emergency'] != hours:
-            e_hours = tl['max_hours_emergency']
-            e_label = f"{int(e_hours)} horas" if e_hours == int(e_hours) else f"{e_hours} horas"
-            print(f"  En emergencia: {c(e_label, Color.YELLOW)}")
-
-        if tl['applies_to'] != 'todos':
-            print(f"  Aplica a: {tl['applies_to']}")
-
-        print(f"  {c('Si se excede:', Color.RED)} {tl['after_expiry_action']}")
-
-
-def print_contacts(contacts):
-    """Imprime contactos de emergencia."""
-    if not contacts:
-        return
-
-    print()
-    print(c(" A QUIEN LLAMAR ", Color.BOLD))
-    print(c(separator(), Color.DIM))
-
-    for ct in contacts:
-        print(f"\n  {c(ct['institution'], Color.CYAN)}")
-        print(f"  {ct['description']}")
-
-        if ct['phone']:
-            print(f"  Tel: {c(ct['phone'], Color.GREEN)}")
-        if ct.get('whatsapp'):
-            print(f"  WhatsApp: {c(ct['whatsapp'], Color.GREEN)}")
-        if ct.get('website'):
-            print(f"  Web: {ct['website']}")
-
-        free_label = "Gratuito" if ct['is_free'] else "De pago"
-        print(f"  {free_label} | {ct['available_hours']}")
-
-
 def print_other_results(results):
     """Imprime otras situaciones posibles."""
     if len(results) <= 1:
@@ -222,12 +97,39 @@ def print_footer():
     print()
 
 
-def run_query(query):
+def fetch_answer(query, use_daemon=True, region=None):
+    """
+    Resultados de la consulta y tarjeta de respuesta (ansi) del mejor resultado.
+
+    Con `region`, la tarjeta es la del contexto vigente hoy en esa region
+    (context_resolver.py). Usa el daemon si esta corriendo; si no, busca en
+    este proceso.
+    """
+    if use_daemon:
+        import search_daemon
+        answer = search_daemon.query(query, card='ansi', region=region)
+        if answer is not None:
+            return answer
+
+    # Sin daemon: se importa el buscador recien aqui
+    from cards import get_card
+    from search import search_situation
+    results = search_situation(query)
+    if not results:
+        return results, None
+    context_id = 'normal'
+    if region:
+        from context_resolver import load_context_resolver
+        context_id = load_context_resolver().active_context_id(region)
+    return results, get_card(results[0]['situation_id'], context_id, fmt='ansi')
+
+
+def run_query(query, use_daemon=True, region=None):
     """Ejecuta una consulta y muestra resultados completos."""
     print_header()
     print(f"\n  Consulta: \"{c(query, Color.BOLD)}\"")
 
-    results = search_situation(query)
+    results, card = fetch_answer(query, use_daemon, region)
 
     if not results:
         print(f"\n  {c('No se encontraron situaciones relevantes.', Color.YELLOW)}")
@@ -241,19 +143,110 @@ def run_query(query):
     best = results[0]
     print_situation(best)
 
-    details = get_situation_details(best['situation_id'])
-    print_rights(details['rights'])
-    print_actions(details['actions'])
-    print_time_limits(details['time_limits'])
-    print_contacts(details['contacts'])
+    # Derechos, pasos, plazos y contactos vienen pre-renderizados (answer_cards)
+    if card:
+        print(card)
     print_other_results(results)
     print_footer()
 
 
-def interactive_mode():
+def run_batch(lines, out, db_path=None, limit=3, with_details=False, chunk_size=BATCH_CHUNK):
+    """
+    Modo batch: una consulta por linea -> una linea NDJSON por consulta.
+
+    Carga el indice una sola vez, serializa los detalles de cada situacion
+    una sola vez y recuerda la respuesta de cada consulta normalizada, asi
+    que el costo por linea repetida es un lookup y un json.dumps del texto.
+
+    Returns:
+        Dict con lines y matched
+    """
+    import json
+    import sqlite3
+    from search import (DB_PATH, QueryCache, get_situation_details,
+                        load_search_index, normalize, tokens_sin_stopwords)
+
+    db_path = db_path or DB_PATH
+    index = load_search_index(db_path)
+    answers = QueryCache(maxsize=BATCH_CACHE_SIZE)
+    details_json = {}
+    conn = sqlite3.connect(str(db_path)) if with_details else None
+
+    def answer_for(query_norm, query):
+        """Fragmento JSON con best/alternatives/details (sin la consulta)."""
+        results = index.search(query_norm, tokens_sin_stopwords(query), limit) if query_norm else []
+        best = results[0] if results else None
+        fragment = '"best": ' + json.dumps(best, ensure_ascii=False)
+        fragment += ', "alternatives": ' + json.dumps(results[1:], ensure_ascii=False)
+        if with_details:
+            sid = best['situation_id'] if best else None
+            if sid not in details_json:
+                details = get_situation_details(sid, conn=conn) if sid else None
+                details_json[sid] = json.dumps(details, ensure_ascii=False)
+            fragment += ', "details": ' + details_json[sid]
+        return fragment, best is not None
+
+    stats = {'lines': 0, 'matched': 0}
+    pending = []
+    try:
+        for line in lines:
+            query = line.rstrip('\r\n')
+            query_norm = normalize(query)
+            answer = answers.get(query_norm)
+            if answer is None:
+                answer = answer_for(query_norm, query)
+                answers.put(query_norm, answer)
+            fragment, matched = answer
+
+            pending.append('{"query": ' + json.dumps(query, ensure_ascii=False) + ', ' + fragment + '}\n')
+            stats['lines'] += 1
+            stats['matched'] += matched
+            if len(pending) >= chunk_size:
+                out.write(''.join(pending))
+                out.flush()
+                pending.clear()
+    finally:
+        if pending:
+            out.write(''.join(pending))
+            out.flush()
+        if conn is not None:
+            conn.close()
+    return stats
+
+
+def enable_autocomplete():
+    """Activa sugerencias con TAB en el modo interactivo (si hay readline)."""
+    try:
+        import readline
+    except ImportError:
+        return False
+
+    from autocomplete import load_autocompleter
+    try:
+        autocompleter = load_autocompleter()
+    except Exception:
+        return False
+
+    matches = []
+
+    def complete(text, state):
+        if state == 0:
+            matches[:] = [s['text'] for s in autocompleter.suggest(readline.get_line_buffer())]
+        return matches[state] if state < len(matches) else None
+
+    # La linea completa es el prefijo: las sugerencias son frases, no palabras
+    readline.set_completer_delims('')
+    readline.set_completer(complete)
+    readline.parse_and_bind('tab: complete')
+    return True
+
+
+def interactive_mode(use_daemon=True, region=None):
     """Modo interactivo: pregunta hasta que el usuario salga."""
     print_header()
     print(f"\n  {c('Modo interactivo', Color.BOLD)} — escribe tu situacion")
+    if enable_autocomplete():
+        print(f"  Presiona TAB para ver sugerencias.")
     print(f"  Escribe 'salir' para terminar.\n")
 
     while True:
@@ -268,17 +261,84 @@ def interactive_mode():
         if query.lower() in ('salir', 'exit', 'quit', 'q'):
             break
 
-        run_query(query)
+        run_query(query, use_daemon, region)
         msg = 'Escribe otra consulta o "salir" para terminar.'
         print(f"\n  {c(msg, Color.DIM)}\n")
 
 
+def fix_console_encoding():
+    """Fix encoding on Windows consoles."""
+    if sys.stdout.encoding and sys.stdout.encoding.lower() != 'utf-8':
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
+
+def parse_args(argv=None):
+    """
+    Opciones y consulta de la linea de comandos.
+
+    Como antes de argparse, un token con '-' que no es opcion es parte de
+    la consulta, en su lugar: se le antepone un espacio (argparse ya no lo
+    toma por opcion) y se vuelve a parsear.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Truths and Rights — CLI de consulta')
+    parser.add_argument('query', nargs='*',
+                        help="Consulta en lenguaje natural (despues de '--' todo es consulta)")
+    parser.add_argument('--serve', action='store_true',
+                        help='Arrancar el daemon de busqueda en un socket Unix')
+    parser.add_argument('--socket', type=str, default=None,
+                        help='Ruta del socket (default: build/search.sock o $TRUTHS_SOCKET)')
+    parser.add_argument('--no-daemon', action='store_true',
+                        help='Buscar siempre en este proceso')
+    parser.add_argument('--batch', action='store_true',
+                        help='Leer una consulta por linea de stdin y escribir NDJSON en stdout')
+    parser.add_argument('--details', action='store_true',
+                        help='En --batch, incluir derechos/acciones/contactos del mejor resultado')
+    parser.add_argument('--limit', type=int, default=3,
+                        help='En --batch, resultados por consulta (mejor + alternativas)')
+    parser.add_argument('--region', type=str, default=None,
+                        help='Region (ej: Callao): muestra los derechos del estado de emergencia vigente ahi')
+    if argv is None:
+        argv = sys.argv[1:]
+    # '--' se separa aca: parse_intermixed_args lo ignora y seguiria leyendo opciones
+    rest = []
+    if '--' in argv:
+        split = argv.index('--')
+        argv, rest = argv[:split], argv[split + 1:]
+    _, unknown = parser.parse_known_intermixed_args(argv)
+    dashed = {token for token in unknown if token.startswith('-')}
+    args = parser.parse_intermixed_args([' ' + t if t in dashed else t for t in argv])
+    args.query = ' '.join([token.strip() for token in args.query] + rest)
+    return args
+
+
 def main():
-    if len(sys.argv) > 1:
-        query = ' '.join(sys.argv[1:])
-        run_query(query)
+    fix_console_encoding()
+    args = parse_args()
+
+    if args.socket or args.serve:
+        import search_daemon
+        if args.socket:
+            os.environ[search_daemon.SOCKET_ENV] = args.socket
+        if args.serve:
+            sys.exit(search_daemon.serve())
+
+    if args.batch:
+        from search import DB_PATH
+        if not DB_PATH.exists():
+            print(f"ERROR: No se encontro la base de datos: {DB_PATH}", file=sys.stderr)
+            sys.exit(1)
+        lines = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', errors='replace')
+        stats = run_batch(lines, sys.stdout, limit=args.limit, with_details=args.details)
+        print(f"{stats['lines']} consultas, {stats['matched']} con resultado", file=sys.stderr)
+        return
+
+    if args.query:
+        run_query(args.query, not args.no_daemon, args.region)
     else:
-        interactive_mode()
+        interactive_mode(not args.no_daemon, args.region)
 
 
 if __name__ == "__main__":
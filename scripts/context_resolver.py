@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Truths and Rights — Resolver de contextos por region y fecha
+¿Hay un estado de emergencia vigente en Callao hoy?
+
+contexts.active_regions es un array JSON y is_currently_active un flag
+estatico: responder la pregunta obligaba a recorrer todos los contextos,
+parsear JSON y recalcular vencimientos a mano (scraper, sitio, app). Aca
+se hace una sola vez:
+
+    - Las regiones se normalizan ('Lima Metropolitana' -> 'lima_metropolitana')
+      y en la DB van a la tabla context_regions (sin filas = todo el pais).
+    - Por region, los intervalos [start_date, end_date] se parten en tramos
+      elementales ordenados; cada tramo guarda los contextos que lo cubren.
+      Una consulta es un bisect sobre los bordes: O(log n).
+    - end_date es inclusivo: el decreto rige todo ese dia.
+    - Un contexto sin fechas depende de is_currently_active.
+
+Lo usan scrape_official.py (--check-updates), generate_site.py (status.json)
+y la busqueda (cli.py --region, daemon).
+
+Uso como modulo:
+    from context_resolver import ContextResolver, load_context_resolver
+    resolver = load_context_resolver()
+    resolver.active_contexts('Callao', '2026-02-01')
+
+Uso directo:
+    python context_resolver.py [region] [YYYY-MM-DD]
+"""
+
+import sys
+import unicodedata
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+
+DEFAULT_CONTEXT = 'normal'
+# Dias antes del vencimiento en que un contexto pasa a 'expiring_soon'
+EXPIRY_WARNING_DAYS = 7
+# Clave de los contextos sin regiones (rigen en todo el pais)
+NATIONWIDE = '*'
+
+# Bordes para intervalos abiertos (fechas ISO: comparan como texto)
+_MIN_DAY = '0000-01-01'
+_MAX_DAY = '9999-12-31'
+
+
+def normalize_region(name):
+    """'Lima Metropolitana' -> 'lima_metropolitana' (sin tildes ni signos)."""
+    text = unicodedata.normalize('NFKD', str(name or ''))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    key = ''.join(ch if ch.isalnum() else ' ' for ch in text)
+    return '_'.join(key.split())
+
+
+def to_day(when=None):
+    """date, datetime o texto ISO -> 'YYYY-MM-DD' (None = hoy)."""
+    if when is None:
+        return date.today().isoformat()
+    if isinstance(when, datetime):
+        return when.date().isoformat()
+    if isinstance(when, date):
+        return when.isoformat()
+    return date.fromisoformat(str(when)[:10]).isoformat()
+
+
+def _next_day(day):
+    if day >= _MAX_DAY:
+        return _MAX_DAY
+    return (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+
+
+def context_interval(ctx):
+    """
+    Intervalo [inicio, fin) en dias ISO en que rige el contexto, o None.
+
+    Sin fechas, el contexto rige siempre si is_currently_active y nunca si no.
+    """
+    start, end = ctx.get('start_date'), ctx.get('end_date')
+    if not start and not end:
+        if ctx.get('is_currently_active'):
+            return _MIN_DAY, _MAX_DAY
+        return None
+    return to_day(start) if start else _MIN_DAY, _next_day(to_day(end)) if end else _MAX_DAY
+
+
+def expiry_status(ctx, when=None, warn_days=EXPIRY_WARNING_DAYS):
+    """
+    Estado de vigencia de un contexto en una fecha.
+
+    Returns:
+        (status, days_left): status es 'upcoming', 'active', 'expiring_soon',
+        'expired' o 'inactive' (sin fechas ni flag); days_left son los dias
+        hasta end_date (negativo si ya vencio, None si no tiene fin)
+    """
+    interval = context_interval(ctx)
+    if interval is None:
+        return 'inactive', None
+    day = to_day(when)
+    start, end = interval
+    days_left = None
+    if ctx.get('end_date'):
+        days_left = (date.fromisoformat(to_day(ctx['end_date'])) - date.fromisoformat(day)).days
+    if day < start:
+        return 'upcoming', days_left
+    if day >= end:
+        return 'expired', days_left
+    if days_left is not None and days_left <= warn_days:
+        return 'expiring_soon', days_left
+    return 'active', days_left
+
+
+class IntervalIndex:
+    """
+    Tramos elementales de un conjunto de intervalos [inicio, fin).
+
+    bounds[i] es el inicio del tramo i (que termina en bounds[i + 1]) y
+    active[i] los ids que lo cubren. stab(dia) = un bisect.
+
+    Se arma con un barrido por los bordes ordenados: en cada uno salen los
+    intervalos que terminan y entran los que empiezan.
+    """
+
+    def __init__(self, intervals):
+        # intervals: lista de (inicio, fin, id)
+        intervals = sorted(intervals)
+        self.bounds = sorted({b for start, end, _ in intervals for b in (start, end)})
+        starts, ends = {}, {}
+        for i, (start, end, _) in enumerate(intervals):
+            if start < end:
+                starts.setdefault(start, []).append(i)
+                ends.setdefault(end, []).append(i)
+        covering = set()
+        self.active = []
+        for bound in self.bounds:
+            covering.difference_update(ends.get(bound, ()))
+            covering.update(starts.get(bound, ()))
+            self.active.append(tuple(intervals[i][2] for i in sorted(covering)))
+
+    def __len__(self):
+        return len(self.bounds)
+
+    def stab(self, day):
+        """Ids de los intervalos que contienen `day` (por fecha de inicio)."""
+        i = bisect_right(self.bounds, day) - 1
+        return self.active[i] if i >= 0 else ()
+
+
+class ContextResolver:
+    """Contextos vigentes por (region, fecha) sobre un indice de intervalos por region."""
+
+    def __init__(self, contexts):
+        self.contexts = {ctx['id']: ctx for ctx in contexts}
+        self.region_names = {}
+        by_region = {NATIONWIDE: []}
+        everywhere = []
+        for ctx in contexts:
+            if ctx.get('context_type') == DEFAULT_CONTEXT or ctx['id'] == DEFAULT_CONTEXT:
+                continue
+            interval = context_interval(ctx)
+            if interval is None:
+                continue
+            entry = (interval[0], interval[1], ctx['id'])
+            everywhere.append(entry)
+            regions = ctx.get('active_regions') or []
+            for name in regions:
+                region = normalize_region(name)
+                self.region_names.setdefault(region, name)
+                by_region.setdefault(region, []).append(entry)
+            if not regions:
+                by_region[NATIONWIDE].append(entry)
+        self._everywhere = IntervalIndex(everywhere)
+        self._by_region = {region: IntervalIndex(entries) for region, entries in by_region.items()}
+
+    @classmethod
+    def from_db(cls, conn):
+        """Lee contexts + context_regions (o el JSON active_regions en DBs viejas)."""
+        import json
+        import sqlite3
+
+        columns = ('id', 'name', 'context_type', 'is_currently_active', 'decree_number',
+                   'start_date', 'end_date', 'active_regions')
+        contexts = [dict(zip(columns, row)) for row in conn.execute(
+            f"SELECT {', '.join(columns)} FROM contexts ORDER BY id"
+        )]
+        try:
+            regions = {}
+            for context_id, region_name in conn.execute(
+                "SELECT context_id, region_name FROM context_regions ORDER BY context_id, position"
+            ):
+                regions.setdefault(context_id, []).append(region_name)
+        except sqlite3.OperationalError:
+            regions = None
+        for ctx in contexts:
+            if regions is not None:
+                ctx['active_regions'] = regions.get(ctx['id'], [])
+            else:
+                ctx['active_regions'] = json.loads(ctx['active_regions'] or '[]')
+        return cls(contexts)
+
+    def active_ids(self, region=None, when=None):
+        """Ids de los contextos vigentes en la region (None = en alguna region)."""
+        day = to_day(when)
+        if region is None:
+            return self._everywhere.stab(day)
+        nationwide = self._by_region[NATIONWIDE].stab(day)
+        index = self._by_region.get(normalize_region(region))
+        local = index.stab(day) if index is not None else ()
+        if not nationwide:
+            return local
+        if not local:
+            return nationwide
+        return tuple(cid for cid in self._everywhere.stab(day) if cid in local or cid in nationwide)
+
+    def active_contexts(self, region=None, when=None):
+        """Contextos (dicts) vigentes en la region y fecha."""
+        return [self.contexts[cid] for cid in self.active_ids(region, when)]
+
+    def active_context_id(self, region=None, when=None):
+        """Contexto que aplica a una consulta: el primero vigente o 'normal'."""
+        ids = self.active_ids(region, when)
+        return ids[0] if ids else DEFAULT_CONTEXT
+
+
+def load_context_resolver(db_path=None):
+    """Resolver sobre la DB (cacheado por build_id)."""
+    from search import cached_by_build_id
+    return cached_by_build_id(db_path, ContextResolver.from_db)
+
+
+# --- Ejecucion directa ---
+
+if __name__ == "__main__":
+    region = sys.argv[1] if len(sys.argv) > 1 else None
+    day = to_day(sys.argv[2] if len(sys.argv) > 2 else None)
+    resolver = load_context_resolver()
+    active = resolver.active_contexts(region, day)
+    print(f"{region or 'Todo el pais'} — {day}:")
+    if not active:
+        print("  Sin contextos especiales vigentes (normal)")
+    for ctx in active:
+        status, days_left = expiry_status(ctx, day)
+        left = f", {days_left} dias restantes" if days_left is not None else ""
+        print(f"  {ctx['id']} ({ctx.get('decree_number') or 's/n'}) — {status}{left}")
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Truths and Rights — Esquemas de datos
+Los JSON Schema de schema/data_format.json compilados a funciones Python.
+
+Un solo juego de esquemas (el de docs/DATA_FORMAT.md) para el validador y
+el build. Cada esquema se compila una vez a una funcion generada: los
+campos, tipos y enums quedan como ifs en linea, sin recorrer el esquema
+por entidad. Soporta lo que usan los esquemas: type, required, properties,
+enum, pattern, minLength/minItems (campo obligatorio no vacio), items y
+anyOf de grupos de required (advertencia con x-severity/x-message).
+
+Si esta instalado fastjsonschema, valida primero con el: si la entidad
+pasa no hay nada que reportar; si no, la funcion generada arma todos los
+mensajes (fastjsonschema corta en el primer error).
+
+Uso como modulo:
+    from data_schemas import check_entity
+    check_entity('sources', source)
+    # [('error', "Fuente 'x': falta campo 'summary'"), ...]
+
+Uso directo:
+    python data_schemas.py [--entities 100000]   # benchmark
+    python data_schemas.py --code sources        # funcion generada
+"""
+
+import hashlib
+import json
+import random
+import re
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+SCHEMA_PATH = PROJECT_ROOT / "schema" / "data_format.json"
+
+# Nombres de los tipos de JSON en los mensajes
+TYPE_NAMES = {
+    'string': 'texto',
+    'array': 'lista',
+    'object': 'objeto',
+    'boolean': 'booleano',
+    'integer': 'entero',
+    'number': 'número',
+    'null': 'null',
+}
+
+_MISSING = object()
+_schemas = None
+_checkers = {}
+
+
+def load_schemas():
+    """Tipo de entidad -> esquema (las definitions de data_format.json)."""
+    global _schemas
+    if _schemas is None:
+        with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+            _schemas = json.load(f)['definitions']
+    return _schemas
+
+
+def schema_digest():
+    """Hash de los esquemas y de este compilador: cambia si cambian los mensajes."""
+    digest = hashlib.sha256(SCHEMA_PATH.read_bytes())
+    digest.update(Path(__file__).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+# --- Generacion de codigo ---
+
+def _is_integer(value):
+    return (isinstance(value, int) and not isinstance(value, bool)) or \
+        (isinstance(value, float) and value.is_integer())
+
+
+class _Code(str):
+    """Parte de un mensaje que es codigo (no texto literal)."""
+
+
+def _text(*parts):
+    """Expresion que concatena las partes; junta los literales seguidos."""
+    merged = []
+    for part in parts:
+        if isinstance(part, list):
+            merged.extend(part)
+        else:
+            merged.append(part)
+    pieces = []
+    for part in merged:
+        if not isinstance(part, _Code) and pieces and not isinstance(pieces[-1], _Code):
+            pieces[-1] += part
+        else:
+            pieces.append(part)
+    return ' + '.join(p if isinstance(p, _Code) else repr(p) for p in pieces)
+
+
+class _Generator:
+    """Arma el cuerpo de la funcion; los valores del esquema van como constantes."""
+
+    def __init__(self):
+        self.lines = []
+        self.constants = {'_MISSING': _MISSING, '_is_integer': _is_integer}
+        self.counter = 0
+
+    def name(self, prefix):
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def constant(self, value):
+        name = self.name('_k')
+        self.constants[name] = value
+        return name
+
+    def emit(self, depth, line):
+        self.lines.append('    ' * depth + line)
+
+    def problem(self, depth, message, severity='error'):
+        """message: expresion Python que arma el texto."""
+        self.emit(depth, f"problems.append(({severity!r}, {message}))")
+
+    def block(self, depth, gen):
+        """Cuerpo de un if/else: `pass` si no genero nada."""
+        before = len(self.lines)
+        gen()
+        if len(self.lines) == before:
+            self.emit(depth, "pass")
+
+    def type_condition(self, types, var):
+        classes = []
+        checks = []
+        for t in types:
+            if t == 'integer':
+                checks.append(f"_is_integer({var})")
+            elif t == 'number':
+                checks.append(f"(isinstance({var}, (int, float)) and not isinstance({var}, bool))")
+            else:
+                classes.append({'string': 'str', 'array': 'list', 'object': 'dict',
+                                'boolean': 'bool', 'null': 'type(None)'}[t])
+        if classes:
+            checks.insert(0, f"isinstance({var}, ({', '.join(classes)},))")
+        return ' or '.join(checks)
+
+    def value(self, schema, var, path, depth):
+        """
+        Chequeos de un valor presente (tipo, enum, pattern, items, objeto).
+        path: lista de partes del camino ('rights', '[', _Code('str(i1)'), ']', ...).
+        """
+        types = schema.get('type')
+        if types:
+            types = [types] if isinstance(types, str) else types
+            names = ' o '.join(TYPE_NAMES[t] for t in types)
+            self.emit(depth, f"if not ({self.type_condition(types, var)}):")
+            self.problem(depth + 1, _text(path, f" debe ser {names}"))
+            self.emit(depth, "else:")
+            depth += 1
+        start = len(self.lines)
+
+        if 'enum' in schema:
+            values = frozenset(schema['enum']) if types == ['string'] else tuple(schema['enum'])
+            self.emit(depth, f"if {var} not in {self.constant(values)}:")
+            label = [schema['x-invalid']] if 'x-invalid' in schema else path + [" inválido"]
+            self.problem(depth + 1, _text(label, ": ", _Code(f"str({var})")))
+
+        if 'pattern' in schema:
+            pattern = self.constant(re.compile(schema['pattern']))
+            self.emit(depth, f"if isinstance({var}, str) and not {pattern}.search({var}):")
+            self.problem(depth + 1, _text(path, f" no sigue el formato {schema['pattern']}"))
+
+        if 'items' in schema:
+            i, item = self.name('i'), self.name('x')
+            inner = depth
+            if types != ['array']:
+                self.emit(depth, f"if isinstance({var}, list):")
+                inner += 1
+            self.emit(inner, f"for {i}, {item} in enumerate({var}):")
+            self.block(inner + 1, lambda: self.value(
+                schema['items'], item, path + ["[", _Code(f"str({i})"), "]"], inner + 1))
+
+        if 'properties' in schema or 'required' in schema or 'anyOf' in schema:
+            if 'object' not in (types or ()):
+                self.emit(depth, f"if isinstance({var}, dict):")
+                depth += 1
+            self.object(schema, var, path, depth)
+
+        if types and len(self.lines) == start:
+            self.lines.pop()  # el else: quedo vacio
+
+    def object(self, schema, var, path, depth):
+        properties = schema.get('properties', {})
+        required = schema.get('required', [])
+        for name in list(properties) + [r for r in required if r not in properties]:
+            sub = properties.get(name, {})
+            child = [name] if not path else path + [f".{name}"]
+            value = self.name('v')
+            self.emit(depth, f"{value} = {var}.get({name!r}, _MISSING)")
+            if name in required:
+                missing = f"{value} is _MISSING or {value} is None"
+                if sub.get('minLength') or sub.get('minItems'):
+                    missing += f" or (isinstance({value}, (str, list)) and not {value})"
+                self.emit(depth, f"if {missing}:")
+                self.problem(depth + 1, _text("falta campo '", child, "'"))
+                self.emit(depth, "else:")
+            else:
+                self.emit(depth, f"if {value} is not _MISSING:")
+            self.block(depth + 1, lambda: self.value(sub, value, child, depth + 1))
+
+        if 'anyOf' in schema:
+            groups = []
+            for branch in schema['anyOf']:
+                if set(branch) - {'required', 'properties'}:
+                    raise ValueError(f"anyOf solo con grupos de required: {branch}")
+                groups.append(' and '.join(f"{var}.get({field!r})" for field in branch['required']))
+            message = schema.get('x-message', 'no cumple ninguna alternativa (anyOf)')
+            self.emit(depth, f"if not ({' or '.join(f'({g})' for g in groups)}):")
+            prefix = path + [": "] if path else []
+            self.problem(depth + 1, _text(prefix, message), schema.get('x-severity', 'error'))
+
+
+def generate_code(schema):
+    """(codigo fuente de check(entity), constantes que usa)."""
+    gen = _Generator()
+    gen.emit(0, "def check(entity):")
+    gen.emit(1, "problems = []")
+    gen.object(schema, 'entity', [], 1)
+    gen.emit(1, "return problems")
+    return '\n'.join(gen.lines) + '\n', gen.constants
+
+
+def compile_codegen(schema):
+    """Funcion generada: entidad -> [(severidad, detalle)], todos los problemas."""
+    code, namespace = generate_code(schema)
+    exec(compile(code, f"<esquema {schema.get('title', '?')}>", 'exec'), namespace)
+    return namespace['check']
+
+
+def compile_checker(schema):
+    """compile_codegen, con fastjsonschema adelante si esta instalado."""
+    check = compile_codegen(schema)
+    try:
+        import fastjsonschema
+    except ImportError:
+        return check
+    fast = fastjsonschema.compile(schema)
+    invalid = fastjsonschema.JsonSchemaException
+
+    def checked(entity):
+        try:
+            fast(entity)
+        except invalid:
+            return check(entity)
+        return []
+    return checked
+
+
+def checker(kind):
+    """Validador compilado (una vez por proceso) del tipo de entidad."""
+    if kind not in _checkers:
+        _checkers[kind] = compile_checker(load_schemas()[kind])
+    return _checkers[kind]
+
+
+def check_entity(kind, entity):
+    """Problemas como mensajes completos: [(severidad, "Fuente 'x': ...")]."""
+    problems = checker(kind)(entity)
+    if not problems:
+        return problems
+    prefix = f"{load_schemas()[kind]['title']} '{entity.get('id', '???')}': "
+    return [(severity, prefix + detail) for severity, detail in problems]
+
+
+# --- Benchmark ---
+
+def synthetic_entity(kind, i, rng):
+    """Entidad valida del tipo; ~5% con algun campo roto."""
+    if kind == 'sources':
+        entity = {'id': f"src_{i}", 'source_type': 'ley', 'name': 'Ley', 'article': f"Artículo {i}",
+                  'full_text': 'La autoridad policial, bajo responsabilidad. ' * 3, 'summary': 'Resumen',
+                  'status': 'vigente', 'publication_date': '2020-01-01', 'last_modified': None}
+    elif kind == 'rights':
+        entity = {'id': f"right_{i}", 'title': 'Derecho', 'description': 'Descripción',
+                  'legal_basis': 'Art. 2', 'category': 'libertad', 'is_absolute': False,
+                  'source_ids': [f"src_{i}"]}
+    elif kind == 'situations':
+        entity = {'id': f"sit_{i}", 'category': 'detencion', 'title': 'Situación', 'description': 'D',
+                  'keywords': ['policia', 'dni'], 'natural_queries': ['me piden el dni'],
+                  'parent_situation_id': None,
+                  'rights': [{'right_id': f"right_{i}", 'context': 'normal', 'applies': True}],
+                  'actions': [{'action_id': f"action_{i}", 'step_order': 1}],
+                  'time_limits': [{'id': f"limit_{i}", 'description': 'Límite', 'max_hours': 4.0,
+                                   'after_expiry_action': 'Soltarte', 'source_id': f"src_{i}"}],
+                  'contacts': ['defensoria_pueblo']}
+    else:
+        entity = {'id': f"action_{i}", 'action_type': 'decir', 'title': 'Acción',
+                  'description': 'Descripción', 'priority': 1, 'is_recommended': True}
+    if rng.random() < 0.05:
+        entity.pop('title' if 'title' in entity else 'name')
+    return entity
+
+
+def synthetic_dataset(n, seed=0):
+    """n entidades (tipo, entidad): 60% fuentes, el resto derechos, situaciones y acciones."""
+    rng = random.Random(seed)
+    kinds = ['sources'] * 6 + ['rights', 'situations', 'actions', 'actions']
+    return [(kinds[i % len(kinds)], synthetic_entity(kinds[i % len(kinds)], i, rng)) for i in range(n)]
+
+
+def benchmark(n=100000, runs=3):
+    """
+    Tiempo de validar n entidades sinteticas con cada implementacion disponible.
+
+    Returns:
+        Lista de dicts (variant, entities, ms, us_per_entity, problems)
+    """
+    dataset = synthetic_dataset(n)
+    schemas = load_schemas()
+    variants = [('codegen', {kind: compile_codegen(schema) for kind, schema in schemas.items()})]
+    try:
+        import fastjsonschema  # noqa: F401
+        variants.append(('fastjsonschema + codegen',
+                         {kind: compile_checker(schema) for kind, schema in schemas.items()}))
+    except ImportError:
+        pass
+    try:
+        import jsonschema
+        validators = {kind: jsonschema.Draft7Validator(schema) for kind, schema in schemas.items()}
+        variants.append(('jsonschema (interpretado)',
+                         {kind: (lambda v: lambda e: list(v.iter_errors(e)))(v)
+                          for kind, v in validators.items()}))
+    except ImportError:
+        pass
+
+    results = []
+    for variant, checks in variants:
+        best = None
+        for _ in range(runs):
+            start = time.perf_counter()
+            problems = sum(1 for kind, entity in dataset if checks[kind](entity))
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results.append({
+            'variant': variant,
+            'entities': n,
+            'ms': best * 1000,
+            'us_per_entity': best / n * 1e6,
+            'problems': problems,
+        })
+    return results
+
+
+# --- Ejecucion directa ---
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Esquemas de datos compilados')
+    parser.add_argument('--entities', type=int, default=100000, help='Entidades del benchmark')
+    parser.add_argument('--code', metavar='TIPO', help='Imprimir la funcion generada para TIPO')
+    args = parser.parse_args()
+
+    if args.code:
+        print(generate_code(load_schemas()[args.code])[0])
+    else:
+        print(f"Validando {args.entities} entidades sintéticas\n")
+        print(f"  {'variante':28} {'total':>10} {'por entidad':>12} {'con problemas':>14}")
+        for r in benchmark(args.entities):
+            print(f"  {r['variant']:28} {r['ms']:8.0f}ms {r['us_per_entity']:9.2f} us {r['problems']:14}")
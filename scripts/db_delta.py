@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Truths and Rights — Paquetes delta entre builds de la DB
+Actualizar la app sin volver a bajar la DB completa.
+
+La app solo compara generated_at de status.json y, si hay datos nuevos,
+reinstala el asset entero. Con datos prepago eso cuesta. Aca se comparan
+dos DBs ya construidas fila por fila y se escribe solo lo que cambio:
+
+    - Cada tabla se recorre ordenada por su clave primaria en ambas DBs
+      (merge de dos cursores, sin cargar tablas en memoria).
+    - Cada fila lleva un hash de su contenido: misma clave y mismo hash =
+      sin cambios; hash distinto = update con solo las columnas que
+      cambiaron; clave solo en la nueva = insert; solo en la vieja = delete.
+    - El changeset es JSON comprimido con gzip. Lleva el build_id de origen
+      y destino, un hash del esquema y la huella (fingerprint) de ambas DBs.
+    - Si el esquema cambio no hay delta posible: se reinstala la DB.
+    - Las DBs mobile guardan los textos legales en una DB aparte
+      (db_profiles.texts_path_for): si esta junto a la nueva, el changeset
+      lleva tambien sus cambios ('texts') y se aplican en la misma
+      transaccion que los de la DB principal.
+
+El manifiesto (deltas.json) se publica junto a status.json: build_id
+vigente, tamano de la DB completa y los deltas disponibles por build_id de
+origen. apply_changeset() es la implementacion de referencia del cliente:
+parcha la DB vieja en una sola transaccion y verifica la huella final
+antes de confirmar (si no coincide, no toca nada).
+
+Uso como modulo:
+    from db_delta import diff_databases, apply_changeset
+    changeset = diff_databases('old.db', 'new.db')
+    apply_changeset('old.db', changeset)
+
+Uso directo:
+    python db_delta.py old.db new.db [--out site]   # changeset + manifiesto
+    python db_delta.py --apply delta.json.gz old.db # aplicar
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+from db_profiles import texts_path_for
+
+DELTA_FORMAT = 2
+MANIFEST_NAME = 'deltas.json'
+DELTAS_DIR = 'deltas'
+
+
+class DeltaError(Exception):
+    """El changeset no se puede generar o no aplica sobre esta DB."""
+
+
+# --- Filas ---
+
+def _encode(value):
+    """Valor SQLite -> JSON (los BLOB van como {'$hex': ...})."""
+    if isinstance(value, bytes):
+        return {'$hex': value.hex()}
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        return bytes.fromhex(value['$hex'])
+    return value
+
+
+def row_hash(row):
+    """Hash del contenido de una fila (valores en orden de columna)."""
+    text = json.dumps([_encode(v) for v in row], ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(text.encode('utf-8')).digest()
+
+
+def _sort_key(key):
+    # Orden de SQLite para la clave: NULL < numeros < texto < BLOB
+    ranks = []
+    for value in key:
+        if value is None:
+            ranks.append((0, 0))
+        elif isinstance(value, (int, float)):
+            ranks.append((1, value))
+        elif isinstance(value, str):
+            ranks.append((2, value))
+        else:
+            ranks.append((3, value))
+    return ranks
+
+
+# --- Esquema ---
+
+def user_tables(conn, schema='main'):
+    """Tablas de datos (sin las internas sqlite_*), ordenadas por nombre."""
+    return [name for (name,) in conn.execute(
+        f"SELECT name FROM {schema}.sqlite_master WHERE type = 'table' "
+        "AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    )]
+
+
+def table_layout(conn, table, schema='main'):
+    """(columnas, columnas de la clave primaria) de una tabla."""
+    info = conn.execute(f"PRAGMA {schema}.table_info({table})").fetchall()
+    columns = [row[1] for row in info]
+    key = [row[1] for row in sorted(info, key=lambda r: r[5]) if row[5]]
+    if not key:
+        raise DeltaError(f"La tabla {table} no tiene clave primaria")
+    return columns, key
+
+
+def schema_hash(conn, schema='main'):
+    """Hash del esquema (tablas, indices, vistas)."""
+    rows = conn.execute(
+        f"SELECT type, name, COALESCE(sql, '') FROM {schema}.sqlite_master "
+        "WHERE name NOT LIKE 'sqlite_%' ORDER BY type, name"
+    ).fetchall()
+    return hashlib.sha256(json.dumps(rows).encode('utf-8')).hexdigest()
+
+
+def _build_id(conn):
+    try:
+        row = conn.execute("SELECT value FROM build_info WHERE key = 'build_id'").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+def _table_rows(conn, table, columns, key, schema='main'):
+    """(clave, fila, hash) de cada fila, en el orden de la clave primaria."""
+    positions = [columns.index(k) for k in key]
+    for row in conn.execute(
+            f"SELECT {', '.join(columns)} FROM {schema}.{table} ORDER BY {', '.join(key)}"):
+        yield tuple(row[p] for p in positions), row, row_hash(row)
+
+
+def fingerprint(conn, schema='main'):
+    """Huella de todo el contenido: hash de (tabla, clave, hash de fila)."""
+    digest = hashlib.sha256()
+    for table in user_tables(conn, schema):
+        columns, key = table_layout(conn, table, schema)
+        digest.update(table.encode('utf-8'))
+        for row_key, _, h in _table_rows(conn, table, columns, key, schema):
+            digest.update(row_hash(row_key))
+            digest.update(h)
+    return digest.hexdigest()
+
+
+# --- Diff ---
+
+def diff_table(old, new, table):
+    """
+    Cambios de una tabla entre dos conexiones.
+
+    Returns:
+        dict con columns, key, insert (filas), update ([clave, {col: valor}])
+        y delete (claves)
+    """
+    columns, key = table_layout(new, table)
+    changes = {'columns': columns, 'key': key, 'insert': [], 'update': [], 'delete': []}
+
+    old_rows = _table_rows(old, table, columns, key)
+    new_rows = _table_rows(new, table, columns, key)
+    a = next(old_rows, None)
+    b = next(new_rows, None)
+    while a is not None or b is not None:
+        if b is None or (a is not None and _sort_key(a[0]) < _sort_key(b[0])):
+            changes['delete'].append([_encode(v) for v in a[0]])
+            a = next(old_rows, None)
+        elif a is None or _sort_key(b[0]) < _sort_key(a[0]):
+            changes['insert'].append([_encode(v) for v in b[1]])
+            b = next(new_rows, None)
+        else:
+            if a[2] != b[2]:
+                changed = {
+                    col: _encode(new_value)
+                    for col, old_value, new_value in zip(columns, a[1], b[1])
+                    if old_value != new_value or type(old_value) is not type(new_value)
+                }
+                changes['update'].append([[_encode(v) for v in b[0]], changed])
+            a = next(old_rows, None)
+            b = next(new_rows, None)
+    return changes
+
+
+def _diff_target(old, new):
+    """Esquema, huellas y cambios por tabla entre dos conexiones."""
+    schema = schema_hash(new)
+    if schema_hash(old) != schema:
+        raise DeltaError("El esquema cambio entre builds: se necesita la DB completa")
+
+    tables = {}
+    for table in user_tables(new):
+        changes = diff_table(old, new, table)
+        if changes['insert'] or changes['update'] or changes['delete']:
+            tables[table] = changes
+
+    return {
+        'schema': schema,
+        'from_fingerprint': fingerprint(old),
+        'to_fingerprint': fingerprint(new),
+        'tables': tables,
+    }
+
+
+def diff_databases(old_path, new_path):
+    """
+    Changeset para pasar de la DB old_path a new_path.
+
+    Si new_path tiene DB de textos al lado (perfil mobile), sus cambios van
+    en changeset['texts'] con el mismo formato (schema, huellas, tables).
+
+    Raises:
+        DeltaError: si los esquemas difieren o falta la DB de textos
+            anterior (hay que reinstalar)
+    """
+    pairs = [(None, old_path, new_path)]
+    old_texts, new_texts = texts_path_for(old_path), texts_path_for(new_path)
+    if new_texts.exists():
+        if not old_texts.exists():
+            raise DeltaError(f"Falta {old_texts}: se necesita la DB de textos completa")
+        pairs.append(('texts', old_texts, new_texts))
+
+    changeset = {'format': DELTA_FORMAT}
+    for name, old_file, new_file in pairs:
+        old = sqlite3.connect(str(old_file))
+        new = sqlite3.connect(str(new_file))
+        try:
+            target = _diff_target(old, new)
+            if name:
+                changeset[name] = target
+            else:
+                changeset.update(from_build_id=_build_id(old), to_build_id=_build_id(new), **target)
+        finally:
+            old.close()
+            new.close()
+    return changeset
+
+
+def changeset_stats(changeset):
+    """Filas por operacion (DB principal y de textos): {'insert': n, 'update': n, 'delete': n}."""
+    stats = {'insert': 0, 'update': 0, 'delete': 0}
+    targets = [changeset] + ([changeset['texts']] if 'texts' in changeset else [])
+    for target in targets:
+        for changes in target['tables'].values():
+            for op in stats:
+                stats[op] += len(changes[op])
+    return stats
+
+
+def write_changeset(changeset, path):
+    """Escribe el changeset comprimido (gzip, mtime fijo: mismos bytes para el mismo delta)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = json.dumps(changeset, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    path.write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+    return path
+
+
+def read_changeset(path):
+    """Lee un changeset escrito por write_changeset()."""
+    return json.loads(gzip.decompress(Path(path).read_bytes()).decode('utf-8'))
+
+
+# --- Aplicar ---
+
+def _apply_tables(conn, schema, tables):
+    """Deletes de todas las tablas, luego updates e inserts."""
+    for table, changes in tables.items():
+        where = ' AND '.join(f"{k} = ?" for k in changes['key'])
+        conn.executemany(
+            f"DELETE FROM {schema}.{table} WHERE {where}",
+            ([_decode(v) for v in key] for key in changes['delete'])
+        )
+    for table, changes in tables.items():
+        where = ' AND '.join(f"{k} = ?" for k in changes['key'])
+        for key, values in changes['update']:
+            assignments = ', '.join(f"{col} = ?" for col in values)
+            conn.execute(
+                f"UPDATE {schema}.{table} SET {assignments} WHERE {where}",
+                [_decode(v) for v in values.values()] + [_decode(v) for v in key]
+            )
+        columns = changes['columns']
+        placeholders = ', '.join('?' for _ in columns)
+        conn.executemany(
+            f"INSERT INTO {schema}.{table} ({', '.join(columns)}) VALUES ({placeholders})",
+            ([_decode(v) for v in row] for row in changes['insert'])
+        )
+
+
+def apply_changeset(db_path, changeset, verify=True):
+    """
+    Parcha la DB (y su DB de textos, si el changeset la trae) en una sola
+    transaccion.
+
+    Comprueba build_id de origen y esquema antes de empezar y, con verify,
+    la huella final antes de confirmar: ante cualquier diferencia se hace
+    ROLLBACK y la DB queda como estaba.
+
+    Raises:
+        DeltaError: si el changeset no corresponde a esta DB
+
+    Returns:
+        changeset_stats() del changeset aplicado
+    """
+    if changeset.get('format') != DELTA_FORMAT:
+        raise DeltaError(f"Formato de changeset no soportado: {changeset.get('format')}")
+
+    targets = [('main', changeset)]
+    conn = sqlite3.connect(str(db_path), isolation_level=None)
+    try:
+        if 'texts' in changeset:
+            texts_path = texts_path_for(db_path)
+            if not texts_path.exists():
+                raise DeltaError(f"El changeset trae textos y falta {texts_path}")
+            # Adjunta: una sola transaccion cubre las dos DBs
+            conn.execute("ATTACH DATABASE ? AS texts", (str(texts_path),))
+            targets.append(('texts', changeset['texts']))
+
+        for schema, target in targets:
+            if schema_hash(conn, schema) != target['schema']:
+                raise DeltaError(f"El esquema de la DB ({schema}) no es el del changeset")
+        build_id = _build_id(conn)
+        if changeset['from_build_id'] and build_id != changeset['from_build_id']:
+            raise DeltaError(
+                f"El changeset parte de {changeset['from_build_id']}, la DB es {build_id}"
+            )
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for schema, target in targets:
+                _apply_tables(conn, schema, target['tables'])
+            if verify:
+                for schema, target in targets:
+                    if fingerprint(conn, schema) != target['to_fingerprint']:
+                        raise DeltaError(
+                            f"La DB parchada ({schema}) no coincide con el build de destino")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        # Estadisticas del planificador al dia con los datos nuevos
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    return changeset_stats(changeset)
+
+
+# --- Manifiesto ---
+
+def _sha256(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def _file_entry(path):
+    return {'file': path.name, 'size': path.stat().st_size, 'sha256': _sha256(path)}
+
+
+def publish_delta(old_path, new_path, out_dir):
+    """
+    Escribe el changeset en out_dir/deltas/ y actualiza out_dir/deltas.json.
+
+    El manifiesto describe el build vigente: si to_build_id cambio, los
+    deltas hacia builds anteriores se descartan. Con DB de textos, 'texts'
+    describe el archivo completo (para quien no puede usar un delta).
+
+    Returns:
+        (ruta del changeset, manifiesto)
+    """
+    out_dir = Path(out_dir)
+    changeset = diff_databases(old_path, new_path)
+    from_id = changeset['from_build_id'] or changeset['from_fingerprint'][:16]
+    to_id = changeset['to_build_id'] or changeset['to_fingerprint'][:16]
+    delta_path = write_changeset(changeset, out_dir / DELTAS_DIR / f"{from_id}-{to_id}.json.gz")
+
+    manifest_path = out_dir / MANIFEST_NAME
+    manifest = {}
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+    if manifest.get('build_id') != to_id:
+        manifest = {'format': DELTA_FORMAT, 'build_id': to_id, 'deltas': []}
+
+    new_path = Path(new_path)
+    manifest['db'] = _file_entry(new_path)
+    manifest.pop('texts', None)
+    if 'texts' in changeset:
+        manifest['texts'] = _file_entry(texts_path_for(new_path))
+    entry = {
+        'from_build_id': from_id,
+        'file': f"{DELTAS_DIR}/{delta_path.name}",
+        'size': delta_path.stat().st_size,
+        'sha256': _sha256(delta_path),
+        'rows': changeset_stats(changeset),
+    }
+    manifest['deltas'] = sorted(
+        [d for d in manifest['deltas'] if d['from_build_id'] != from_id] + [entry],
+        key=lambda d: d['from_build_id']
+    )
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    manifest_path.write_text(json.dumps(manifest, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+    return delta_path, manifest
+
+
+# --- Ejecucion directa ---
+
+def main():
+    parser = argparse.ArgumentParser(description='Delta entre dos builds de la DB')
+    parser.add_argument('old', nargs='?', help='DB anterior (la que tiene el cliente)')
+    parser.add_argument('new', nargs='?', help='DB nueva')
+    parser.add_argument('--out', default='site', help='Directorio publicado (junto a status.json)')
+    parser.add_argument('--apply', metavar='CHANGESET', help='Aplicar un changeset sobre OLD')
+    args = parser.parse_args()
+
+    try:
+        if args.apply:
+            if not args.old:
+                parser.error('--apply necesita la DB a parchar')
+            stats = apply_changeset(args.old, read_changeset(args.apply))
+            print(f"✓ Changeset aplicado: {stats['insert']} inserts, "
+                  f"{stats['update']} updates, {stats['delete']} deletes")
+            return
+
+        if not args.old or not args.new:
+            parser.error('se necesitan las DBs OLD y NEW')
+        delta_path, manifest = publish_delta(args.old, args.new, args.out)
+    except DeltaError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+
+    entry = next(d for d in manifest['deltas'] if d['file'].endswith(delta_path.name))
+    rows = entry['rows']
+    print(f"✓ Delta: {delta_path} ({entry['size'] / 1024:.1f} KB, "
+          f"DB completa {manifest['db']['size'] / 1024:.1f} KB)")
+    print(f"  {rows['insert']} inserts, {rows['update']} updates, {rows['delete']} deletes")
+    print(f"✓ Manifiesto: {Path(args.out) / MANIFEST_NAME}")
+
+
+if __name__ == "__main__":
+    main()
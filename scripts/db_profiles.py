@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Truths and Rights — Perfiles de build de la DB
+La DB de escritorio (CLI, API, scraper) y la que viaja en la app no son la
+misma: la app no usa tablas de servidor, ni los textos legales completos
+al arrancar, ni tarjetas en formatos que no sean json.
+
+El perfil 'mobile' parte de la DB ya construida y escribe en build/mobile/:
+    truths_and_rights_pe.db        - lo que la app abre al iniciar
+    truths_and_rights_pe_texts.db  - legal_texts (full_text), se adjunta
+                                     con ATTACH recien cuando se pide un texto
+
+Pasos: copiar, mover full_text, sacar tablas de servidor, ANALYZE, fijar
+page_size y VACUUM. Al final se imprime un reporte de tamano por tabla y
+se compara contra MOBILE_SIZE_BUDGET_KB (CI falla si se pasa).
+
+Uso:
+    python build_db.py --country PE --profile mobile [--check-budget]
+    python db_profiles.py build/mobile/truths_and_rights_pe.db   # solo reporte
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+from search import text_decoder
+
+PROFILES = ('desktop', 'mobile')
+
+# Tablas que la app no lee (servidor / herramientas de escritorio)
+MOBILE_DROP_TABLES = ('users', 'incident_reports', 'force_levels', 'source_citations',
+                      'text_dictionaries')
+# Vistas que dependen de tablas eliminadas
+MOBILE_DROP_VIEWS = ('v_heatmap',)
+# La app solo muestra tarjetas JSON (getAnswerCard), aunque el build guarde mas formatos
+MOBILE_CARD_FORMATS = ('json',)
+
+# Cada tabla e indice ocupa al menos una pagina y la DB tiene ~40 arboles
+# chicos: con 1 KB el asset pesa ~25% menos que con 4 KB (medido: 440 vs
+# 584 KB) y una lectura por clave sigue tocando 2-3 paginas.
+MOBILE_PAGE_SIZE = 1024
+
+# Presupuesto del asset (DB principal + textos; hoy ~475 KB). Holgura para
+# crecer en datos; lo que debe fallar es volver a embarcar tablas o
+# formatos enteros (la DB de escritorio pesa ~700 KB).
+MOBILE_SIZE_BUDGET_KB = 640
+
+TEXTS_SUFFIX = '_texts'
+
+# Tabla de la DB de textos (la app la adjunta como 'texts')
+LEGAL_TEXTS_TABLE = """
+    CREATE TABLE {schema}.legal_texts (
+        source_id TEXT PRIMARY KEY,
+        full_text TEXT NOT NULL
+    ) WITHOUT ROWID
+"""
+
+
+def texts_path_for(db_path):
+    """Ruta de la DB secundaria de textos legales de una DB mobile."""
+    db_path = Path(db_path)
+    return db_path.with_name(f"{db_path.stem}{TEXTS_SUFFIX}{db_path.suffix}")
+
+
+def table_sizes(conn):
+    """
+    Bytes por tabla (indices incluidos en su tabla).
+
+    Usa la tabla virtual dbstat; si el sqlite3 no la trae, devuelve {}.
+    """
+    try:
+        rows = conn.execute("""
+            SELECT COALESCE(m.tbl_name, s.name), SUM(s.pgsize)
+            FROM dbstat s LEFT JOIN sqlite_master m ON m.name = s.name
+            GROUP BY 1 ORDER BY 2 DESC
+        """).fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    return dict(rows)
+
+
+def write_texts_db(conn, texts_path):
+    """
+    Copia legal_sources.full_text a la DB de textos y los vacia en la principal.
+
+    Los textos van en claro aunque la DB de origen este comprimida
+    (--compress-texts): la app los lee sin descomprimir.
+    """
+    if texts_path.exists():
+        texts_path.unlink()
+    decode = text_decoder(conn)
+    rows = [(source_id, decode(text)) for source_id, text in
+            conn.execute("SELECT id, full_text FROM legal_sources ORDER BY id")]
+    conn.execute("ATTACH DATABASE ? AS texts", (str(texts_path),))
+    conn.execute(LEGAL_TEXTS_TABLE.format(schema='texts'))
+    conn.executemany("INSERT INTO texts.legal_texts (source_id, full_text) VALUES (?, ?)", rows)
+    count = len(rows)
+    conn.commit()
+    conn.execute("DETACH DATABASE texts")
+    conn.execute("UPDATE legal_sources SET full_text = ''")
+    return count
+
+
+def build_mobile_db(src_path, dest_dir):
+    """
+    Deriva la DB mobile desde una DB de escritorio ya construida.
+
+    Returns:
+        (ruta de la DB principal, ruta de la DB de textos)
+    """
+    dest_dir = Path(dest_dir)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    db_path = dest_dir / Path(src_path).name
+    texts_path = texts_path_for(db_path)
+    if db_path.exists():
+        db_path.unlink()
+
+    src = sqlite3.connect(str(src_path))
+    conn = sqlite3.connect(str(db_path))
+    src.backup(conn)
+    src.close()
+
+    # Antes de sacar tablas: los textos se descomprimen con text_dictionaries
+    write_texts_db(conn, texts_path)
+
+    for view in MOBILE_DROP_VIEWS:
+        conn.execute(f"DROP VIEW IF EXISTS {view}")
+    for table in MOBILE_DROP_TABLES:
+        conn.execute(f"DROP TABLE IF EXISTS {table}")
+    placeholders = ', '.join('?' for _ in MOBILE_CARD_FORMATS)
+    conn.execute(f"DELETE FROM answer_cards WHERE format NOT IN ({placeholders})", MOBILE_CARD_FORMATS)
+    conn.execute("INSERT OR REPLACE INTO build_info (key, value) VALUES ('profile', 'mobile')")
+    conn.commit()
+
+    conn.execute("ANALYZE")
+    conn.commit()
+
+    conn.execute(f"PRAGMA page_size = {MOBILE_PAGE_SIZE}")
+    conn.execute("VACUUM")
+    conn.close()
+
+    texts = sqlite3.connect(str(texts_path))
+    texts.execute(f"PRAGMA page_size = {MOBILE_PAGE_SIZE}")
+    texts.execute("VACUUM")
+    texts.close()
+    return db_path, texts_path
+
+
+def size_report(db_path, budget_kb=MOBILE_SIZE_BUDGET_KB, top=8):
+    """
+    Imprime el tamano del asset (DB + textos) y las tablas mas pesadas.
+
+    Returns:
+        True si el asset entra en el presupuesto
+    """
+    db_path = Path(db_path)
+    texts_path = texts_path_for(db_path)
+    files = [p for p in (db_path, texts_path) if p.exists()]
+    total_kb = sum(p.stat().st_size for p in files) / 1024
+
+    print(f"\n--- Tamaño del asset mobile ---")
+    for path in files:
+        print(f"  {path.name}: {path.stat().st_size / 1024:.1f} KB")
+    conn = sqlite3.connect(str(db_path))
+    for name, size in list(table_sizes(conn).items())[:top]:
+        print(f"    {name:28} {size / 1024:8.1f} KB")
+    conn.close()
+
+    ok = total_kb <= budget_kb
+    status = 'OK' if ok else 'EXCEDIDO'
+    print(f"  Total: {total_kb:.1f} KB (presupuesto {budget_kb} KB) [{status}]")
+    return ok
+
+
+# --- Ejecucion directa ---
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python db_profiles.py <db mobile>")
+        sys.exit(1)
+    sys.exit(0 if size_report(sys.argv[1]) else 1)
@@ -7,6 +7,7 @@ Python puro con string templates (sin Jinja2, sin dependencias extra).
 
 Uso:
     python scripts/generate_site.py
+    python scripts/generate_site.py --trace build/site_trace.json   # tiempos por pagina
 """
 
 import json
@@ -15,6 +16,9 @@ import sys
 from datetime import datetime
 from pathlib import Path
 
+from context_resolver import ContextResolver, expiry_status
+from tracing import finish_tracing, span, start_tracing
+
 PROJECT_ROOT = Path(__file__).parent.parent
 DATA_DIR = PROJECT_ROOT / "data" / "PE"
 SITE_DIR = PROJECT_ROOT / "site"
@@ -25,8 +29,11 @@ HISTORY_FILE = DATA_DIR / "verification_history.jsonl"
 # ============================================================
 
 def load_json(path):
-    with open(path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    with span('load_json', file=path.name) as s:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        s.add(rows=len(data) if isinstance(data, list) else 1, bytes=path.stat().st_size)
+    return data
 
 
 def load_all_data():
@@ -618,19 +625,32 @@ def gen_status_json(data):
     meta = data['metadata']
     emergencies = meta.get('active_emergencies', [])
 
-    emergency_status = "none"
-    for em in emergencies:
-        end = em.get('end_date', '')
-        try:
-            end_dt = datetime.strptime(end, '%Y-%m-%d')
-            if datetime.now() > end_dt:
-                emergency_status = "expired"
-            elif (end_dt - datetime.now()).days <= 7:
-                emergency_status = "expiring_soon"
-            else:
-                emergency_status = "active"
-        except ValueError:
-            emergency_status = "unknown"
+    # Vigencia por fechas (context_resolver), no por el flag estatico
+    resolver = ContextResolver(data['contexts'])
+    active_contexts = []
+    for ctx in resolver.active_contexts():
+        status, days_left = expiry_status(ctx)
+        active_contexts.append({
+            "id": ctx['id'],
+            "decree": ctx.get('decree_number'),
+            "regions": ctx.get('active_regions', []),
+            "end_date": ctx.get('end_date'),
+            "days_left": days_left,
+            "status": status,
+        })
+
+    if active_contexts:
+        statuses = {c['status'] for c in active_contexts}
+        emergency_status = "expiring_soon" if "expiring_soon" in statuses else "active"
+    elif any(
+        ctx.get('is_currently_active') and expiry_status(ctx)[0] == 'expired'
+        for ctx in data['contexts']
+    ):
+        # Los datos dicen que hay una emergencia, pero sus fechas ya vencieron
+        # (active_emergencies no cuenta: puede listar una que aun no empieza)
+        emergency_status = "expired"
+    else:
+        emergency_status = "none"
 
     return json.dumps({
         "generated_at": datetime.now().isoformat(),
@@ -642,47 +662,67 @@ def gen_status_json(data):
         "last_verified": meta.get('last_verified', None),
         "emergency_status": emergency_status,
         "emergencies": emergencies,
+        "active_contexts": active_contexts,
     }, ensure_ascii=False, indent=2)
 
 # ============================================================
 # MAIN
 # ============================================================
 
+def write_page(filename, generate, data):
+    """Genera y escribe una pagina (un span por pagina, con sus bytes)."""
+    with span('page', file=filename) as s:
+        content = generate(data)
+        path = SITE_DIR / filename
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        s.add(bytes=path.stat().st_size)
+    print(f"  Generado: {filename}")
+
+
 def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generar el portal estatico')
+    parser.add_argument('--trace', metavar='OUT.json',
+                        help='Guardar trazas por etapa (formato Chrome) e imprimir un resumen')
+    args = parser.parse_args()
+    if args.trace:
+        start_tracing('generate_site')
+
     print("Truths and Rights — Generador de sitio estatico")
     print(f"Leyendo datos de {DATA_DIR}")
 
-    data = load_all_data()
+    with span('load_all_data'):
+        data = load_all_data()
     print(f"  {len(data['sources'])} fuentes, {len(data['rights'])} derechos, {len(data['situations'])} situaciones")
 
     SITE_DIR.mkdir(parents=True, exist_ok=True)
 
     pages = [
-        ("index.html", gen_index(data)),
-        ("situaciones.html", gen_situaciones(data)),
-        ("derechos.html", gen_derechos(data)),
-        ("fuentes.html", gen_fuentes(data)),
-        ("emergencia.html", gen_emergencia(data)),
-        ("mitos.html", gen_mitos(data)),
-        ("contactos.html", gen_contactos(data)),
-        ("verificacion.html", gen_verificacion(data)),
+        ("index.html", gen_index),
+        ("situaciones.html", gen_situaciones),
+        ("derechos.html", gen_derechos),
+        ("fuentes.html", gen_fuentes),
+        ("emergencia.html", gen_emergencia),
+        ("mitos.html", gen_mitos),
+        ("contactos.html", gen_contactos),
+        ("verificacion.html", gen_verificacion),
     ]
 
-    for filename, content in pages:
-        path = SITE_DIR / filename
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(content)
-        print(f"  Generado: {filename}")
+    with span('pages'):
+        for filename, generate in pages:
+            write_page(filename, generate, data)
 
-    # status.json
-    status_path = SITE_DIR / "status.json"
-    with open(status_path, 'w', encoding='utf-8') as f:
-        f.write(gen_status_json(data))
-    print(f"  Generado: status.json")
+        # status.json
+        write_page("status.json", gen_status_json, data)
 
     print(f"\nSitio generado en {SITE_DIR}/")
     print(f"  Total: {len(pages)} paginas + status.json")
 
+    if args.trace:
+        finish_tracing(args.trace)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Truths and Rights — Textos casi duplicados
+MinHash + LSH sobre los textos de las fuentes y las descripciones de los derechos.
+
+El mismo articulo cargado con dos ids ocupa el doble en la DB y aparece
+dos veces en la busqueda. Comparar todos los textos contra todos es
+cuadratico; con MinHash cada texto se resume en NUM_PERM minimos, uno
+por funcion de hash, sobre sus frases de SHINGLE_WORDS palabras (la
+fraccion de minimos iguales estima la similitud de Jaccard) y con LSH solo
+se comparan los textos que coinciden en alguna banda de ROWS minimos:
+tiempo ~lineal.
+
+    - Los textos se normalizan (minusculas, sin tildes ni puntuacion).
+    - Las NUM_PERM funciones de hash salen de una sola llamada a SHAKE-128
+      por frase (NUM_PERM enteros de 64 bits) y los minimos se toman en C
+      (map/zip): ~4 veces mas rapido que NUM_PERM permutaciones (a*x + b) mod p
+      en Python, ~0.7 ms por texto de 80 palabras.
+    - Las firmas se guardan entre corridas (SignatureCache), por hash del
+      texto normalizado: solo se calculan las de textos nuevos o editados.
+    - Con BANDS x ROWS = 16 x 8, un par con similitud 0.8 cae en el mismo
+      balde de alguna banda con probabilidad ~0.94; los candidatos se
+      confirman con la similitud estimada (>= THRESHOLD).
+
+validate_sources.py reporta los grupos como advertencias.
+
+Uso como modulo:
+    from near_duplicates import SignatureCache, find_clusters
+    cache = SignatureCache(path)
+    signatures = {sid: cache.signature(text) for sid, text in texts.items()}
+    find_clusters(signatures)   # [(['art_1', 'art_1_bis'], 0.95), ...]
+    cache.save()
+
+Uso directo:
+    python near_duplicates.py [--country PE] [--threshold 0.8]
+"""
+
+import base64
+import hashlib
+import json
+import re
+import struct
+import unicodedata
+from pathlib import Path
+
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+THRESHOLD = 0.8
+
+# Si cambian, las firmas guardadas no sirven
+PARAMS = f"shake128:{NUM_PERM}:{SHINGLE_WORDS}"
+
+_PACK = struct.Struct(f"<{NUM_PERM}Q")
+
+
+def normalize(text):
+    """Minusculas, sin tildes ni puntuacion, espacios simples."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    return ' '.join(re.findall(r'[a-z0-9ñ]+', text))
+
+
+def text_digest(normalized):
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def shingles(normalized):
+    """Frases de SHINGLE_WORDS palabras (el texto entero si es mas corto)."""
+    words = normalized.split()
+    if len(words) <= SHINGLE_WORDS:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def minhash(normalized):
+    """Firma de NUM_PERM minimos; None si el texto esta vacio."""
+    hashes = [_PACK.unpack(hashlib.shake_128(p.encode('utf-8')).digest(_PACK.size))
+              for p in shingles(normalized)]
+    if not hashes:
+        return None
+    return list(map(min, zip(*hashes)))
+
+
+def similarity(sig_a, sig_b):
+    """Jaccard estimado: fraccion de minimos iguales."""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / NUM_PERM
+
+
+def find_clusters(signatures, threshold=THRESHOLD):
+    """
+    Grupos de textos casi duplicados.
+
+    Cada banda de ROWS minimos es la llave de un balde; dentro de cada balde
+    el primero se compara con los demas (no todos contra todos) y los pares
+    que superan el umbral se unen (union-find).
+
+    Args:
+        signatures: dict id -> firma (None se ignora)
+    Returns:
+        Lista de (ids ordenados, similitud minima de las uniones), por primer id
+    """
+    ids = [key for key, sig in signatures.items() if sig is not None]
+    parent = {key: key for key in ids}
+    weakest = {}
+
+    def find(key):
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    for band in range(BANDS):
+        start = band * ROWS
+        buckets = {}
+        for key in ids:
+            buckets.setdefault(tuple(signatures[key][start:start + ROWS]), []).append(key)
+        for members in buckets.values():
+            first = members[0]
+            for other in members[1:]:
+                root_a, root_b = find(first), find(other)
+                if root_a == root_b:
+                    continue
+                score = similarity(signatures[first], signatures[other])
+                if score >= threshold:
+                    parent[root_b] = root_a
+                    weakest[root_a] = min(score, weakest.get(root_a, 1.0), weakest.get(root_b, 1.0))
+
+    groups = {}
+    for key in ids:
+        groups.setdefault(find(key), []).append(key)
+    clusters = [(sorted(members), weakest[root]) for root, members in groups.items() if len(members) > 1]
+    return sorted(clusters)
+
+
+class SignatureCache:
+    """Firmas MinHash por hash del texto normalizado, en un JSON entre corridas."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.signatures = {}
+        self.used = set()
+        self.computed = 0
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if stored.get('params') == PARAMS:
+            self.signatures = stored['signatures']
+
+    def get(self, digest):
+        """Firma guardada para el digest (o None)."""
+        packed = self.signatures.get(digest)
+        if packed is None:
+            return None
+        self.used.add(digest)
+        return list(_PACK.unpack(base64.b64decode(packed))) if packed else None
+
+    def signature(self, text, digest=None):
+        """Firma del texto: la guardada o, si no hay, calculada y guardada."""
+        if digest in self.signatures:
+            return self.get(digest)
+        normalized = normalize(text)
+        digest = digest or text_digest(normalized)
+        if digest in self.signatures:
+            return self.get(digest)
+        sig = minhash(normalized)
+        self.signatures[digest] = base64.b64encode(_PACK.pack(*sig)).decode('ascii') if sig else ''
+        self.used.add(digest)
+        self.computed += 1
+        return sig
+
+    def save(self):
+        """Guarda solo las firmas usadas en esta corrida."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'params': PARAMS,
+                'signatures': {d: self.signatures[d] for d in sorted(self.used)},
+            }, f, separators=(',', ':'))
+
+
+# --- Ejecucion directa ---
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from build_db import DATA_DIR, load_country_data
+    from validate_sources import INDEX_DIR, NEAR_DUPLICATE_FIELDS
+
+    parser = argparse.ArgumentParser(description='Textos casi duplicados (MinHash + LSH)')
+    parser.add_argument('--country', default='PE')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    country = args.country.upper()
+    data = load_country_data(DATA_DIR / country)
+    cache = SignatureCache(INDEX_DIR / f"{country.lower()}_minhash.json")
+    for kind, field in NEAR_DUPLICATE_FIELDS.items():
+        start = time.perf_counter()
+        signatures = {}
+        for entity in data[kind]:
+            signatures.setdefault(entity.get('id'), cache.signature(entity.get(field) or ''))
+        clusters = find_clusters(signatures, args.threshold)
+        print(f"{kind}.{field}: {len(signatures)} textos, {len(clusters)} grupos "
+              f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+        for ids, score in clusters:
+            print(f"  ~{score:.0%}  {', '.join(ids)}")
+    cache.save()
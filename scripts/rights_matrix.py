@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Truths and Rights — Matriz de derechos efectivos
+Que derechos aplican en cada (situacion, contexto), precalculado en build.
+
+Regla (la misma para CLI, sitio, tarjetas y app):
+    1. Un derecho es candidato si la situacion lo lista en 'normal' o en
+       el contexto.
+    2. La fila del contexto pisa a la de 'normal' (applies). Una fila con
+       applies = 0 dice que el derecho no aplica a la situacion: no es una
+       suspension.
+    3. Sin fila propia del contexto, los derechos de contexts.affects_rights
+       quedan suspendidos, salvo los never_suspended.
+
+build_db.py guarda cada derecho con un bit fijo (right_bits) y, por cada
+(situacion, contexto), dos bitsets en effective_rights: los que aplican y
+los suspendidos. Consultar "¿aplica este derecho?" es un lookup en un dict
+y una operacion de bits; no hay joins ni JSON en el camino caliente.
+
+Uso como modulo:
+    from rights_matrix import load_rights_matrix
+    matrix = load_rights_matrix()
+    matrix.applies("police_id_check", "estado_emergencia_seguridad", "right_dignity")
+
+Uso directo:
+    python rights_matrix.py police_id_check [contexto]
+"""
+
+import sys
+
+DEFAULT_CONTEXT = 'normal'
+
+
+def _mask_bytes(mask, n_bits):
+    return mask.to_bytes(max(1, (n_bits + 7) // 8), 'little')
+
+
+def compute_matrix(conn):
+    """
+    Calcula la matriz desde las tablas rights, contexts y situation_rights.
+
+    Returns:
+        (right_ids ordenados por bit, dict (situation_id, context_id) ->
+        (mascara de derechos que aplican, mascara de suspendidos))
+    """
+    import json
+
+    rights = conn.execute("SELECT id, never_suspended FROM rights ORDER BY display_order, id").fetchall()
+    right_ids = [r[0] for r in rights]
+    bit = {rid: i for i, rid in enumerate(right_ids)}
+    never_suspended = {rid for rid, never in rights if never}
+
+    affects = {}
+    for context_id, affects_rights in conn.execute("SELECT id, affects_rights FROM contexts ORDER BY id"):
+        affects[context_id] = set(json.loads(affects_rights or '[]'))
+    affects.setdefault(DEFAULT_CONTEXT, set())
+
+    rows = {}
+    for situation_id, right_id, context_id, applies in conn.execute(
+        "SELECT situation_id, right_id, context_id, applies FROM situation_rights"
+    ):
+        rows.setdefault(situation_id, {}).setdefault(context_id, {})[right_id] = bool(applies)
+
+    matrix = {}
+    for (situation_id,) in conn.execute("SELECT id FROM situations ORDER BY id"):
+        by_context = rows.get(situation_id, {})
+        normal = by_context.get(DEFAULT_CONTEXT, {})
+        for context_id, affected in affects.items():
+            own = by_context.get(context_id, {}) if context_id != DEFAULT_CONTEXT else {}
+            applies_mask = suspended_mask = 0
+            for right_id in set(normal) | set(own):
+                if right_id not in bit:
+                    continue
+                if right_id in own:
+                    applies = own[right_id]
+                else:
+                    applies = normal[right_id]
+                    if applies and right_id in affected and right_id not in never_suspended:
+                        suspended_mask |= 1 << bit[right_id]
+                        continue
+                if applies:
+                    applies_mask |= 1 << bit[right_id]
+            matrix[(situation_id, context_id)] = (applies_mask, suspended_mask)
+
+    return right_ids, matrix
+
+
+def write_matrix(conn):
+    """
+    Guarda la matriz en right_bits + effective_rights.
+
+    Returns:
+        Numero de pares (situacion, contexto) guardados
+    """
+    right_ids, matrix = compute_matrix(conn)
+    n_bits = len(right_ids)
+
+    conn.execute("DELETE FROM right_bits")
+    conn.execute("DELETE FROM effective_rights")
+    conn.executemany(
+        "INSERT INTO right_bits (right_id, bit) VALUES (?, ?)",
+        [(rid, i) for i, rid in enumerate(right_ids)]
+    )
+    conn.executemany(
+        "INSERT INTO effective_rights (situation_id, context_id, applies_bits, suspended_bits) VALUES (?, ?, ?, ?)",
+        [
+            (situation_id, context_id, _mask_bytes(applies, n_bits), _mask_bytes(suspended, n_bits))
+            for (situation_id, context_id), (applies, suspended) in sorted(matrix.items())
+        ]
+    )
+    return len(matrix)
+
+
+class RightsMatrix:
+    """Matriz cargada en memoria: lookups O(1) por (situacion, contexto, derecho)."""
+
+    def __init__(self, right_ids, masks):
+        self.right_ids = right_ids
+        self._bit = {rid: i for i, rid in enumerate(right_ids)}
+        self._masks = masks
+
+    @classmethod
+    def from_db(cls, conn):
+        right_ids = [row[0] for row in conn.execute("SELECT right_id FROM right_bits ORDER BY bit")]
+        masks = {
+            (situation_id, context_id): (int.from_bytes(applies, 'little'), int.from_bytes(suspended, 'little'))
+            for situation_id, context_id, applies, suspended in conn.execute(
+                "SELECT situation_id, context_id, applies_bits, suspended_bits FROM effective_rights"
+            )
+        }
+        return cls(right_ids, masks)
+
+    def __len__(self):
+        return len(self._masks)
+
+    def masks(self, situation_id, context_id=DEFAULT_CONTEXT):
+        """(aplican, suspendidos) como enteros; (0, 0) si el par no existe."""
+        return self._masks.get((situation_id, context_id), (0, 0))
+
+    def applies(self, situation_id, context_id, right_id):
+        """True si el derecho aplica a la situacion en ese contexto."""
+        bit = self._bit.get(right_id)
+        if bit is None:
+            return False
+        return bool(self.masks(situation_id, context_id)[0] >> bit & 1)
+
+    def is_suspended(self, situation_id, context_id, right_id):
+        """True si el derecho es de la situacion pero esta suspendido en el contexto."""
+        bit = self._bit.get(right_id)
+        if bit is None:
+            return False
+        return bool(self.masks(situation_id, context_id)[1] >> bit & 1)
+
+    def _ids(self, mask):
+        ids = []
+        while mask:
+            low = mask & -mask
+            ids.append(self.right_ids[low.bit_length() - 1])
+            mask ^= low
+        return ids
+
+    def effective_rights(self, situation_id, context_id=DEFAULT_CONTEXT):
+        """IDs de los derechos que aplican (en el orden de right_bits)."""
+        return self._ids(self.masks(situation_id, context_id)[0])
+
+    def suspended_rights(self, situation_id, context_id=DEFAULT_CONTEXT):
+        """IDs de los derechos de la situacion suspendidos en el contexto."""
+        return self._ids(self.masks(situation_id, context_id)[1])
+
+
+def _matrix_from_db(conn):
+    import sqlite3
+    try:
+        return RightsMatrix.from_db(conn)
+    except sqlite3.OperationalError:
+        # DB anterior a la matriz: se calcula en el momento
+        return RightsMatrix(*compute_matrix(conn))
+
+
+def load_rights_matrix(db_path=None):
+    """Carga la matriz de la DB (cacheada por build_id)."""
+    from search import cached_by_build_id
+    return cached_by_build_id(db_path, _matrix_from_db)
+
+
+# --- Ejecucion directa ---
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python rights_matrix.py <situation_id> [contexto]")
+        sys.exit(1)
+
+    situation_id = sys.argv[1]
+    context_id = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_CONTEXT
+    matrix = load_rights_matrix()
+    print(f"Aplican en {context_id}:")
+    for right_id in matrix.effective_rights(situation_id, context_id):
+        print(f"  + {right_id}")
+    for right_id in matrix.suspended_rights(situation_id, context_id):
+        print(f"  - {right_id} (suspendido)")
@@ -34,6 +34,7 @@ from datetime import datetime
 from pathlib import Path
 from urllib.parse import urljoin, quote
 
+from context_resolver import ContextResolver, expiry_status
 from history import append_to_history
 
 # Fix encoding on Windows consoles
@@ -58,6 +59,7 @@ except ImportError:
 PROJECT_ROOT = Path(__file__).parent.parent
 DATA_DIR = PROJECT_ROOT / "data" / "PE"
 RAW_DIR = DATA_DIR / "sources" / "raw"
+DB_PATH = PROJECT_ROOT / "build" / "truths_and_rights_pe.db"
 SOURCES_DIR = DATA_DIR / "sources"
 
 REQUEST_DELAY = 2  # segundos entre requests
@@ -572,6 +574,18 @@ class CongresoScraper:
 # VERIFICADOR DE ACTUALIZACIONES
 # ============================================================
 
+def print_impact(impacted):
+    """Resume el contenido que cita las fuentes modificadas."""
+    labels = {
+        'right': 'Derechos', 'situation': 'Situaciones', 'time_limit': 'Plazos',
+        'myth': 'Mitos', 'context': 'Contextos',
+    }
+    print("\n  Contenido afectado:")
+    for kind, items in impacted.items():
+        if items:
+            print(f"    {labels.get(kind, kind)} ({len(items)}): " + ", ".join(i['id'] for i in items))
+
+
 class UpdateChecker:
     """Verifica si las fuentes legales siguen vigentes."""
 
@@ -617,6 +631,15 @@ class UpdateChecker:
             else:
                 results['verified'].append(sid)
 
+        if results['needs_update']:
+            graph = self.citation_graph()
+            if graph is not None:
+                changed = [item['id'] for item in results['needs_update']]
+                for item in results['needs_update']:
+                    item['impact'] = graph.cited_by(item['id'])
+                results['impacted'] = graph.describe(graph.impact(changed))
+                print_impact(results['impacted'])
+
         report_path = RAW_DIR / f"verification_report_{datetime.now().strftime('%Y%m%d')}.json"
         ensure_dirs()
         save_raw(results, report_path.name)
@@ -627,6 +650,14 @@ class UpdateChecker:
 
         return results
 
+    def citation_graph(self):
+        """Grafo de citas de la DB (build_db.py), o None si no se genero."""
+        from citations import load_citation_graph
+        if not DB_PATH.exists():
+            print(f"  (Sin {DB_PATH.name}: correr build_db.py para ver el contenido afectado)")
+            return None
+        return load_citation_graph(DB_PATH)
+
     def check_emergency_status(self):
         """Verifica si hay estados de emergencia vencidos o por vencer."""
         print("\nVerificando estados de emergencia...")
@@ -643,38 +674,48 @@ class UpdateChecker:
             'errors': [],
         }
 
+        resolver = ContextResolver(contexts)
         for ctx in contexts:
-            if ctx.get('context_type') == 'estado_emergencia':
-                end_date = ctx.get('end_date')
-                if end_date:
-                    end = datetime.strptime(end_date, '%Y-%m-%d')
-                    today = datetime.now()
-                    days_left = (end - today).days
-
-                    if today > end:
-                        print(f"  VENCIDO: {ctx['decree_number']}")
-                        print(f"    Vencio: {end_date}")
-                        print(f"    ACCION: Verificar si fue renovado en El Peruano")
-                        results['needs_update'].append({
-                            'id': ctx['id'],
-                            'decree': ctx['decree_number'],
-                            'status': 'expired',
-                            'end_date': end_date,
-                            'days_left': days_left,
-                        })
-                    else:
-                        print(f"  Vigente: {ctx['decree_number']} ({days_left} dias restantes)")
-                        if days_left <= 7:
-                            print(f"    Vence pronto - verificar renovacion")
-                            results['needs_update'].append({
-                                'id': ctx['id'],
-                                'decree': ctx['decree_number'],
-                                'status': 'expiring_soon',
-                                'end_date': end_date,
-                                'days_left': days_left,
-                            })
-                        else:
-                            results['verified'].append(ctx['id'])
+            if ctx.get('context_type') != 'estado_emergencia' or not ctx.get('end_date'):
+                continue
+            status, days_left = expiry_status(ctx)
+            end_date = ctx['end_date']
+
+            if status == 'expired':
+                print(f"  VENCIDO: {ctx['decree_number']}")
+                print(f"    Vencio: {end_date}")
+                print(f"    ACCION: Verificar si fue renovado en El Peruano")
+            elif status == 'upcoming':
+                print(f"  Programado: {ctx['decree_number']} (desde {ctx.get('start_date')})")
+            else:
+                print(f"  Vigente: {ctx['decree_number']} ({days_left} dias restantes)")
+                if status == 'expiring_soon':
+                    print(f"    Vence pronto - verificar renovacion")
+
+            if status in ('expired', 'expiring_soon'):
+                results['needs_update'].append({
+                    'id': ctx['id'],
+                    'decree': ctx['decree_number'],
+                    'status': status,
+                    'end_date': end_date,
+                    'days_left': days_left,
+                })
+            else:
+                results['verified'].append(ctx['id'])
+
+        # El flag estatico debe coincidir con lo que dicen las fechas
+        active_now = set(resolver.active_ids())
+        for ctx in contexts:
+            if ctx.get('context_type') == 'normal' or not (ctx.get('start_date') or ctx.get('end_date')):
+                continue
+            if bool(ctx.get('is_currently_active')) != (ctx['id'] in active_now):
+                print(f"  is_currently_active desactualizado: {ctx['id']}")
+                results['needs_update'].append({
+                    'id': ctx['id'],
+                    'decree': ctx.get('decree_number'),
+                    'status': 'flag_mismatch',
+                    'is_currently_active': bool(ctx.get('is_currently_active')),
+                })
 
         return results
 
@@ -737,6 +778,7 @@ def check_updates():
         'emergency': emergency_report,
         'verified': sources_report.get('verified', []),
         'needs_update': sources_report.get('needs_update', []) + emergency_report.get('needs_update', []),
+        'impacted': sources_report.get('impacted', {}),
         'errors': sources_report.get('errors', []),
     }
 
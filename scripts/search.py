@@ -11,34 +11,49 @@ Uso directo:
     python search.py "me quieren revisar el celular"
 
 Funciona offline: SQLite + Python puro, sin dependencias externas.
+
+Importar este modulo no hace trabajo: sqlite3, re, mmap, heapq, etc. se
+importan recien en la funcion que los usa y la DB se abre en la primera
+busqueda, asi el arranque del CLI no paga lo que no va a usar
+(tests/test_startup.py controla el presupuesto).
 """
 
-import io
-import re
-import sqlite3
+import _thread
+import os
+import struct
 import sys
+import time
 import unicodedata
 from pathlib import Path
 
-# Fix encoding on Windows consoles
-if sys.stdout.encoding and sys.stdout.encoding.lower() != 'utf-8':
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
-
 PROJECT_ROOT = Path(__file__).parent.parent
 DB_PATH = PROJECT_ROOT / "build" / "truths_and_rights_pe.db"
 
 
+# Regex de normalize(), compiladas en el primer uso
+_PUNCTUATION = None
+_SPACES = None
+
+
+def _compile_patterns():
+    global _PUNCTUATION, _SPACES
+    import re
+    _PUNCTUATION = re.compile(r'[^\w\s]')
+    _SPACES = re.compile(r'\s+')
+
+
 def normalize(text):
     """Normaliza texto: minusculas, sin tildes, sin puntuacion."""
+    if _PUNCTUATION is None:
+        _compile_patterns()
     text = text.lower().strip()
     # Quitar tildes
     text = unicodedata.normalize('NFD', text)
     text = ''.join(c for c in text if unicodedata.category(c) != 'Mn')
     # Quitar puntuacion
-    text = re.sub(r'[^\w\s]', '', text)
+    text = _PUNCTUATION.sub('', text)
     # Colapsar espacios
-    text = re.sub(r'\s+', ' ', text)
+    text = _SPACES.sub(' ', text)
     return text
 
 
@@ -147,7 +162,757 @@ def score_partial_match(query_tokens, target_str):
     return score
 
 
-def search_situation(query, db_path=None, limit=3):
+# Umbral minimo de relevancia y cota superior de score_partial_match
+MIN_SCORE = 0.05
+MAX_PARTIAL_SCORE = 0.4
+# Holgura para que las cotas no queden por debajo del total por redondeo float
+BOUND_EPSILON = 1e-9
+
+
+# ============================================================
+# INDICE DE BUSQUEDA SERIALIZADO
+# ============================================================
+#
+# build_db.py escribe truths_and_rights_<cc>.idx junto a la DB. El archivo
+# guarda, ya normalizados, todos los datos que usan los scorers:
+#
+#   VOCO/VOCB  vocabulario ordenado (offsets u32 + blob UTF-8)
+#   KWPO/KWPV  postings token -> situaciones (keywords)
+#   TIPO/TIPV  postings token -> situaciones (titulo sin stopwords)
+#   PAPO/PAPV  postings token -> situaciones (tokens de 4+ letras, match parcial)
+#   NQPO/NQPV  postings token -> frases de natural_queries
+#   PHRO/PHRB  frases normalizadas de natural_queries
+#   SPHO       rango de frases de cada situacion
+#   PHLN       tokens sin stopwords por frase
+#   KWLN/TILN  tokens de keywords / titulo por situacion
+#   PFXO/PFXB  prefijos de 4 letras ordenados
+#   PFXR       rango [inicio, fin) del vocabulario para cada prefijo
+#   METO/METB  id, title, description, severity, category por situacion
+#
+# Los arreglos se leen con mmap + memoryview.cast('I') sin copiar nada, asi
+# que abrir el indice cuesta lo mismo con 10 o con 10.000 situaciones. El
+# header lleva el build_id de la DB: si no coincide, el indice se ignora y
+# se reconstruye en memoria desde la tabla situations.
+
+INDEX_MAGIC = b'TRSIDX\x00\x00'
+INDEX_VERSION = 1
+INDEX_BYTE_ORDER_MARK = 0x01020304
+INDEX_ALIGN = 8
+
+# magic, version, marca de orden de bytes (nativa), n secciones, build_id
+_INDEX_HEADER = struct.Struct('=8sIII32s')
+# nombre, offset, longitud
+_INDEX_SECTION = struct.Struct('=4sII')
+
+META_FIELDS = ('id', 'title', 'description', 'severity', 'category')
+
+SITUATIONS_QUERY = """
+    SELECT id, title, description, keywords, natural_queries, severity, category
+    FROM situations
+    WHERE is_active = 1
+"""
+
+BUILD_INFO_QUERY = "SELECT key, value FROM build_info"
+
+# Detalles de una situacion. Cada consulta tiene su indice cubriente en el
+# schema (idx_situation_*); tests/test_query_plans.py vigila los planes.
+RIGHTS_QUERY = """
+    SELECT r.id, r.title, r.description, r.legal_basis,
+           r.is_absolute, r.never_suspended, r.category,
+           sr.context_id, sr.applies, sr.notes
+    FROM situation_rights sr
+    JOIN rights r ON sr.right_id = r.id
+    WHERE sr.situation_id = ?
+    ORDER BY sr.right_order, sr.right_id
+"""
+
+ACTIONS_QUERY = """
+    SELECT a.id, a.action_type, a.title, a.description,
+           a.script, a.warning, a.legal_basis_summary,
+           sa.step_order
+    FROM situation_actions sa
+    JOIN actions a ON sa.action_id = a.id
+    WHERE sa.situation_id = ? AND sa.is_available = 1
+    ORDER BY sa.step_order
+"""
+
+CONTACTS_QUERY = """
+    SELECT ec.id, ec.institution, ec.description,
+           ec.phone, ec.whatsapp, ec.email, ec.website,
+           ec.available_hours, ec.is_free, ec.contact_type
+    FROM situation_contacts sc
+    JOIN emergency_contacts ec ON sc.contact_id = ec.id
+    WHERE sc.situation_id = ?
+    ORDER BY sc.priority
+"""
+
+TIME_LIMITS_QUERY = """
+    SELECT id, description, max_hours, max_hours_emergency,
+           applies_to, after_expiry_action
+    FROM time_limits
+    WHERE situation_id = ?
+"""
+
+
+def index_path_for(db_path):
+    """Ruta del indice serializado que acompana a una DB."""
+    return Path(db_path).with_suffix('.idx')
+
+
+def read_build_info(conn):
+    """Lee la tabla build_info como dict (vacio si la DB no la tiene)."""
+    import sqlite3
+    try:
+        return dict(conn.execute(BUILD_INFO_QUERY).fetchall())
+    except sqlite3.OperationalError:
+        return {}
+
+
+def read_build_id(conn):
+    """Lee el build_id guardado por build_db.py (None si la DB no lo tiene)."""
+    return read_build_info(conn).get('build_id')
+
+
+# --- Textos comprimidos (build_db.py --compress-texts, text_codec.py) ---
+#
+# Con compresion, legal_sources.full_text guarda un BLOB comprimido con un
+# diccionario compartido (tabla text_dictionaries); sin ella, TEXT plano.
+# text_decoder() devuelve una funcion que acepta los dos.
+
+FULL_TEXT_DICTIONARY = 'legal_sources.full_text'
+
+TEXT_DICTIONARY_QUERY = "SELECT codec, dictionary FROM text_dictionaries WHERE name = ?"
+
+
+def _plain_text(value):
+    return value
+
+
+def _zlib_decoder(dictionary):
+    import zlib
+
+    def decode(value):
+        if not isinstance(value, bytes):
+            return value
+        # deflate crudo (sin cabecera): el diccionario va aparte
+        inflater = zlib.decompressobj(wbits=-15, zdict=dictionary)
+        return (inflater.decompress(value) + inflater.flush()).decode('utf-8')
+    return decode
+
+
+def _zstd_decoder(dictionary):
+    import zstandard
+    decompressor = zstandard.ZstdDecompressor(dict_data=zstandard.ZstdCompressionDict(dictionary))
+
+    def decode(value):
+        if not isinstance(value, bytes):
+            return value
+        return decompressor.decompress(value).decode('utf-8')
+    return decode
+
+
+_TEXT_CODECS = {
+    'zlib': _zlib_decoder,
+    'zstd': _zstd_decoder,
+}
+
+
+def text_decoder(conn, name=FULL_TEXT_DICTIONARY):
+    """
+    Funcion valor -> str para una columna que puede estar comprimida.
+
+    Los TEXT (y None) pasan sin cambios; los BLOB se descomprimen con el
+    diccionario guardado en la DB.
+    """
+    import sqlite3
+    try:
+        row = conn.execute(TEXT_DICTIONARY_QUERY, (name,)).fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    if row is None:
+        return _plain_text
+    codec, dictionary = row
+    return _TEXT_CODECS[codec](bytes(dictionary))
+
+
+def fetch_full_text(conn, source_id):
+    """Texto completo de una fuente legal, descomprimido (None si no existe)."""
+    row = conn.execute("SELECT full_text FROM legal_sources WHERE id = ?", (source_id,)).fetchone()
+    if row is None:
+        return None
+    return text_decoder(conn)(row[0])
+
+
+def _pack_strings(strings):
+    """Serializa strings como (offsets u32, blob UTF-8)."""
+    from array import array
+    offsets = array('I', [0])
+    blob = bytearray()
+    for text in strings:
+        blob += text.encode('utf-8')
+        offsets.append(len(blob))
+    return offsets.tobytes(), bytes(blob)
+
+
+def _pack_postings(lists):
+    """Serializa listas de enteros en formato CSR (offsets, valores)."""
+    from array import array
+    offsets = array('I', [0])
+    values = array('I')
+    for items in lists:
+        values.extend(items)
+        offsets.append(len(values))
+    return offsets.tobytes(), values.tobytes()
+
+
+def build_search_index(conn, build_id=''):
+    """
+    Construye el indice serializado desde la tabla situations.
+
+    Returns:
+        bytes con el indice (listo para escribir a disco o usar en memoria)
+    """
+    from array import array
+
+    rows = conn.execute(SITUATIONS_QUERY).fetchall()
+
+    kw_sets, title_sets, partial_sets = [], [], []
+    phrases, phrase_sets, sit_phrases = [], [], [0]
+    meta = []
+
+    for s_id, title, description, keywords, natural_q, severity, category in rows:
+        keywords = keywords or ''
+        natural_q = natural_q or ''
+        title = title or ''
+
+        # Mismos tokens que calculan los scorers en cada consulta
+        kw_sets.append(tokenize(keywords))
+        title_sets.append(tokens_sin_stopwords(normalize(title)))
+        partial_sets.append({t for t in tokenize(keywords + ' ' + natural_q) if len(t) >= 4})
+        for nq in natural_q.split('|'):
+            nq_norm = normalize(nq)
+            phrases.append(nq_norm)
+            phrase_sets.append(tokens_sin_stopwords(nq_norm))
+        sit_phrases.append(len(phrases))
+
+        meta.extend([s_id, title, description or '', severity or '', category or ''])
+
+    vocab = sorted(set().union(*kw_sets, *title_sets, *partial_sets, *phrase_sets))
+    token_id = {tok: i for i, tok in enumerate(vocab)}
+
+    def postings(sets):
+        lists = [[] for _ in vocab]
+        for owner, tokens in enumerate(sets):
+            for tok in tokens:
+                lists[token_id[tok]].append(owner)
+        return _pack_postings(lists)
+
+    # Los tokens con el mismo prefijo de 4 letras son contiguos en el vocabulario
+    prefixes, ranges = [], array('I')
+    for i, tok in enumerate(vocab):
+        if len(tok) < 4:
+            continue
+        if prefixes and prefixes[-1] == tok[:4]:
+            ranges[-1] = i + 1
+        else:
+            prefixes.append(tok[:4])
+            ranges.extend((i, i + 1))
+
+    sections = {}
+    sections['VOCO'], sections['VOCB'] = _pack_strings(vocab)
+    sections['KWPO'], sections['KWPV'] = postings(kw_sets)
+    sections['TIPO'], sections['TIPV'] = postings(title_sets)
+    sections['PAPO'], sections['PAPV'] = postings(partial_sets)
+    sections['NQPO'], sections['NQPV'] = postings(phrase_sets)
+    sections['PHRO'], sections['PHRB'] = _pack_strings(phrases)
+    sections['SPHO'] = array('I', sit_phrases).tobytes()
+    sections['PHLN'] = array('I', [len(t) for t in phrase_sets]).tobytes()
+    sections['KWLN'] = array('I', [len(t) for t in kw_sets]).tobytes()
+    sections['TILN'] = array('I', [len(t) for t in title_sets]).tobytes()
+    sections['PFXO'], sections['PFXB'] = _pack_strings(prefixes)
+    sections['PFXR'] = ranges.tobytes()
+    sections['METO'], sections['METB'] = _pack_strings(meta)
+
+    header_size = _INDEX_HEADER.size + _INDEX_SECTION.size * len(sections)
+    out = bytearray(header_size)
+    _INDEX_HEADER.pack_into(out, 0, INDEX_MAGIC, INDEX_VERSION, INDEX_BYTE_ORDER_MARK,
+                            len(sections), (build_id or '').encode('ascii'))
+    for i, (name, data) in enumerate(sections.items()):
+        out += b'\x00' * (-len(out) % INDEX_ALIGN)
+        _INDEX_SECTION.pack_into(out, _INDEX_HEADER.size + i * _INDEX_SECTION.size,
+                                 name.encode('ascii'), len(out), len(data))
+        out += data
+    return bytes(out)
+
+
+def write_search_index(conn, path, build_id):
+    """
+    Escribe el indice a disco de forma atomica (tmp + rename).
+
+    En Windows no se puede reemplazar un .idx que otro proceso tiene mapeado
+    (ej: el daemon de busqueda con el build anterior): se borra el temporal,
+    se lanza IndexInUseError y el .idx viejo queda; como su build_id ya no
+    coincide, load_search_index arma el indice en memoria hasta el proximo build.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(build_search_index(conn, build_id))
+    try:
+        os.replace(tmp_path, path)
+    except PermissionError as e:
+        tmp_path.unlink()
+        raise IndexInUseError(f"No se pudo reemplazar {path} (¿abierto por otro proceso?): {e}") from e
+    return path
+
+
+class IndexInUseError(PermissionError):
+    """El .idx anterior esta mapeado por otro proceso y no se puede reemplazar."""
+
+
+class _StringTable:
+    """Tabla de strings sobre (offsets u32, blob) sin decodificar por adelantado."""
+
+    def __init__(self, offsets, blob):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def raw(self, i):
+        return bytes(self._blob[self._offsets[i]:self._offsets[i + 1]])
+
+    def __getitem__(self, i):
+        return self.raw(i).decode('utf-8')
+
+    def find(self, text):
+        """Busqueda binaria (la tabla esta ordenada). Devuelve -1 si no esta."""
+        key = text.encode('utf-8')
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.raw(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self) and self.raw(lo) == key:
+            return lo
+        return -1
+
+
+class _Postings:
+    """Listas de enteros en formato CSR."""
+
+    def __init__(self, offsets, values):
+        self._offsets = offsets
+        self._values = values
+
+    def __getitem__(self, i):
+        return self._values[self._offsets[i]:self._offsets[i + 1]]
+
+
+class SearchIndex:
+    """
+    Indice de busqueda sobre un buffer serializado por build_search_index.
+
+    El buffer puede ser un mmap del archivo .idx o bytes construidos en
+    memoria; en ambos casos se accede con memoryview sin copiar.
+    """
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        view = memoryview(buffer)
+        # Todas las vistas sobre el buffer: close() las libera antes de cerrar el mmap
+        self._views = [view]
+        try:
+            magic, version, bom, n_sections, build_id = _INDEX_HEADER.unpack_from(view, 0)
+        except struct.error:
+            raise ValueError("Indice truncado")
+        if magic != INDEX_MAGIC or version != INDEX_VERSION or bom != INDEX_BYTE_ORDER_MARK:
+            raise ValueError("Indice con formato o version incompatible")
+
+        sections = {}
+        for i in range(n_sections):
+            name, offset, length = _INDEX_SECTION.unpack_from(
+                view, _INDEX_HEADER.size + i * _INDEX_SECTION.size)
+            if offset + length > len(view):
+                raise ValueError(f"Seccion {name!r} fuera del archivo")
+            sections[name.decode('ascii')] = view[offset:offset + length]
+        self._views.extend(sections.values())
+
+        def u32(name):
+            cast = sections[name].cast('I')
+            self._views.append(cast)
+            return cast
+
+        try:
+            self.build_id = build_id.rstrip(b'\x00').decode('ascii') or None
+            self._vocab = _StringTable(u32('VOCO'), sections['VOCB'])
+            self._kw = _Postings(u32('KWPO'), u32('KWPV'))
+            self._title = _Postings(u32('TIPO'), u32('TIPV'))
+            self._partial = _Postings(u32('PAPO'), u32('PAPV'))
+            self._nq = _Postings(u32('NQPO'), u32('NQPV'))
+            self._phrases = _StringTable(u32('PHRO'), sections['PHRB'])
+            self._sit_phrases = u32('SPHO')
+            self._phrase_len = u32('PHLN')
+            self._kw_len = u32('KWLN')
+            self._title_len = u32('TILN')
+            self._prefixes = _StringTable(u32('PFXO'), sections['PFXB'])
+            self._prefix_ranges = u32('PFXR')
+            self._meta = _StringTable(u32('METO'), sections['METB'])
+        except KeyError as e:
+            raise ValueError(f"Falta la seccion {e} en el indice")
+
+        self._phrase_cache = {}
+        # Pais de la DB de origen; lo completa load_search_index
+        self.country = None
+
+    def __len__(self):
+        return len(self._kw_len)
+
+    def close(self):
+        """
+        Libera las vistas y cierra el mmap del .idx, si lo hay.
+
+        En Windows un archivo mapeado no se puede reemplazar: sin esto, el
+        build siguiente no podria escribir el .idx. Si alguien conserva una
+        vista (BufferError), el mmap se cierra cuando el GC la libere.
+        """
+        try:
+            for view in reversed(self._views):
+                view.release()
+            if hasattr(self._buffer, 'close'):
+                self._buffer.close()
+        except BufferError:
+            pass
+
+    def _phrase(self, i):
+        text = self._phrase_cache.get(i)
+        if text is None:
+            text = self._phrases[i]
+            self._phrase_cache[i] = text
+        return text
+
+    def metadata(self, s):
+        """Metadatos (id, title, ...) de la situacion s."""
+        base = s * len(META_FIELDS)
+        return {field: self._meta[base + i] for i, field in enumerate(META_FIELDS)}
+
+    def _partial_scores(self, query_tokens):
+        """score_partial_match para todas las situaciones via tabla de prefijos."""
+        scores = {}
+        for qt in query_tokens:
+            if len(qt) < 4:
+                continue
+            p = self._prefixes.find(qt[:4])
+            if p < 0:
+                continue
+            for tid in range(self._prefix_ranges[2 * p], self._prefix_ranges[2 * p + 1]):
+                owners = self._partial[tid]
+                if not owners:
+                    continue
+                tt = self._vocab[tid]
+                overlap = 0
+                for i in range(min(len(qt), len(tt))):
+                    if qt[i] == tt[i]:
+                        overlap += 1
+                    else:
+                        break
+                score = overlap / max(len(qt), len(tt)) * 0.4
+                for s in owners:
+                    if score > scores.get(s, 0.0):
+                        scores[s] = score
+        return scores
+
+    def _natural_query_score(self, s, query_norm, n_query, phrase_hits):
+        """score_natural_query_match con frases ya normalizadas."""
+        best = 0.0
+        for ph in range(self._sit_phrases[s], self._sit_phrases[s + 1]):
+            nq_norm = self._phrase(ph)
+
+            if query_norm == nq_norm:
+                return 1.0
+            if query_norm in nq_norm or nq_norm in query_norm:
+                ratio = min(len(query_norm), len(nq_norm)) / max(len(query_norm), len(nq_norm))
+                best = max(best, 0.7 + 0.3 * ratio)
+                continue
+
+            n_phrase = self._phrase_len[ph]
+            if not n_query or not n_phrase:
+                continue
+
+            shared = phrase_hits.get(ph, 0)
+            if shared:
+                precision = shared / n_query
+                recall = shared / n_phrase
+                f1 = 2 * precision * recall / (precision + recall)
+                best = max(best, f1 * 0.8)
+        return best
+
+    def search(self, query_norm, query_tokens, limit=3):
+        """Top-k de situaciones para una consulta ya normalizada."""
+        import heapq
+
+        if not query_norm or limit <= 0:
+            return []
+
+        kw_hits, title_hits, phrase_hits = {}, {}, {}
+        for tok in query_tokens:
+            tid = self._vocab.find(tok)
+            if tid < 0:
+                continue
+            for s in self._kw[tid]:
+                kw_hits[s] = kw_hits.get(s, 0) + 1
+            for s in self._title[tid]:
+                title_hits[s] = title_hits.get(s, 0) + 1
+            for ph in self._nq[tid]:
+                phrase_hits[ph] = phrase_hits.get(ph, 0) + 1
+        partial_scores = self._partial_scores(query_tokens)
+        n_query = len(query_tokens)
+
+        # Min-heap con los k mejores: (score redondeado, -orden, situacion, puntajes).
+        # El orden de la tabla desempata igual que un sort estable.
+        top = []
+
+        for s in range(len(self)):
+            kw_score = kw_hits[s] / self._kw_len[s] if s in kw_hits else 0.0
+            title_score = 0.0
+            if s in title_hits:
+                title_score = title_hits[s] / max(n_query, self._title_len[s]) * 0.5
+            partial_score = partial_scores.get(s, 0.0)
+
+            # nq es el unico scorer caro: si ni con nq perfecto se supera
+            # al k-esimo actual, se descarta sin calcularlo.
+            rest = (kw_score * 0.30) + (title_score * 0.15) + (partial_score * 0.10)
+            if _cannot_enter(top, limit, rest + 0.45 + BOUND_EPSILON):
+                continue
+
+            nq_score = self._natural_query_score(s, query_norm, n_query, phrase_hits)
+
+            # Puntaje final ponderado
+            total = (nq_score * 0.45) + (kw_score * 0.30) + (title_score * 0.15) + (partial_score * 0.10)
+            if _cannot_enter(top, limit, total):
+                continue
+
+            entry = (round(total, 4), -s, s, (nq_score, kw_score, title_score, partial_score))
+            if len(top) < limit:
+                heapq.heappush(top, entry)
+            else:
+                heapq.heapreplace(top, entry)
+
+        top.sort(key=lambda e: (e[0], e[1]), reverse=True)
+        return [_build_result(self.metadata(s), score, parts) for score, _, s, parts in top]
+
+
+def _map_index_file(path, build_id):
+    """Abre el .idx con mmap si existe y corresponde al build_id de la DB."""
+    if not build_id or not Path(path).exists():
+        return None
+    import mmap
+    try:
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        index = SearchIndex(mapped)
+    except ValueError:
+        index = None
+    if index is None:
+        # Fuera del except: el traceback ya no retiene las vistas sobre el mmap
+        mapped.close()
+        return None
+    if index.build_id != build_id:
+        index.close()
+        return None
+    return index
+
+
+# Indices cargados en este proceso: ruta de la DB -> (firma del archivo, indice)
+_INDEX_CACHE = {}
+_INDEX_LOCK = _thread.allocate_lock()
+
+
+def load_search_index(db_path=None):
+    """
+    Devuelve el indice de busqueda de una DB.
+
+    Usa el .idx generado por build_db.py (via mmap) cuando su build_id
+    coincide con el de la DB; si falta o esta desactualizado, lo construye
+    en memoria. El resultado queda cacheado hasta que cambie el archivo de la
+    DB; entonces se cierra el indice anterior (y su mmap).
+    """
+    if db_path is None:
+        db_path = DB_PATH
+
+    key = str(db_path)
+    st = os.stat(db_path)
+    stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+    cached = _INDEX_CACHE.get(key)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    with _INDEX_LOCK:
+        # Otro hilo pudo cargarlo mientras se esperaba el lock
+        cached = _INDEX_CACHE.get(key)
+        if cached and cached[0] == stamp:
+            return cached[1]
+
+        import sqlite3
+        conn = sqlite3.connect(str(db_path))
+        try:
+            info = read_build_info(conn)
+            build_id = info.get('build_id')
+            index = _map_index_file(index_path_for(db_path), build_id)
+            if index is None:
+                index = SearchIndex(build_search_index(conn, build_id))
+        finally:
+            conn.close()
+        index.country = info.get('country')
+
+        _INDEX_CACHE[key] = (stamp, index)
+        if cached:
+            cached[1].close()
+    return index
+
+
+# Objetos derivados de la DB (autocompletado, matriz, grafo...):
+# (loader, ruta de la DB) -> (build_id, objeto)
+_BUILD_CACHE = {}
+_BUILD_CACHE_LOCK = _thread.allocate_lock()
+
+
+def cached_by_build_id(db_path, loader):
+    """
+    loader(conn) sobre la DB, cacheado hasta que cambie su build_id.
+
+    Mismo esquema que load_search_index: lectura sin lock y, si hay que
+    cargar, lock y segunda mirada, asi dos hilos del daemon o de la API no
+    cargan lo mismo a la vez. loader no debe llamar a esta funcion (el lock
+    no es reentrante). Una DB sin build_id se recarga en cada llamada.
+    """
+    import sqlite3
+    if db_path is None:
+        db_path = DB_PATH
+    key = (loader, str(db_path))
+
+    conn = sqlite3.connect(str(db_path))
+    try:
+        build_id = read_build_id(conn)
+        cached = _BUILD_CACHE.get(key)
+        if cached and build_id and cached[0] == build_id:
+            return cached[1]
+        with _BUILD_CACHE_LOCK:
+            cached = _BUILD_CACHE.get(key)
+            if cached and build_id and cached[0] == build_id:
+                return cached[1]
+            value = loader(conn)
+            _BUILD_CACHE[key] = (build_id, value)
+    finally:
+        conn.close()
+    return value
+
+
+# ============================================================
+# CACHE DE RESULTADOS
+# ============================================================
+
+class QueryCache:
+    """
+    Cache LRU de resultados con TTL opcional y contadores de uso.
+
+    Las claves incluyen el build_id de la DB, asi que un build nuevo deja
+    de encontrar las entradas viejas (que salen por LRU o por TTL).
+
+    El orden LRU es el de insercion del dict (se reinserta al usar) y el
+    lock es el de _thread: crear el cache al importar no arrastra
+    collections ni threading.
+    """
+
+    def __init__(self, maxsize=256, ttl=None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = {}
+        self._lock = _thread.allocate_lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def configure(self, maxsize=None, ttl=...):
+        """Cambia tamano maximo y/o TTL (ttl=None desactiva la expiracion)."""
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if ttl is not ...:
+                self.ttl = ttl
+            self._evict()
+
+    def get(self, key):
+        """Devuelve el valor cacheado o None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and self._clock() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries[key] = self._entries.pop(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (self._clock(), value)
+            self._evict()
+
+    def _evict(self):
+        while len(self._entries) > max(self.maxsize, 0):
+            del self._entries[next(iter(self._entries))]
+            self.evictions += 1
+
+    def clear(self):
+        """Vacia el cache y reinicia los contadores."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self):
+        """Contadores actuales como dict."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Cache compartido por search_situation en este proceso
+RESULT_CACHE = QueryCache()
+
+
+def cache_stats():
+    """Contadores del cache de resultados (hits, misses, evictions, ...)."""
+    return RESULT_CACHE.stats()
+
+
+def _copy_results(results):
+    """Copia los resultados para que quien llama no altere el cache."""
+    return [dict(r, match_details=dict(r['match_details'])) for r in results]
+
+
+def search_situation(query, db_path=None, limit=3, use_cache=True):
     """
     Busca la situacion mas relevante para una consulta en lenguaje natural.
 
@@ -155,6 +920,7 @@ def search_situation(query, db_path=None, limit=3):
         query: Texto del usuario (ej: "me quieren revisar el celular")
         db_path: Ruta a la base de datos SQLite (opcional)
         limit: Numero maximo de resultados
+        use_cache: Usar el cache de resultados (RESULT_CACHE)
 
     Returns:
         Lista de dicts con situation_id, title, score, y match_details
@@ -168,121 +934,97 @@ def search_situation(query, db_path=None, limit=3):
         return []
 
     query_norm = normalize(query)
-    if not query_norm:
+    if not query_norm or limit <= 0:
         return []
 
-    query_tokens = tokens_sin_stopwords(query)
+    index = load_search_index(db_path)
+    if not use_cache:
+        return index.search(query_norm, tokens_sin_stopwords(query), limit)
 
-    conn = sqlite3.connect(str(db_path))
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT id, title, description, keywords, natural_queries, severity, category
-        FROM situations
-        WHERE is_active = 1
-    """)
-
-    results = []
-
-    for row in cursor.fetchall():
-        s_id = row['id']
-        keywords = row['keywords'] or ''
-        natural_q = row['natural_queries'] or ''
-        title = row['title'] or ''
-
-        # Calcular puntajes parciales
-        kw_score = score_keyword_match(query_tokens, keywords)
-        nq_score = score_natural_query_match(query_norm, natural_q)
-        title_score = score_title_match(query_norm, title)
-        partial_score = score_partial_match(query_tokens, keywords + ' ' + natural_q)
-
-        # Puntaje final ponderado
-        total = (nq_score * 0.45) + (kw_score * 0.30) + (title_score * 0.15) + (partial_score * 0.10)
-
-        if total > 0.05:
-            results.append({
-                'situation_id': s_id,
-                'title': title,
-                'description': row['description'],
-                'severity': row['severity'],
-                'category': row['category'],
-                'score': round(total, 4),
-                'match_details': {
-                    'natural_query': round(nq_score, 3),
-                    'keywords': round(kw_score, 3),
-                    'title': round(title_score, 3),
-                    'partial': round(partial_score, 3),
-                }
-            })
-
-    conn.close()
-
-    results.sort(key=lambda x: x['score'], reverse=True)
-    return results[:limit]
-
-
-def get_situation_details(situation_id, db_path=None):
+    # Sin build_id (DB vieja) se usa la ruta + firma del archivo como version
+    version = index.build_id or (str(db_path),) + _INDEX_CACHE[str(db_path)][0]
+    key = (query_norm, limit, index.country, version)
+    results = RESULT_CACHE.get(key)
+    if results is None:
+        results = index.search(query_norm, tokens_sin_stopwords(query), limit)
+        RESULT_CACHE.put(key, results)
+    return _copy_results(results)
+
+
+def _cannot_enter(top, limit, bound):
+    """
+    True si un candidato con puntaje <= bound no puede entrar al top-k.
+
+    Con el heap lleno compara contra el k-esimo (redondeado, como se ordena);
+    los empates pierden porque el candidato llego despues.
+    """
+    if len(top) < limit:
+        return bound <= MIN_SCORE
+    return round(bound, 4) <= top[0][0]
+
+
+def _build_result(meta, score, parts):
+    """Construye el dict de resultado (solo para los sobrevivientes del top-k)."""
+    nq_score, kw_score, title_score, partial_score = parts
+    return {
+        'situation_id': meta['id'],
+        'title': meta['title'],
+        'description': meta['description'],
+        'severity': meta['severity'],
+        'category': meta['category'],
+        'score': score,
+        'match_details': {
+            'natural_query': round(nq_score, 3),
+            'keywords': round(kw_score, 3),
+            'title': round(title_score, 3),
+            'partial': round(partial_score, 3),
+        }
+    }
+
+
+def get_situation_details(situation_id, db_path=None, conn=None):
     """
     Obtiene todos los detalles de una situacion: derechos, acciones, contactos.
 
+    Args:
+        situation_id: ID de la situacion
+        db_path: Ruta a la base de datos SQLite (opcional)
+        conn: Conexion ya abierta (ej: de un pool); si se pasa, no se cierra
+
     Returns:
         Dict con rights, actions, contacts, time_limits
     """
+    if conn is not None:
+        return _fetch_situation_details(conn, situation_id)
+
     if db_path is None:
         db_path = DB_PATH
 
+    import sqlite3
     conn = sqlite3.connect(str(db_path))
-    conn.row_factory = sqlite3.Row
+    try:
+        return _fetch_situation_details(conn, situation_id)
+    finally:
+        conn.close()
+
+
+def _fetch_situation_details(conn, situation_id):
+    import sqlite3
     c = conn.cursor()
+    c.row_factory = sqlite3.Row
 
-    # Derechos
-    c.execute("""
-        SELECT r.id, r.title, r.description, r.legal_basis,
-               r.is_absolute, r.never_suspended, r.category,
-               sr.context_id, sr.applies, sr.notes
-        FROM situation_rights sr
-        JOIN rights r ON sr.right_id = r.id
-        WHERE sr.situation_id = ?
-        ORDER BY r.display_order
-    """, (situation_id,))
+    c.execute(RIGHTS_QUERY, (situation_id,))
     rights = [dict(row) for row in c.fetchall()]
 
-    # Acciones
-    c.execute("""
-        SELECT a.id, a.action_type, a.title, a.description,
-               a.script, a.warning, a.legal_basis_summary,
-               sa.step_order
-        FROM situation_actions sa
-        JOIN actions a ON sa.action_id = a.id
-        WHERE sa.situation_id = ? AND sa.is_available = 1
-        ORDER BY sa.step_order
-    """, (situation_id,))
+    c.execute(ACTIONS_QUERY, (situation_id,))
     actions = [dict(row) for row in c.fetchall()]
 
-    # Contactos
-    c.execute("""
-        SELECT ec.id, ec.institution, ec.description,
-               ec.phone, ec.whatsapp, ec.email, ec.website,
-               ec.available_hours, ec.is_free, ec.contact_type
-        FROM situation_contacts sc
-        JOIN emergency_contacts ec ON sc.contact_id = ec.id
-        WHERE sc.situation_id = ?
-        ORDER BY sc.priority
-    """, (situation_id,))
+    c.execute(CONTACTS_QUERY, (situation_id,))
     contacts = [dict(row) for row in c.fetchall()]
 
-    # Limites de tiempo
-    c.execute("""
-        SELECT id, description, max_hours, max_hours_emergency,
-               applies_to, after_expiry_action
-        FROM time_limits
-        WHERE situation_id = ?
-    """, (situation_id,))
+    c.execute(TIME_LIMITS_QUERY, (situation_id,))
     time_limits = [dict(row) for row in c.fetchall()]
 
-    conn.close()
-
     return {
         'rights': rights,
         'actions': actions,
@@ -294,6 +1036,12 @@ def get_situation_details(situation_id, db_path=None):
 # --- Ejecucion directa ---
 
 if __name__ == "__main__":
+    # Fix encoding on Windows consoles
+    if sys.stdout.encoding and sys.stdout.encoding.lower() != 'utf-8':
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+        sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+
     if len(sys.argv) < 2:
         print("Uso: python search.py \"tu consulta\"")
         print("Ejemplo: python search.py \"me quieren revisar el celular\"")
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Truths and Rights — Daemon de busqueda
+Mantiene el indice y los detalles en memoria y atiende por un socket Unix.
+
+Cada `python cli.py "..."` paga arranque del interprete, imports, apertura
+de la DB y la busqueda. En terminales que consultan muchas veces conviene
+dejar un proceso caliente:
+
+    python cli.py --serve          # arranca el daemon
+    python cli.py "me piden dni"   # usa el daemon si esta corriendo
+
+Protocolo: una linea JSON por pedido y una por respuesta.
+    -> {"query": "me piden dni", "limit": 3, "details": true}
+    <- {"results": [...], "details": {...}}
+    -> {"situation_id": "police_id_check"}
+    <- {"details": {...}}
+    -> {"query": "me piden dni", "card": "ansi", "region": "Callao"}
+    <- {"results": [...], "card": "...", "context": "normal"}
+    -> {"status": true}
+    <- {"status": {...}}
+"""
+
+import json
+import os
+import socket
+import socketserver
+import sys
+from pathlib import Path
+
+# El cliente no importa search: asi una consulta via daemon no paga el
+# costo de cargar el buscador. El servidor lo importa al arrancar.
+PROJECT_ROOT = Path(__file__).parent.parent
+SOCKET_PATH = PROJECT_ROOT / "build" / "search.sock"
+SOCKET_ENV = "TRUTHS_SOCKET"
+# Tiempo maximo que espera el cliente antes de caer a la busqueda en proceso
+CLIENT_TIMEOUT = 2.0
+MAX_REQUEST_BYTES = 64 * 1024
+
+
+def default_socket_path():
+    """Ruta del socket (configurable con la variable TRUTHS_SOCKET)."""
+    return Path(os.environ.get(SOCKET_ENV, SOCKET_PATH))
+
+
+def is_supported():
+    """Los sockets Unix no existen en todas las plataformas (ej: Windows viejo)."""
+    return hasattr(socket, 'AF_UNIX')
+
+
+class SearchService:
+    """Busqueda + cache de detalles sobre una DB; es el estado caliente del daemon."""
+
+    def __init__(self, db_path=None, details_cache_size=512):
+        import search
+        self._search = search
+        self.db_path = Path(db_path or search.DB_PATH)
+        self.details_cache = search.QueryCache(maxsize=details_cache_size)
+        # Calienta el indice antes del primer pedido
+        search.load_search_index(self.db_path)
+
+    def details(self, situation_id):
+        index = self._search.load_search_index(self.db_path)
+        key = (situation_id, index.build_id)
+        details = self.details_cache.get(key)
+        if details is None:
+            details = self._search.get_situation_details(situation_id, db_path=self.db_path)
+            self.details_cache.put(key, details)
+        return details
+
+    def card(self, situation_id, fmt, context_id='normal'):
+        """Tarjeta pre-renderizada (answer_cards), cacheada junto a los detalles."""
+        from cards import get_card
+        index = self._search.load_search_index(self.db_path)
+        key = ('card', situation_id, context_id, fmt, index.build_id)
+        card = self.details_cache.get(key)
+        if card is None:
+            card = get_card(situation_id, context_id, fmt, db_path=self.db_path)
+            self.details_cache.put(key, card)
+        return card
+
+    def context_for(self, region):
+        """Contexto vigente hoy en la region ('normal' sin region)."""
+        if not region:
+            return 'normal'
+        from context_resolver import load_context_resolver
+        return load_context_resolver(self.db_path).active_context_id(str(region))
+
+    def handle(self, request):
+        """Atiende un pedido ya decodificado y devuelve la respuesta (dict)."""
+        if not isinstance(request, dict):
+            return {'error': 'Pedido invalido: se esperaba un objeto JSON'}
+        if request.get('status'):
+            index = self._search.load_search_index(self.db_path)
+            return {'status': {
+                'db_path': str(self.db_path),
+                'build_id': index.build_id,
+                'situations': len(index),
+                'results_cache': self._search.cache_stats(),
+                'details_cache': self.details_cache.stats(),
+            }}
+
+        if 'situation_id' in request:
+            if request.get('card'):
+                return {'card': self.card(str(request['situation_id']), str(request['card']),
+                                          str(request.get('context', 'normal')))}
+            return {'details': self.details(str(request['situation_id']))}
+
+        query = request.get('query')
+        if not isinstance(query, str):
+            return {'error': "Falta 'query'"}
+        limit = int(request.get('limit', 3))
+        results = self._search.search_situation(query, db_path=self.db_path, limit=limit)
+        response = {'results': results}
+        if request.get('details') and results:
+            response['details'] = self.details(results[0]['situation_id'])
+        if request.get('card') and results:
+            context_id = self.context_for(request.get('region'))
+            response['card'] = self.card(results[0]['situation_id'], str(request['card']), context_id)
+            response['context'] = context_id
+        return response
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            line = self.rfile.readline(MAX_REQUEST_BYTES + 1)
+            if not line:
+                break
+            if len(line) > MAX_REQUEST_BYTES:
+                self._reply({'error': 'Pedido demasiado grande'})
+                break
+            try:
+                response = self.server.service.handle(json.loads(line))
+            except (ValueError, TypeError) as e:
+                response = {'error': f'Pedido invalido: {e}'}
+            except Exception as e:
+                # DB ausente, sqlite3.Error, tarjeta inexistente...: igual se
+                # responde una linea, el cliente no queda esperando
+                response = {'error': f'Error interno: {type(e).__name__}: {e}'}
+            self._reply(response)
+
+    def _reply(self, response):
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+        self.wfile.flush()
+
+
+class SearchDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, service):
+        self.service = service
+        self.socket_path = Path(socket_path)
+        _claim_socket_path(self.socket_path)
+        super().__init__(str(self.socket_path), _RequestHandler)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            self.socket_path.unlink()
+        except OSError:
+            pass
+
+
+def _claim_socket_path(path):
+    """Borra un socket abandonado; falla si otro daemon lo esta usando."""
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(path))
+    except OSError:
+        path.unlink()
+    else:
+        raise RuntimeError(f"Ya hay un daemon escuchando en {path}")
+    finally:
+        probe.close()
+
+
+def serve(socket_path=None, db_path=None):
+    """Arranca el daemon y atiende hasta Ctrl+C."""
+    if not is_supported():
+        print("ERROR: Esta plataforma no soporta sockets Unix.")
+        return 1
+
+    socket_path = Path(socket_path or default_socket_path())
+    service = SearchService(db_path)
+    with SearchDaemon(socket_path, service) as server:
+        print(f"Daemon de busqueda escuchando en {socket_path}")
+        print(f"  DB: {service.db_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nDaemon detenido.")
+    return 0
+
+
+# --- Cliente ---
+
+def request(payload, socket_path=None, timeout=CLIENT_TIMEOUT):
+    """
+    Envia un pedido al daemon.
+
+    Returns:
+        dict con la respuesta, o None si no hay daemon (el que llama debe
+        hacer la busqueda en proceso).
+    """
+    if not is_supported():
+        return None
+    socket_path = Path(socket_path or default_socket_path())
+    if not socket_path.exists():
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(socket_path))
+        sock.sendall(json.dumps(payload, ensure_ascii=False).encode('utf-8') + b'\n')
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            if chunk.endswith(b'\n'):
+                break
+        response = json.loads(b''.join(chunks))
+    except (OSError, ValueError):
+        return None
+    finally:
+        sock.close()
+
+    if 'error' in response:
+        return None
+    return response
+
+
+def query(text, limit=3, details=True, socket_path=None, card=None, region=None):
+    """
+    Busqueda via daemon: (results, details) o None si no hay daemon.
+
+    Con card='ansi' (u otro formato de cards.py) devuelve (results, tarjeta)
+    en lugar de los detalles; `region` elige el contexto vigente de la tarjeta.
+    """
+    payload = {'query': text, 'limit': limit, 'details': details and not card}
+    if card:
+        payload['card'] = card
+    if region:
+        payload['region'] = region
+    response = request(payload, socket_path)
+    if response is None:
+        return None
+    if card:
+        return response['results'], response.get('card')
+    return response['results'], response.get('details')
+
+
+if __name__ == "__main__":
+    sys.exit(serve())
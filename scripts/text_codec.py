@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Truths and Rights — Compresion de textos legales
+legal_sources.full_text con un diccionario compartido.
+
+Con los codigos completos, full_text es lo que mas pesa en la DB. Los
+articulos son cortos y repiten las mismas frases ("la autoridad policial",
+"bajo responsabilidad", "conforme a ley"): comprimidos de a uno, zlib no
+llega a aprender nada. Con un diccionario entrenado sobre todo el corpus
+cada articulo se comprime referenciando frases del diccionario.
+
+    - zstd (si esta instalado zstandard): train_dictionary sobre los textos.
+    - zlib (siempre): zdict armado con las frases de varias palabras que mas
+      se repiten entre articulos; las mas utiles al final (distancias cortas).
+    - El diccionario va en text_dictionaries; cada fila guarda un BLOB
+      (deflate crudo o frame zstd). Si comprimir no achica, queda en TEXT.
+    - search.text_decoder() descomprime sin que el lector sepa si la DB se
+      construyo comprimida o no.
+
+Opcional: build_db.py --compress-texts. La DB mobile siempre lleva los
+textos en claro (db_profiles.py los descomprime al moverlos).
+
+Uso como modulo:
+    from text_codec import compress_full_texts
+    stats = compress_full_texts(conn)
+
+Uso directo:
+    python text_codec.py [db]   # benchmark: tamano vs latencia por articulo
+"""
+
+import sys
+import time
+import zlib
+from collections import Counter
+
+from search import FULL_TEXT_DICTIONARY, text_decoder
+
+# zlib solo puede referenciar los ultimos 32 KB: un zdict mas grande no sirve
+ZLIB_DICT_SIZE = 32 * 1024
+ZSTD_DICT_SIZE = 64 * 1024
+ZLIB_LEVEL = 9
+ZSTD_LEVEL = 19
+
+# Frases candidatas: n palabras seguidas, presentes en al menos MIN_DOCS textos
+PHRASE_WORDS = (12, 8, 5, 3)
+MIN_DOCS = 2
+
+
+def available_codecs():
+    """'zstd' primero si el modulo esta instalado; 'zlib' siempre."""
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return ('zlib',)
+    return ('zstd', 'zlib')
+
+
+def train_zlib_dictionary(texts, size=ZLIB_DICT_SIZE):
+    """
+    zdict con las frases que mas bytes ahorran en el corpus.
+
+    Puntaje = (textos en que aparece - 1) * largo: lo que se repite en un
+    solo texto ya lo comprime zlib por su cuenta.
+    """
+    docs = Counter()
+    for text in texts:
+        words = text.split()
+        phrases = set()
+        for n in PHRASE_WORDS:
+            for i in range(len(words) - n + 1):
+                phrases.add(' '.join(words[i:i + n]))
+        docs.update(phrases)
+
+    candidates = sorted(
+        ((count - 1) * len(phrase.encode('utf-8')), phrase)
+        for phrase, count in docs.items() if count >= MIN_DOCS
+    )
+    chosen = []
+    used = 0
+    joined = ''
+    for _, phrase in reversed(candidates):
+        if phrase in joined:
+            continue
+        length = len(phrase.encode('utf-8')) + 1
+        if used + length > size:
+            continue
+        chosen.append(phrase)
+        joined += phrase + ' '
+        used += length
+    # zlib encuentra antes (y codifica mas corto) lo que esta al final
+    return ' '.join(reversed(chosen)).encode('utf-8')
+
+
+def train_dictionary(texts, codec):
+    """Diccionario para el codec; zstd vuelve a zlib si el corpus es muy chico."""
+    if codec == 'zstd':
+        import zstandard
+        samples = [text.encode('utf-8') for text in texts]
+        try:
+            return 'zstd', zstandard.train_dictionary(ZSTD_DICT_SIZE, samples).as_bytes()
+        except zstandard.ZstdError:
+            pass
+    return 'zlib', train_zlib_dictionary(texts)
+
+
+def compressor(codec, dictionary):
+    """Funcion str -> BLOB comprimido con el diccionario."""
+    if codec == 'zstd':
+        import zstandard
+        zc = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=zstandard.ZstdCompressionDict(dictionary))
+        return lambda text: zc.compress(text.encode('utf-8'))
+
+    def compress(text):
+        deflater = zlib.compressobj(ZLIB_LEVEL, zlib.DEFLATED, -15, zdict=dictionary)
+        return deflater.compress(text.encode('utf-8')) + deflater.flush()
+    return compress
+
+
+def compress_full_texts(conn, codec=None):
+    """
+    Entrena el diccionario sobre legal_sources.full_text y comprime cada fila.
+
+    Returns:
+        dict con codec, rows, raw_bytes, stored_bytes y dictionary_bytes
+    """
+    codec = codec or available_codecs()[0]
+    rows = conn.execute("SELECT id, full_text FROM legal_sources ORDER BY id").fetchall()
+    texts = [text for _, text in rows if isinstance(text, str) and text]
+
+    codec, dictionary = train_dictionary(texts, codec)
+    compress = compressor(codec, dictionary)
+    conn.execute(
+        "INSERT OR REPLACE INTO text_dictionaries (name, codec, dictionary) VALUES (?, ?, ?)",
+        (FULL_TEXT_DICTIONARY, codec, dictionary)
+    )
+
+    raw_bytes = stored_bytes = 0
+    updates = []
+    for source_id, text in rows:
+        if not isinstance(text, str) or not text:
+            continue
+        raw = len(text.encode('utf-8'))
+        blob = compress(text)
+        raw_bytes += raw
+        if len(blob) < raw:
+            updates.append((blob, source_id))
+            stored_bytes += len(blob)
+        else:
+            stored_bytes += raw
+    conn.executemany("UPDATE legal_sources SET full_text = ? WHERE id = ?", updates)
+
+    return {
+        'codec': codec,
+        'rows': len(updates),
+        'raw_bytes': raw_bytes,
+        'stored_bytes': stored_bytes,
+        'dictionary_bytes': len(dictionary),
+    }
+
+
+# --- Benchmark ---
+
+def _decode_us(decode, blobs, runs):
+    """Mejor tiempo por articulo (us) de decodificar todos los blobs."""
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        for blob in blobs:
+            decode(blob)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / max(len(blobs), 1) * 1e6
+
+
+def benchmark(conn, runs=20):
+    """
+    Tamano y latencia de lectura por articulo: texto plano, zlib por fila
+    sin diccionario y cada codec con diccionario compartido.
+
+    Returns:
+        Lista de dicts (variant, bytes, dictionary_bytes, decode_us)
+    """
+    decode_current = text_decoder(conn)
+    texts = [decode_current(text) for (text,) in conn.execute("SELECT full_text FROM legal_sources ORDER BY id")]
+    texts = [text for text in texts if text]
+    raw = [text.encode('utf-8') for text in texts]
+
+    results = [{
+        'variant': 'plano',
+        'bytes': sum(len(b) for b in raw),
+        'dictionary_bytes': 0,
+        'decode_us': _decode_us(lambda b: b.decode('utf-8'), raw, runs),
+    }]
+
+    per_row = [zlib.compress(b, ZLIB_LEVEL) for b in raw]
+    results.append({
+        'variant': 'zlib por fila',
+        'bytes': sum(len(b) for b in per_row),
+        'dictionary_bytes': 0,
+        'decode_us': _decode_us(lambda b: zlib.decompress(b).decode('utf-8'), per_row, runs),
+    })
+
+    from search import _TEXT_CODECS
+    for codec in available_codecs():
+        codec, dictionary = train_dictionary(texts, codec)
+        compress = compressor(codec, dictionary)
+        blobs = [compress(text) for text in texts]
+        decode = _TEXT_CODECS[codec](dictionary)
+        results.append({
+            'variant': f'{codec} + diccionario',
+            'bytes': sum(min(len(blob), len(b)) for blob, b in zip(blobs, raw)),
+            'dictionary_bytes': len(dictionary),
+            'decode_us': _decode_us(decode, blobs, runs),
+        })
+    return results
+
+
+# --- Ejecucion directa ---
+
+if __name__ == "__main__":
+    import sqlite3
+    from search import DB_PATH
+
+    db_path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    conn = sqlite3.connect(str(db_path))
+    count = conn.execute("SELECT COUNT(*) FROM legal_sources").fetchone()[0]
+    results = benchmark(conn)
+    conn.close()
+
+    plain = results[0]['bytes']
+    print(f"full_text: {count} articulos, {plain / 1024:.1f} KB en claro\n")
+    print(f"  {'variante':22} {'textos':>10} {'+ dicc.':>10} {'total':>8} {'lectura/art.':>13}")
+    for r in results:
+        total = r['bytes'] + r['dictionary_bytes']
+        print(f"  {r['variant']:22} {r['bytes'] / 1024:8.1f}KB {r['dictionary_bytes'] / 1024:8.1f}KB "
+              f"{total / plain:7.0%} {r['decode_us']:10.1f} us")
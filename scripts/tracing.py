@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Truths and Rights — Trazas del build
+Tramos (spans) anidados con tiempo, filas y bytes.
+
+Cuando el build se pone lento en CI hay que saber si es la carga de JSON,
+la validacion, los inserts, los indices o el commit. build_db.py,
+validate_sources.py y generate_site.py marcan sus etapas con span() y,
+con --trace salida.json, escriben:
+
+    - un archivo de eventos de Chrome (chrome://tracing o ui.perfetto.dev)
+    - un resumen en texto: cada etapa con llamadas, ms, filas y bytes
+
+Sin --trace, span() devuelve siempre el mismo objeto vacio: el costo es
+una llamada y un `is None`, sin relojes ni diccionarios.
+
+Uso como modulo:
+    from tracing import span, start_tracing, finish_tracing
+    start_tracing()
+    with span('sources', file='constitution.json') as s:
+        ...
+        s.add(rows=43, bytes=12000)
+    finish_tracing('build/trace.json')
+"""
+
+import json
+import os
+import threading
+import time
+
+# Contadores que el resumen suma por etapa
+SUMMARY_COUNTERS = ('rows', 'bytes')
+
+_tracer = None
+
+
+class _NullSpan:
+    """Span de cuando no hay trazas: no mide ni guarda nada."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, **counters):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """Tramo medido; add() acumula contadores (rows, bytes) en sus args."""
+
+    __slots__ = ('tracer', 'name', 'args', 'path', 'start')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        tracer = self.tracer
+        tracer._stack.append(self.name)
+        self.path = '/'.join(tracer._stack)
+        tracer._order.setdefault(self.path, len(tracer._order))
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self.tracer._stack.pop()
+        self.tracer._record(self, end)
+        return False
+
+    def add(self, **counters):
+        for key, value in counters.items():
+            self.args[key] = self.args.get(key, 0) + value
+
+
+class Tracer:
+    """Junta los tramos terminados de este proceso."""
+
+    def __init__(self, category='build'):
+        self.category = category
+        self.events = []
+        self.spans = []
+        self._stack = []
+        self._order = {}
+        self._origin = time.perf_counter_ns()
+        self._pid = os.getpid()
+
+    def span(self, name, args):
+        return Span(self, name, args)
+
+    def _record(self, span, end):
+        self.events.append({
+            'name': span.name,
+            'cat': self.category,
+            'ph': 'X',
+            'ts': (span.start - self._origin) / 1000,
+            'dur': (end - span.start) / 1000,
+            'pid': self._pid,
+            'tid': threading.get_ident(),
+            'args': span.args,
+        })
+        self.spans.append((span.path, (end - span.start) / 1e6, span.args))
+
+    def chrome_trace(self):
+        """Dict en formato Trace Event (eventos completos 'X', en us)."""
+        events = sorted(self.events, key=lambda e: (e['ts'], -e['dur']))
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def summary(self):
+        """Texto: una linea por etapa (en orden de inicio), indentada por nivel."""
+        totals = {}
+        for path, ms, args in self.spans:
+            entry = totals.setdefault(path, {'calls': 0, 'ms': 0.0})
+            entry['calls'] += 1
+            entry['ms'] += ms
+            for key in SUMMARY_COUNTERS:
+                if isinstance(args.get(key), (int, float)):
+                    entry[key] = entry.get(key, 0) + args[key]
+
+        lines = [f"  {'etapa':44} {'llamadas':>8} {'ms':>10} {'filas':>9} {'bytes':>11}"]
+        for path in sorted(totals, key=self._order.get):
+            entry = totals[path]
+            depth = path.count('/')
+            name = '  ' * depth + path.rsplit('/', 1)[-1]
+            rows = entry.get('rows', '')
+            size = entry.get('bytes', '')
+            lines.append(f"  {name:44} {entry['calls']:8} {entry['ms']:10.1f} {rows:>9} {size:>11}")
+        return '\n'.join(lines)
+
+
+def span(name, **args):
+    """Tramo con nombre; sin start_tracing() devuelve NULL_SPAN."""
+    if _tracer is None:
+        return NULL_SPAN
+    return _tracer.span(name, args)
+
+
+def tracing_enabled():
+    return _tracer is not None
+
+
+def start_tracing(category='build'):
+    """Activa las trazas en este proceso (reinicia las anteriores)."""
+    global _tracer
+    _tracer = Tracer(category)
+    return _tracer
+
+
+def finish_tracing(path=None, print_summary=True):
+    """
+    Desactiva las trazas; escribe el archivo de Chrome en `path` e imprime
+    el resumen.
+
+    Returns:
+        El Tracer con lo medido (None si no estaban activas)
+    """
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is None:
+        return None
+    if path:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(tracer.chrome_trace(), f, ensure_ascii=False)
+    if print_summary:
+        print(f"\n--- Trazas{f' ({path})' if path else ''} ---")
+        print(tracer.summary())
+    return tracer
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Truths and Rights — Busqueda unificada
+Un solo indice rankeado sobre situaciones, derechos, mitos y fuentes legales.
+
+Hay preguntas que responde mejor un mito ("¿es legal grabar a la policia?")
+o una fuente ("cuantos gramos puedo llevar") que una situacion. En vez de
+recorrer cada tabla por separado, este modulo indexa todas las entidades en
+un indice invertido con etiqueta de tipo y responde en una sola pasada por
+los postings de la consulta, respetando un cupo por tipo.
+
+Usa el mismo pipeline de texto que search.py (normalize + stopwords).
+
+Uso como modulo:
+    from unified_search import unified_search
+    results = unified_search("es legal grabar a la policia")
+
+Uso directo:
+    python unified_search.py "cuantos gramos puedo llevar"
+"""
+
+import heapq
+import math
+import sqlite3
+import sys
+from pathlib import Path
+
+from search import (
+    DB_PATH, STOPWORDS, cached_by_build_id, normalize, text_decoder, tokens_sin_stopwords,
+)
+
+# Tipos indexados: consulta (id + campos, el primero es el titulo), peso de
+# cada campo y campo que se muestra como extracto
+ENTITY_FIELDS = {
+    'situation': {
+        'query': "SELECT id, title, natural_queries, keywords, description FROM situations WHERE is_active = 1",
+        'weights': (3.0, 3.0, 2.0, 1.0),
+        'snippet': 3,
+    },
+    'right': {
+        'query': "SELECT id, title, description, legal_basis FROM rights ORDER BY display_order, id",
+        'weights': (3.0, 1.5, 1.0),
+        'snippet': 1,
+    },
+    'myth': {
+        'query': "SELECT id, myth, reality, explanation FROM myths ORDER BY display_order, id",
+        'weights': (3.0, 2.0, 1.0),
+        'snippet': 1,
+    },
+    'source': {
+        'query': "SELECT id, name || ' ' || COALESCE(article, ''), summary, full_text FROM legal_sources ORDER BY id",
+        'weights': (2.0, 2.0, 1.0),
+        'snippet': 1,
+    },
+}
+
+# Cupo por defecto de resultados de cada tipo
+DEFAULT_QUOTAS = {
+    'situation': 3,
+    'right': 3,
+    'myth': 2,
+    'source': 2,
+}
+
+# BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Los tokens largos tambien se indexan por su raiz de STEM_LEN letras
+# (grabar/grabarte, gramos/gramo) con menos peso que el match exacto.
+STEM_LEN = 5
+STEM_WEIGHT = 0.5
+
+SNIPPET_LEN = 160
+
+
+def _separators(text):
+    """natural_queries y keywords usan '|' y ',' como separadores."""
+    return (text or '').replace('|', ' ').replace(',', ' ')
+
+
+def index_terms(text):
+    """Terminos indexables: tokens sin stopwords + raices de los tokens largos."""
+    terms = {}
+    for tok in normalize(_separators(text)).split():
+        if tok in STOPWORDS:
+            continue
+        terms[tok] = terms.get(tok, 0) + 1.0
+        if len(tok) > STEM_LEN:
+            stem = '~' + tok[:STEM_LEN]
+            terms[stem] = terms.get(stem, 0) + STEM_WEIGHT
+    return terms
+
+
+def query_terms(query):
+    """Terminos de la consulta (mismo esquema que index_terms)."""
+    terms = {}
+    for tok in tokens_sin_stopwords(query):
+        terms[tok] = 1.0
+        if len(tok) > STEM_LEN:
+            terms.setdefault('~' + tok[:STEM_LEN], STEM_WEIGHT)
+    return terms
+
+
+def _snippet(text):
+    text = ' '.join((text or '').split())
+    if len(text) <= SNIPPET_LEN:
+        return text
+    return text[:SNIPPET_LEN].rsplit(' ', 1)[0] + '…'
+
+
+class UnifiedIndex:
+    """
+    Indice invertido: termino -> [(documento, tf ponderado)].
+
+    Cada documento guarda su tipo, id, titulo, un extracto y su largo
+    ponderado (para la normalizacion de BM25).
+    """
+
+    def __init__(self):
+        self.docs = []
+        self.postings = {}
+        self._total_len = 0.0
+
+    def add(self, entity_type, entity_id, fields, weights, snippet=1):
+        """Agrega una entidad: fields[0] es el titulo y fields[snippet] el extracto."""
+        doc = len(self.docs)
+        tf = {}
+        length = 0.0
+        for text, weight in zip(fields, weights):
+            for term, count in index_terms(text).items():
+                tf[term] = tf.get(term, 0.0) + count * weight
+                length += count * weight
+        for term, value in tf.items():
+            self.postings.setdefault(term, []).append((doc, value))
+
+        self.docs.append({
+            'type': entity_type,
+            'id': entity_id,
+            'title': fields[0] or '',
+            'snippet': _snippet(fields[snippet] if snippet < len(fields) else ''),
+            'length': length,
+        })
+        self._total_len += length
+
+    @classmethod
+    def from_db(cls, conn):
+        index = cls()
+        # full_text puede venir comprimido (build_db.py --compress-texts)
+        decode = text_decoder(conn)
+        for entity_type, spec in ENTITY_FIELDS.items():
+            for row in conn.execute(spec['query']):
+                entity_id, fields = row[0], tuple(decode(field) for field in row[1:])
+                index.add(entity_type, entity_id, fields, spec['weights'], spec['snippet'])
+        return index
+
+    def __len__(self):
+        return len(self.docs)
+
+    def search(self, query, limit=10, quotas=None):
+        """
+        Una pasada por los postings de la consulta y seleccion top-k por tipo.
+
+        Args:
+            query: Texto del usuario
+            limit: Maximo total de resultados
+            quotas: dict tipo -> maximo de resultados de ese tipo
+                    (por defecto DEFAULT_QUOTAS; tipos ausentes se excluyen)
+
+        Returns:
+            Lista de dicts con type, id, title, snippet y score, ordenada por score
+        """
+        quotas = DEFAULT_QUOTAS if quotas is None else quotas
+        terms = query_terms(query)
+        if not terms or not self.docs or limit <= 0:
+            return []
+
+        n_docs = len(self.docs)
+        avg_len = self._total_len / n_docs or 1.0
+
+        # Acumulacion BM25 en una sola pasada por los postings de la consulta
+        scores = {}
+        for term, q_weight in terms.items():
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc, tf in posting:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.docs[doc]['length'] / avg_len)
+                scores[doc] = scores.get(doc, 0.0) + q_weight * idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        # Min-heap por tipo con su cupo (desempate: orden de indexacion)
+        heaps = {t: [] for t, q in quotas.items() if q > 0}
+        for doc, score in scores.items():
+            heap = heaps.get(self.docs[doc]['type'])
+            if heap is None:
+                continue
+            entry = (score, -doc)
+            if len(heap) < quotas[self.docs[doc]['type']]:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+
+        selected = sorted((e for heap in heaps.values() for e in heap), reverse=True)[:limit]
+        results = []
+        for score, neg_doc in selected:
+            doc = self.docs[-neg_doc]
+            results.append({
+                'type': doc['type'],
+                'id': doc['id'],
+                'title': doc['title'],
+                'snippet': doc['snippet'],
+                'score': round(score, 4),
+            })
+        return results
+
+
+def load_unified_index(db_path=None):
+    """Construye (o reutiliza, mientras no cambie el build_id) el indice unificado."""
+    return cached_by_build_id(db_path, UnifiedIndex.from_db)
+
+
+def unified_search(query, db_path=None, limit=10, quotas=None):
+    """
+    Busca en situaciones, derechos, mitos y fuentes a la vez.
+
+    Returns:
+        Lista de dicts con type ('situation', 'right', 'myth', 'source'),
+        id, title, snippet y score
+    """
+    if db_path is None:
+        db_path = DB_PATH
+
+    if not Path(db_path).exists():
+        print(f"ERROR: No se encontro la base de datos: {db_path}")
+        print("Ejecuta primero: python scripts/build_db.py --country PE")
+        return []
+
+    return load_unified_index(db_path).search(query, limit=limit, quotas=quotas)
+
+
+# --- Ejecucion directa ---
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python unified_search.py \"tu consulta\"")
+        sys.exit(1)
+
+    query = ' '.join(sys.argv[1:])
+    print(f"\nBuscando: \"{query}\"\n")
+
+    results = unified_search(query)
+    if not results:
+        print("Sin resultados.")
+        sys.exit(0)
+
+    for r in results:
+        print(f"[{r['score']:.2f}] ({r['type']}) {r['title']}")
+        print(f"   {r['snippet']}")
+        print()
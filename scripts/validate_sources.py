@@ -7,6 +7,10 @@ Uso:
     python validate_sources.py              # Validar todo
     python validate_sources.py --country PE # Solo Perú
     python validate_sources.py --fix        # Intentar corregir errores menores
+    python validate_sources.py --trace build/validate_trace.json
+                                            # Tiempos por etapa (tracing.py)
+    python validate_sources.py --country PE --changed-since origin/main
+                                            # Solo lo que cambio (ver abajo)
 
 Verifica:
   - Todos los archivos JSON son válidos
@@ -15,15 +19,41 @@ Verifica:
   - No hay IDs duplicados
   - Las fuentes citadas en rights/situations existen en sources
   - Los contactos citados existen
+  - Las situaciones padre existen y no forman ciclos
+  - No hay textos de fuentes ni descripciones de derechos casi duplicados
+    (MinHash + LSH, near_duplicates.py; advertencia)
   - Build funciona sin errores
+
+Los campos obligatorios, tipos y valores validos salen de los esquemas
+de schema/data_format.json (data_schemas.py), los mismos que usa el build.
+
+Cada corrida guarda en build/validation/<cc>.json un indice por archivo:
+blob de git, IDs, problemas de campos, referencias salientes (y cuales
+estan rotas) y, por ID, que archivos lo referencian. Con --changed-since
+solo se leen los archivos que git ve cambiados desde esa ref; de los demas
+se reusa lo guardado y solo se re-chequean sus referencias a IDs que
+aparecieron o desaparecieron. El resultado es el mismo que el de una
+validacion completa (el build lo corre su propio paso de CI). Sin indice,
+o si no coincide con la ref, se valida todo.
+
+El indice guarda tambien el hash de cada texto comparado; las firmas
+MinHash van aparte, en build/validation/<cc>_minhash.json, y solo se
+calculan las de textos nuevos o editados.
 """
 
+import hashlib
 import json
+import subprocess
 import sys
 import io
 from pathlib import Path
 from collections import Counter
 
+from build_db import DATA_FILES
+from data_schemas import check_entity, load_schemas, schema_digest
+from near_duplicates import SignatureCache, find_clusters, normalize, text_digest
+from tracing import finish_tracing, span, start_tracing
+
 # Fix encoding on Windows consoles (cp1252 can't handle emojis)
 if sys.stdout.encoding and sys.stdout.encoding.lower() != 'utf-8':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
@@ -31,348 +61,556 @@ if sys.stdout.encoding and sys.stdout.encoding.lower() != 'utf-8':
 
 PROJECT_ROOT = Path(__file__).parent.parent
 DATA_DIR = PROJECT_ROOT / "data"
+INDEX_DIR = PROJECT_ROOT / "build" / "validation"
+
+# Sube si cambia lo que guarda el indice: los indices viejos se ignoran
+INDEX_FORMAT = 2
+
+# Tipos de entidad, en el orden en que se reportan
+ENTITY_KINDS = ('contexts', 'sources', 'rights', 'actions', 'contacts', 'situations', 'myths')
+
+# "Fuente", "Derecho"...: el title de cada esquema
+ENTITY_LABELS = {kind: schema['title'] for kind, schema in load_schemas().items()}
+
+# Como se nombra el tipo referenciado en los mensajes
+REFERENCE_LABELS = {
+    'sources': 'fuente',
+    'rights': 'derecho',
+    'actions': 'acción',
+    'contacts': 'contacto',
+    'contexts': 'contexto',
+    'situations': 'situación padre',
+}
+
+# Textos que se comparan buscando casi duplicados, y como se reportan
+NEAR_DUPLICATE_FIELDS = {'sources': 'full_text', 'rights': 'description'}
+NEAR_DUPLICATE_LABELS = {
+    'sources': 'Fuentes con texto casi idéntico',
+    'rights': 'Derechos con descripción casi idéntica',
+}
+
+# Encabezado y cierre de la seccion de cada tipo
+KIND_SECTIONS = {
+    'contexts': ("🌐 Validando contextos...", "{} contextos validados"),
+    'sources': ("📚 Validando fuentes legales...", "{} fuentes validadas"),
+    'rights': ("⚖️ Validando derechos...", "{} derechos validados"),
+    'actions': ("🎬 Validando acciones...", "{} acciones validadas"),
+    'contacts': ("📞 Validando contactos...", "{} contactos validados"),
+    'situations': ("🔍 Validando situaciones...", "{} situaciones validadas"),
+    'myths': ("💡 Validando mitos...", "{} mitos validados"),
+}
+
+
+# ============================================================
+# REFERENCIAS
+# ============================================================
+
+def iter_references(kind, entity):
+    """
+    Referencias de una entidad a otras: (tipo referenciado, id, severidad).
+
+    Todas son 'error' salvo mitos -> fuentes ('warn'): el mito se muestra
+    igual aunque la fuente citada no este cargada.
+    """
+    if kind == 'contexts':
+        if entity.get('source_id'):
+            yield 'sources', entity['source_id'], 'error'
+    elif kind == 'rights':
+        for src_id in entity.get('source_ids', []):
+            yield 'sources', src_id, 'error'
+    elif kind == 'situations':
+        for right_rel in entity.get('rights', []):
+            if right_rel.get('right_id'):
+                yield 'rights', right_rel['right_id'], 'error'
+            yield 'contexts', right_rel.get('context', 'normal'), 'error'
+        for action_rel in entity.get('actions', []):
+            if action_rel.get('action_id'):
+                yield 'actions', action_rel['action_id'], 'error'
+        for cid in entity.get('contacts', []):
+            yield 'contacts', cid, 'error'
+        for tl in entity.get('time_limits', []):
+            if tl.get('source_id'):
+                yield 'sources', tl['source_id'], 'error'
+        if entity.get('parent_situation_id'):
+            yield 'situations', entity['parent_situation_id'], 'error'
+    elif kind == 'myths':
+        for src_id in entity.get('related_source_ids', []):
+            yield 'sources', src_id, 'warn'
+
+
+def find_parent_cycles(parents):
+    """
+    Ciclos de parent_situation_id, en O(n): cada situacion se recorre una vez.
+
+    Args:
+        parents: dict id de situacion -> id del padre
+    Returns:
+        Lista de ciclos (listas de ids, empezando por el menor)
+    """
+    visited = {}  # id -> recorrido en que se visito
+    cycles = []
+    for walk, sid in enumerate(sorted(parents)):
+        path = []
+        while sid in parents and sid not in visited:
+            visited[sid] = walk
+            path.append(sid)
+            sid = parents[sid]
+        # Se volvio a un id de este mismo recorrido: el tramo desde ahi es un ciclo
+        if visited.get(sid) == walk and path:
+            cycle = path[path.index(sid):]
+            first = cycle.index(min(cycle))
+            cycles.append(cycle[first:] + cycle[:first])
+    return cycles
+
+
+# ============================================================
+# ARCHIVOS E INDICE
+# ============================================================
+
+def git_blob_id(raw):
+    """Id que git le da al contenido: se compara con `git ls-tree` sin releer."""
+    return hashlib.sha1(b"blob %d\0" % len(raw) + raw).hexdigest()
+
+
+def scan_file(kind, path):
+    """
+    Lee y chequea un archivo de datos, sin imprimir.
+
+    Returns:
+        (entrada del indice, entidades). La entrada lleva kind, blob, loaded,
+        ids, issues [[severidad, mensaje]], references
+        [[id dueño, tipo referenciado, id, severidad]] y, para los tipos de
+        NEAR_DUPLICATE_FIELDS, texts {id: hash del texto normalizado}.
+    """
+    entry = {'kind': kind, 'blob': None, 'loaded': False, 'ids': [], 'issues': [],
+             'references': [], 'broken': []}
+    if not path.exists():
+        entry['issues'].append(['warn', f"Archivo no encontrado: {path}"])
+        return entry, []
+
+    raw = path.read_bytes()
+    entry['blob'] = git_blob_id(raw)
+    with span('load_json', file=path.name) as s:
+        try:
+            data = json.loads(raw.decode('utf-8'))
+        except json.JSONDecodeError as e:
+            entry['issues'].append(['error', f"JSON inválido en {path}: {e}"])
+            return entry, []
+        data = data if isinstance(data, list) else [data]
+        s.add(rows=len(data), bytes=len(raw))
+    entry['loaded'] = True
+
+    entities = [e for e in data if isinstance(e, dict)]
+    for entity in entities:
+        eid = entity.get('id', '???')
+        entry['ids'].append(eid)
+        entry['issues'].extend([severity, msg] for severity, msg in check_entity(kind, entity))
+        entry['references'].extend([eid, target, ref_id, severity]
+                                   for target, ref_id, severity in iter_references(kind, entity))
+    if kind in NEAR_DUPLICATE_FIELDS:
+        field = NEAR_DUPLICATE_FIELDS[kind]
+        entry['texts'] = {}
+        for entity in entities:
+            text = entity.get(field)
+            if isinstance(text, str):
+                entry['texts'].setdefault(entity.get('id', '???'), text_digest(normalize(text)))
+    return entry, entities
+
+
+def referrers_index(files):
+    """tipo -> id referenciado -> archivos que lo referencian."""
+    referrers = {}
+    for rel, entry in files.items():
+        for _, target, ref_id, _ in entry['references']:
+            targets = referrers.setdefault(target, {}).setdefault(ref_id, [])
+            if not targets or targets[-1] != rel:
+                targets.append(rel)
+    return referrers
+
+
+def git_changes(country_dir, ref):
+    """
+    Archivos del pais que cambiaron desde `ref` (incluye los sin commitear y
+    los nuevos) y blob de cada archivo en `ref`. Rutas relativas al pais.
+
+    Returns:
+        (set de rutas cambiadas, dict ruta -> blob), o None si git falla
+    """
+    def git(*args):
+        result = subprocess.run(
+            ['git', '-c', 'core.quotePath=false', *args],
+            cwd=country_dir, capture_output=True, text=True, encoding='utf-8', check=True,
+        )
+        return result.stdout.splitlines()
+
+    try:
+        changed = set(git('diff', '--name-only', '--relative', '--no-renames', ref, '--', '.'))
+        changed.update(git('ls-files', '--others', '--exclude-standard', '--', '.'))
+        blobs = {}
+        for line in git('ls-tree', '-r', ref, '--', '.'):
+            meta, path = line.split('\t', 1)
+            blobs[path] = meta.split()[2]
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return changed, blobs
+
 
 # ============================================================
 # VALIDADORES
 # ============================================================
 
 class Validator:
-    def __init__(self, country_code):
+    """
+    Valida en dos fases, sin depender del orden de carga:
+      1. collect(): lee cada archivo (campos y referencias salientes) y arma
+         un indice de IDs por tipo; los duplicados se reportan aca.
+      2. validate_kind() reporta los problemas de campos de cada tipo;
+         validate_references() busca cada referencia en el indice del tipo
+         referenciado.
+
+    Con collect(changed_since=ref), los archivos sin cambios se toman del
+    indice guardado en vez de leerse.
+    """
+
+    def __init__(self, country_code, data_dir=DATA_DIR, index_dir=INDEX_DIR):
         self.country = country_code
-        self.country_dir = DATA_DIR / country_code
+        self.country_dir = Path(data_dir) / country_code
+        self.index_path = Path(index_dir) / f"{country_code.lower()}.json"
+        self.signatures_path = Path(index_dir) / f"{country_code.lower()}_minhash.json"
         self.errors = []
         self.warnings = []
         self.stats = Counter()
-        
-        # Registros de IDs para cross-reference
-        self.source_ids = set()
-        self.right_ids = set()
-        self.action_ids = set()
-        self.situation_ids = set()
-        self.contact_ids = set()
-        self.context_ids = set()
-    
+
+        # Entradas del indice por archivo (ruta relativa al pais)
+        self.files = {}
+        # Entidades leidas en esta corrida (para el build) e indices de IDs
+        self.entities = {kind: [] for kind in ENTITY_KINDS}
+        self.index = {kind: {} for kind in ENTITY_KINDS}
+        # Textos leidos en esta corrida: archivo -> id -> texto
+        self.texts = {}
+
+        # Modo incremental: archivos leidos, IDs que aparecieron o desaparecieron
+        # y archivos sin cambios que referencian alguno de esos IDs
+        self.scanned = []
+        self.changed_ids = None
+        self.affected = set()
+
     def error(self, msg):
         self.errors.append(msg)
         print(f"  ✗ ERROR: {msg}")
-    
+
     def warn(self, msg):
         self.warnings.append(msg)
         print(f"  ⚠ WARN: {msg}")
-    
+
     def ok(self, msg):
         print(f"  ✓ {msg}")
-    
-    def load_json(self, filepath):
-        """Carga JSON con manejo de errores."""
-        if not filepath.exists():
-            self.warn(f"Archivo no encontrado: {filepath}")
-            return []
-        
+
+    def report_issue(self, severity, msg):
+        (self.error if severity == 'error' else self.warn)(msg)
+
+    def kind_files(self, kind):
+        """Archivos de un tipo (los de un solo archivo, aunque no existan)."""
+        pattern = DATA_FILES[kind]
+        if '*' in pattern:
+            return sorted(self.country_dir.glob(pattern))
+        return [self.country_dir / pattern]
+
+    # --- Indice persistido ---
+
+    def load_index(self):
+        """Indice de la corrida anterior, o None si no hay o es de otro formato."""
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            self.stats['files_loaded'] += 1
-            return data if isinstance(data, list) else [data]
-        except json.JSONDecodeError as e:
-            self.error(f"JSON inválido en {filepath}: {e}")
-            return []
-    
-    def load_all_from_dir(self, dirname):
-        """Carga todos los JSON de un directorio."""
-        dirpath = self.country_dir / dirname
-        all_data = []
-        if dirpath.exists():
-            for f in sorted(dirpath.glob("*.json")):
-                if f.name == 'raw':
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if (previous.get('format') != INDEX_FORMAT or previous.get('country') != self.country
+                or previous.get('schemas') != schema_digest()):
+            return None
+        return previous
+
+    def save_index(self):
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.index_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'format': INDEX_FORMAT,
+                'country': self.country,
+                'schemas': schema_digest(),
+                'files': self.files,
+                'referrers': referrers_index(self.files),
+            }, f, ensure_ascii=False, separators=(',', ':'))
+
+    def reusable_files(self, ref, previous):
+        """Archivos que git no ve cambiados y cuyo blob en `ref` es el del indice."""
+        changes = git_changes(self.country_dir, ref)
+        if changes is None:
+            print(f"  ⚠ git no pudo comparar con '{ref}': se valida todo")
+            return set()
+        changed, blobs = changes
+        return {
+            rel for rel, entry in previous['files'].items()
+            if rel not in changed and entry['blob'] is not None and blobs.get(rel) == entry['blob']
+        }
+
+    # --- Fase 1: indices ---
+
+    def collect(self, changed_since=None):
+        """Lee los archivos (o los toma del indice) e indexa los IDs."""
+        print("\n📂 Indexando datos...")
+        previous = self.load_index() if changed_since else None
+        reusable = self.reusable_files(changed_since, previous) if previous else set()
+
+        for kind in ENTITY_KINDS:
+            for path in self.kind_files(kind):
+                rel = path.relative_to(self.country_dir).as_posix()
+                if rel in reusable:
+                    self.files[rel] = previous['files'][rel]
                     continue
-                all_data.extend(self.load_json(f))
-        return all_data
-    
-    # --- Validadores específicos ---
-    
-    def validate_sources(self):
-        """Valida fuentes legales."""
-        print("\n📚 Validando fuentes legales...")
-        sources = self.load_all_from_dir("sources")
-        
-        required = ['id', 'source_type', 'name', 'full_text', 'summary', 'status']
-        valid_types = ['constitucion', 'codigo_penal', 'codigo_procesal',
-                       'decreto_legislativo', 'ley', 'jurisprudencia', 'tratado_internacional']
-        valid_status = ['vigente', 'modificado', 'derogado', 'parcialmente_inconstitucional']
-        
-        for s in sources:
-            sid = s.get('id', '???')
-            self.stats['sources'] += 1
-            
-            # Campos obligatorios
-            for field in required:
-                if not s.get(field):
-                    self.error(f"Fuente '{sid}': falta campo '{field}'")
-            
-            # Tipo válido
-            if s.get('source_type') and s['source_type'] not in valid_types:
-                self.error(f"Fuente '{sid}': source_type inválido: {s['source_type']}")
-            
-            # Status válido
-            if s.get('status') and s['status'] not in valid_status:
-                self.error(f"Fuente '{sid}': status inválido: {s['status']}")
-            
-            # ID duplicado
-            if sid in self.source_ids:
-                self.error(f"Fuente '{sid}': ID DUPLICADO")
-            self.source_ids.add(sid)
-        
-        self.ok(f"{len(sources)} fuentes validadas")
-    
-    def validate_rights(self):
-        """Valida derechos."""
-        print("\n⚖️ Validando derechos...")
-        rights = self.load_json(self.country_dir / "rights" / "rights.json")
-        
-        required = ['id', 'title', 'description', 'legal_basis', 'category']
-        valid_categories = ['libertad', 'integridad', 'comunicaciones',
-                           'propiedad', 'debido_proceso', 'dignidad']
-        
-        for r in rights:
-            rid = r.get('id', '???')
-            self.stats['rights'] += 1
-            
-            for field in required:
-                if not r.get(field):
-                    self.error(f"Derecho '{rid}': falta campo '{field}'")
-            
-            if r.get('category') and r['category'] not in valid_categories:
-                self.error(f"Derecho '{rid}': categoría inválida: {r['category']}")
-            
-            # Verificar que source_ids referencian fuentes existentes
-            for src_id in r.get('source_ids', []):
-                if src_id not in self.source_ids:
-                    self.error(f"Derecho '{rid}': referencia fuente inexistente: {src_id}")
-            
-            if rid in self.right_ids:
-                self.error(f"Derecho '{rid}': ID DUPLICADO")
-            self.right_ids.add(rid)
-        
-        self.ok(f"{len(rights)} derechos validados")
-    
-    def validate_actions(self):
-        """Valida acciones."""
-        print("\n🎬 Validando acciones...")
-        actions = self.load_json(self.country_dir / "actions" / "actions.json")
-        
-        required = ['id', 'action_type', 'title', 'description']
-        valid_types = ['decir', 'hacer', 'no_hacer', 'grabar', 'llamar', 'documentar']
-        
-        for a in actions:
-            aid = a.get('id', '???')
-            self.stats['actions'] += 1
-            
-            for field in required:
-                if not a.get(field):
-                    self.error(f"Acción '{aid}': falta campo '{field}'")
-            
-            if a.get('action_type') and a['action_type'] not in valid_types:
-                self.error(f"Acción '{aid}': action_type inválido: {a['action_type']}")
-            
-            if aid in self.action_ids:
-                self.error(f"Acción '{aid}': ID DUPLICADO")
-            self.action_ids.add(aid)
-        
-        self.ok(f"{len(actions)} acciones validadas")
-    
-    def validate_contacts(self):
-        """Valida contactos."""
-        print("\n📞 Validando contactos...")
-        contacts = self.load_json(self.country_dir / "contacts" / "emergency_contacts.json")
-        
-        required = ['id', 'institution', 'description', 'contact_type']
-        
-        for c in contacts:
-            cid = c.get('id', '???')
-            self.stats['contacts'] += 1
-            
-            for field in required:
-                if not c.get(field):
-                    self.error(f"Contacto '{cid}': falta campo '{field}'")
-            
-            # Al menos un medio de contacto
-            has_contact = any(c.get(f) for f in ['phone', 'whatsapp', 'email', 'website'])
-            if not has_contact:
-                self.warn(f"Contacto '{cid}': sin medio de contacto (teléfono, web, etc.)")
-            
-            if cid in self.contact_ids:
-                self.error(f"Contacto '{cid}': ID DUPLICADO")
-            self.contact_ids.add(cid)
-        
-        self.ok(f"{len(contacts)} contactos validados")
-    
-    def validate_contexts(self):
-        """Valida contextos."""
-        print("\n🌐 Validando contextos...")
-        contexts = self.load_json(self.country_dir / "contexts" / "contexts.json")
-        
-        for ctx in contexts:
-            cid = ctx.get('id', '???')
-            self.stats['contexts'] += 1
-            self.context_ids.add(cid)
-        
-        if 'normal' not in self.context_ids:
+                entry, entities = scan_file(kind, path)
+                self.files[rel] = entry
+                self.entities[kind].extend(entities)
+                self.scanned.append(rel)
+                if kind in NEAR_DUPLICATE_FIELDS:
+                    self.texts[rel] = {e.get('id', '???'): e.get(NEAR_DUPLICATE_FIELDS[kind]) for e in entities}
+
+        for rel, entry in self.files.items():
+            self.stats['files_loaded'] += entry['loaded']
+            index = self.index[entry['kind']]
+            for eid in entry['ids']:
+                if eid in index:
+                    self.error(f"{ENTITY_LABELS[entry['kind']]} '{eid}': ID DUPLICADO")
+                else:
+                    index[eid] = rel
+
+        if previous:
+            self.find_affected(previous)
+            self.ok(f"{sum(len(index) for index in self.index.values())} IDs indexados "
+                    f"({len(self.scanned)} archivos leídos, {len(self.files) - len(self.scanned)} del índice)")
+        else:
+            self.ok(f"{sum(len(index) for index in self.index.values())} IDs indexados")
+
+    def find_affected(self, previous):
+        """IDs de los archivos leidos o borrados, antes y despues, y quien los referencia."""
+        self.changed_ids = {kind: set() for kind in ENTITY_KINDS}
+        gone = [rel for rel in previous['files'] if rel not in self.files]
+        for rel in self.scanned + gone:
+            for entry in (self.files.get(rel), previous['files'].get(rel)):
+                if entry:
+                    self.changed_ids[entry['kind']].update(entry['ids'])
+
+        referrers = previous.get('referrers', {})
+        for kind, ids in self.changed_ids.items():
+            for eid in ids:
+                self.affected.update(referrers.get(kind, {}).get(eid, ()))
+        self.affected.difference_update(self.scanned)
+
+    # --- Fase 2: validadores ---
+
+    def validate_kind(self, kind):
+        """Problemas de campos (y de lectura) de los archivos de un tipo."""
+        header, done = KIND_SECTIONS[kind]
+        print(f"\n{header}")
+        count = 0
+        for entry in self.files.values():
+            if entry['kind'] != kind:
+                continue
+            count += len(entry['ids'])
+            for severity, msg in entry['issues']:
+                self.report_issue(severity, msg)
+        self.stats[kind] += count
+
+        if kind == 'contexts' and 'normal' not in self.index['contexts']:
             self.error("Falta contexto 'normal' (obligatorio)")
-        
-        self.ok(f"{len(contexts)} contextos validados")
-    
-    def validate_situations(self):
-        """Valida situaciones y sus referencias cruzadas."""
-        print("\n🔍 Validando situaciones...")
-        situations = self.load_all_from_dir("situations")
-        
-        required = ['id', 'category', 'title', 'description', 'keywords', 'natural_queries']
-        
-        for s in situations:
-            sid = s.get('id', '???')
-            self.stats['situations'] += 1
-            
-            for field in required:
-                if not s.get(field):
-                    self.error(f"Situación '{sid}': falta campo '{field}'")
-            
-            # Verificar que los derechos referenciados existen
-            for right_rel in s.get('rights', []):
-                rid = right_rel.get('right_id')
-                if rid and rid not in self.right_ids:
-                    self.error(f"Situación '{sid}': referencia derecho inexistente: {rid}")
-                
-                ctx = right_rel.get('context', 'normal')
-                if ctx not in self.context_ids:
-                    self.error(f"Situación '{sid}': referencia contexto inexistente: {ctx}")
-            
-            # Verificar que las acciones referenciadas existen
-            for action_rel in s.get('actions', []):
-                aid = action_rel.get('action_id')
-                if aid and aid not in self.action_ids:
-                    self.error(f"Situación '{sid}': referencia acción inexistente: {aid}")
-            
-            # Verificar que los contactos referenciados existen
-            for cid in s.get('contacts', []):
-                if cid not in self.contact_ids:
-                    self.error(f"Situación '{sid}': referencia contacto inexistente: {cid}")
-            
-            # Verificar parent_situation_id
-            parent = s.get('parent_situation_id')
-            if parent and parent not in self.situation_ids and parent != sid:
-                self.warn(f"Situación '{sid}': parent '{parent}' podría no existir aún")
-            
-            if sid in self.situation_ids:
-                self.error(f"Situación '{sid}': ID DUPLICADO")
-            self.situation_ids.add(sid)
-        
-        self.ok(f"{len(situations)} situaciones validadas")
-    
-    def validate_myths(self):
-        """Valida mitos."""
-        print("\n💡 Validando mitos...")
-        myths = self.load_json(self.country_dir / "myths" / "myths.json")
-        
-        for m in myths:
-            mid = m.get('id', '???')
-            self.stats['myths'] += 1
-            
-            for field in ['id', 'myth', 'reality', 'explanation', 'category']:
-                if not m.get(field):
-                    self.error(f"Mito '{mid}': falta campo '{field}'")
-            
-            for src_id in m.get('related_source_ids', []):
-                if src_id not in self.source_ids:
-                    self.warn(f"Mito '{mid}': referencia fuente inexistente: {src_id}")
-        
-        self.ok(f"{len(myths)} mitos validados")
-    
+
+        self.ok(done.format(count))
+
+    def validate_references(self):
+        """Cada referencia cruzada contra el índice del tipo referenciado."""
+        print("\n🔗 Validando referencias cruzadas...")
+        total = checked = 0
+        parents = {}
+        for rel, entry in self.files.items():
+            references = entry['references']
+            total += len(references)
+            if self.changed_ids is None or rel in self.scanned:
+                entry['broken'] = [i for i, (_, target, ref_id, _) in enumerate(references)
+                                   if ref_id not in self.index[target]]
+                checked += len(references)
+            elif rel in self.affected:
+                # Sin cambios, pero apunta a IDs que aparecieron o desaparecieron
+                broken = set(entry['broken'])
+                for i, (_, target, ref_id, _) in enumerate(references):
+                    if ref_id in self.changed_ids[target]:
+                        checked += 1
+                        if ref_id in self.index[target]:
+                            broken.discard(i)
+                        else:
+                            broken.add(i)
+                entry['broken'] = sorted(broken)
+
+            label = ENTITY_LABELS[entry['kind']]
+            for i in entry['broken']:
+                eid, target, ref_id, severity = references[i]
+                self.report_issue(severity, f"{label} '{eid}': referencia "
+                                            f"{REFERENCE_LABELS[target]} inexistente: {ref_id}")
+            for eid, target, ref_id, _ in references:
+                if target == 'situations' and self.index['situations'].get(eid) == rel:
+                    parents.setdefault(eid, ref_id)
+        self.stats['references'] += total
+
+        for cycle in find_parent_cycles(parents):
+            self.error(f"Situación '{cycle[0]}': ciclo de parent_situation_id: "
+                       f"{' → '.join(cycle + cycle[:1])}")
+
+        if self.changed_ids is None:
+            self.ok(f"{total} referencias validadas")
+        else:
+            self.ok(f"{total} referencias validadas ({checked} re-chequeadas)")
+
+    def file_texts(self, rel):
+        """id -> texto de un archivo (los del indice se releen)."""
+        if rel not in self.texts:
+            kind = self.files[rel]['kind']
+            _, entities = scan_file(kind, self.country_dir / rel)
+            self.texts[rel] = {e.get('id', '???'): e.get(NEAR_DUPLICATE_FIELDS[kind]) for e in entities}
+        return self.texts[rel]
+
+    def validate_near_duplicates(self):
+        """
+        Grupos de textos casi identicos (MinHash + LSH, ~lineal).
+
+        Las firmas salen de SignatureCache por hash del texto: solo se
+        calculan las de textos nuevos o editados; un archivo sin cambios solo
+        se relee si su firma no esta guardada.
+        """
+        print("\n🧬 Buscando textos casi duplicados...")
+        cache = SignatureCache(self.signatures_path)
+        total = clusters = 0
+        for kind in NEAR_DUPLICATE_FIELDS:
+            signatures = {}
+            for rel, entry in self.files.items():
+                if entry['kind'] != kind:
+                    continue
+                for eid, digest in entry.get('texts', {}).items():
+                    if self.index[kind].get(eid) != rel:
+                        continue
+                    signature = cache.get(digest)
+                    if signature is None and digest not in cache.signatures:
+                        signature = cache.signature(self.file_texts(rel)[eid], digest)
+                    signatures[eid] = signature
+            total += len(signatures)
+            for ids, score in find_clusters(signatures):
+                clusters += 1
+                self.warn(f"{NEAR_DUPLICATE_LABELS[kind]} (~{score:.0%}): {', '.join(ids)}")
+        cache.save()
+        self.ok(f"{total} textos comparados ({cache.computed} firmas calculadas, {clusters} grupos)")
+
     def validate_build(self):
-        """Intenta construir la base de datos."""
+        """Construye la base de datos en memoria, en el mismo proceso."""
         print("\n🔨 Validando build...")
-        
-        build_script = PROJECT_ROOT / "scripts" / "build_db.py"
-        if not build_script.exists():
-            self.error("build_db.py no encontrado")
+
+        # Con las entidades ya cargadas: se construye lo que se valido
+        from build_db import build_database, load_json
+        metadata = load_json(self.country_dir / "metadata.json")
+        data = dict(self.entities, metadata=metadata[0] if metadata else {})
+        try:
+            conn, build = build_database(self.country, data=data)
+        except Exception as e:
+            self.error(f"Build falló: {type(e).__name__}: {e}")
             return
-        
-        import subprocess
-        result = subprocess.run(
-            [sys.executable, str(build_script), '--country', self.country, '--validate'],
-            capture_output=True, text=True
-        )
-        
-        if result.returncode == 0:
-            self.ok("Build exitoso")
-        else:
-            self.error(f"Build falló: {result.stderr}")
-    
+        conn.close()
+
+        for warning in build.warnings:
+            self.warn(f"Build: {warning}")
+        self.ok(f"Build exitoso ({sum(build.rows.values())} filas, {build.elapsed_ms:.0f} ms)")
+
     # --- Ejecución ---
-    
-    def run(self):
-        """Ejecuta todas las validaciones."""
+
+    def run(self, changed_since=None):
+        """
+        Ejecuta todas las validaciones.
+
+        Con changed_since (ref de git), solo lee lo cambiado desde esa ref y
+        no corre el build (las entidades sin cambios no se cargan).
+        """
         print(f"\n{'='*50}")
         print(f"🛡️  Validando datos para: {self.country}")
         print(f"{'='*50}")
-        
+
         if not self.country_dir.exists():
             self.error(f"Directorio no existe: {self.country_dir}")
             return self.report()
-        
-        # Orden importa: sources primero porque otros dependen de ellos
-        self.validate_contexts()
-        self.validate_sources()
-        self.validate_rights()
-        self.validate_actions()
-        self.validate_contacts()
-        self.validate_situations()
-        self.validate_myths()
-        self.validate_build()
-        
+
+        # Primero los indices; despues el orden de los pasos no importa
+        steps = [('collect', lambda: self.collect(changed_since))]
+        steps += [(kind, lambda kind=kind: self.validate_kind(kind)) for kind in ENTITY_KINDS]
+        steps.append(('references', self.validate_references))
+        steps.append(('near_duplicates', self.validate_near_duplicates))
+        if not changed_since:
+            steps.append(('build', self.validate_build))
+        with span('validate', country=self.country):
+            for name, step in steps:
+                with span(name) as s:
+                    step()
+                    if name in self.stats:
+                        s.add(rows=self.stats[name])
+            with span('save_index'):
+                self.save_index()
+
         return self.report()
-    
+
     def report(self):
         """Imprime reporte final."""
         print(f"\n{'='*50}")
         print(f"📊 REPORTE DE VALIDACIÓN — {self.country}")
         print(f"{'='*50}")
-        
+
         print(f"\nRegistros:")
         for key, count in sorted(self.stats.items()):
             print(f"  {key}: {count}")
-        
+
         print(f"\n✗ Errores: {len(self.errors)}")
         print(f"⚠ Advertencias: {len(self.warnings)}")
-        
+
         if not self.errors and not self.warnings:
             print("\n✓ ¡Todos los datos son válidos!")
         elif not self.errors:
             print("\n✓ Sin errores críticos (hay advertencias)")
         else:
             print("\n✗ HAY ERRORES — corregir antes de build")
-        
+
         return len(self.errors) == 0
 
 
 def main():
     import argparse
-    
+
     parser = argparse.ArgumentParser(description='Validate Truths and Rights data')
     parser.add_argument('--country', type=str, default=None, help='Country code')
+    parser.add_argument('--changed-since', metavar='REF',
+                        help='Leer solo los archivos cambiados desde REF (git) y reusar el índice '
+                             'de build/validation/ para el resto')
+    parser.add_argument('--trace', metavar='OUT.json',
+                        help='Guardar trazas por etapa (formato Chrome) e imprimir un resumen')
     args = parser.parse_args()
-    
+    if args.trace:
+        start_tracing('validate_sources')
+
     if args.country:
         countries = [args.country.upper()]
     else:
         countries = [d.name for d in DATA_DIR.iterdir() if d.is_dir()]
-    
+
     all_ok = True
     for country in sorted(countries):
         validator = Validator(country)
-        if not validator.run():
+        if not validator.run(args.changed_since):
             all_ok = False
-    
+
+    if args.trace:
+        finish_tracing(args.trace)
+
     sys.exit(0 if all_ok else 1)
 
 
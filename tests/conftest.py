@@ -4,7 +4,6 @@ Fixtures compartidos para todos los tests.
 
 import json
 import sqlite3
-import subprocess
 import sys
 from pathlib import Path
 
@@ -15,6 +14,8 @@ DATA_DIR = PROJECT_ROOT / "data" / "PE"
 BUILD_DIR = PROJECT_ROOT / "build"
 DB_PATH = BUILD_DIR / "truths_and_rights_pe.db"
 
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
 
 @pytest.fixture(scope="session")
 def project_root():
@@ -28,14 +29,19 @@ def data_dir():
 
 @pytest.fixture(scope="session")
 def db_path():
-    """Genera la DB antes de los tests si no existe."""
-    if not DB_PATH.exists():
-        BUILD_DIR.mkdir(parents=True, exist_ok=True)
-        subprocess.run(
-            [sys.executable, str(PROJECT_ROOT / "scripts" / "build_db.py"), "--country", "PE"],
-            check=True,
-            capture_output=True,
-        )
+    """Genera la DB en el proceso si no existe o si los datos cambiaron."""
+    from build_db import build_database, compute_build_id
+    if DB_PATH.exists():
+        conn = sqlite3.connect(str(DB_PATH))
+        try:
+            current = conn.execute("SELECT value FROM build_info WHERE key = 'build_id'").fetchone()
+        except sqlite3.OperationalError:
+            current = None
+        conn.close()
+        if current and current[0] == compute_build_id(DATA_DIR):
+            return DB_PATH
+    conn, _ = build_database("PE", DB_PATH)
+    conn.close()
     return DB_PATH
 
 
@@ -0,0 +1,207 @@
+"""
+Tests de la API HTTP (api_server.py).
+Levanta el servidor asyncio en un hilo y le habla con http.client:
+endpoints, ETags/304, gzip, keep-alive y el pool de conexiones read-only.
+"""
+
+import asyncio
+import gzip
+import http.client
+import json
+import shutil
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+import api_server
+import api_load_test
+from search import get_situation_details, search_situation
+
+
+@contextmanager
+def running(db_path):
+    loop = asyncio.new_event_loop()
+    api = api_server.ApiServer(api_server.SearchApi(db_path), port=0, workers=2)
+    loop.run_until_complete(api.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        yield api
+    finally:
+        asyncio.run_coroutine_threadsafe(api.close(), loop).result(timeout=5)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        loop.close()
+
+
+@pytest.fixture(scope="module")
+def server(db_path):
+    with running(db_path) as api:
+        yield api
+
+
+@pytest.fixture
+def client(server):
+    conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+    yield conn
+    conn.close()
+
+
+def get(client, path, headers=None):
+    client.request("GET", path, headers=headers or {})
+    response = client.getresponse()
+    body = response.read()
+    if response.getheader("Content-Encoding") == "gzip":
+        body = gzip.decompress(body)
+    return response, json.loads(body) if body else None
+
+
+class TestEndpoints:
+    def test_search_matches_in_process(self, client, db_path):
+        response, payload = get(client, "/search?q=me+piden+el+DNI&limit=2")
+        assert response.status == 200
+        assert payload["results"] == search_situation("me piden el DNI", db_path=db_path, limit=2)
+        assert "details" not in payload
+
+    def test_search_with_details(self, client, db_path):
+        _, payload = get(client, "/search?q=me+piden+el+DNI&details=1")
+        assert payload["details"] == get_situation_details("police_id_check", db_path=db_path)
+
+    def test_search_without_query_is_400(self, client):
+        response, payload = get(client, "/search")
+        assert response.status == 400
+        assert "error" in payload
+
+    def test_situation(self, client, db_path):
+        response, payload = get(client, "/situations/cannabis_possession")
+        assert response.status == 200
+        assert payload["id"] == "cannabis_possession"
+        assert payload["rights"] == get_situation_details("cannabis_possession", db_path=db_path)["rights"]
+
+    def test_unknown_situation_is_404(self, client):
+        response, _ = get(client, "/situations/no_existe")
+        assert response.status == 404
+
+    def test_unknown_path_is_404(self, client):
+        response, _ = get(client, "/nada")
+        assert response.status == 404
+
+    def test_post_not_allowed(self, client):
+        client.request("POST", "/search?q=dni", body=b"{}")
+        response = client.getresponse()
+        response.read()
+        assert response.status == 405
+        assert response.getheader("Allow") == "GET, HEAD"
+
+    def test_status(self, client, db_conn):
+        response, payload = get(client, "/status")
+        build_id = db_conn.execute("SELECT value FROM build_info WHERE key = 'build_id'").fetchone()[0]
+        assert response.status == 200
+        assert payload["build_id"] == build_id
+        assert payload["situations"] > 0
+        assert response.getheader("ETag") is None
+
+
+class TestHttpFeatures:
+    def test_etag_derived_from_build_id(self, client, db_conn):
+        build_id = db_conn.execute("SELECT value FROM build_info WHERE key = 'build_id'").fetchone()[0]
+        response, _ = get(client, "/situations/police_id_check")
+        assert build_id[:16] in response.getheader("ETag")
+
+    def test_etag_differs_per_resource(self, client):
+        a, _ = get(client, "/situations/police_id_check")
+        b, _ = get(client, "/situations/cannabis_possession")
+        assert a.getheader("ETag") != b.getheader("ETag")
+
+    def test_if_none_match_returns_304(self, client):
+        response, _ = get(client, "/search?q=grabar+policia")
+        etag = response.getheader("ETag")
+        response, payload = get(client, "/search?q=grabar+policia", {"If-None-Match": etag})
+        assert response.status == 304
+        assert payload is None
+
+    @pytest.mark.parametrize("path", ["/situations/no_existe", "/search?q=", "/no/existe"])
+    def test_errors_have_no_etag(self, client, path):
+        response, _ = get(client, path, {"If-None-Match": "*"})
+        assert response.status in (400, 404)
+        assert response.getheader("ETag") is None
+
+    def test_gzip_when_accepted(self, client):
+        plain, plain_payload = get(client, "/situations/police_id_check")
+        zipped, zipped_payload = get(client, "/situations/police_id_check", {"Accept-Encoding": "gzip"})
+        assert plain.getheader("Content-Encoding") is None
+        assert zipped.getheader("Content-Encoding") == "gzip"
+        assert int(zipped.getheader("Content-Length")) < int(plain.getheader("Content-Length"))
+        assert zipped_payload == plain_payload
+
+    def test_keep_alive_reuses_connection(self, client):
+        get(client, "/status")
+        sock = client.sock
+        for _ in range(3):
+            response, _ = get(client, "/search?q=me+piden+el+DNI")
+            assert response.status == 200
+        assert client.sock is sock
+
+    def test_connection_close(self, client):
+        response, _ = get(client, "/status", {"Connection": "close"})
+        assert response.getheader("Connection") == "close"
+
+    def test_head_has_no_body(self, client):
+        client.request("HEAD", "/situations/police_id_check")
+        response = client.getresponse()
+        assert response.status == 200
+        assert int(response.getheader("Content-Length")) > 0
+        assert response.read() == b""
+
+
+class TestServerErrors:
+    def test_missing_db_is_500(self, db_path, tmp_path):
+        copy = tmp_path / "copia.db"
+        shutil.copy(db_path, copy)
+        with running(copy) as server:
+            copy.unlink()
+            conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+            response, payload = get(conn, "/situations/police_id_check")
+            conn.close()
+        assert response.status == 500
+        assert payload == {"error": "Internal Server Error"}
+        assert response.getheader("Connection") == "close"
+
+
+class TestConnectionPool:
+    def test_connections_are_read_only(self, db_path):
+        pool = api_server.ConnectionPool(db_path, size=1)
+        with pool.connection() as conn:
+            with pytest.raises(sqlite3.OperationalError):
+                conn.execute("DELETE FROM situations")
+        pool.close()
+
+    def test_connections_are_reused(self, db_path):
+        pool = api_server.ConnectionPool(db_path, size=2)
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            assert second is first
+        pool.close()
+
+    def test_reset_discards_connections(self, db_path):
+        pool = api_server.ConnectionPool(db_path, size=1)
+        with pool.connection() as first:
+            pool.reset()
+        with pool.connection() as second:
+            assert second is not first
+        pool.close()
+
+
+class TestLoadTest:
+    def test_reports_rps_and_p99(self, server):
+        stats = asyncio.run(api_load_test.run_load("127.0.0.1", server.port, concurrency=2, duration=0.3))
+        assert stats["requests"] > 0
+        assert stats["errors"] == 0
+        assert stats["rps"] > 0
+        assert stats["p99_ms"] >= stats["p50_ms"]
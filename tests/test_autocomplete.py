@@ -0,0 +1,105 @@
+"""
+Tests del autocompletado.
+Verifica el trie de sugerencias, la tabla search_suggestions y la latencia por tecla.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from autocomplete import (
+    Autocompleter, SuggestionTrie, load_autocompleter, suggestion_key, TOP_K,
+)
+from search import normalize
+
+
+def _suggestion(text, weight=1, s_id="sit"):
+    return {
+        "text": text,
+        "normalized": normalize(text),
+        "kind": "natural_query",
+        "weight": weight,
+        "situation_id": s_id,
+    }
+
+
+class TestSuggestionTrie:
+    def test_top_k_per_node(self):
+        trie = SuggestionTrie(top_k=2)
+        for text in ["me piden dni", "me piden papeles", "me paran"]:
+            trie.insert(_suggestion(text))
+        table = dict(trie.items())
+        assert [s["text"] for s in table["me p"]] == ["me paran", "me piden dni"]
+        assert [s["text"] for s in table["me pi"]] == ["me piden dni", "me piden papeles"]
+
+    def test_weight_wins_over_length(self):
+        trie = SuggestionTrie(top_k=1)
+        trie.insert(_suggestion("celu", weight=1))
+        trie.insert(_suggestion("celular revisado", weight=3))
+        assert dict(trie.items())["cel"][0]["text"] == "celular revisado"
+
+
+class TestAutocompleter:
+    @pytest.fixture(autouse=True)
+    def setup(self, db_path):
+        self.ac = load_autocompleter(db_path)
+
+    def test_table_is_populated(self, db_conn):
+        count = db_conn.execute("SELECT COUNT(*) FROM search_suggestions").fetchone()[0]
+        assert count > 0
+        assert len(self.ac) > 0
+
+    def test_suggests_natural_queries(self):
+        texts = [s["text"] for s in self.ac.suggest("me piden")]
+        assert any("DNI" in t for t in texts)
+
+    def test_prefix_is_normalized(self):
+        assert self.ac.suggest("ME PÍDEN") == self.ac.suggest("me piden")
+
+    def test_suggestions_match_prefix(self):
+        for s in self.ac.suggest("quieren"):
+            assert normalize(s["text"]).startswith("quieren")
+
+    def test_respects_top_k(self):
+        assert len(self.ac.suggest("m")) <= TOP_K
+
+    def test_empty_prefix(self):
+        assert self.ac.suggest("") == []
+        assert self.ac.suggest("zzzz") == []
+
+    def test_single_indexed_lookup(self, db_conn):
+        rows = db_conn.execute(
+            "SELECT suggestion FROM search_suggestions WHERE prefix = ? ORDER BY rank",
+            ("me pi",),
+        ).fetchall()
+        assert [r[0] for r in rows] == [s["text"] for s in self.ac.suggest("me pi")]
+
+    def test_long_prefix_filters_full_text(self):
+        ac = Autocompleter({"ab": [{"text": "abcd", "normalized": "abcd",
+                                     "situation_id": "x", "kind": "title"}]},
+                           max_prefix_len=2)
+        assert ac.suggest("abc")[0]["text"] == "abcd"
+        assert ac.suggest("abz") == []
+
+    def test_trailing_space_closes_the_word(self):
+        assert suggestion_key("Me  ") == "me "
+        assert suggestion_key("   ") == ""
+        trie = SuggestionTrie()
+        for text in ["mecanismo de queja", "me piden dni"]:
+            trie.insert(_suggestion(text))
+        ac = Autocompleter(dict(trie.items()))
+        assert [s["text"] for s in ac.suggest("me")] == ["me piden dni", "mecanismo de queja"]
+        assert [s["text"] for s in ac.suggest("me ")] == ["me piden dni"]
+        assert [s["text"] for s in ac.suggest("ME ?")] == ["me piden dni"]
+
+    def test_keystroke_latency_under_1ms(self):
+        prefixes = ["m", "me", "me p", "me pi", "quieren rev", "cuanto tiempo"]
+        start = time.perf_counter()
+        for _ in range(200):
+            for p in prefixes:
+                self.ac.suggest(p)
+        per_call = (time.perf_counter() - start) / (200 * len(prefixes))
+        assert per_call < 0.001
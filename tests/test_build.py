@@ -3,6 +3,10 @@ Tests del build de la base de datos.
 Verifica que build_db.py genera una DB correcta con todas las tablas pobladas.
 """
 
+import hashlib
+import json
+import os
+import shutil
 import sqlite3
 import subprocess
 import sys
@@ -11,6 +15,11 @@ from pathlib import Path
 import pytest
 
 PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+from build_db import (
+    _iter_json_buffered, build_database, compute_build_id, insert_sources, iter_json,
+    load_country_data, load_schema,
+)
 
 
 class TestBuildProcess:
@@ -35,11 +44,250 @@ class TestBuildProcess:
         assert db_path.stat().st_size > 0
 
 
+class TestReproducibleBuild:
+    ARTIFACTS = [
+        "truths_and_rights_pe.db",
+        "truths_and_rights_pe.idx",
+        "mobile/truths_and_rights_pe.db",
+        "mobile/truths_and_rights_pe_texts.db",
+    ]
+    BUILD_SCRIPT = (
+        "import sys; sys.path.insert(0, sys.argv[1])\n"
+        "from pathlib import Path\n"
+        "from build_db import build_database\n"
+        "from db_profiles import build_mobile_db\n"
+        "out = Path(sys.argv[2])\n"
+        "conn, stats = build_database('PE', out / 'truths_and_rights_pe.db')\n"
+        "conn.close()\n"
+        "build_mobile_db(stats.db_path, out / 'mobile')\n"
+    )
+
+    def build_digests(self, out_dir, hash_seed):
+        # Otra semilla de hash: el orden de sets/dicts no debe llegar a la DB.
+        # En tmp_path: la DB de build/ que usan los demas tests no se toca
+        env = dict(os.environ, PYTHONHASHSEED=str(hash_seed))
+        subprocess.run(
+            [sys.executable, "-c", self.BUILD_SCRIPT, str(PROJECT_ROOT / "scripts"), str(out_dir)],
+            check=True, capture_output=True, env=env,
+        )
+        return {name: hashlib.sha256((out_dir / name).read_bytes()).hexdigest()
+                for name in self.ARTIFACTS}
+
+    def test_two_builds_are_byte_identical(self, tmp_path):
+        assert self.build_digests(tmp_path / "a", 1) == self.build_digests(tmp_path / "b", 2)
+
+    def test_build_id_ignores_scripts_outside_the_build(self, tmp_path, monkeypatch):
+        import build_db
+        scripts = tmp_path / "scripts"
+        shutil.copytree(PROJECT_ROOT / "scripts", scripts, ignore=shutil.ignore_patterns("__pycache__"))
+        monkeypatch.setattr(build_db, "SCRIPTS_DIR", scripts)
+        before = compute_build_id(PROJECT_ROOT / "data" / "PE")
+        with open(scripts / "cli.py", "a", encoding="utf-8") as f:
+            f.write("\n# cambio que no toca la DB\n")
+        assert compute_build_id(PROJECT_ROOT / "data" / "PE") == before
+        with open(scripts / "cards.py", "a", encoding="utf-8") as f:
+            f.write("\n# cambio en un modulo del build\n")
+        assert compute_build_id(PROJECT_ROOT / "data" / "PE") != before
+
+    def test_build_id_is_input_hash(self, db_path):
+        conn = sqlite3.connect(str(db_path))
+        info = dict(conn.execute("SELECT key, value FROM build_info"))
+        conn.close()
+        assert info["build_id"] == compute_build_id(PROJECT_ROOT / "data" / "PE")
+
+    def test_timestamps_come_from_data(self, db_path):
+        metadata = json.loads((PROJECT_ROOT / "data" / "PE" / "metadata.json").read_text(encoding="utf-8"))
+        conn = sqlite3.connect(str(db_path))
+        built_at = conn.execute("SELECT value FROM build_info WHERE key = 'built_at'").fetchone()[0]
+        stamps = {row[0] for row in conn.execute("SELECT created_at FROM legal_sources")}
+        conn.close()
+        assert built_at.startswith(metadata["last_verified"])
+        assert stamps == {built_at}
+
+    def test_no_free_pages(self, db_path):
+        conn = sqlite3.connect(str(db_path))
+        assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+        conn.close()
+
+
+def synthetic_source(i):
+    return {
+        "id": f"art_{i}", "source_type": "codigo_penal", "name": "Código Penal",
+        "article": f"Artículo {i}", "full_text": "La autoridad policial, bajo responsabilidad, " * 4,
+        "summary": "Resumen", "status": "vigente", "last_modified": None, "number": 1.5e3,
+    }
+
+
+@pytest.fixture(scope="module")
+def big_sources_file(tmp_path_factory):
+    """sources/*.json con 20.000 articulos (~8 MB)."""
+    path = tmp_path_factory.mktemp("stream") / "codigo.json"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for i in range(20000):
+            f.write(("," if i else "") + json.dumps(synthetic_source(i), ensure_ascii=False, indent=2))
+        f.write("\n]\n")
+    return path
+
+
+class TestStreamingIngestion:
+    def test_matches_json_load_on_repo_data(self):
+        for path in sorted((PROJECT_ROOT / "data" / "PE").rglob("*.json")):
+            expected = json.loads(path.read_text(encoding="utf-8"))
+            expected = expected if isinstance(expected, list) else [expected]
+            assert list(iter_json(path)) == expected, path
+            if isinstance(json.loads(path.read_text(encoding="utf-8")), list):
+                # Bloques chicos: elementos partidos en muchos bordes de buffer
+                with open(path, encoding="utf-8") as f:
+                    assert list(_iter_json_buffered(f, chunk_size=7)) == expected, path
+
+    def test_numbers_at_buffer_edge(self, tmp_path):
+        path = tmp_path / "numeros.json"
+        path.write_text("[12345, 6.5e10, -7, true, null, \"x\"]", encoding="utf-8")
+        with open(path, encoding="utf-8") as f:
+            assert list(_iter_json_buffered(f, chunk_size=3)) == [12345, 6.5e10, -7, True, None, "x"]
+
+    def test_truncated_file_fails(self, tmp_path):
+        path = tmp_path / "roto.json"
+        path.write_text('[{"id": "a"}, {"id": ', encoding="utf-8")
+        with pytest.raises(ValueError):
+            with open(path, encoding="utf-8") as f:
+                list(_iter_json_buffered(f, chunk_size=4))
+
+    @pytest.mark.parametrize("text", ["[,,1]", "[1 2]", "[1,]", "[1,,2]", "[{\"a\" 1}]", "[1x]"])
+    def test_invalid_json_fails(self, tmp_path, text):
+        path = tmp_path / "roto.json"
+        path.write_text(text, encoding="utf-8")
+        with pytest.raises(ValueError):
+            with open(path, encoding="utf-8") as f:
+                list(_iter_json_buffered(f, chunk_size=2))
+
+    def test_syntax_error_stops_reading(self, tmp_path):
+        path = tmp_path / "roto.json"
+        path.write_text('[{"id": "a"} {"id": "b"},' + '{"id": "c"},' * 100000 + '{}]', encoding="utf-8")
+        with open(path, encoding="utf-8") as f:
+            with pytest.raises(ValueError, match="caracter 13"):
+                list(_iter_json_buffered(f, chunk_size=64))
+            assert f.tell() < 1024
+
+    def test_peak_memory_is_flat(self, big_sources_file):
+        import tracemalloc
+        tracemalloc.start()
+        with open(big_sources_file, encoding="utf-8") as f:
+            count = sum(1 for _ in _iter_json_buffered(f))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert count == 20000
+        assert peak < big_sources_file.stat().st_size / 20
+
+    def test_build_memory_is_flat(self, tmp_path):
+        """build_database() entero, con un sources/*.json de ~20 MB: el RSS no crece con el archivo."""
+        resource = pytest.importorskip("resource")
+        country_dir = tmp_path / "PE"
+        shutil.copytree(PROJECT_ROOT / "data" / "PE", country_dir)
+        big_file = country_dir / "sources" / "codigo.json"
+        with open(big_file, "w", encoding="utf-8") as f:
+            f.write("[\n")
+            for i in range(60000):
+                f.write(("," if i else "") + json.dumps(synthetic_source(i), ensure_ascii=False, indent=2))
+            f.write("\n]\n")
+
+        # En otro proceso: ru_maxrss es el pico de todo el proceso
+        script = (
+            "import resource, sys; sys.path.insert(0, sys.argv[1]); import build_db\n"
+            "from pathlib import Path\n"
+            "build_db.DATA_DIR = Path(sys.argv[2])\n"
+            "before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+            "conn, stats = build_db.build_database('PE', Path(sys.argv[2]) / 'pe.db')\n"
+            "print(stats.rows['sources'], resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before)\n"
+        )
+        result = subprocess.run([sys.executable, "-c", script, str(PROJECT_ROOT / "scripts"), str(tmp_path)],
+                                check=True, capture_output=True, text=True)
+        rows, growth = map(int, result.stdout.split())
+        growth *= 1 if sys.platform == "darwin" else 1024
+        assert rows > 60000
+        assert growth < big_file.stat().st_size / 2
+
+    def test_insert_sources_from_stream(self, big_sources_file, capsys):
+        conn = sqlite3.connect(":memory:")
+        load_schema(conn)
+        insert_sources(conn, iter_json(big_sources_file), "PE")
+        assert conn.execute("SELECT COUNT(*) FROM legal_sources").fetchone()[0] == 20000
+        conn.close()
+
+
+class TestLibraryBuild:
+    def test_memory_build_prints_nothing(self, capsys):
+        conn, stats = build_database("PE")
+        count = conn.execute("SELECT COUNT(*) FROM legal_sources").fetchone()[0]
+        conn.close()
+        assert capsys.readouterr().out == ""
+        assert stats.rows["sources"] == count > 0
+        assert stats.rows["cards"] > 0
+        assert stats.build_id == compute_build_id(PROJECT_ROOT / "data" / "PE")
+        assert stats.db_path is None
+
+    def test_into_given_connection(self):
+        conn = sqlite3.connect(":memory:")
+        same, stats = build_database("PE", conn)
+        assert same is conn
+        assert conn.execute("SELECT value FROM build_info WHERE key = 'build_id'").fetchone()[0] == stats.build_id
+        conn.close()
+
+    def test_file_build_matches_cli(self, db_path, tmp_path):
+        conn, stats = build_database("PE", tmp_path / "pe.db")
+        conn.close()
+        assert stats.index_path.exists()
+        assert (tmp_path / "pe.db").read_bytes() == db_path.read_bytes()
+
+    def test_file_build_replaces_previous_db(self, tmp_path):
+        target = tmp_path / "pe.db"
+        target.write_bytes(b"db anterior")
+        conn, stats = build_database("PE", target)
+        conn.close()
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["pe.db", "pe.idx"]
+        conn = sqlite3.connect(str(target))
+        assert conn.execute("SELECT value FROM build_info WHERE key = 'build_id'").fetchone()[0] == stats.build_id
+        conn.close()
+
+    def test_locked_index_becomes_warning(self, tmp_path, monkeypatch):
+        import build_db
+        from search import IndexInUseError
+
+        def locked(conn, path, build_id):
+            raise IndexInUseError(f"No se pudo reemplazar {path}")
+
+        monkeypatch.setattr(build_db, "write_search_index", locked)
+        conn, stats = build_database("PE", tmp_path / "pe.db")
+        conn.close()
+        assert stats.index_path is None
+        assert stats.db_path.exists()
+        assert stats.warnings == [f"No se pudo reemplazar {tmp_path / 'pe.idx'}"]
+
+    def test_preloaded_data(self):
+        data = load_country_data(PROJECT_ROOT / "data" / "PE")
+        data["sources"] = list(data["sources"])[:5]
+        data["myths"] = []
+        conn, stats = build_database("PE", data=data)
+        counts = [conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in ("legal_sources", "myths")]
+        conn.close()
+        assert counts == [5, 0]
+        assert stats.build_id != compute_build_id(PROJECT_ROOT / "data" / "PE")
+
+    def test_invalid_entries_become_warnings(self, capsys):
+        conn, stats = build_database("PE", data={"sources": [{"id": "sin_campos"}]})
+        conn.close()
+        assert capsys.readouterr().out == ""
+        assert stats.rows["sources"] == 0
+        assert len(stats.warnings) == 1 and "sin_campos" in stats.warnings[0]
+
+
 class TestDatabaseTables:
     EXPECTED_TABLES = [
         "legal_sources",
         "situations",
         "contexts",
+        "context_regions",
         "rights",
         "situation_rights",
         "right_sources",
@@ -49,6 +297,13 @@ class TestDatabaseTables:
         "situation_contacts",
         "time_limits",
         "myths",
+        "myth_sources",
+        "build_info",
+        "source_citations",
+        "right_bits",
+        "effective_rights",
+        "answer_cards",
+        "text_dictionaries",
     ]
 
     def test_all_tables_exist(self, db_conn):
@@ -105,8 +360,11 @@ class TestDatabaseViews:
 class TestDatabaseIndexes:
     EXPECTED_INDEXES = [
         "idx_situations_category",
-        "idx_situations_keywords",
-        "idx_rights_category",
+        "idx_situations_active_order",
+        "idx_situation_rights_order",
+        "idx_situation_actions_available",
+        "idx_situation_contacts_priority",
+        "idx_rights_category_order",
     ]
 
     def test_indexes_exist(self, db_conn):
@@ -0,0 +1,127 @@
+"""
+Tests de las tarjetas de respuesta pre-renderizadas (answer_cards).
+"""
+
+import json
+import re
+import shutil
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+import cards
+import cli
+from rights_matrix import write_matrix
+
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+
+
+@pytest.fixture
+def db_copy(db_path, tmp_path):
+    """Copia de la DB que cada test puede modificar."""
+    path = tmp_path / "copy.db"
+    shutil.copy(db_path, path)
+    conn = sqlite3.connect(str(path))
+    yield conn
+    conn.close()
+
+
+class TestAnswerCardsTable:
+    def test_every_situation_and_context_has_a_json_card(self, db_conn):
+        situations = db_conn.execute("SELECT COUNT(*) FROM situations").fetchone()[0]
+        contexts = db_conn.execute("SELECT COUNT(*) FROM contexts").fetchone()[0]
+        stored = db_conn.execute(
+            "SELECT format, COUNT(*) FROM answer_cards GROUP BY format").fetchall()
+        assert [tuple(row) for row in stored] == [("json", situations * contexts)]
+
+    def test_other_formats_render_from_json(self, db_conn):
+        pairs = db_conn.execute("SELECT situation_id, context_id FROM answer_cards").fetchall()
+        for situation_id, context_id in pairs:
+            card = cards.collect_card(db_conn, situation_id, context_id)
+            for fmt in cards.CARD_FORMATS:
+                assert cards.read_card(db_conn, situation_id, context_id, fmt) == cards.render_card(card, fmt)
+
+    def test_json_card_matches_collected_card(self, db_conn):
+        body = cards.read_card(db_conn, "police_id_check", "normal", "json")
+        assert json.loads(body) == cards.collect_card(db_conn, "police_id_check", "normal")
+
+    def test_text_is_ansi_without_colors(self, db_conn):
+        ansi = cards.read_card(db_conn, "cannabis_possession", "normal", "ansi")
+        text = cards.read_card(db_conn, "cannabis_possession", "normal", "text")
+        assert "\x1b[" in ansi
+        assert ANSI_ESCAPE.sub("", ansi) == text
+
+    def test_markdown_has_sections(self, db_conn):
+        body = cards.read_card(db_conn, "police_phone_search", "normal", "markdown")
+        assert body.startswith("## ")
+        assert "### Tus derechos" in body
+        assert "### Qué hacer (paso a paso)" in body
+
+
+class TestCardContent:
+    def test_rights_match_normal_context(self, db_conn):
+        card = cards.collect_card(db_conn, "police_id_check")
+        expected = [row[0] for row in db_conn.execute("""
+            SELECT sr.right_id FROM situation_rights sr JOIN rights r ON r.id = sr.right_id
+            WHERE sr.situation_id = 'police_id_check' AND sr.context_id = 'normal' AND sr.applies = 1
+            ORDER BY r.display_order
+        """)]
+        assert [r["id"] for r in card["rights"]] == expected
+
+    def test_emergency_card_names_context(self, db_conn):
+        card = cards.collect_card(db_conn, "police_id_check", "estado_emergencia_seguridad")
+        assert card["context"]["context_type"] == "estado_emergencia"
+        assert card["emergency_notes"]
+
+    def test_suspended_right_is_removed_in_context(self, db_copy):
+        db_copy.execute("UPDATE contexts SET affects_rights = ? WHERE id = 'estado_emergencia_seguridad'",
+                        (json.dumps(["right_no_arbitrary_search"]),))
+        write_matrix(db_copy)
+        normal = cards.collect_card(db_copy, "cannabis_possession", "normal")
+        emergency = cards.collect_card(db_copy, "cannabis_possession", "estado_emergencia_seguridad")
+        assert "right_no_arbitrary_search" in [r["id"] for r in normal["rights"]]
+        assert "right_no_arbitrary_search" not in [r["id"] for r in emergency["rights"]]
+        assert "right_no_arbitrary_search" in [r["id"] for r in emergency["suspended_rights"]]
+
+    def test_right_not_applying_is_not_suspended(self, db_copy):
+        db_copy.execute("""
+            INSERT OR REPLACE INTO situation_rights (situation_id, right_id, context_id, applies, notes)
+            VALUES ('cannabis_possession', 'right_no_arbitrary_search', 'estado_emergencia_seguridad', 0, NULL)
+        """)
+        write_matrix(db_copy)
+        emergency = cards.collect_card(db_copy, "cannabis_possession", "estado_emergencia_seguridad")
+        assert "right_no_arbitrary_search" not in [r["id"] for r in emergency["rights"]]
+        assert emergency["suspended_rights"] == []
+
+    def test_never_suspended_right_stays_in_context(self, db_copy):
+        db_copy.execute("UPDATE contexts SET affects_rights = ? WHERE id = 'estado_emergencia_seguridad'",
+                        (json.dumps(["right_police_id"]),))
+        write_matrix(db_copy)
+        emergency = cards.collect_card(db_copy, "police_id_check", "estado_emergencia_seguridad")
+        assert "right_police_id" in [r["id"] for r in emergency["rights"]]
+        assert emergency["suspended_rights"] == []
+
+    def test_unknown_situation(self, db_conn):
+        assert cards.read_card(db_conn, "no_existe") is None
+
+    def test_unknown_format(self, db_conn):
+        card = cards.collect_card(db_conn, "police_id_check")
+        with pytest.raises(ValueError):
+            cards.render_card(card, "html")
+
+
+class TestCardFallback:
+    def test_db_without_table_renders_on_the_fly(self, db_copy, db_conn):
+        db_copy.execute("DROP TABLE answer_cards")
+        assert cards.read_card(db_copy, "retention_time", fmt="text") == \
+            cards.read_card(db_conn, "retention_time", fmt="text")
+
+
+class TestCliUsesCards:
+    def test_fetch_answer_returns_ansi_card(self, db_conn):
+        results, card = cli.fetch_answer("me piden el DNI", use_daemon=False)
+        assert results[0]["situation_id"] == "police_id_check"
+        assert card == cards.read_card(db_conn, "police_id_check", fmt="ansi")
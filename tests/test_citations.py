@@ -0,0 +1,103 @@
+"""
+Tests del grafo de citas (myth_sources + source_citations, citations.py).
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from citations import (
+    TARGET_TYPES, CitationGraph, compute_citations, impact_query, load_citation_graph,
+)
+
+
+def scan_json(source_id, all_rights, all_situations, all_myths, all_contexts):
+    """Lo que hoy implica recorrer todos los JSON a mano."""
+    rights = {r["id"] for r in all_rights if source_id in r.get("source_ids", [])}
+    limits, situations = set(), set()
+    for sit in all_situations:
+        if any(r["right_id"] in rights for r in sit.get("rights", [])):
+            situations.add(sit["id"])
+        for tl in sit.get("time_limits", []):
+            if tl.get("source_id") == source_id:
+                limits.add(tl["id"])
+                situations.add(sit["id"])
+    return {
+        "right": sorted(rights),
+        "situation": sorted(situations),
+        "time_limit": sorted(limits),
+        "myth": sorted(m["id"] for m in all_myths if source_id in m.get("related_source_ids", [])),
+        "context": sorted(c["id"] for c in all_contexts if c.get("source_id") == source_id),
+    }
+
+
+class TestTables:
+    def test_myth_sources_normalized(self, db_conn, all_myths):
+        expected = {(m["id"], s) for m in all_myths for s in m.get("related_source_ids", [])}
+        rows = {tuple(r) for r in db_conn.execute("SELECT myth_id, source_id FROM myth_sources")}
+        assert rows == expected
+
+    def test_stored_equals_computed(self, db_conn):
+        stored = [tuple(r) for r in db_conn.execute(
+            "SELECT source_id, target_type, target_id, via FROM source_citations "
+            "ORDER BY source_id, target_type, target_id, via"
+        )]
+        assert stored == compute_citations(db_conn)
+
+    def test_reverse_lookups_use_indexes(self, db_conn):
+        for sql in (
+            "SELECT right_id FROM right_sources WHERE source_id = 'x'",
+            "SELECT id FROM time_limits WHERE source_id = 'x'",
+            "SELECT myth_id FROM myth_sources WHERE source_id = 'x'",
+            "SELECT target_id FROM source_citations WHERE source_id = 'x'",
+        ):
+            plan = " ".join(row[3] for row in db_conn.execute("EXPLAIN QUERY PLAN " + sql))
+            assert "SCAN" not in plan, plan
+
+
+class TestImpact:
+    def test_matches_json_scan_for_every_source(
+        self, db_path, all_sources, all_rights, all_situations, all_myths, all_contexts
+    ):
+        graph = load_citation_graph(db_path)
+        for source in all_sources:
+            expected = scan_json(source["id"], all_rights, all_situations, all_myths, all_contexts)
+            assert graph.cited_by(source["id"]) == expected, source["id"]
+
+    def test_impact_query_matches_graph(self, db_conn, db_path):
+        graph = load_citation_graph(db_path)
+        sources = graph.sources[:5]
+        assert impact_query(db_conn, sources) == graph.impact(sources)
+
+    def test_situation_reached_via_right(self, db_path, all_situations):
+        graph = load_citation_graph(db_path)
+        sit = next(s for s in all_situations if s.get("rights"))
+        right_id = sit["rights"][0]["right_id"]
+        source_id = next(
+            s for s in graph.sources if right_id in graph.cited_by(s)["right"]
+        )
+        assert sit["id"] in graph.cited_by(source_id)["situation"]
+        assert f"right:{right_id}" in graph.via(source_id, "situation", sit["id"])
+
+    def test_unknown_source_has_no_impact(self, db_path):
+        graph = load_citation_graph(db_path)
+        assert graph.cited_by("no_existe") == {kind: [] for kind in TARGET_TYPES}
+
+    def test_describe_adds_titles(self, db_conn, db_path):
+        graph = load_citation_graph(db_path)
+        described = graph.describe(graph.impact(graph.sources))
+        right = described["right"][0]
+        title = db_conn.execute("SELECT title FROM rights WHERE id = ?", (right["id"],)).fetchone()[0]
+        assert right["title"] == title
+
+    def test_db_without_graph_computes_it(self, db_path, tmp_path):
+        import shutil
+        import sqlite3
+        path = tmp_path / "old.db"
+        shutil.copy(db_path, path)
+        conn = sqlite3.connect(str(path))
+        conn.execute("DROP TABLE source_citations")
+        old = CitationGraph.from_db(conn)
+        conn.close()
+        graph = load_citation_graph(db_path)
+        assert all(old.cited_by(s) == graph.cited_by(s) for s in graph.sources)
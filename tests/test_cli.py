@@ -0,0 +1,97 @@
+"""
+Tests del modo batch de cli.py (NDJSON por stdin/stdout).
+"""
+
+import io
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+import cli
+from search import get_situation_details, search_situation
+
+CLI = Path(__file__).parent.parent / "scripts" / "cli.py"
+
+
+def batch(lines, **kwargs):
+    out = io.StringIO()
+    stats = cli.run_batch(lines, out, **kwargs)
+    return [json.loads(line) for line in out.getvalue().splitlines()], stats
+
+
+class TestBatchMode:
+    def test_one_output_line_per_input_line(self, db_path):
+        records, stats = batch(["me piden el DNI\n", "\n", "xyzzy qwerty\n"], db_path=db_path)
+        assert [r["query"] for r in records] == ["me piden el DNI", "", "xyzzy qwerty"]
+        assert stats == {"lines": 3, "matched": 1}
+
+    def test_best_and_alternatives_match_search(self, db_path):
+        records, _ = batch(["me quieren revisar el celular"], db_path=db_path, limit=3)
+        expected = search_situation("me quieren revisar el celular", db_path=db_path, limit=3)
+        assert records[0]["best"] == expected[0]
+        assert records[0]["alternatives"] == expected[1:]
+        assert "details" not in records[0]
+
+    def test_no_match(self, db_path):
+        records, _ = batch(["xyzzy qwerty"], db_path=db_path, with_details=True)
+        assert records[0]["best"] is None
+        assert records[0]["alternatives"] == []
+        assert records[0]["details"] is None
+
+    def test_details(self, db_path):
+        records, _ = batch(["me piden el DNI"], db_path=db_path, with_details=True)
+        assert records[0]["details"] == get_situation_details("police_id_check", db_path=db_path)
+
+    def test_repeated_queries_give_identical_output(self, db_path):
+        records, _ = batch(["Me piden el DNI", "me piden el dni"], db_path=db_path, with_details=True)
+        assert records[0]["query"] != records[1]["query"]
+        assert {k: v for k, v in records[0].items() if k != "query"} == \
+               {k: v for k, v in records[1].items() if k != "query"}
+
+    def test_output_is_flushed_in_chunks(self, db_path):
+        class Recorder(io.StringIO):
+            writes = 0
+
+            def write(self, s):
+                Recorder.writes += 1
+                return super().write(s)
+
+        out = Recorder()
+        cli.run_batch(["me piden el DNI"] * 25, out, db_path=db_path, chunk_size=10)
+        assert Recorder.writes == 3
+        assert len(out.getvalue().splitlines()) == 25
+
+    def test_stdin_stdout_pipeline(self, db_path):
+        proc = subprocess.run(
+            [sys.executable, str(CLI), "--batch", "--limit", "2"],
+            input="me piden el DNI\nquieren revisar mi mochila\n".encode("utf-8"),
+            capture_output=True,
+            check=True,
+        )
+        records = [json.loads(line) for line in proc.stdout.decode("utf-8").splitlines()]
+        assert [r["best"]["situation_id"] for r in records] == ["police_id_check", "police_bag_search"]
+        assert all(len(r["alternatives"]) <= 1 for r in records)
+
+
+class TestArguments:
+    @pytest.mark.parametrize("argv,query", [
+        (["me", "piden", "el", "DNI"], "me piden el DNI"),
+        (["-no", "me", "dejan", "ir"], "-no me dejan ir"),
+        (["me", "piden", "-x", "algo"], "me piden -x algo"),
+        (["me", "--no-daemon", "piden"], "me piden"),
+        (["--", "--serve", "es", "consulta"], "--serve es consulta"),
+    ])
+    def test_dashed_words_stay_in_query(self, argv, query):
+        assert cli.parse_args(argv).query == query
+
+    def test_double_dash_disables_options(self):
+        args = cli.parse_args(["--no-daemon", "me", "--", "--serve", "-x"])
+        assert (args.serve, args.no_daemon, args.query) == (False, True, "me --serve -x")
+
+    def test_options_still_parse(self):
+        args = cli.parse_args(["--region", "Callao", "-no", "me", "dejan", "--no-daemon"])
+        assert (args.region, args.no_daemon, args.query) == ("Callao", True, "-no me dejan")
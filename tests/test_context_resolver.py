@@ -0,0 +1,204 @@
+"""
+Tests del resolver de contextos por region y fecha (context_resolver.py).
+"""
+
+import json
+import random
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from context_resolver import (
+    ContextResolver, IntervalIndex, expiry_status, load_context_resolver, normalize_region,
+)
+import generate_site
+import search_daemon
+
+EMERGENCY = "estado_emergencia_seguridad"
+
+
+def ctx(cid, start=None, end=None, regions=(), active=False, context_type="estado_emergencia"):
+    return {
+        "id": cid, "context_type": context_type, "start_date": start, "end_date": end,
+        "active_regions": list(regions), "is_currently_active": active,
+    }
+
+
+@pytest.fixture
+def resolver():
+    return ContextResolver([
+        ctx("normal", context_type="normal", active=True),
+        ctx("lima_enero", "2026-01-01", "2026-01-31", ["Lima Metropolitana", "Callao"]),
+        ctx("callao_feb", "2026-01-20", "2026-02-19", ["Callao"]),
+        ctx("nacional", "2026-03-01", "2026-03-10"),
+        ctx("toque_sin_fechas", regions=["Puno"], active=True, context_type="toque_queda"),
+        ctx("viejo_sin_fechas", regions=["Puno"], active=False),
+    ])
+
+
+class TestNormalizeRegion:
+    @pytest.mark.parametrize("name,key", [
+        ("Lima Metropolitana", "lima_metropolitana"),
+        ("  CALLAO ", "callao"),
+        ("Junín", "junin"),
+        ("Madre de Dios - Tambopata", "madre_de_dios_tambopata"),
+    ])
+    def test_keys(self, name, key):
+        assert normalize_region(name) == key
+
+
+class TestIntervalIndex:
+    def test_stab(self):
+        index = IntervalIndex([("2026-01-01", "2026-01-10", "a"), ("2026-01-05", "2026-01-20", "b")])
+        assert index.stab("2025-12-31") == ()
+        assert index.stab("2026-01-01") == ("a",)
+        assert index.stab("2026-01-07") == ("a", "b")
+        assert index.stab("2026-01-10") == ("b",)
+        assert index.stab("2026-01-20") == ()
+
+    def test_empty(self):
+        assert IntervalIndex([]).stab("2026-01-01") == ()
+
+    def test_sweep_matches_definition(self):
+        rng = random.Random(3)
+        days = [f"2026-{m:02d}-{d:02d}" for m in range(1, 4) for d in range(1, 29)]
+        intervals = []
+        for i in range(300):
+            start, end = sorted(rng.sample(days, 2))
+            intervals.append((start, rng.choice([end, start]), f"c{i}"))
+        index = IntervalIndex(intervals)
+        ordered = sorted(intervals)
+        for day in days:
+            assert index.stab(day) == tuple(cid for start, end, cid in ordered if start <= day < end)
+
+
+class TestResolver:
+    def test_region_and_date(self, resolver):
+        assert resolver.active_ids("Callao", "2026-01-25") == ("lima_enero", "callao_feb")
+        assert resolver.active_ids("lima metropolitana", "2026-01-25") == ("lima_enero",)
+        assert resolver.active_ids("Callao", "2026-02-10") == ("callao_feb",)
+        assert resolver.active_ids("Cusco", "2026-01-25") == ()
+
+    def test_end_date_is_inclusive(self, resolver):
+        assert resolver.active_ids("Callao", "2026-02-19") == ("callao_feb",)
+        assert resolver.active_ids("Callao", "2026-02-20") == ()
+
+    def test_nationwide_applies_to_every_region(self, resolver):
+        assert resolver.active_ids("Cusco", "2026-03-05") == ("nacional",)
+        assert resolver.active_ids("Callao", "2026-03-05") == ("nacional",)
+
+    def test_undated_contexts_follow_flag(self, resolver):
+        assert resolver.active_ids("Puno", "1999-01-01") == ("toque_sin_fechas",)
+        assert "viejo_sin_fechas" not in resolver.active_ids("Puno", "2026-01-01")
+
+    def test_normal_is_never_listed(self, resolver):
+        assert "normal" not in resolver.active_ids(None, "2026-01-25")
+
+    def test_active_context_id_falls_back_to_normal(self, resolver):
+        assert resolver.active_context_id("Callao", "2026-02-10") == "callao_feb"
+        assert resolver.active_context_id("Cusco", "2026-02-10") == "normal"
+
+    def test_accepts_dates_and_timestamps(self, resolver):
+        assert resolver.active_ids("Callao", date(2026, 2, 10)) == ("callao_feb",)
+        assert resolver.active_ids("Callao", "2026-02-10T23:59:00") == ("callao_feb",)
+
+    def test_matches_linear_scan(self, resolver):
+        for day in ("2025-12-31", "2026-01-01", "2026-01-20", "2026-01-31", "2026-02-01", "2026-03-10"):
+            for region in ("Callao", "Lima Metropolitana", "Puno", "Cusco"):
+                expected = {
+                    c["id"] for c in resolver.contexts.values()
+                    if c["context_type"] != "normal"
+                    and expiry_status(c, day)[0] in ("active", "expiring_soon")
+                    and (not c["active_regions"] or normalize_region(region) in
+                         {normalize_region(r) for r in c["active_regions"]})
+                }
+                assert set(resolver.active_ids(region, day)) == expected
+
+
+class TestExpiryStatus:
+    @pytest.mark.parametrize("day,status,days_left", [
+        ("2026-01-10", "upcoming", 40),
+        ("2026-01-20", "active", 30),
+        ("2026-02-12", "expiring_soon", 7),
+        ("2026-02-19", "expiring_soon", 0),
+        ("2026-02-20", "expired", -1),
+    ])
+    def test_statuses(self, day, status, days_left):
+        c = ctx("x", "2026-01-20", "2026-02-19")
+        assert expiry_status(c, day) == (status, days_left)
+
+    def test_inactive_without_dates_or_flag(self):
+        assert expiry_status(ctx("x")) == ("inactive", None)
+
+
+class TestFromDb:
+    def test_regions_normalized_in_db(self, db_conn):
+        rows = db_conn.execute(
+            "SELECT region, region_name FROM context_regions WHERE context_id = ? ORDER BY position",
+            (EMERGENCY,),
+        ).fetchall()
+        assert [tuple(r) for r in rows] == [("lima_metropolitana", "Lima Metropolitana"), ("callao", "Callao")]
+
+    def test_db_matches_json(self, db_path, all_contexts):
+        from_db = load_context_resolver(db_path)
+        from_json = ContextResolver(all_contexts)
+        for day in ("2026-01-19", "2026-01-20", "2026-02-19", "2026-02-20"):
+            for region in ("Callao", "Lima Metropolitana", "Arequipa", None):
+                assert from_db.active_ids(region, day) == from_json.active_ids(region, day)
+
+    def test_db_without_regions_table(self, db_path, tmp_path):
+        import shutil
+        import sqlite3
+        path = tmp_path / "old.db"
+        shutil.copy(db_path, path)
+        conn = sqlite3.connect(str(path))
+        conn.execute("DROP TABLE context_regions")
+        resolver = ContextResolver.from_db(conn)
+        conn.close()
+        assert resolver.active_ids("Callao", "2026-02-01") == (EMERGENCY,)
+
+
+class TestConsumers:
+    def test_status_json_uses_dates(self, all_contexts):
+        contexts = json.loads(json.dumps(all_contexts))
+        data = {
+            "metadata": {}, "contexts": contexts, "sources": [], "rights": [],
+            "situations": [], "contacts": [],
+        }
+        for c in contexts:
+            if c["id"] == EMERGENCY:
+                c["start_date"], c["end_date"] = "2000-01-01", "9999-12-30"
+        status = json.loads(generate_site.gen_status_json(data))
+        assert status["emergency_status"] == "active"
+        assert [c["id"] for c in status["active_contexts"]] == [EMERGENCY]
+
+        for c in contexts:
+            if c["id"] == EMERGENCY:
+                c["start_date"], c["end_date"], c["is_currently_active"] = "2000-01-01", "2000-01-31", True
+        status = json.loads(generate_site.gen_status_json(data))
+        assert status["emergency_status"] == "expired"
+        assert status["active_contexts"] == []
+
+    def test_status_json_upcoming_emergency_is_not_expired(self, all_contexts):
+        contexts = json.loads(json.dumps(all_contexts))
+        data = {
+            "metadata": {"active_emergencies": [EMERGENCY]}, "contexts": contexts, "sources": [],
+            "rights": [], "situations": [], "contacts": [],
+        }
+        for c in contexts:
+            if c["id"] == EMERGENCY:
+                c["start_date"], c["end_date"], c["is_currently_active"] = "9999-01-01", "9999-12-30", True
+        status = json.loads(generate_site.gen_status_json(data))
+        assert status["emergency_status"] == "none"
+        assert status["active_contexts"] == []
+
+    def test_daemon_card_uses_region_context(self, db_path):
+        service = search_daemon.SearchService(db_path)
+        resolver = load_context_resolver(db_path)
+        expected = resolver.active_context_id("Callao")
+        response = service.handle({"query": "me piden el DNI", "card": "text", "region": "Callao"})
+        assert response["context"] == expected
+        assert service.handle({"query": "me piden el DNI", "card": "text"})["context"] == "normal"
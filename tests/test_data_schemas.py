@@ -0,0 +1,102 @@
+"""
+Tests de los esquemas de datos compilados (data_schemas.py).
+"""
+
+import json
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+from build_db import DATA_FILES, validate_source
+from data_schemas import (
+    benchmark, check_entity, compile_checker, compile_codegen, load_schemas, synthetic_dataset,
+)
+
+
+def docs_examples():
+    """(tipo, entidad) de cada bloque JSON de docs/DATA_FORMAT.md."""
+    text = (PROJECT_ROOT / "docs" / "DATA_FORMAT.md").read_text(encoding="utf-8")
+    for kind, block in re.findall(r"### [^\n]*\(`(\w+)/[^`]*`\)\s*```json\n(.*?)```", text, re.S):
+        for entity in json.loads(block):
+            yield kind, entity
+
+
+class TestSchemasMatchData:
+    def test_docs_examples_are_valid(self):
+        examples = list(docs_examples())
+        assert {kind for kind, _ in examples} == set(load_schemas()) - {"contexts"}
+        for kind, entity in examples:
+            assert check_entity(kind, entity) == [], entity["id"]
+
+    def test_repo_data_is_valid(self, data_dir):
+        for kind, pattern in DATA_FILES.items():
+            for path in sorted(data_dir.glob(pattern)):
+                for entity in json.loads(path.read_text(encoding="utf-8")):
+                    assert check_entity(kind, entity) == [], (path.name, entity.get("id"))
+
+
+class TestMessages:
+    def test_missing_empty_and_enum(self):
+        problems = check_entity("sources", {"id": "x", "source_type": "otra", "name": "", "status": None})
+        assert problems == [
+            ("error", "Fuente 'x': source_type inválido: otra"),
+            ("error", "Fuente 'x': falta campo 'name'"),
+            ("error", "Fuente 'x': falta campo 'full_text'"),
+            ("error", "Fuente 'x': falta campo 'summary'"),
+            ("error", "Fuente 'x': falta campo 'status'"),
+        ]
+
+    def test_custom_enum_message(self):
+        right = {"id": "r", "title": "t", "description": "d", "legal_basis": "b", "category": "otra"}
+        assert check_entity("rights", right) == [("error", "Derecho 'r': categoría inválida: otra")]
+
+    def test_types_and_nested_items(self):
+        situation = {
+            "id": "s", "category": "c", "title": "t", "description": "d",
+            "keywords": ["a", 3], "natural_queries": "una sola consulta",
+            "actions": [{"action_id": "a", "step_order": 1.0}, {"action_id": "b", "step_order": True}, "x"],
+        }
+        assert [msg for _, msg in check_entity("situations", situation)] == [
+            "Situación 's': keywords[1] debe ser texto",
+            "Situación 's': actions[1].step_order debe ser entero",
+            "Situación 's': actions[2] debe ser objeto",
+        ]
+
+    def test_any_of_is_a_warning(self):
+        contact = {"id": "c", "institution": "i", "description": "d", "contact_type": "t", "phone": ""}
+        assert check_entity("contacts", contact) == [
+            ("warn", "Contacto 'c': sin medio de contacto (teléfono, web, etc.)")]
+
+    def test_date_pattern(self):
+        source = {"id": "x", "source_type": "ley", "name": "n", "full_text": "f", "summary": "s",
+                  "status": "vigente", "publication_date": "29/12/1993"}
+        [(_, msg)] = check_entity("sources", source)
+        assert "publication_date no sigue el formato" in msg
+
+    def test_unsupported_any_of_fails_at_compile_time(self):
+        with pytest.raises(ValueError):
+            compile_codegen({"type": "object", "anyOf": [{"type": "string"}]})
+
+
+class TestBackends:
+    def test_fastjsonschema_agrees_with_codegen(self):
+        pytest.importorskip("fastjsonschema")
+        schemas = load_schemas()
+        for kind, entity in synthetic_dataset(2000):
+            assert compile_checker(schemas[kind])(entity) == compile_codegen(schemas[kind])(entity)
+
+    def test_benchmark_reports_problems(self):
+        [codegen, *_] = benchmark(n=200, runs=1)
+        assert codegen["variant"] == "codegen"
+        assert 0 < codegen["problems"] < 200
+
+
+def test_builder_uses_the_same_schemas():
+    warnings = []
+    source = {"id": "x", "source_type": "ley", "name": "n", "full_text": "f", "summary": "s", "status": "otro"}
+    assert not validate_source(source, warnings)
+    assert warnings == ["Fuente 'x' descartada: status inválido: otro"]
@@ -0,0 +1,182 @@
+"""
+Tests de los deltas entre builds (db_delta.py).
+"""
+
+import json
+import shutil
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+from build_db import build_database, load_country_data
+from db_delta import (
+    DeltaError, apply_changeset, changeset_stats, diff_databases, fingerprint,
+    publish_delta, read_changeset, write_changeset,
+)
+from db_profiles import build_mobile_db, texts_path_for
+
+
+@pytest.fixture
+def db_pair(db_path, tmp_path):
+    """Dos copias del build: 'old' intacta y 'new' para modificar."""
+    old = tmp_path / "old.db"
+    new = tmp_path / "new.db"
+    shutil.copy(db_path, old)
+    shutil.copy(db_path, new)
+    return old, new
+
+
+def modify(db, *statements):
+    conn = sqlite3.connect(str(db))
+    for sql in statements:
+        conn.execute(sql)
+    conn.commit()
+    conn.close()
+
+
+def db_fingerprint(db):
+    conn = sqlite3.connect(str(db))
+    try:
+        return fingerprint(conn)
+    finally:
+        conn.close()
+
+
+NEW_BUILD = "UPDATE build_info SET value = 'build-nuevo' WHERE key = 'build_id'"
+
+
+class TestDiff:
+    def test_identical_builds_have_empty_changeset(self, db_pair):
+        changeset = diff_databases(*db_pair)
+        assert changeset["tables"] == {}
+        assert changeset["from_fingerprint"] == changeset["to_fingerprint"]
+
+    def test_insert_update_delete_per_table(self, db_pair):
+        old, new = db_pair
+        modify(new,
+               NEW_BUILD,
+               "UPDATE rights SET title = 'Titulo nuevo' WHERE id = 'right_police_id'",
+               "DELETE FROM myths WHERE id = (SELECT MIN(id) FROM myths)",
+               "INSERT INTO search_suggestions (prefix, rank, suggestion, situation_id, kind) "
+               "VALUES ('zzz', 1, 'zzz', 'police_id_check', 'title')")
+        changeset = diff_databases(old, new)
+
+        assert changeset["to_build_id"] == "build-nuevo"
+        assert set(changeset["tables"]) == {"build_info", "rights", "myths", "search_suggestions"}
+        rights = changeset["tables"]["rights"]
+        assert rights["update"] == [[["right_police_id"], {"title": "Titulo nuevo"}]]
+        assert len(changeset["tables"]["myths"]["delete"]) == 1
+        assert len(changeset["tables"]["search_suggestions"]["insert"]) == 1
+
+    def test_schema_change_needs_full_download(self, db_pair):
+        old, new = db_pair
+        modify(new, "CREATE TABLE extra (id TEXT PRIMARY KEY)")
+        with pytest.raises(DeltaError):
+            diff_databases(old, new)
+
+
+class TestApply:
+    def test_apply_reproduces_new_build(self, db_pair, tmp_path):
+        old, new = db_pair
+        modify(new,
+               NEW_BUILD,
+               "UPDATE situations SET title = title || ' (editado)' WHERE id = 'police_id_check'",
+               "DELETE FROM situation_contacts WHERE situation_id = 'police_id_check'")
+        path = write_changeset(diff_databases(old, new), tmp_path / "delta.json.gz")
+
+        stats = apply_changeset(old, read_changeset(path))
+        assert stats["update"] >= 2
+        assert db_fingerprint(old) == db_fingerprint(new)
+
+    def test_blob_columns_roundtrip(self, db_pair):
+        old, new = db_pair
+        modify(new, NEW_BUILD, "UPDATE effective_rights SET applies_bits = x'ff00ff' "
+                               "WHERE situation_id = 'police_id_check' AND context_id = 'normal'")
+        apply_changeset(old, diff_databases(old, new))
+        assert db_fingerprint(old) == db_fingerprint(new)
+
+    def test_wrong_base_build_is_rejected(self, db_pair):
+        old, new = db_pair
+        modify(new, NEW_BUILD)
+        changeset = diff_databases(old, new)
+        modify(old, "UPDATE build_info SET value = 'otro' WHERE key = 'build_id'")
+        with pytest.raises(DeltaError):
+            apply_changeset(old, changeset)
+
+    def test_failed_verification_rolls_back(self, db_pair):
+        old, new = db_pair
+        modify(new, NEW_BUILD, "UPDATE rights SET title = 'x' WHERE id = 'right_police_id'")
+        changeset = diff_databases(old, new)
+        changeset["to_fingerprint"] = "0" * 64
+        before = db_fingerprint(old)
+        with pytest.raises(DeltaError):
+            apply_changeset(old, changeset)
+        assert db_fingerprint(old) == before
+
+
+class TestManifest:
+    def test_publish_writes_delta_and_manifest(self, db_pair, tmp_path):
+        old, new = db_pair
+        modify(new, NEW_BUILD)
+        out = tmp_path / "site"
+        delta_path, manifest = publish_delta(old, new, out)
+
+        on_disk = json.loads((out / "deltas.json").read_text(encoding="utf-8"))
+        assert on_disk == manifest
+        assert manifest["build_id"] == "build-nuevo"
+        [entry] = manifest["deltas"]
+        assert (out / entry["file"]) == delta_path
+        assert entry["size"] < manifest["db"]["size"] / 100
+        assert changeset_stats(read_changeset(delta_path)) == entry["rows"]
+
+
+class TestMobileTexts:
+    """Los textos legales de la DB mobile viven en la DB de textos."""
+
+    @pytest.fixture
+    def mobile_pair(self, db_path, tmp_path):
+        old, _ = build_mobile_db(db_path, tmp_path / "old")
+        data = load_country_data(PROJECT_ROOT / "data" / "PE")
+        data["sources"] = list(data["sources"])
+        source = dict(data["sources"][0], full_text="Texto legal reformado.")
+        data["sources"][0] = source
+        conn, _ = build_database("PE", tmp_path / "src" / db_path.name, data=data)
+        conn.close()
+        new, _ = build_mobile_db(tmp_path / "src" / db_path.name, tmp_path / "new")
+        return old, new, source["id"]
+
+    def test_full_text_change_reaches_client(self, mobile_pair, tmp_path):
+        old, new, source_id = mobile_pair
+        delta_path, manifest = publish_delta(old, new, tmp_path / "site")
+        changeset = read_changeset(delta_path)
+        assert changeset["texts"]["tables"]["legal_texts"]["update"] == [
+            [[source_id], {"full_text": "Texto legal reformado."}]]
+        assert manifest["texts"]["file"] == texts_path_for(new).name
+
+        apply_changeset(old, changeset)
+        texts = sqlite3.connect(str(texts_path_for(old)))
+        full_text = texts.execute(
+            "SELECT full_text FROM legal_texts WHERE source_id = ?", (source_id,)).fetchone()[0]
+        texts.close()
+        assert full_text == "Texto legal reformado."
+        assert db_fingerprint(old) == db_fingerprint(new)
+        assert db_fingerprint(texts_path_for(old)) == db_fingerprint(texts_path_for(new))
+
+    def test_failed_texts_verification_rolls_back_both(self, mobile_pair):
+        old, new, _ = mobile_pair
+        changeset = diff_databases(old, new)
+        changeset["texts"]["to_fingerprint"] = "0" * 64
+        before = db_fingerprint(old), db_fingerprint(texts_path_for(old))
+        with pytest.raises(DeltaError):
+            apply_changeset(old, changeset)
+        assert (db_fingerprint(old), db_fingerprint(texts_path_for(old))) == before
+
+    def test_missing_old_texts_needs_full_download(self, mobile_pair):
+        old, new, _ = mobile_pair
+        texts_path_for(old).unlink()
+        with pytest.raises(DeltaError):
+            diff_databases(old, new)
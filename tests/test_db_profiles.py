@@ -0,0 +1,78 @@
+"""
+Tests del perfil mobile de la DB (db_profiles.py).
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+import db_profiles
+from db_profiles import build_mobile_db, size_report
+
+
+@pytest.fixture(scope="module")
+def mobile_build(db_path, tmp_path_factory):
+    return build_mobile_db(db_path, tmp_path_factory.mktemp("mobile"))
+
+
+@pytest.fixture
+def mobile_conn(mobile_build):
+    conn = sqlite3.connect(str(mobile_build[0]))
+    yield conn
+    conn.close()
+
+
+def tables(conn, schema="main"):
+    return {r[0] for r in conn.execute(f"SELECT name FROM {schema}.sqlite_master WHERE type = 'table'")}
+
+
+class TestMobileDb:
+    def test_server_tables_dropped(self, mobile_conn):
+        assert not tables(mobile_conn) & set(db_profiles.MOBILE_DROP_TABLES)
+
+    def test_app_tables_kept(self, mobile_conn):
+        expected = {"situations", "rights", "situation_rights", "actions", "contexts",
+                    "context_regions", "answer_cards", "effective_rights", "right_bits",
+                    "search_suggestions", "build_info", "legal_sources"}
+        assert expected <= tables(mobile_conn)
+
+    def test_only_json_cards(self, mobile_conn):
+        formats = {r[0] for r in mobile_conn.execute("SELECT DISTINCT format FROM answer_cards")}
+        assert formats == set(db_profiles.MOBILE_CARD_FORMATS)
+
+    def test_full_text_moved_to_texts_db(self, mobile_conn, mobile_build, db_conn):
+        assert mobile_conn.execute(
+            "SELECT COUNT(*) FROM legal_sources WHERE full_text != ''"
+        ).fetchone()[0] == 0
+        mobile_conn.execute("ATTACH DATABASE ? AS texts", (str(mobile_build[1]),))
+        moved = dict(mobile_conn.execute("SELECT source_id, full_text FROM texts.legal_texts"))
+        mobile_conn.execute("DETACH DATABASE texts")
+        original = {r["id"]: r["full_text"] for r in db_conn.execute("SELECT id, full_text FROM legal_sources")}
+        assert moved == original
+
+    def test_page_size_analyze_and_vacuum(self, mobile_conn):
+        assert mobile_conn.execute("PRAGMA page_size").fetchone()[0] == db_profiles.MOBILE_PAGE_SIZE
+        assert mobile_conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+        assert mobile_conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0] > 0
+
+    def test_same_build_id_marked_mobile(self, mobile_conn, db_conn):
+        info = dict(mobile_conn.execute("SELECT key, value FROM build_info"))
+        build_id = db_conn.execute("SELECT value FROM build_info WHERE key = 'build_id'").fetchone()[0]
+        assert info["build_id"] == build_id
+        assert info["profile"] == "mobile"
+
+    def test_smaller_than_desktop(self, mobile_build, db_path):
+        assert mobile_build[0].stat().st_size < db_path.stat().st_size
+
+
+class TestSizeBudget:
+    def test_within_budget(self, mobile_build, capsys):
+        assert size_report(mobile_build[0])
+        assert "OK" in capsys.readouterr().out
+
+    def test_over_budget_fails(self, mobile_build, capsys):
+        assert not size_report(mobile_build[0], budget_kb=1)
+        assert "EXCEDIDO" in capsys.readouterr().out
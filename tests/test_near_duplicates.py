@@ -0,0 +1,128 @@
+"""
+Tests de la deteccion de textos casi duplicados (near_duplicates.py) y de
+su paso en el validador.
+"""
+
+import json
+import random
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from near_duplicates import SignatureCache, find_clusters, minhash, normalize, similarity
+from validate_sources import Validator
+
+ARTICLE = ("Toda persona tiene derecho a la libertad y a la seguridad personales. "
+           "Nadie puede ser detenido sino por mandamiento escrito y motivado del juez "
+           "o por las autoridades policiales en caso de flagrante delito. El detenido "
+           "debe ser puesto a disposición del juzgado correspondiente dentro de las "
+           "cuarenta y ocho horas o en el término de la distancia.")
+
+
+def signature(text):
+    return minhash(normalize(text))
+
+
+class TestSignatures:
+    def test_normalize(self):
+        assert normalize("¡Artículo  2°, inciso 24-f!") == "articulo 2 inciso 24 f"
+        assert normalize(None) == ""
+
+    def test_formatting_does_not_matter(self):
+        assert signature(ARTICLE) == signature(ARTICLE.upper().replace(".", " ;"))
+
+    def test_similarity_tracks_edits(self):
+        edited = ARTICLE.replace("cuarenta y ocho horas", "veinticuatro horas")
+        assert similarity(signature(ARTICLE), signature(edited)) > 0.6
+        assert similarity(signature(ARTICLE), signature("Derecho a guardar silencio.")) < 0.1
+
+    def test_empty_text_has_no_signature(self):
+        assert signature("  ¡! ") is None
+
+
+class TestClusters:
+    def test_groups_near_duplicates_only(self):
+        signatures = {
+            "art_2_24": signature(ARTICLE),
+            "art_2_24_bis": signature(ARTICLE.replace("juez", "juez competente")),
+            "copia": signature(ARTICLE),
+            "otro": signature("Nadie debe ser incomunicado sino en caso indispensable."),
+            "vacio": None,
+        }
+        [(ids, score)] = find_clusters(signatures)
+        assert ids == ["art_2_24", "art_2_24_bis", "copia"]
+        assert 0.8 <= score < 1
+
+    def test_unrelated_texts_at_scale(self):
+        rng = random.Random(7)
+        words = [f"palabra{i}" for i in range(3000)]
+        signatures = {f"t{i}": signature(" ".join(rng.choices(words, k=30))) for i in range(2000)}
+        signatures["t5_copia"] = signatures["t5"]
+        assert find_clusters(signatures) == [(["t5", "t5_copia"], 1.0)]
+
+
+class TestCache:
+    def test_signatures_are_reused_between_runs(self, tmp_path):
+        path = tmp_path / "minhash.json"
+        first = SignatureCache(path)
+        expected = first.signature(ARTICLE)
+        first.signature("")
+        first.save()
+
+        second = SignatureCache(path)
+        assert second.signature(ARTICLE) == expected
+        assert second.signature("") is None
+        assert second.computed == 0
+
+    def test_save_drops_unused_signatures(self, tmp_path):
+        path = tmp_path / "minhash.json"
+        cache = SignatureCache(path)
+        cache.signature(ARTICLE)
+        cache.save()
+        cache = SignatureCache(path)
+        cache.signature("Otro texto")
+        cache.save()
+        assert len(json.loads(path.read_text(encoding="utf-8"))["signatures"]) == 1
+
+
+def duplicate_source(pe, new_id):
+    """Copia la primera fuente con otro id y un cambio minimo."""
+    path = sorted((pe / "sources").glob("*.json"))[0]
+    sources = json.loads(path.read_text(encoding="utf-8"))
+    copy = dict(sources[0], id=new_id, full_text=sources[0]["full_text"] + " (texto vigente)")
+    path.write_text(json.dumps(sources + [copy], ensure_ascii=False), encoding="utf-8")
+    return sources[0]["id"]
+
+
+@pytest.fixture
+def country(data_dir, tmp_path):
+    shutil.copytree(data_dir, tmp_path / "PE")
+    return tmp_path
+
+
+class TestValidator:
+    def test_reports_duplicated_source(self, country):
+        original = duplicate_source(country / "PE", "copia_de_fuente")
+        validator = Validator("PE", country, country / "index")
+        validator.run()
+        [warning] = [w for w in validator.warnings if "casi idéntico" in w]
+        assert original in warning and "copia_de_fuente" in warning
+        assert validator.errors == []
+
+    def test_changed_since_uses_cached_signatures(self, country, capsys):
+        git = ["git", "-c", "user.name=test", "-c", "user.email=test@example.com"]
+        subprocess.run(git + ["init", "-q"], cwd=country, check=True)
+        subprocess.run(git + ["add", "."], cwd=country, check=True)
+        subprocess.run(git + ["commit", "-qm", "base"], cwd=country, check=True)
+        Validator("PE", country, country / "index").run()
+
+        duplicate_source(country / "PE", "copia_de_fuente")
+        validator = Validator("PE", country, country / "index")
+        validator.run("HEAD")
+        assert len(validator.scanned) == 1
+        assert [w for w in validator.warnings if "copia_de_fuente" in w]
+        assert "(1 firmas calculadas" in capsys.readouterr().out
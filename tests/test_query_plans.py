@@ -0,0 +1,109 @@
+"""
+Regresion de planes de consulta (EXPLAIN QUERY PLAN).
+
+Cada consulta de scripts/search.py y de la app (mobile/src/database/*.ts)
+debe resolverse con un indice: falla ante un SCAN de tabla en una consulta
+filtrada o ante un ORDER BY que necesite TEMP B-TREE. Las consultas de la
+app se extraen del fuente TypeScript, asi que una consulta nueva queda
+vigilada sin tocar este archivo.
+"""
+
+import re
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+import search
+from db_profiles import LEGAL_TEXTS_TABLE
+
+MOBILE_DB_DIR = Path(__file__).parent.parent / "mobile" / "src" / "database"
+
+SEARCH_QUERIES = {
+    name: getattr(search, name)
+    for name in ("SITUATIONS_QUERY", "BUILD_INFO_QUERY", "RIGHTS_QUERY",
+                 "ACTIONS_QUERY", "CONTACTS_QUERY", "TIME_LIMITS_QUERY")
+}
+
+# Lecturas de tabla completa a proposito: un SCAN es el plan correcto.
+WHOLE_TABLE_READS = {
+    "SITUATIONS_QUERY",          # arma el indice de busqueda (una vez por build_id)
+    "BUILD_INFO_QUERY",          # tabla clave/valor de 3 filas
+    "searchSituation",           # mismo caso que SITUATIONS_QUERY en la app
+    "getAllContexts",
+    "getAllLegalPossession",
+}
+
+_FUNCTION = re.compile(r"^export async function (\w+)", re.M)
+_LITERAL = re.compile(r"`([^`]*)`|'((?:SELECT|WITH)\b[^']*)'", re.S)
+_ASSIGNED = re.compile(r"(\w+)\s*=\s*`([^`]*)`", re.S)
+_PLACEHOLDER = re.compile(r"\$\{(\w+)\}")
+
+
+def mobile_queries():
+    """(funcion, sql) de cada consulta de los .ts, con cada variante de ${...}."""
+    queries = []
+    for path in sorted(MOBILE_DB_DIR.glob("*.ts")):
+        source = path.read_text(encoding="utf-8")
+        starts = [(m.start(), m.group(1)) for m in _FUNCTION.finditer(source)]
+        for i, (start, function) in enumerate(starts):
+            end = starts[i + 1][0] if i + 1 < len(starts) else len(source)
+            body = source[start:end]
+            fragments = {name: sql for name, sql in _ASSIGNED.findall(body)}
+            for match in _LITERAL.finditer(body):
+                sql = match.group(1) or match.group(2)
+                if not re.match(r"\s*(SELECT|WITH)\b", sql):
+                    continue
+                names = _PLACEHOLDER.findall(sql)
+                # Sin el fragmento opcional y con cada fragmento puesto
+                variants = [_PLACEHOLDER.sub("", sql)]
+                variants += [
+                    _PLACEHOLDER.sub(lambda m, n=name: fragments[n] if m.group(1) == n else "", sql)
+                    for name in names if name in fragments
+                ]
+                queries.extend((function, variant) for variant in variants)
+    return queries
+
+
+ALL_QUERIES = list(SEARCH_QUERIES.items()) + mobile_queries()
+
+
+@pytest.fixture(scope="module")
+def plan_conn(db_path):
+    """Conexion a la DB con la DB de textos de la app adjunta (vacia)."""
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("ATTACH DATABASE ':memory:' AS texts")
+    conn.execute(LEGAL_TEXTS_TABLE.format(schema="texts"))
+    yield conn
+    conn.close()
+
+
+def query_plan(conn, sql):
+    params = ["x"] * sql.count("?")
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def test_mobile_queries_found():
+    functions = {name for name, _ in mobile_queries()}
+    assert {"getAllSituations", "getActionsForSituation", "getSuggestions", "searchSituation"} <= functions
+
+
+def test_analyze_ran_at_build(db_conn):
+    stats = db_conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0]
+    assert stats > 0
+
+
+@pytest.mark.parametrize("name,sql", ALL_QUERIES, ids=[name for name, _ in ALL_QUERIES])
+def test_query_plan_uses_indexes(plan_conn, name, sql):
+    plan = query_plan(plan_conn, sql)
+    text = "\n".join(plan)
+    assert "TEMP B-TREE" not in text, f"{name} ordena en memoria:\n{text}"
+    if name in WHOLE_TABLE_READS:
+        return
+    full_scans = [step for step in plan if step.startswith("SCAN ") and " INDEX " not in step]
+    assert not full_scans, f"{name} recorre la tabla completa:\n{text}"
+    if re.search(r"\bWHERE\b", sql):
+        scans = [step for step in plan if step.startswith("SCAN ")]
+        assert not scans, f"{name} filtra sin usar un indice:\n{text}"
@@ -0,0 +1,142 @@
+"""
+Tests de la matriz de derechos efectivos (right_bits + effective_rights).
+"""
+
+import json
+import shutil
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+import rights_matrix
+from rights_matrix import RightsMatrix, compute_matrix, write_matrix
+
+EMERGENCY = "estado_emergencia_seguridad"
+
+
+@pytest.fixture
+def db_copy(db_path, tmp_path):
+    """Copia de la DB que cada test puede modificar."""
+    path = tmp_path / "copy.db"
+    shutil.copy(db_path, path)
+    conn = sqlite3.connect(str(path))
+    yield conn
+    conn.close()
+
+
+@pytest.fixture(scope="module")
+def matrix(db_path):
+    return rights_matrix.load_rights_matrix(db_path)
+
+
+def _matrix_of(conn):
+    return RightsMatrix(*compute_matrix(conn))
+
+
+class TestStoredMatrix:
+    def test_every_situation_and_context_present(self, db_conn):
+        situations = db_conn.execute("SELECT COUNT(*) FROM situations").fetchone()[0]
+        contexts = db_conn.execute("SELECT COUNT(*) FROM contexts").fetchone()[0]
+        assert db_conn.execute("SELECT COUNT(*) FROM effective_rights").fetchone()[0] == situations * contexts
+
+    def test_one_bit_per_right(self, db_conn):
+        rights = db_conn.execute("SELECT COUNT(*) FROM rights").fetchone()[0]
+        bits = [r[0] for r in db_conn.execute("SELECT bit FROM right_bits ORDER BY bit")]
+        assert bits == list(range(rights))
+
+    def test_stored_equals_computed(self, db_conn, matrix):
+        right_ids, masks = compute_matrix(db_conn)
+        assert matrix.right_ids == right_ids
+        for key, value in masks.items():
+            assert matrix.masks(*key) == value
+
+    def test_normal_equals_applies_rows(self, db_conn, matrix):
+        for (situation_id,) in db_conn.execute("SELECT id FROM situations"):
+            expected = {
+                r[0] for r in db_conn.execute(
+                    "SELECT right_id FROM situation_rights "
+                    "WHERE situation_id = ? AND context_id = 'normal' AND applies = 1",
+                    (situation_id,),
+                )
+            }
+            assert set(matrix.effective_rights(situation_id)) == expected
+
+    def test_load_is_cached_per_build(self, db_path, matrix):
+        assert rights_matrix.load_rights_matrix(db_path) is matrix
+
+    def test_unknown_pair_is_empty(self, matrix):
+        assert matrix.effective_rights("no_existe") == []
+        assert not matrix.applies("no_existe", "normal", "right_dignity")
+
+
+class TestRules:
+    def test_affected_right_without_override_is_suspended(self, db_copy):
+        db_copy.execute(
+            "INSERT INTO situation_rights (situation_id, right_id, context_id, applies) "
+            "VALUES ('police_id_check', 'right_home_inviolability', 'normal', 1)"
+        )
+        m = _matrix_of(db_copy)
+        assert m.applies("police_id_check", "normal", "right_home_inviolability")
+        assert m.is_suspended("police_id_check", EMERGENCY, "right_home_inviolability")
+        assert "right_home_inviolability" in m.suspended_rights("police_id_check", EMERGENCY)
+
+    def test_context_override_wins(self, db_copy):
+        db_copy.execute(
+            "INSERT INTO situation_rights (situation_id, right_id, context_id, applies) "
+            "VALUES ('police_id_check', 'right_home_inviolability', 'normal', 1), "
+            "('police_id_check', 'right_home_inviolability', ?, 1)",
+            (EMERGENCY,),
+        )
+        m = _matrix_of(db_copy)
+        assert m.applies("police_id_check", EMERGENCY, "right_home_inviolability")
+
+    def test_context_row_with_applies_zero_does_not_apply(self, db_copy):
+        db_copy.execute(
+            "INSERT INTO situation_rights (situation_id, right_id, context_id, applies) "
+            "VALUES ('cannabis_possession', 'right_no_arbitrary_search', ?, 0)",
+            (EMERGENCY,),
+        )
+        m = _matrix_of(db_copy)
+        assert m.applies("cannabis_possession", "normal", "right_no_arbitrary_search")
+        assert not m.applies("cannabis_possession", EMERGENCY, "right_no_arbitrary_search")
+        # No aplica a la situacion: no es una suspension de la emergencia
+        assert not m.is_suspended("cannabis_possession", EMERGENCY, "right_no_arbitrary_search")
+
+    def test_never_suspended_is_not_suspended(self, db_copy):
+        db_copy.execute("UPDATE contexts SET affects_rights = ? WHERE id = ?",
+                        (json.dumps(["right_dignity"]), EMERGENCY))
+        db_copy.execute("DELETE FROM situation_rights WHERE situation_id = 'police_id_check' "
+                        "AND right_id = 'right_dignity' AND context_id = ?", (EMERGENCY,))
+        db_copy.execute(
+            "INSERT OR REPLACE INTO situation_rights (situation_id, right_id, context_id, applies) "
+            "VALUES ('police_id_check', 'right_dignity', 'normal', 1)"
+        )
+        m = _matrix_of(db_copy)
+        assert m.applies("police_id_check", EMERGENCY, "right_dignity")
+        assert not m.is_suspended("police_id_check", EMERGENCY, "right_dignity")
+
+    @pytest.mark.parametrize("context", ["normal", EMERGENCY])
+    def test_never_suspended_respects_applies_zero(self, db_copy, context):
+        db_copy.execute(
+            "INSERT OR REPLACE INTO situation_rights (situation_id, right_id, context_id, applies) "
+            "VALUES ('police_id_check', 'right_dignity', ?, 0)",
+            (context,),
+        )
+        m = _matrix_of(db_copy)
+        assert not m.applies("police_id_check", context, "right_dignity")
+        assert not m.is_suspended("police_id_check", context, "right_dignity")
+
+    def test_write_then_load_round_trip(self, db_copy):
+        db_copy.execute(
+            "INSERT INTO situation_rights (situation_id, right_id, context_id, applies) "
+            "VALUES ('police_id_check', 'right_home_inviolability', 'normal', 1)"
+        )
+        write_matrix(db_copy)
+        stored = RightsMatrix.from_db(db_copy)
+        computed = _matrix_of(db_copy)
+        assert len(stored) == len(computed)
+        for key in computed._masks:
+            assert stored.masks(*key) == computed.masks(*key)
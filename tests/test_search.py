@@ -4,13 +4,17 @@ Verifica que search.py encuentra la situacion correcta
 para distintas consultas en espanol.
 """
 
+import sqlite3
 import sys
+import threading
+import time
 from pathlib import Path
 
 import pytest
 
 # Agregar scripts/ al path
 sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+import search
 from search import search_situation, get_situation_details, normalize, tokenize
 
 
@@ -221,3 +225,259 @@ class TestGetSituationDetails:
         details = get_situation_details("nonexistent_id", db_path=self.db_path)
         assert len(details["rights"]) == 0
         assert len(details["actions"]) == 0
+
+
+# ============================================================
+# Tests de seleccion top-k
+# ============================================================
+
+class TestSearchTopK:
+    """El top-k con poda debe coincidir con el ranking completo ordenado."""
+
+    QUERIES = [
+        "me piden el DNI",
+        "quieren revisar mi mochila",
+        "me llevan a la comisaría",
+        "policía",
+        "celu",
+        "me encuentran con marihuana",
+        "xyzabc123",
+    ]
+
+    @pytest.fixture(autouse=True)
+    def setup(self, db_path):
+        self.db_path = db_path
+
+    def _full_ranking(self, query):
+        """Ranking de referencia: puntua todo y ordena (sin poda)."""
+        query_norm = normalize(query)
+        query_tokens = search.tokens_sin_stopwords(query)
+        conn = sqlite3.connect(str(self.db_path))
+        rows = conn.execute(
+            "SELECT id, title, keywords, natural_queries FROM situations WHERE is_active = 1"
+        ).fetchall()
+        conn.close()
+        ranked = []
+        for s_id, title, keywords, natural_q in rows:
+            total = (search.score_natural_query_match(query_norm, natural_q) * 0.45
+                     + search.score_keyword_match(query_tokens, keywords) * 0.30
+                     + search.score_title_match(query_norm, title) * 0.15
+                     + search.score_partial_match(query_tokens, keywords + ' ' + natural_q) * 0.10)
+            if total > 0.05:
+                ranked.append((s_id, round(total, 4)))
+        ranked.sort(key=lambda x: x[1], reverse=True)
+        return ranked
+
+    @pytest.mark.parametrize("limit", [1, 2, 3, 5, 50])
+    def test_matches_full_sort(self, limit):
+        for query in self.QUERIES:
+            expected = self._full_ranking(query)[:limit]
+            results = search_situation(query, db_path=self.db_path, limit=limit)
+            assert [(r["situation_id"], r["score"]) for r in results] == expected, query
+
+    def test_zero_limit_returns_empty(self):
+        assert search_situation("me piden el DNI", db_path=self.db_path, limit=0) == []
+
+
+# ============================================================
+# Tests del indice serializado
+# ============================================================
+
+class TestSearchIndex:
+    @pytest.fixture(autouse=True)
+    def setup(self, db_path):
+        self.db_path = db_path
+
+    def _build_id(self):
+        conn = sqlite3.connect(str(self.db_path))
+        build_id = search.read_build_id(conn)
+        conn.close()
+        return build_id
+
+    def test_build_writes_index_next_to_db(self):
+        assert search.index_path_for(self.db_path).exists()
+
+    def test_index_file_matches_build_id(self):
+        index = search._map_index_file(search.index_path_for(self.db_path), self._build_id())
+        assert index is not None
+        assert index.build_id == self._build_id()
+
+    def test_mmap_index_matches_in_memory_index(self):
+        mapped = search._map_index_file(search.index_path_for(self.db_path), self._build_id())
+        conn = sqlite3.connect(str(self.db_path))
+        in_memory = search.SearchIndex(search.build_search_index(conn))
+        conn.close()
+        for query in TestSearchTopK.QUERIES:
+            q_norm = normalize(query)
+            q_tokens = search.tokens_sin_stopwords(query)
+            assert mapped.search(q_norm, q_tokens, 5) == in_memory.search(q_norm, q_tokens, 5)
+
+    def test_stale_index_is_ignored(self, tmp_path):
+        """Un .idx de otro build no se usa: se reconstruye en memoria."""
+        db_copy = tmp_path / "copy.db"
+        db_copy.write_bytes(self.db_path.read_bytes())
+        conn = sqlite3.connect(str(db_copy))
+        search.write_search_index(conn, search.index_path_for(db_copy), "otro_build")
+        conn.close()
+
+        assert search._map_index_file(search.index_path_for(db_copy), self._build_id()) is None
+        results = search_situation("me piden el DNI", db_path=db_copy)
+        assert results[0]["situation_id"] == "police_id_check"
+
+    def test_corrupt_index_is_rejected(self, tmp_path):
+        bad = tmp_path / "bad.idx"
+        bad.write_bytes(b"no es un indice")
+        assert search._map_index_file(bad, self._build_id()) is None
+
+    def test_replaced_index_closes_its_mmap(self, tmp_path):
+        db_copy = tmp_path / "copy.db"
+        db_copy.write_bytes(self.db_path.read_bytes())
+        search.index_path_for(db_copy).write_bytes(search.index_path_for(self.db_path).read_bytes())
+        old = search.load_search_index(db_copy)
+        assert not old._buffer.closed
+
+        db_copy.write_bytes(self.db_path.read_bytes() + b"\x00" * 4096)
+        new = search.load_search_index(db_copy)
+        assert new is not old
+        assert old._buffer.closed
+        assert search_situation("me piden el DNI", db_path=db_copy)[0]["situation_id"] == "police_id_check"
+        new.close()
+
+    def test_locked_index_raises_and_cleans_tmp(self, tmp_path, monkeypatch):
+        """En Windows un .idx mapeado no se puede reemplazar."""
+        def locked(src, dst):
+            raise PermissionError(13, "Acceso denegado")
+
+        monkeypatch.setattr(search.os, "replace", locked)
+        path = tmp_path / "db.idx"
+        conn = sqlite3.connect(str(self.db_path))
+        with pytest.raises(search.IndexInUseError, match="abierto por otro proceso"):
+            search.write_search_index(conn, path, self._build_id())
+        conn.close()
+        assert list(tmp_path.iterdir()) == []
+
+
+# ============================================================
+# Tests del cache de resultados
+# ============================================================
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestQueryCache:
+    def test_hit_and_miss_counters(self):
+        cache = search.QueryCache(maxsize=4)
+        assert cache.get("a") is None
+        cache.put("a", [1])
+        assert cache.get("a") == [1]
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_lru_eviction(self):
+        cache = search.QueryCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")          # "b" pasa a ser el menos usado
+        cache.put("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.stats()["evictions"] == 1
+
+    def test_ttl_expiration(self):
+        clock = FakeClock()
+        cache = search.QueryCache(maxsize=2, ttl=10, clock=clock)
+        cache.put("a", 1)
+        clock.now = 5
+        assert cache.get("a") == 1
+        clock.now = 20
+        assert cache.get("a") is None
+        assert cache.stats()["expirations"] == 1
+
+
+class TestSearchResultCache:
+    @pytest.fixture(autouse=True)
+    def setup(self, db_path):
+        self.db_path = db_path
+        search.RESULT_CACHE.clear()
+        yield
+        search.RESULT_CACHE.clear()
+
+    def test_repeated_query_hits_cache(self):
+        first = search_situation("me piden el DNI", db_path=self.db_path)
+        second = search_situation("¿Me piden el dni?", db_path=self.db_path)
+        assert first == second
+        stats = search.cache_stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 1
+
+    def test_limit_is_part_of_key(self):
+        search_situation("me piden el DNI", db_path=self.db_path, limit=1)
+        search_situation("me piden el DNI", db_path=self.db_path, limit=3)
+        assert search.cache_stats()["misses"] == 2
+
+    def test_mutating_results_does_not_poison_cache(self):
+        results = search_situation("me piden el DNI", db_path=self.db_path)
+        results[0]["match_details"]["keywords"] = -1
+        results.clear()
+        again = search_situation("me piden el DNI", db_path=self.db_path)
+        assert again and again[0]["match_details"]["keywords"] != -1
+
+    def test_new_build_invalidates(self, tmp_path):
+        db_copy = tmp_path / "copy.db"
+        db_copy.write_bytes(self.db_path.read_bytes())
+        search_situation("me piden el DNI", db_path=db_copy)
+
+        conn = sqlite3.connect(str(db_copy))
+        conn.execute("UPDATE build_info SET value = 'nuevo_build' WHERE key = 'build_id'")
+        conn.commit()
+        conn.close()
+
+        search_situation("me piden el DNI", db_path=db_copy)
+        assert search.cache_stats()["misses"] == 2
+        assert search.cache_stats()["hits"] == 0
+
+    def test_use_cache_false_bypasses(self):
+        search_situation("me piden el DNI", db_path=self.db_path, use_cache=False)
+        assert search.cache_stats()["misses"] == 0
+
+
+class TestCachedByBuildId:
+    def test_concurrent_callers_load_once(self, db_path):
+        calls = []
+
+        def slow_loader(conn):
+            calls.append(search.read_build_id(conn))
+            time.sleep(0.05)
+            return object()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            search.cached_by_build_id(db_path, slow_loader))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(calls) == 1
+        assert len({id(r) for r in results}) == 1
+
+    def test_new_build_reloads(self, db_path, tmp_path):
+        db_copy = tmp_path / "copy.db"
+        db_copy.write_bytes(db_path.read_bytes())
+
+        def loader(conn):
+            return search.read_build_id(conn)
+
+        first = search.cached_by_build_id(db_copy, loader)
+        assert search.cached_by_build_id(db_copy, loader) == first
+        conn = sqlite3.connect(str(db_copy))
+        conn.execute("UPDATE build_info SET value = 'nuevo_build' WHERE key = 'build_id'")
+        conn.commit()
+        conn.close()
+        assert search.cached_by_build_id(db_copy, loader) == "nuevo_build"
@@ -0,0 +1,125 @@
+"""
+Tests del daemon de busqueda (socket Unix).
+Verifica que el cliente obtiene lo mismo que la busqueda en proceso y que
+cae a la busqueda local cuando no hay daemon.
+"""
+
+import json
+import socket
+import sys
+from contextlib import contextmanager
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+import search_daemon
+from search import get_situation_details, search_situation
+
+pytestmark = pytest.mark.skipif(not search_daemon.is_supported(),
+                                reason="Sin soporte de sockets Unix")
+
+
+@contextmanager
+def running(sock_path, service):
+    server = search_daemon.SearchDaemon(sock_path, service)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    try:
+        yield sock_path
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def daemon(db_path, tmp_path):
+    with running(tmp_path / "search.sock", search_daemon.SearchService(db_path)) as sock_path:
+        yield sock_path
+
+
+def raw_request(sock_path, line):
+    """Una linea cruda al daemon; devuelve la respuesta decodificada."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(5)
+    sock.connect(str(sock_path))
+    stream = sock.makefile("rwb")
+    stream.write(line)
+    stream.flush()
+    response = stream.readline()
+    sock.close()
+    return json.loads(response)
+
+
+class TestSearchDaemon:
+    def test_query_matches_in_process(self, daemon, db_path):
+        results, details = search_daemon.query("me piden el DNI", socket_path=daemon)
+        assert results == search_situation("me piden el DNI", db_path=db_path)
+        assert details == get_situation_details("police_id_check", db_path=db_path)
+
+    def test_details_request(self, daemon, db_path):
+        response = search_daemon.request({"situation_id": "cannabis_possession"}, daemon)
+        assert response["details"] == get_situation_details("cannabis_possession", db_path=db_path)
+
+    def test_query_with_card(self, daemon, db_path):
+        from cards import get_card
+        results, card = search_daemon.query("me piden el DNI", socket_path=daemon, card="ansi")
+        assert results[0]["situation_id"] == "police_id_check"
+        assert card == get_card("police_id_check", fmt="ansi", db_path=db_path)
+
+    def test_details_are_cached(self, daemon):
+        for _ in range(3):
+            search_daemon.request({"situation_id": "police_id_check"}, daemon)
+        status = search_daemon.request({"status": True}, daemon)["status"]
+        assert status["details_cache"]["hits"] >= 2
+
+    def test_status_reports_build_id(self, daemon):
+        status = search_daemon.request({"status": True}, daemon)["status"]
+        assert status["build_id"]
+        assert status["situations"] > 0
+
+    def test_invalid_request_returns_none(self, daemon):
+        assert search_daemon.request({"foo": 1}, daemon) is None
+
+    @pytest.mark.parametrize("line", [b"[1]\n", b"\"texto\"\n", b"{no es json\n"])
+    def test_malformed_request_gets_an_error_line(self, daemon, line):
+        assert "error" in raw_request(daemon, line)
+
+    def test_internal_error_gets_an_error_line(self, db_path, tmp_path):
+        service = search_daemon.SearchService(db_path)
+        service.db_path = tmp_path / "no_existe.db"
+        with running(tmp_path / "search.sock", service) as sock_path:
+            for line in (b'{"situation_id": "police_id_check"}\n', b'{"status": true}\n',
+                         b'{"situation_id": "police_id_check", "card": "ansi"}\n'):
+                assert raw_request(sock_path, line)["error"].startswith("Error interno")
+
+    def test_multiple_requests_on_one_connection(self, daemon):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(str(daemon))
+        stream = sock.makefile("rwb")
+        for _ in range(2):
+            stream.write(b'{"query": "me piden el DNI", "limit": 1}\n')
+            stream.flush()
+            assert b"police_id_check" in stream.readline()
+        sock.close()
+
+
+class TestClientFallback:
+    def test_no_socket_returns_none(self, tmp_path):
+        assert search_daemon.query("me piden el DNI", socket_path=tmp_path / "nada.sock") is None
+
+    def test_stale_socket_returns_none(self, tmp_path):
+        stale = tmp_path / "stale.sock"
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        s.bind(str(stale))
+        s.close()
+        assert search_daemon.query("me piden el DNI", socket_path=stale) is None
+
+    def test_stale_socket_is_reclaimed(self, tmp_path, db_path):
+        stale = tmp_path / "stale.sock"
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        s.bind(str(stale))
+        s.close()
+        server = search_daemon.SearchDaemon(stale, search_daemon.SearchService(db_path))
+        server.server_close()
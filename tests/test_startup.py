@@ -0,0 +1,32 @@
+"""
+Tests de arranque: importar search.py y cli.py no debe hacer trabajo ni
+cargar modulos pesados. El presupuesto en ms lo mide `make bench-startup`
+(bench_startup.py): un tiempo de reloj no es estable en un runner cargado.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+import bench_startup
+
+
+@pytest.mark.parametrize("module", sorted(bench_startup.FORBIDDEN_AT_IMPORT))
+def test_import_does_not_load_heavy_modules(module):
+    assert bench_startup.loaded_after_import(module) == []
+
+
+def test_import_does_not_rewrap_stdout():
+    """El arreglo de encoding de consola se hace en main(), no al importar."""
+    code = "import sys; out = sys.stdout; import cli, search; print(sys.stdout is out)"
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=bench_startup.SCRIPTS_DIR,
+        env=dict(os.environ, PYTHONIOENCODING="latin-1"),
+        capture_output=True, text=True, check=True,
+    )
+    assert proc.stdout.strip() == "True"
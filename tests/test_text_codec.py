@@ -0,0 +1,96 @@
+"""
+Tests de la compresion de full_text con diccionario compartido (text_codec.py).
+"""
+
+import shutil
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from db_profiles import build_mobile_db
+from search import fetch_full_text, text_decoder
+from text_codec import available_codecs, benchmark, compress_full_texts, train_zlib_dictionary, ZLIB_DICT_SIZE
+from unified_search import UnifiedIndex
+
+
+@pytest.fixture(scope="module")
+def plain_texts(db_path):
+    conn = sqlite3.connect(str(db_path))
+    texts = dict(conn.execute("SELECT id, full_text FROM legal_sources"))
+    conn.close()
+    return texts
+
+
+@pytest.fixture(params=available_codecs())
+def compressed_db(db_path, tmp_path, request):
+    path = tmp_path / "compressed.db"
+    shutil.copy(db_path, path)
+    conn = sqlite3.connect(str(path))
+    stats = compress_full_texts(conn, request.param)
+    conn.commit()
+    conn.close()
+    return path, stats
+
+
+class TestDictionary:
+    def test_zlib_dictionary_fits_window(self, plain_texts):
+        dictionary = train_zlib_dictionary(list(plain_texts.values()))
+        assert 0 < len(dictionary) <= ZLIB_DICT_SIZE
+
+    def test_shared_phrases_only(self):
+        texts = ["la autoridad policial debe identificarse ante el ciudadano " + word
+                 for word in ("uno", "dos", "tres")]
+        dictionary = train_zlib_dictionary(texts).decode("utf-8")
+        assert "la autoridad policial debe identificarse" in dictionary
+        assert "tres" not in dictionary
+
+
+class TestCompressedDb:
+    def test_texts_stored_as_blobs(self, compressed_db):
+        path, stats = compressed_db
+        conn = sqlite3.connect(str(path))
+        types = {row[0] for row in conn.execute("SELECT typeof(full_text) FROM legal_sources")}
+        dictionaries = conn.execute("SELECT COUNT(*) FROM text_dictionaries").fetchone()[0]
+        conn.close()
+        assert "blob" in types
+        assert dictionaries == 1
+        assert stats["stored_bytes"] < stats["raw_bytes"]
+
+    def test_roundtrip(self, compressed_db, plain_texts):
+        conn = sqlite3.connect(str(compressed_db[0]))
+        decode = text_decoder(conn)
+        decoded = {sid: decode(text) for sid, text in conn.execute("SELECT id, full_text FROM legal_sources")}
+        assert fetch_full_text(conn, "const_art2_inc24f") == plain_texts["const_art2_inc24f"]
+        conn.close()
+        assert decoded == plain_texts
+
+    def test_plain_db_passthrough(self, db_conn, plain_texts):
+        assert fetch_full_text(db_conn, "const_art2_inc24f") == plain_texts["const_art2_inc24f"]
+        assert fetch_full_text(db_conn, "no_existe") is None
+
+    def test_unified_index_reads_compressed_texts(self, compressed_db, db_path):
+        compressed = sqlite3.connect(str(compressed_db[0]))
+        plain = sqlite3.connect(str(db_path))
+        hits = [[(r["type"], r["id"]) for r in UnifiedIndex.from_db(conn).search("flagrancia detenido")]
+                for conn in (compressed, plain)]
+        compressed.close()
+        plain.close()
+        assert hits[0] == hits[1]
+
+    def test_mobile_texts_stay_plain(self, compressed_db, plain_texts, tmp_path):
+        _, texts_path = build_mobile_db(compressed_db[0], tmp_path / "mobile")
+        conn = sqlite3.connect(str(texts_path))
+        texts = dict(conn.execute("SELECT source_id, full_text FROM legal_texts"))
+        conn.close()
+        assert texts == plain_texts
+
+
+def test_benchmark_reports_each_variant(db_conn):
+    results = benchmark(db_conn, runs=1)
+    variants = [r["variant"] for r in results]
+    assert variants[:2] == ["plano", "zlib por fila"]
+    assert "zlib + diccionario" in variants
+    assert all(r["decode_us"] >= 0 for r in results)
@@ -0,0 +1,90 @@
+"""
+Tests de las trazas del build (tracing.py).
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+import tracing
+from tracing import NULL_SPAN, finish_tracing, span, start_tracing
+
+
+@pytest.fixture
+def tracer():
+    tracer = start_tracing("test")
+    yield tracer
+    finish_tracing(print_summary=False)
+
+
+class TestDisabled:
+    def test_span_is_shared_noop(self):
+        assert not tracing.tracing_enabled()
+        with span("etapa", file="x.json") as s:
+            s.add(rows=10)
+        assert span("otra") is NULL_SPAN
+
+    def test_finish_without_start(self):
+        assert finish_tracing() is None
+
+
+class TestSpans:
+    def test_nested_spans_and_counters(self, tracer):
+        with span("build"):
+            with span("sources") as s:
+                s.add(rows=40, bytes=1000)
+                s.add(rows=3)
+            with span("rights") as s:
+                s.add(rows=20)
+        paths = [path for path, _, _ in tracer.spans]
+        assert paths == ["build/sources", "build/rights", "build"]
+        assert tracer.spans[0][2] == {"rows": 43, "bytes": 1000}
+
+    def test_chrome_trace_format(self, tracer):
+        with span("build", country="PE"):
+            with span("schema"):
+                pass
+        events = tracer.chrome_trace()["traceEvents"]
+        assert [e["name"] for e in events] == ["build", "schema"]
+        parent, child = events
+        assert all(e["ph"] == "X" and e["cat"] == "test" for e in events)
+        assert parent["ts"] <= child["ts"]
+        assert child["ts"] + child["dur"] <= parent["ts"] + parent["dur"]
+        assert parent["args"] == {"country": "PE"}
+
+    def test_summary_in_start_order_with_totals(self, tracer):
+        with span("pages"):
+            for size in (100, 250):
+                with span("page") as s:
+                    s.add(bytes=size)
+        lines = tracer.summary().splitlines()
+        assert lines[1].split()[0] == "pages"
+        assert lines[2].split()[:2] == ["page", "2"]
+        assert lines[2].split()[-1] == "350"
+
+    def test_span_closes_on_error(self, tracer):
+        with pytest.raises(ValueError):
+            with span("falla"):
+                raise ValueError
+        with span("despues"):
+            pass
+        assert [path for path, _, _ in tracer.spans] == ["falla", "despues"]
+
+
+def test_build_writes_trace(tmp_path):
+    out = tmp_path / "trace.json"
+    result = subprocess.run(
+        [sys.executable, str(PROJECT_ROOT / "scripts" / "build_db.py"), "--country", "PE", "--trace", str(out)],
+        capture_output=True, text=True, encoding="utf-8", errors="replace",
+    )
+    assert result.returncode == 0, result.stderr
+    events = {e["name"]: e for e in json.loads(out.read_text(encoding="utf-8"))["traceEvents"]}
+    assert {"build_country", "schema", "sources", "cards", "commit", "vacuum_into"} <= set(events)
+    assert events["sources"]["args"]["rows"] > 0
+    assert events["sources"]["args"]["bytes"] > 0
+    assert "--- Trazas" in result.stdout
@@ -0,0 +1,84 @@
+"""
+Tests de la busqueda unificada.
+Verifica que un solo indice responde con situaciones, derechos, mitos y fuentes.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from unified_search import UnifiedIndex, index_terms, unified_search, DEFAULT_QUOTAS
+
+
+class TestIndexTerms:
+    def test_removes_stopwords(self):
+        assert "la" not in index_terms("grabar a la policía")
+
+    def test_normalizes_and_stems(self):
+        terms = index_terms("Grabación")
+        assert "grabacion" in terms
+        assert "~graba" in terms
+
+    def test_splits_keyword_separators(self):
+        terms = index_terms("dni,documento|papeles")
+        assert {"dni", "documento", "papeles"} <= set(terms)
+
+
+class TestUnifiedIndex:
+    def _index(self):
+        index = UnifiedIndex()
+        index.add("situation", "s1", ("Me piden el DNI", "dni documento"), (3.0, 1.0))
+        index.add("myth", "m1", ("No puedes grabar", "grabar es legal"), (3.0, 1.0))
+        index.add("myth", "m2", ("Grabar siempre es delito", "grabar"), (3.0, 1.0))
+        index.add("right", "r1", ("Puedes grabar", "grabar la intervencion"), (3.0, 1.0))
+        return index
+
+    def test_results_are_type_tagged(self):
+        results = self._index().search("grabar")
+        assert {r["type"] for r in results} == {"myth", "right"}
+
+    def test_per_type_quota(self):
+        results = self._index().search("grabar", quotas={"myth": 1, "right": 1})
+        assert [r["type"] for r in results].count("myth") == 1
+
+    def test_missing_type_in_quotas_is_excluded(self):
+        results = self._index().search("grabar", quotas={"right": 5})
+        assert [r["id"] for r in results] == ["r1"]
+
+    def test_limit(self):
+        assert len(self._index().search("grabar", limit=1)) == 1
+
+    def test_sorted_by_score(self):
+        scores = [r["score"] for r in self._index().search("grabar")]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_empty_query(self):
+        assert self._index().search("") == []
+        assert self._index().search("la de el") == []
+
+
+class TestUnifiedSearchDB:
+    @pytest.fixture(autouse=True)
+    def setup(self, db_path):
+        self.db_path = db_path
+
+    def _ids(self, query, **kwargs):
+        return [(r["type"], r["id"]) for r in unified_search(query, db_path=self.db_path, **kwargs)]
+
+    def test_recording_query_finds_myth_and_right(self):
+        results = self._ids("¿es legal grabar a la policía?")
+        assert ("myth", "myth_recording_illegal") in results
+        assert ("situation", "recording_police") in results
+        assert any(t == "right" for t, _ in results)
+
+    def test_grams_query_finds_source_and_myth(self):
+        results = self._ids("cuántos gramos puedo llevar")
+        assert ("source", "cp_art299") in results
+        assert ("myth", "myth_cannabis_always_illegal") in results
+
+    def test_default_quotas_respected(self):
+        results = unified_search("policía derechos intervención", db_path=self.db_path, limit=50)
+        for entity_type, quota in DEFAULT_QUOTAS.items():
+            assert sum(1 for r in results if r["type"] == entity_type) <= quota
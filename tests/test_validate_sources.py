@@ -0,0 +1,182 @@
+"""
+Tests del validador de datos (validate_sources.py): indices primero,
+referencias cruzadas despues, sin depender del orden de carga.
+"""
+
+import json
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from validate_sources import Validator, find_parent_cycles
+
+
+@pytest.fixture
+def country(data_dir, tmp_path):
+    """Copia de data/PE para modificar."""
+    shutil.copytree(data_dir, tmp_path / "PE")
+    return tmp_path
+
+
+def edit(path, change):
+    data = json.loads(path.read_text(encoding="utf-8"))
+    change(data)
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def validate(root):
+    validator = Validator("PE", root, root / "validation")
+    validator.collect()
+    validator.validate_references()
+    return validator
+
+
+def situation_files(root):
+    return sorted((root / "PE" / "situations").glob("*.json"))
+
+
+class TestRepoData:
+    def test_full_run_is_clean(self, capsys):
+        validator = Validator("PE")
+        assert validator.run()
+        assert validator.warnings == []
+        assert validator.stats["references"] > 0
+        assert "Build exitoso" in capsys.readouterr().out
+
+
+class TestReferences:
+    def test_parent_defined_later_is_not_reported(self, country):
+        files = situation_files(country)
+        last_id = json.loads(files[-1].read_text(encoding="utf-8"))[-1]["id"]
+        edit(files[0], lambda sits: sits[0].update(parent_situation_id=last_id))
+        validator = validate(country)
+        assert validator.errors == [] and validator.warnings == []
+
+    def test_all_broken_references_in_one_run(self, country):
+        pe = country / "PE"
+        edit(pe / "contexts" / "contexts.json", lambda ctxs: ctxs[0].update(source_id="no_ctx"))
+        edit(pe / "rights" / "rights.json", lambda rights: rights[0]["source_ids"].append("no_right"))
+        edit(pe / "myths" / "myths.json", lambda myths: myths[0]["related_source_ids"].append("no_myth"))
+
+        def break_situation(sits):
+            sits[0]["contacts"].append("no_contact")
+            sits[0]["parent_situation_id"] = "no_parent"
+            sits[0]["time_limits"].append({"id": "limit_x", "source_id": "no_limit"})
+        edit(situation_files(country)[0], break_situation)
+
+        validator = validate(country)
+        missing = {error.rsplit(": ", 1)[-1] for error in validator.errors}
+        assert missing == {"no_ctx", "no_right", "no_contact", "no_parent", "no_limit"}
+        assert [w.rsplit(": ", 1)[-1] for w in validator.warnings] == ["no_myth"]
+
+    def test_duplicate_ids(self, country):
+        edit(country / "PE" / "actions" / "actions.json", lambda actions: actions.append(dict(actions[0])))
+        validator = validate(country)
+        assert len(validator.errors) == 1 and "ID DUPLICADO" in validator.errors[0]
+
+    def test_parent_cycle_is_an_error(self, country):
+        files = situation_files(country)
+        first = json.loads(files[0].read_text(encoding="utf-8"))[0]["id"]
+        second = json.loads(files[-1].read_text(encoding="utf-8"))[-1]["id"]
+        edit(files[0], lambda sits: sits[0].update(parent_situation_id=second))
+        edit(files[-1], lambda sits: sits[-1].update(parent_situation_id=first))
+        validator = validate(country)
+        assert len(validator.errors) == 1 and "ciclo" in validator.errors[0]
+
+
+class TestParentCycles:
+    def test_chains_without_cycles(self):
+        assert find_parent_cycles({"b": "a", "c": "b", "d": "fuera"}) == []
+
+    def test_each_cycle_reported_once(self):
+        parents = {"c": "a", "a": "b", "b": "c", "x": "x", "tail": "a"}
+        assert find_parent_cycles(parents) == [["a", "b", "c"], ["x"]]
+
+    def test_long_chain_is_linear(self):
+        parents = {f"s{i}": f"s{i + 1}" for i in range(50000)}
+        parents["s50000"] = "s0"
+        [cycle] = find_parent_cycles(parents)
+        assert len(cycle) == 50001
+
+
+def git(repo, *args):
+    subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                   cwd=repo, check=True, capture_output=True)
+
+
+def run_validator(root, index_dir, changed_since=None):
+    validator = Validator("PE", root, index_dir)
+    validator.run(changed_since)
+    return validator
+
+
+def result(validator):
+    """Lo comparable entre modos: --changed-since no corre el build."""
+    def without_build(messages):
+        return sorted(m for m in messages if not m.startswith("Build"))
+    return without_build(validator.errors), without_build(validator.warnings), dict(validator.stats)
+
+
+@pytest.fixture
+def repo(country):
+    """data/PE en un repo de git propio, ya validado una vez (indice guardado)."""
+    git(country, "init", "-q")
+    git(country, "add", ".")
+    git(country, "commit", "-qm", "base")
+    run_validator(country, country / "index")
+    return country
+
+
+class TestChangedSince:
+    def full_result(self, repo):
+        return result(run_validator(repo, repo / "index_completo"))
+
+    def test_nothing_changed_reads_nothing(self, repo):
+        validator = run_validator(repo, repo / "index", "HEAD")
+        assert validator.scanned == []
+        assert result(validator) == self.full_result(repo)
+
+    def test_matches_full_validation(self, repo):
+        pe = repo / "PE"
+        sources_file = sorted((pe / "sources").glob("*.json"))[0]
+        removed = json.loads(sources_file.read_text(encoding="utf-8"))[0]["id"]
+        edit(sources_file, lambda sources: sources.pop(0))
+        edit(pe / "actions" / "actions.json", lambda actions: actions.append(dict(actions[0])))
+        edit(pe / "contacts" / "emergency_contacts.json", lambda contacts: contacts[0].pop("institution"))
+        (pe / "sources" / "nueva.json").write_text(json.dumps([{"id": "sin_campos"}]), encoding="utf-8")
+
+        validator = run_validator(repo, repo / "index", "HEAD")
+        assert len(validator.scanned) == 4
+        assert any(removed in error for error in validator.errors)
+        assert validator.affected
+        assert result(validator) == self.full_result(repo)
+
+    def test_fixing_a_reference_clears_the_error(self, repo):
+        pe = repo / "PE"
+        edit(pe / "myths" / "myths.json", lambda myths: myths[0]["related_source_ids"].append("fuente_nueva"))
+        git(repo, "commit", "-qam", "mito cita una fuente que falta")
+        assert len(run_validator(repo, repo / "index", "HEAD~1").warnings) == 1
+
+        (pe / "sources" / "nueva.json").write_text(json.dumps([{
+            "id": "fuente_nueva", "source_type": "ley", "name": "Ley", "full_text": "Texto",
+            "summary": "Resumen", "status": "vigente",
+        }]), encoding="utf-8")
+        validator = run_validator(repo, repo / "index", "HEAD")
+        assert validator.scanned == ["sources/nueva.json"]
+        assert result(validator) == self.full_result(repo) and validator.warnings == []
+
+    def test_stale_index_rereads_mismatched_files(self, repo):
+        edit(repo / "PE" / "rights" / "rights.json", lambda rights: rights[0].update(category="otra"))
+        git(repo, "commit", "-qam", "cambio que el indice no vio")
+        validator = run_validator(repo, repo / "index", "HEAD")
+        assert validator.scanned == ["rights/rights.json"]
+        assert result(validator) == self.full_result(repo)
+
+    def test_without_index_validates_everything(self, repo):
+        validator = run_validator(repo, repo / "otro_index", "HEAD")
+        assert len(validator.scanned) == len(validator.files)
+        assert result(validator) == self.full_result(repo)